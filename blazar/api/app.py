@@ -13,10 +13,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from oslo_config import cfg
 from oslo_serialization import jsonutils
+import prometheus_client
 
 from blazar.api.v1 import app as v1_app
 from blazar.api.v2 import app as v2_app
+from blazar import metrics
+
+CONF = cfg.CONF
 
 
 class VersionSelectorApplication(object):
@@ -47,6 +52,11 @@ class VersionSelectorApplication(object):
         self._status = ''
         self._response_headers = []
 
+        if environ['PATH_INFO'] == '/metrics' and CONF.metrics.api_enabled:
+            start_response('200 OK', [
+                ('Content-Type', prometheus_client.CONTENT_TYPE_LATEST)])
+            return [metrics.api_metrics()]
+
         if environ['PATH_INFO'] == '/' or environ['PATH_INFO'] == '/versions':
             versions = {'versions': []}
             tmp_versions = self._append_versions_from_app(versions, self.v1,
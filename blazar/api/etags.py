@@ -0,0 +1,58 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Conditional GET support for collections.
+
+A collection is versioned by the number of rows it is built from and the
+latest time one of these rows was created or updated, as returned by e.g.
+db_api.lease_list_version(). Deleting a row changes the count, and any
+other change moves the time forward.
+"""
+
+import datetime
+
+from oslo_utils import timeutils
+
+# NOTE: Timestamps have a one second resolution in MySQL, so a change made
+# during the same second as the latest one does not change the version. No
+# ETag is given out until that second is over, with some leeway for the
+# clock difference between the API and manager hosts.
+SETTLE_TIME = datetime.timedelta(seconds=2)
+
+
+def last_modified(version):
+    """Return the latest change of a version, as a naive UTC datetime."""
+    updated_at = version['updated_at']
+    if isinstance(updated_at, str):
+        updated_at = timeutils.normalize_time(
+            timeutils.parse_isotime(updated_at))
+    return updated_at
+
+
+def etag(version):
+    """Return the ETag of a version, or None if it may still change."""
+    updated_at = last_modified(version)
+    if updated_at is None:
+        return '%d' % version['count']
+    if timeutils.utcnow() - updated_at < SETTLE_TIME:
+        return None
+    return '%d-%s' % (version['count'], updated_at.strftime('%Y%m%d%H%M%S%f'))
+
+
+def is_fresh(request, etag):
+    """Whether the client sending request already has the ETag version.
+
+    Only If-None-Match is considered: Last-Modified does not move when rows
+    are deleted, so If-Modified-Since cannot tell if a collection changed.
+    """
+    return etag is not None and etag in request.if_none_match
@@ -13,19 +13,29 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from oslo_config import cfg
+
+from blazar.manager.floatingips import reader as manager_reader
 from blazar.manager.floatingips import rpcapi as manager_rpcapi
 from blazar import policy
 from blazar.utils import trusts
 
+CONF = cfg.CONF
+CONF.import_opt('api_db_reads', 'blazar.config')
+
 
 class API(object):
     def __init__(self):
         self.manager_rpcapi = manager_rpcapi.ManagerRPCAPI()
+        if CONF.api_db_reads:
+            self.manager_reader = manager_reader.ManagerDBReader()
+        else:
+            self.manager_reader = self.manager_rpcapi
 
     @policy.authorize('floatingips', 'get')
     def get_floatingips(self):
         """List all existing floatingip."""
-        return self.manager_rpcapi.list_floatingips()
+        return self.manager_reader.list_floatingips()
 
     @policy.authorize('floatingips', 'post')
     @trusts.use_trust_auth()
@@ -45,7 +55,7 @@ class API(object):
         :param floatingip_id: ID of the floatingip in Blazar DB.
         :type floatingip_id: str
         """
-        return self.manager_rpcapi.get_floatingip(floatingip_id)
+        return self.manager_reader.get_floatingip(floatingip_id)
 
     @policy.authorize('floatingips', 'delete')
     def delete_floatingip(self, floatingip_id):
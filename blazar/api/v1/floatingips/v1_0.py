@@ -15,7 +15,6 @@
 
 from blazar.api.v1.floatingips import service
 from blazar.api.v1 import utils as api_utils
-from blazar.api.v1 import validation
 from blazar import utils
 
 
@@ -34,7 +33,7 @@ _api = utils.LazyProxy(service.API)
 @rest.get('')
 def floatingips_list(req):
     """List all existing floatingips."""
-    return api_utils.render(floatingips=_api.get_floatingips())
+    return api_utils.render_stream('floatingips', _api.get_floatingips())
 
 
 @rest.post('')
@@ -44,14 +43,12 @@ def floatingips_create(req, data):
 
 
 @rest.get('/<floatingip_id>')
-@validation.check_exists(_api.get_floatingip, floatingip_id='floatingip_id')
 def floatingips_get(req, floatingip_id):
     """Get floatingip by its ID."""
     return api_utils.render(floatingip=_api.get_floatingip(floatingip_id))
 
 
 @rest.delete('/<floatingip_id>')
-@validation.check_exists(_api.get_floatingip, floatingip_id='floatingip_id')
 def floatingips_delete(req, floatingip_id):
     """Delete specified floatingip."""
     _api.delete_floatingip(floatingip_id)
@@ -0,0 +1,156 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Long polling of lease changes.
+
+All the requests of an API process waiting for lease changes share a single
+poller, which fetches the new changes once per poll interval and wakes the
+requests up. Any number of waiting requests thus costs one range query on
+the lease changes per interval. The poller only runs while requests wait.
+"""
+
+import collections
+import threading
+import time
+
+from oslo_config import cfg
+from oslo_log import log as logging
+
+from blazar.utils import service as service_utils
+from blazar.utils import timing
+
+CONF = cfg.CONF
+CONF.import_opt('lease_changes_poll_interval', 'blazar.config')
+LOG = logging.getLogger(__name__)
+
+# Maximum number of changes fetched at once.
+CHANGES_LIMIT = 1000
+
+# Number of the latest changes kept in memory for the waiting requests.
+BUFFER_SIZE = 10000
+
+
+def _visible(changes, project_id):
+    if project_id is None:
+        return list(changes)
+    return [change for change in changes
+            if change['project_id'] == project_id]
+
+
+class ChangeFeed(object):
+    """The changes of leases, shared by the requests waiting for them.
+
+    :param reader: object with the list_lease_changes() and
+                   get_latest_lease_change_id() methods of the manager RPC
+                   API, used to get the changes.
+    """
+
+    def __init__(self, reader):
+        self.reader = reader
+        self._cond = threading.Condition()
+        # The changes following the one with ID _start_id, up to the one
+        # with ID _latest_id, while the poller runs.
+        self._changes = collections.deque()
+        self._start_id = None
+        self._latest_id = None
+        self._waiters = 0
+        self._polling = False
+
+    def latest_id(self):
+        """Return the ID of the latest change."""
+        return self.reader.get_latest_lease_change_id()
+
+    def wait(self, since, timeout, project_id=None):
+        """Return the changes following the change with ID since.
+
+        If there are none, wait for up to timeout seconds for some.
+
+        :param project_id: if set, only return the changes of the leases
+                           of this project.
+        :return: a tuple of the changes, and of the ID of the change to
+                 continue from.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._waiters += 1
+            try:
+                self._start_polling()
+                while self._start_id is None or since >= self._start_id:
+                    if self._latest_id is not None and \
+                            self._latest_id > since:
+                        changes = _visible(
+                            [change for change in self._changes
+                             if change['id'] > since], project_id)
+                        since = self._latest_id
+                        if changes:
+                            return changes, since
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return [], since
+                    with timing.waiting():
+                        self._cond.wait(remaining)
+            finally:
+                self._waiters -= 1
+
+        # NOTE: The changes following since are not in memory anymore, or
+        # were made before the poller started.
+        changes = self.reader.list_lease_changes(since, limit=CHANGES_LIMIT)
+        if changes:
+            since = changes[-1]['id']
+        return _visible(changes, project_id), since
+
+    def _start_polling(self):
+        if not self._polling:
+            self._polling = True
+            threading.Thread(target=self._poll, daemon=True).start()
+
+    def _reset(self):
+        self._changes.clear()
+        self._start_id = self._latest_id = None
+        self._polling = False
+        self._cond.notify_all()
+
+    @service_utils.with_empty_context
+    def _poll(self):
+        try:
+            latest_id = self.latest_id()
+            with self._cond:
+                self._start_id = self._latest_id = latest_id
+                self._cond.notify_all()
+
+            while True:
+                with self._cond:
+                    if not self._waiters:
+                        self._reset()
+                        return
+                    since = self._latest_id
+
+                changes = self.reader.list_lease_changes(
+                    since, limit=CHANGES_LIMIT)
+                if changes:
+                    self._add(changes)
+                if len(changes) < CHANGES_LIMIT:
+                    time.sleep(CONF.lease_changes_poll_interval)
+        except Exception:
+            LOG.exception('Failed to poll lease changes.')
+            with self._cond:
+                self._reset()
+
+    def _add(self, changes):
+        with self._cond:
+            self._changes.extend(changes)
+            while len(self._changes) > BUFFER_SIZE:
+                self._start_id = self._changes.popleft()['id']
+            self._latest_id = changes[-1]['id']
+            self._cond.notify_all()
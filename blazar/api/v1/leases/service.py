@@ -13,13 +13,19 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from oslo_config import cfg
 from oslo_log import log as logging
 
+from blazar.api.v1.leases import changes
 from blazar import context
+from blazar import exceptions
+from blazar.manager.leases import reader as manager_reader
 from blazar.manager.leases import rpcapi as manager_rpcapi
 from blazar import policy
 from blazar.utils import trusts
 
+CONF = cfg.CONF
+CONF.import_opt('api_db_reads', 'blazar.config')
 LOG = logging.getLogger(__name__)
 
 
@@ -27,19 +33,49 @@ class API(object):
 
     def __init__(self):
         self.manager_rpcapi = manager_rpcapi.ManagerRPCAPI()
+        if CONF.api_db_reads:
+            self.manager_reader = manager_reader.ManagerDBReader()
+        else:
+            self.manager_reader = self.manager_rpcapi
+        self.change_feed = changes.ChangeFeed(self.manager_reader)
 
     # Leases operations
 
-    @policy.authorize('leases', 'get')
-    def get_leases(self, query):
-        """List all existing leases."""
+    def _listed_project_id(self):
         ctx = context.current()
         if policy.enforce(ctx, 'admin', {}, do_raise=False):
-            project_id = None
-        else:
-            project_id = ctx.project_id
-        return self.manager_rpcapi.list_leases(project_id=project_id,
-                                               query=query)
+            return None
+        return ctx.project_id
+
+    @policy.authorize('leases', 'get')
+    def get_leases(self, query, fields=None):
+        """List all existing leases."""
+        return self.manager_reader.list_leases(
+            project_id=self._listed_project_id(), query=query, fields=fields)
+
+    @policy.authorize('leases', 'get')
+    def get_leases_version(self):
+        """Get the version of the lease list returned by get_leases."""
+        return self.manager_reader.get_leases_version(
+            project_id=self._listed_project_id())
+
+    @policy.authorize('leases', 'get')
+    def get_lease_changes(self, since=None, wait=0):
+        """Get the changes of leases following the change with ID since.
+
+        :param since: ID of the last change known by the caller. If None,
+                      no change is returned, only the ID of the latest one.
+        :type since: int
+        :param wait: time in seconds to wait for changes if there are none,
+                     at most lease_changes_max_wait.
+        :type wait: int
+        :return: the changes and the ID of the change to continue from.
+        """
+        if since is None:
+            return [], self.change_feed.latest_id()
+        wait = min(wait, CONF.lease_changes_max_wait)
+        return self.change_feed.wait(since, wait,
+                                     project_id=self._listed_project_id())
 
     @policy.authorize('leases', 'post')
     @trusts.use_trust_auth()
@@ -56,14 +92,50 @@ class API(object):
         data['user_id'] = ctx.user_id
         return self.manager_rpcapi.create_lease(data)
 
+    @policy.authorize('leases', 'post')
+    @trusts.use_trust_auth()
+    def create_lease_async(self, data):
+        """Create new lease without waiting for its resources.
+
+        The lease is returned in CREATING status. Its status changes to
+        PENDING once its resources are created.
+
+        :param data: New lease characteristics.
+        :type data: dict
+        """
+        ctx = context.current()
+        data['user_id'] = ctx.user_id
+        return self.manager_rpcapi.create_lease(data, wait=False)
+
+    @policy.authorize('leases', 'post')
+    @trusts.use_trust_auth()
+    def create_leases(self, data):
+        """Create several leases sharing the same trust.
+
+        :param data: New leases characteristics, under the 'leases' key, and
+                     whether the batch is atomic, under the 'atomic' key.
+        :type data: dict
+        """
+        ctx = context.current()
+        for lease in data['leases']:
+            lease['user_id'] = ctx.user_id
+        return self.manager_rpcapi.create_leases(data['leases'],
+                                                 data['trust_id'],
+                                                 atomic=data['atomic'])
+
     @policy.authorize('leases', 'get')
-    def get_lease(self, lease_id):
+    def get_lease(self, lease_id, fields=None):
         """Get lease by its ID.
 
         :param lease_id: ID of the lease in Blazar DB.
         :type lease_id: str
+        :param fields: names of the only fields to return, or None for all.
+        :type fields: list
         """
-        return self.manager_rpcapi.get_lease(lease_id)
+        lease = self.manager_reader.get_lease(lease_id, fields=fields)
+        if lease is None:
+            raise exceptions.NotFound(object={'lease_id': lease_id})
+        return lease
 
     @policy.authorize('leases', 'put')
     def update_lease(self, lease_id, data):
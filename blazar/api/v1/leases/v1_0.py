@@ -13,13 +13,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from oslo_config import cfg
 from oslo_log import log as logging
 
 from blazar.api.v1.leases import service
 from blazar.api.v1 import utils as api_utils
-from blazar.api.v1 import validation
+from blazar import exceptions
 from blazar import utils
 
+CONF = cfg.CONF
 LOG = logging.getLogger(__name__)
 
 
@@ -37,31 +39,87 @@ _api = utils.LazyProxy(service.API)
 @rest.get('/leases', query=True)
 def leases_list(req, query):
     """List all existing leases."""
-    return api_utils.render(leases=_api.get_leases(query))
+    fields = api_utils.get_fields(query)
+    return api_utils.render_versioned(
+        _api.get_leases_version(), 'leases',
+        lambda: _api.get_leases(query, fields=fields))
 
 
 @rest.post('/leases')
 def leases_create(req, data):
-    """Create new lease."""
+    """Create new lease.
+
+    With the "Prefer: respond-async" header, the lease is returned in
+    CREATING status with 202 Accepted, before its resources are created.
+    """
+    if api_utils.prefers_async(req):
+        resp = api_utils.render(lease=_api.create_lease_async(data),
+                                status=202)
+        resp.headers['Preference-Applied'] = api_utils.RESPOND_ASYNC
+        return resp
     return api_utils.render(lease=_api.create_lease(data))
 
 
-@rest.get('/leases/<lease_id>')
-@validation.check_exists(_api.get_lease, lease_id='lease_id')
-def leases_get(req, lease_id):
+@rest.post('/leases:batch', status_code=200)
+def leases_create_batch(req, data):
+    """Create several leases at once."""
+    leases = data.get('leases')
+    if not leases or not isinstance(leases, list):
+        raise exceptions.InvalidInput('A non-empty list of leases is required')
+    if len(leases) > CONF.max_batch_leases:
+        raise exceptions.InvalidInput(
+            'At most %d leases can be created at once'
+            % CONF.max_batch_leases)
+    atomic = data.get('atomic', True)
+    if not isinstance(atomic, bool):
+        raise exceptions.InvalidInput('atomic must be a boolean')
+
+    results = _api.create_leases({'leases': leases, 'atomic': atomic})
+    return api_utils.render(leases=results)
+
+
+def _non_negative_int(query, name, default=None):
+    value = query.get(name)
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        value = -1
+    if value < 0:
+        raise exceptions.InvalidInput(
+            '%s must be a non-negative integer' % name)
+    return value
+
+
+@rest.get('/leases/changes', query=True)
+def leases_changes(req, query):
+    """Get the changes of leases following a given change.
+
+    Without the since parameter, only return the ID of the latest change,
+    to start following the changes from. With the wait parameter, wait for
+    up to this number of seconds for changes if there are none yet.
+    """
+    since = _non_negative_int(query, 'since')
+    wait = _non_negative_int(query, 'wait', default=0)
+    changes, next_since = _api.get_lease_changes(since=since, wait=wait)
+    return api_utils.render(changes=changes, next_since=next_since)
+
+
+@rest.get('/leases/<lease_id>', query=True)
+def leases_get(req, lease_id, query=None):
     """Get lease by its ID."""
-    return api_utils.render(lease=_api.get_lease(lease_id))
+    fields = api_utils.get_fields(query)
+    return api_utils.render(lease=_api.get_lease(lease_id, fields=fields))
 
 
 @rest.put('/leases/<lease_id>')
-@validation.check_exists(_api.get_lease, lease_id='lease_id')
 def leases_update(req, lease_id, data):
     """Update lease."""
     return api_utils.render(lease=_api.update_lease(lease_id, data))
 
 
 @rest.delete('/leases/<lease_id>')
-@validation.check_exists(_api.get_lease, lease_id='lease_id')
 def leases_delete(req, lease_id):
     """Delete specified lease."""
     _api.delete_lease(lease_id)
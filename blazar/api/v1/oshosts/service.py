@@ -13,19 +13,36 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from oslo_config import cfg
+
+from blazar import exceptions
+from blazar.manager.oshosts import reader as manager_reader
 from blazar.manager.oshosts import rpcapi as manager_rpcapi
 from blazar import policy
 from blazar.utils import trusts
 
+CONF = cfg.CONF
+CONF.import_opt('api_db_reads', 'blazar.config')
+
 
 class API(object):
     def __init__(self):
         self.manager_rpcapi = manager_rpcapi.ManagerRPCAPI()
+        if CONF.api_db_reads:
+            self.manager_reader = manager_reader.ManagerDBReader()
+        else:
+            self.manager_reader = self.manager_rpcapi
 
     @policy.authorize('oshosts', 'get')
-    def get_computehosts(self, query):
+    def get_computehosts(self, query, fields=None):
         """List all existing computehosts."""
-        return self.manager_rpcapi.list_computehosts(query=query)
+        return self.manager_reader.list_computehosts(query=query,
+                                                     fields=fields)
+
+    @policy.authorize('oshosts', 'get')
+    def get_computehosts_version(self):
+        """Get the version of the computehost list."""
+        return self.manager_reader.get_computehosts_version()
 
     @policy.authorize('oshosts', 'post')
     @trusts.use_trust_auth()
@@ -39,13 +56,18 @@ class API(object):
         return self.manager_rpcapi.create_computehost(data)
 
     @policy.authorize('oshosts', 'get')
-    def get_computehost(self, host_id):
+    def get_computehost(self, host_id, fields=None):
         """Get computehost by its ID.
 
         :param host_id: ID of the computehost in Blazar DB.
         :type host_id: str
+        :param fields: names of the only fields to return, or None for all.
+        :type fields: list
         """
-        return self.manager_rpcapi.get_computehost(host_id)
+        host = self.manager_reader.get_computehost(host_id, fields=fields)
+        if host is None:
+            raise exceptions.NotFound(object={'host_id': host_id})
+        return host
 
     @policy.authorize('oshosts', 'put')
     def update_computehost(self, host_id, data):
@@ -74,7 +96,12 @@ class API(object):
         :param query: parameters to query allocations
         :type query: dict
         """
-        return self.manager_rpcapi.list_allocations(query)
+        return self.manager_reader.list_allocations(query)
+
+    @policy.authorize('oshosts', 'get_allocations')
+    def get_allocations_version(self):
+        """Get the version of the allocation list."""
+        return self.manager_reader.get_allocations_version()
 
     @policy.authorize('oshosts', 'get_allocations')
     def get_allocations(self, host_id, query):
@@ -85,12 +112,12 @@ class API(object):
         :param query: parameters to query allocations
         :type query: dict
         """
-        return self.manager_rpcapi.get_allocations(host_id, query)
+        return self.manager_reader.get_allocations(host_id, query)
 
     @policy.authorize('oshosts', 'get_resource_properties')
     def list_resource_properties(self, query):
         """List resource properties for hosts."""
-        return self.manager_rpcapi.list_resource_properties(query)
+        return self.manager_reader.list_resource_properties(query)
 
     @policy.authorize('oshosts', 'update_resource_properties')
     def update_resource_property(self, property_name, data):
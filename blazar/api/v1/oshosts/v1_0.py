@@ -15,7 +15,6 @@
 
 from blazar.api.v1.oshosts import service
 from blazar.api.v1 import utils as api_utils
-from blazar.api.v1 import validation
 from blazar import utils
 
 
@@ -33,7 +32,10 @@ _api = utils.LazyProxy(service.API)
 @rest.get('', query=True)
 def computehosts_list(req, query=None):
     """List all existing computehosts."""
-    return api_utils.render(hosts=_api.get_computehosts(query))
+    fields = api_utils.get_fields(query)
+    return api_utils.render_versioned(
+        _api.get_computehosts_version(), 'hosts',
+        lambda: _api.get_computehosts(query, fields=fields))
 
 
 @rest.post('')
@@ -42,15 +44,15 @@ def computehosts_create(req, data):
     return api_utils.render(host=_api.create_computehost(data))
 
 
-@rest.get('/<host_id>')
-@validation.check_exists(_api.get_computehost, host_id='host_id')
-def computehosts_get(req, host_id):
+@rest.get('/<host_id>', query=True)
+def computehosts_get(req, host_id, query=None):
     """Get computehost by its ID."""
-    return api_utils.render(host=_api.get_computehost(host_id))
+    fields = api_utils.get_fields(query)
+    return api_utils.render(host=_api.get_computehost(host_id,
+                                                      fields=fields))
 
 
 @rest.put('/<host_id>')
-@validation.check_exists(_api.get_computehost, host_id='host_id')
 def computehosts_update(req, host_id, data):
     """Update computehost. Only name changing may be proceeded."""
     if len(data) == 0:
@@ -61,7 +63,6 @@ def computehosts_update(req, host_id, data):
 
 
 @rest.delete('/<host_id>')
-@validation.check_exists(_api.get_computehost, host_id='host_id')
 def computehosts_delete(req, host_id):
     """Delete specified computehost."""
     _api.delete_computehost(host_id)
@@ -71,11 +72,12 @@ def computehosts_delete(req, host_id):
 @rest.get('/allocations', query=True)
 def allocations_list(req, query):
     """List all allocations on all computehosts."""
-    return api_utils.render(allocations=_api.list_allocations(query))
+    return api_utils.render_versioned(
+        _api.get_allocations_version(), 'allocations',
+        lambda: _api.list_allocations(query))
 
 
 @rest.get('/<host_id>/allocation', query=True)
-@validation.check_exists(_api.get_computehost, host_id='host_id')
 def allocations_get(req, host_id, query):
     """List all allocations on a specific host."""
     return api_utils.render(allocation=_api.get_allocations(host_id, query))
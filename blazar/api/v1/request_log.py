@@ -10,10 +10,12 @@
 # implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-"""Simple middleware for request logging."""
+"""Simple middleware for request logging and timing."""
 
 from oslo_log import log as logging
 
+from blazar.utils import timing
+
 
 LOG = logging.getLogger(__name__)
 
@@ -21,11 +23,16 @@ LOG = logging.getLogger(__name__)
 class RequestLog(object):
     """Middleware to write a simple request log to.
 
+    The log records the wall time of each request and the time it spent
+    waiting on RPC calls. The latency of the request is also recorded in the
+    histogram of its route.
+
     Borrowed from Paste Translogger
     """
 
     format = ('%(REMOTE_ADDR)s "%(REQUEST_METHOD)s %(REQUEST_URI)s" '
-              'status: %(status)s len: %(bytes)s ')
+              'status: %(status)s len: %(bytes)s time: %(time).3f '
+              'rpc_time: %(rpc_time).3f')
 
     def __init__(self, application):
         self.application = application
@@ -39,8 +46,7 @@ class RequestLog(object):
         accept = environ.get('HTTP_ACCEPT')
         if accept:
             environ['HTTP_ACCEPT'] = 'application/json'
-        if LOG.isEnabledFor(logging.INFO):
-            return self._log_app(environ, start_response)
+        return self._log_app(environ, start_response)
 
     @staticmethod
     def _get_uri(environ):
@@ -52,31 +58,73 @@ class RequestLog(object):
 
     def _log_app(self, environ, start_response):
         req_uri = self._get_uri(environ)
+        timer = timing.start_request()
+        response = {'status': '500 Internal Server Error', 'size': None}
 
         def replacement_start_response(status, headers, exc_info=None):
             """We need to gaze at the content-length, if set to write log info.
 
             """
-            size = None
+            response['status'] = status
             for name, value in headers:
                 if name.lower() == 'content-length':
-                    size = value
-            self.write_log(environ, req_uri, status, size)
+                    response['size'] = value
             return start_response(status, headers, exc_info)
 
-        return self.application(environ, replacement_start_response)
-
-    def write_log(self, environ, req_uri, status, size):
+        def finish(size):
+            # NOTE: Streamed responses have no content length, their size is
+            # known once their body is sent.
+            if response['size'] is None:
+                response['size'] = size
+            self.write_log(environ, req_uri, response['status'],
+                           response['size'], timer)
+
+        try:
+            app_iter = self.application(environ, replacement_start_response)
+        except Exception:
+            finish(None)
+            raise
+        return _TimedBody(app_iter, finish)
+
+    def write_log(self, environ, req_uri, status, size, timer):
         """Write the log info out in a formatted form to ``LOG.info``.
 
         """
+        status_code = status.split(None, 1)[0]
+        latency = timing.end_request(
+            timer, environ['REQUEST_METHOD'], environ.get(timing.ROUTE_KEY),
+            req_uri, status_code, size,
+            request_id=environ.get('openstack.request_id'))
         if size is None:
             size = '-'
         log_format = {
             'REMOTE_ADDR': environ.get('REMOTE_ADDR', '-'),
             'REQUEST_METHOD': environ['REQUEST_METHOD'],
             'REQUEST_URI': req_uri,
-            'status': status.split(None, 1)[0],
-            'bytes': size
+            'status': status_code,
+            'bytes': size,
+            'time': latency,
+            'rpc_time': timer.rpc_time,
         }
         LOG.info(self.format, log_format)
+
+
+class _TimedBody(object):
+    """Response body calling finish with its size once it is sent."""
+
+    def __init__(self, app_iter, finish):
+        self.app_iter = app_iter
+        self.finish = finish
+        self.size = 0
+
+    def __iter__(self):
+        for chunk in self.app_iter:
+            self.size += len(chunk)
+            yield chunk
+
+    def close(self):
+        try:
+            if hasattr(self.app_iter, 'close'):
+                self.app_iter.close()
+        finally:
+            self.finish(self.size)
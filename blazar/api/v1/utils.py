@@ -23,6 +23,7 @@ from oslo_serialization import jsonutils
 from werkzeug import datastructures
 
 from blazar.api import context
+from blazar.api import etags
 from blazar.api.v1 import api_version_request as api_version
 from blazar.db import exceptions as db_exceptions
 from blazar.enforcement import exceptions as enforcement_exceptions
@@ -30,6 +31,7 @@ from blazar import exceptions as ex
 from blazar.i18n import _
 from blazar.manager import exceptions as manager_exceptions
 from blazar.utils.openstack import exceptions as opst_exceptions
+from blazar.utils import timing
 
 LOG = logging.getLogger(__name__)
 
@@ -77,6 +79,8 @@ class Rest(flask.Blueprint):
             def handler(**kwargs):
                 LOG.debug("Rest.route.decorator.handler, kwargs=%s", kwargs)
                 _init_resp_type(file_upload)
+                flask.request.environ[timing.ROUTE_KEY] = (
+                    flask.request.url_rule.rule)
 
                 # update status code
                 if status:
@@ -139,6 +143,11 @@ class Rest(flask.Blueprint):
 
 RT_JSON = datastructures.MIMEAccept([("application/json", 1)])
 
+RESPOND_ASYNC = 'respond-async'
+
+# Size of the chunks in which streamed responses are sent.
+STREAM_CHUNK_SIZE = 64 * 1024
+
 
 def set_api_version_request():
     requested_version = get_requested_microversion()
@@ -236,30 +245,92 @@ def render(result=None, response_type=None, status=None, **kwargs):
                       _("Non-dict and non-empty kwargs passed to render."))
         return
 
-    status_code = getattr(flask.request, 'status_code', None)
+    status_code = _status_code(status)
+    response_type = _response_type(response_type)
+    if response_type is None:
+        return
+
+    body = jsonutils.dump_as_bytes(result)
+
+    return flask.Response(response=body, status=status_code,
+                          mimetype=response_type)
+
+
+def render_stream(key, rows, status=None):
+    """Render a collection response, serializing it row by row.
+
+    The body is the same as the one of render(**{key: list(rows)}), but
+    it is sent in chunks while rows is iterated, so that neither the rows
+    nor the whole body need to be held in memory at once.
+
+    :param key: name of the collection in the response body.
+    :param rows: iterable of the JSON serializable rows of the collection.
+    """
+    status_code = _status_code(status)
+    response_type = _response_type()
+    if response_type is None:
+        return
+
+    rows = iter(rows)
+    # NOTE: The first row is fetched before the response is returned, so
+    # that e.g. a database error is reported with an error status rather
+    # than with a truncated body.
+    first = next(rows, None)
+
+    def generate():
+        chunk = bytearray(b'{"%s": [' % key.encode())
+        if first is not None:
+            chunk += jsonutils.dump_as_bytes(first)
+        for row in rows:
+            chunk += b', '
+            chunk += jsonutils.dump_as_bytes(row)
+            if len(chunk) >= STREAM_CHUNK_SIZE:
+                yield bytes(chunk)
+                chunk.clear()
+        chunk += b']}'
+        yield bytes(chunk)
+
+    return flask.Response(response=flask.stream_with_context(generate()),
+                          status=status_code, mimetype=response_type)
+
+
+def _status_code(status=None):
     if status:
-        status_code = status
-    if not status_code:
-        status_code = 200
+        return status
+    return getattr(flask.request, 'status_code', None) or 200
+
 
+def _response_type(response_type=None):
     if not response_type:
         response_type = getattr(flask.request, 'resp_type', RT_JSON)
 
-    serializer = None
-    if "application/json" in response_type:
-        response_type = RT_JSON
-        serializer = jsonutils
-    else:
+    if "application/json" not in response_type:
         abort_and_log(400,
                       _("Content type '%s' isn't supported") % response_type)
-        return
+        return None
 
-    body = serializer.dump_as_bytes(result)
+    return str(RT_JSON)
 
-    response_type = str(response_type)
 
-    return flask.Response(response=body, status=status_code,
-                          mimetype=response_type)
+def render_versioned(version, key, get_rows):
+    """Render the rows returned by get_rows unless the client has them.
+
+    :param version: version of the rows, see blazar.api.etags.
+    :param key: name of the collection in the response body.
+    :param get_rows: function returning the rows to render with
+                     render_stream(). It is not called when the client
+                     sent the current ETag.
+    """
+    etag = etags.etag(version)
+    if etags.is_fresh(flask.request, etag):
+        resp = flask.Response(status=304)
+    else:
+        resp = render_stream(key, get_rows())
+
+    if etag is not None:
+        resp.set_etag(etag)
+        resp.last_modified = etags.last_modified(version)
+    return resp
 
 
 def request_data():
@@ -294,6 +365,29 @@ def get_request_args():
     return flask.request.args
 
 
+def get_fields(query):
+    """Pop the fields requested with the fields parameter from query.
+
+    Return None if all fields are requested, or else the list of field
+    names, which always includes id.
+    """
+    if not query or 'fields' not in query:
+        return None
+    fields = ['id']
+    for field in query.pop('fields').split(','):
+        field = field.strip()
+        if field and field not in fields:
+            fields.append(field)
+    return fields
+
+
+def prefers_async(req):
+    """Whether the client asked for an asynchronous response (RFC 7240)."""
+    preferences = req.headers.get('Prefer', '')
+    return RESPOND_ASYNC in [p.split(';')[0].split('=')[0].strip().lower()
+                             for p in preferences.split(',')]
+
+
 def abort_and_log(status_code, descr, exc=None):
     """Process occurred errors."""
     LOG.error("Request aborted with status code %(code)s and "
@@ -38,7 +38,8 @@ OPT_GROUP_NAME = 'keystone_authtoken'
 
 def setup_app(pecan_config=None, extra_hooks=None):
 
-    app_hooks = [hooks.ConfigHook(),
+    app_hooks = [hooks.TimingHook(),
+                 hooks.ConfigHook(),
                  hooks.DBHook(),
                  hooks.ContextHook(),
                  hooks.RPCHook(),
@@ -17,12 +17,35 @@ import abc
 
 from oslo_config import cfg
 from oslo_log import log as logging
+import pecan
 from pecan import rest
+import wsme
+
+from blazar.api import etags
 
 LOG = logging.getLogger(__name__)
 CONF = cfg.CONF
 
 
+def not_modified(version):
+    """Return a 304 response if the client has this version of a collection.
+
+    Otherwise, return None after setting the ETag and Last-Modified headers
+    of the response when possible.
+
+    :param version: version of the collection, see blazar.api.etags.
+    """
+    etag = etags.etag(version)
+    if etag is None:
+        return None
+
+    pecan.response.etag = etag
+    pecan.response.last_modified = etags.last_modified(version)
+    if etags.is_fresh(pecan.request, etag):
+        return wsme.api.Response(None, status_code=304, return_type=None)
+    return None
+
+
 class BaseController(rest.RestController, metaclass=abc.ABCMeta):
 
     """Mandatory API method name."""
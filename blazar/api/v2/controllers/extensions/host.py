@@ -122,6 +122,10 @@ class HostsController(extensions.BaseController):
     @wsme_pecan.wsexpose([Host], q=[])
     def get_all(self):
         """Returns all hosts."""
+        response = extensions.not_modified(
+            pecan.request.hosts_rpcapi.get_computehosts_version())
+        if response is not None:
+            return response
         return [Host.convert(host)
                 for host in
                 pecan.request.hosts_rpcapi.list_computehosts()]
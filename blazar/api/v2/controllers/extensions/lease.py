@@ -100,6 +100,10 @@ class LeasesController(extensions.BaseController):
     @wsme_pecan.wsexpose([Lease], q=[])
     def get_all(self):
         """Returns all leases."""
+        response = extensions.not_modified(
+            pecan.request.rpcapi.get_leases_version())
+        if response is not None:
+            return response
         return [Lease.convert(lease)
                 for lease in pecan.request.rpcapi.list_leases()]
 
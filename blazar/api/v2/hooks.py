@@ -21,6 +21,7 @@ from blazar.api import context
 from blazar.db import api as dbapi
 from blazar.manager.leases import rpcapi as leases_rpcapi
 from blazar.manager.oshosts import rpcapi as hosts_rpcapi
+from blazar.utils import timing
 
 LOG = logging.getLogger(__name__)
 
@@ -66,3 +67,34 @@ class RPCHook(hooks.PecanHook):
     def before(self, state):
         state.request.rpcapi = leases_rpcapi.ManagerRPCAPI()
         state.request.hosts_rpcapi = hosts_rpcapi.ManagerRPCAPI()
+
+
+class TimingHook(hooks.PecanHook):
+    """Time requests, and record their latency per controller method."""
+
+    def on_route(self, state):
+        state.request.timer = timing.start_request()
+
+    def after(self, state):
+        timer = getattr(state.request, 'timer', None)
+        if timer is None:
+            return
+
+        route = None
+        controller = state.controller
+        if controller is not None:
+            route = '%s.%s' % (
+                type(getattr(controller, '__self__', None)).__name__,
+                controller.__name__)
+        size = state.response.content_length
+        latency = timing.end_request(
+            timer, state.request.method, route, state.request.path_qs,
+            state.response.status_int, size,
+            request_id=state.request.environ.get('openstack.request_id'))
+        LOG.debug('"%(method)s %(uri)s" status: %(status)s len: %(bytes)s '
+                  'time: %(time).3f rpc_time: %(rpc_time).3f',
+                  {'method': state.request.method,
+                   'uri': state.request.path_qs,
+                   'status': state.response.status_int,
+                   'bytes': '-' if size is None else size,
+                   'time': latency, 'rpc_time': timer.rpc_time})
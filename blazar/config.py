@@ -71,6 +71,35 @@ api_opts = [
     cfg.BoolOpt('enable_v1_api',
                 default=True,
                 help='Deploy the v1 API.'),
+    cfg.BoolOpt('api_db_reads',
+                default=False,
+                help='Serve the read-only requests of the v1 API, such as '
+                     'listing leases or hosts, from the database instead of '
+                     'calling blazar-manager. This requires the API service '
+                     'to have access to the database.'),
+    cfg.FloatOpt('lease_changes_poll_interval',
+                 default=1.0,
+                 min=0.1,
+                 help='Interval [seconds] at which an API process polls for '
+                      'new lease changes, while requests wait for some.'),
+    cfg.IntOpt('max_batch_leases',
+               default=100,
+               min=1,
+               help='Maximum number of leases created by a single request '
+                    'to POST /v1/leases:batch.'),
+    cfg.IntOpt('lease_changes_max_wait',
+               default=60,
+               min=0,
+               help='Maximum time [seconds] a request to the lease change '
+                    'feed may wait for changes.'),
+    cfg.FloatOpt('slow_request_threshold',
+                 default=5.0,
+                 min=0,
+                 help='API requests taking longer than this time [seconds] '
+                      'are logged as slow requests, with the time spent '
+                      'waiting on RPC calls. The time requests wait for '
+                      'lease changes is not counted. 0 disables the '
+                      'logging of slow requests.'),
 ]
 
 lease_opts = [
@@ -79,7 +108,15 @@ lease_opts = [
                min=0,
                help='The minimum interval [minutes] between the end of a '
                     'lease and the start of the next lease for the same '
-                    'resource. This interval is used for cleanup.')
+                    'resource. This interval is used for cleanup.'),
+    cfg.IntOpt('provisioning_time',
+               default=0,
+               min=0,
+               help='The interval [minutes] before the start of a lease in '
+                    'which the Nova and Placement resources of its '
+                    'reservations, e.g. aggregates and flavors, are '
+                    'created. If this is set to 0, they are created with '
+                    'the lease.')
 ]
 
 CONF = cfg.CONF
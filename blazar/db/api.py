@@ -71,6 +71,40 @@ def drop_db():
     return IMPL.drop_db()
 
 
+def transaction(run_after_commit=True):
+    """Return a context manager running DB API calls in one transaction.
+
+    The DB API calls made within the block join the transaction, which is
+    committed at the end of the outermost block or rolled back on error.
+
+    :param run_after_commit: if False, the functions registered with
+        after_commit() are not called once the transaction is committed.
+        The block yields them as a list of (func, args, kwargs) tuples.
+    """
+    return IMPL.transaction(run_after_commit=run_after_commit)
+
+
+def after_commit(func, *args, **kwargs):
+    """Call func once the current transaction is committed.
+
+    This is meant for side effects on remote services, which can't be rolled
+    back. Outside of a transaction, func is called immediately.
+    """
+    IMPL.after_commit(func, *args, **kwargs)
+
+
+def track_queries(operation):
+    """Return a context manager counting the queries run by the block.
+
+    The queries are counted and timed by shape, and logged as an operation
+    over budget if there are too many of them or if they are too slow.
+
+    :param operation: the name of the operation run by the block, e.g. an
+        RPC method.
+    """
+    return IMPL.track_queries(operation)
+
+
 # Helpers for building constraints / equality checks
 
 
@@ -142,9 +176,15 @@ def reservation_destroy(reservation_id):
     IMPL.reservation_destroy(reservation_id)
 
 
+@to_dict
 def reservation_update(reservation_id, reservation_values):
     """Update reservation."""
-    IMPL.reservation_update(reservation_id, reservation_values)
+    return IMPL.reservation_update(reservation_id, reservation_values)
+
+
+def reservation_update_flags_bulk(reservation_ids, flags):
+    """Update flags of several reservations, return their lease ids."""
+    return IMPL.reservation_update_flags_bulk(reservation_ids, flags)
 
 
 # Lease
@@ -173,15 +213,50 @@ def lease_get_all_by_user(user_id):
 
 
 @to_dict
-def lease_get(lease_id):
-    """Return lease."""
-    return IMPL.lease_get(lease_id)
+def lease_get_all_by_status(lease_status):
+    """Return all leases in a specific status."""
+    return IMPL.lease_get_all_by_status(lease_status)
 
 
 @to_dict
-def lease_list(project_id=None):
+def lease_get(lease_id, fields=None):
+    """Return lease.
+
+    :param fields: if set, only load these fields of the lease and its id.
+    """
+    return IMPL.lease_get(lease_id, fields=fields)
+
+
+@to_dict
+def lease_list(project_id=None, fields=None):
     """Return a list of all existing leases."""
-    return IMPL.lease_list(project_id)
+    return IMPL.lease_list(project_id, fields=fields)
+
+
+def lease_list_iter(project_id=None, fields=None):
+    """Iterate over all existing leases.
+
+    The leases are loaded from the database in batches while iterating.
+    """
+    for lease in IMPL.lease_list_iter(project_id, fields=fields):
+        yield lease.to_dict()
+
+
+def lease_count_by_status():
+    """Count the leases by status and degraded flag.
+
+    :return: a list of (status, degraded, count) tuples.
+    """
+    return IMPL.lease_count_by_status()
+
+
+def lease_list_version(project_id=None):
+    """Return the version of the lease list.
+
+    The version is a dict with the number of rows making up the leases and
+    the latest time one of these rows was created or updated.
+    """
+    return IMPL.lease_list_version(project_id)
 
 
 def lease_destroy(lease_id):
@@ -189,9 +264,45 @@ def lease_destroy(lease_id):
     IMPL.lease_destroy(lease_id)
 
 
+@to_dict
 def lease_update(lease_id, lease_values):
     """Update lease or raise if not exists."""
-    IMPL.lease_update(lease_id, lease_values)
+    return IMPL.lease_update(lease_id, lease_values)
+
+
+def lease_mark_degraded_bulk(lease_ids):
+    """Mark several leases as degraded, return their ids."""
+    return IMPL.lease_mark_degraded_bulk(lease_ids)
+
+
+# Lease changes
+
+@to_dict
+def lease_change_list(since=0, limit=100):
+    """Return the changes of leases following the change with ID since.
+
+    Every creation, update and deletion of a lease is recorded as a change,
+    with the status and degraded flag of the lease after it. Changes have
+    consecutive IDs, in the order they are committed, and are returned in
+    this order.
+    """
+    return IMPL.lease_change_list(since, limit)
+
+
+def lease_change_latest():
+    """Return the ID of the latest lease change, or 0 if there is none.
+
+    The ID of the latest change is returned even if it has been purged.
+    """
+    return IMPL.lease_change_latest()
+
+
+def lease_change_purge(before):
+    """Delete lease changes created before a date.
+
+    :return: the number of deleted changes.
+    """
+    return IMPL.lease_change_purge(before)
 
 
 # Events
@@ -202,6 +313,11 @@ def event_create(event_values):
     return IMPL.event_create(event_values)
 
 
+def event_create_all(events_values):
+    """Create events from a list of values at once."""
+    IMPL.event_create_all(events_values)
+
+
 @to_dict
 def event_get_all():
     """Return all events."""
@@ -228,14 +344,23 @@ def event_get_all_sorted_by_filters(sort_key, sort_dir, filters):
                                                 filters)
 
 
+def event_backlog(event_status, before):
+    """Count the events in a status, due at a date, by event type.
+
+    :return: a list of (event type, count, time of the oldest event) tuples.
+    """
+    return IMPL.event_backlog(event_status, before)
+
+
 def event_destroy(event_id):
     """Delete event or raise if not exists."""
     IMPL.event_destroy(event_id)
 
 
+@to_dict
 def event_update(event_id, event_values):
     """Update event or raise if not exists."""
-    IMPL.event_update(event_id, event_values)
+    return IMPL.event_update(event_id, event_values)
 
 
 # Host reservations
@@ -268,11 +393,12 @@ def host_reservation_destroy(host_reservation_id):
     IMPL.host_reservation_destroy(host_reservation_id)
 
 
+@to_dict
 def host_reservation_update(host_reservation_id,
                             host_reservation_values):
     """Update host reservation."""
-    IMPL.host_reservation_update(host_reservation_id,
-                                 host_reservation_values)
+    return IMPL.host_reservation_update(host_reservation_id,
+                                        host_reservation_values)
 
 
 # Instance reservation
@@ -287,6 +413,7 @@ def instance_reservation_get(instance_reservation_id):
     return IMPL.instance_reservation_get(instance_reservation_id)
 
 
+@to_dict
 def instance_reservation_update(instance_reservation_id,
                                 instance_reservation_values):
     """Update instance reservation."""
@@ -306,6 +433,12 @@ def host_allocation_create(allocation_values):
     return IMPL.host_allocation_create(allocation_values)
 
 
+def host_allocation_create_all(reservation_id, host_ids, free_between=None):
+    """Create the allocations of a reservation in a single transaction."""
+    return IMPL.host_allocation_create_all(reservation_id, host_ids,
+                                           free_between)
+
+
 @to_dict
 def host_allocation_get_all_by_values(**kwargs):
     """Returns all entries filtered by col=value."""
@@ -320,9 +453,16 @@ def host_allocation_destroy(allocation_id):
     IMPL.host_allocation_destroy(allocation_id)
 
 
+@to_dict
 def host_allocation_update(allocation_id, allocation_values):
     """Update allocation."""
-    IMPL.host_allocation_update(allocation_id, allocation_values)
+    return IMPL.host_allocation_update(allocation_id, allocation_values)
+
+
+def host_allocation_update_all(allocation_values, destroyed_ids=None):
+    """Update and delete allocations in a single transaction."""
+    IMPL.host_allocation_update_all(allocation_values,
+                                    destroyed_ids=destroyed_ids)
 
 
 # Compute Hosts
@@ -333,15 +473,41 @@ def host_create(values):
 
 
 @to_dict
-def host_get(host_id):
-    """Return a specific Compute host."""
-    return IMPL.host_get(host_id)
+def host_get(host_id, fields=None):
+    """Return a specific Compute host.
+
+    :param fields: if set, only load these fields of the host and its id.
+    """
+    return IMPL.host_get(host_id, fields=fields)
 
 
 @to_dict
-def host_list():
+def host_list(fields=None):
     """Return a list of events."""
-    return IMPL.host_list()
+    return IMPL.host_list(fields=fields)
+
+
+def host_list_version():
+    """Return the version of the host list, like lease_list_version."""
+    return IMPL.host_list_version()
+
+
+def host_allocation_list_version():
+    """Return the version of the host allocations list.
+
+    See lease_list_version.
+    """
+    return IMPL.host_allocation_list_version()
+
+
+def host_get_all_by_ids(host_ids):
+    """Return the given Compute hosts with their extra capabilities."""
+    return IMPL.host_get_all_by_ids(host_ids)
+
+
+def host_summary_get_all(host_ids, fields):
+    """Return compact documents of the given Compute hosts."""
+    return IMPL.host_summary_get_all(host_ids, fields)
 
 
 @to_dict
@@ -373,9 +539,10 @@ def host_destroy(host_id):
     IMPL.host_destroy(host_id)
 
 
+@to_dict
 def host_update(host_id, values):
     """Update Compute host."""
-    IMPL.host_update(host_id, values)
+    return IMPL.host_update(host_id, values)
 
 
 # ComputeHostExtraCapabilities
@@ -437,6 +604,34 @@ def host_trait_create(values):
     return IMPL.host_trait_create(values)
 
 
+# HostHealingEntry
+
+def host_healing_entry_create_all_by_hosts(host_ids, start_date):
+    """Record reservations allocated on failed hosts as to be healed."""
+    return IMPL.host_healing_entry_create_all_by_hosts(host_ids, start_date)
+
+
+@to_dict
+def host_healing_entry_get_all_by_interval(start_date, end_date):
+    """Return host healing entries whose lease overlaps the interval."""
+    return IMPL.host_healing_entry_get_all_by_interval(start_date, end_date)
+
+
+def host_healing_entry_destroy_all(entry_ids):
+    """Delete specific host healing entries."""
+    IMPL.host_healing_entry_destroy_all(entry_ids)
+
+
+def host_healing_entry_destroy_all_by_hosts(host_ids):
+    """Delete all host healing entries of specific hosts."""
+    IMPL.host_healing_entry_destroy_all_by_hosts(host_ids)
+
+
+def host_healing_entry_destroy_all_expired(end_date):
+    """Delete all host healing entries of leases ended before end_date."""
+    IMPL.host_healing_entry_destroy_all_expired(end_date)
+
+
 # FloatingIP reservation
 
 def fip_reservation_create(fip_reservation_values):
@@ -450,6 +645,7 @@ def fip_reservation_get(fip_reservation_id):
     return IMPL.fip_reservation_get(fip_reservation_id)
 
 
+@to_dict
 def fip_reservation_update(fip_reservation_id, fip_reservation_values):
     """Update floating IP reservation."""
     return IMPL.fip_reservation_update(fip_reservation_id,
@@ -474,6 +670,7 @@ def required_fip_get(required_fip_id):
     return IMPL.required_fip_get(required_fip_id)
 
 
+@to_dict
 def required_fip_update(required_fip_id, required_fip_values):
     """Update required FIP."""
     return IMPL.required_fip_update(required_fip_id,
@@ -497,6 +694,12 @@ def fip_allocation_create(allocation_values):
     return IMPL.fip_allocation_create(allocation_values)
 
 
+def fip_allocation_create_all(reservation_id, fip_ids, free_between=None):
+    """Create the allocations of a reservation in a single transaction."""
+    return IMPL.fip_allocation_create_all(reservation_id, fip_ids,
+                                          free_between)
+
+
 @to_dict
 def fip_allocation_get_all_by_values(**kwargs):
     """Returns all entries filtered by col=value."""
@@ -508,9 +711,10 @@ def fip_allocation_destroy(allocation_id):
     IMPL.fip_allocation_destroy(allocation_id)
 
 
+@to_dict
 def fip_allocation_update(allocation_id, allocation_values):
     """Update floating ip allocation."""
-    IMPL.fip_allocation_update(allocation_id, allocation_values)
+    return IMPL.fip_allocation_update(allocation_id, allocation_values)
 
 
 # Floating ip
@@ -532,6 +736,17 @@ def floatingip_list():
     return IMPL.floatingip_list()
 
 
+@to_dict
+def floatingip_get_all_by_ids(floatingip_ids):
+    """Return the given floating ips."""
+    return IMPL.floatingip_get_all_by_ids(floatingip_ids)
+
+
+def floatingip_summary_get_all(floatingip_ids, fields):
+    """Return compact documents of the given floating ips."""
+    return IMPL.floatingip_summary_get_all(floatingip_ids, fields)
+
+
 @to_dict
 def reservable_fip_get_all_by_queries(queries):
     """Returns reservable fips filtered by an array of queries."""
@@ -555,3 +770,20 @@ def resource_property_update(resource_type, property_name, values):
 
 def resource_property_create(values):
     return IMPL.resource_property_create(values)
+
+
+# Project usages
+
+@to_dict
+def project_usage_get(project_id):
+    """Return the usage of a project."""
+    return IMPL.project_usage_get(project_id)
+
+
+def project_usage_increment(project_id, period, values, limits=None):
+    """Add amounts to the usage counters of a project, within limits.
+
+    :return: False if a counter would exceed its limit, in which case the
+             usage is left unchanged, True otherwise.
+    """
+    return IMPL.project_usage_increment(project_id, period, values, limits)
@@ -0,0 +1,50 @@
+# Copyright 2026 OpenStack Foundation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Add host healing entries
+
+Revision ID: 4b5e2c1d9a7f
+Revises: 553383923ca0
+Create Date: 2026-10-19 09:12:44.318027
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '4b5e2c1d9a7f'
+down_revision = '553383923ca0'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    op.create_table(
+        'host_healing_entries',
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('computehost_id', sa.String(length=36), nullable=False),
+        sa.Column('reservation_id', sa.String(length=36), nullable=False),
+        sa.ForeignKeyConstraint(['computehost_id'], ['computehosts.id'],
+                                ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['reservation_id'], ['reservations.id'],
+                                ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('computehost_id', 'reservation_id')
+    )
+
+
+def downgrade():
+    op.drop_table('host_healing_entries')
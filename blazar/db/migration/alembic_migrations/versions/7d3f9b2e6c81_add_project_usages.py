@@ -0,0 +1,127 @@
+# Copyright 2026 OpenStack Foundation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Add project usages
+
+Revision ID: 7d3f9b2e6c81
+Revises: 4b5e2c1d9a7f
+Create Date: 2026-10-19 11:02:17.540913
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '7d3f9b2e6c81'
+down_revision = '4b5e2c1d9a7f'
+
+from alembic import op
+from oslo_utils import timeutils
+from oslo_utils import uuidutils
+import sqlalchemy as sa
+
+COUNTERS = ('hosts', 'instances', 'floatingips')
+
+
+def _backfill_usages(project_usages):
+    """Account the leases which have not ended yet.
+
+    Only the resource-hours of the leases created during the current month
+    are charged, as the ledger would have done.
+    """
+    connection = op.get_bind()
+    leases = sa.table('leases', sa.column('id'), sa.column('project_id'),
+                      sa.column('start_date', sa.DateTime),
+                      sa.column('end_date', sa.DateTime),
+                      sa.column('created_at', sa.DateTime))
+    events = sa.table('events', sa.column('lease_id'),
+                      sa.column('event_type'), sa.column('status'))
+    reservations = sa.table('reservations', sa.column('id'),
+                            sa.column('lease_id'), sa.column('resource_type'))
+    host_allocations = sa.table('computehost_allocations',
+                                sa.column('reservation_id'))
+    instance_reservations = sa.table('instance_reservations',
+                                     sa.column('reservation_id'),
+                                     sa.column('amount'))
+    fip_allocations = sa.table('floatingip_allocations',
+                               sa.column('reservation_id'))
+
+    unended = sa.select(events.c.lease_id).where(
+        events.c.event_type == 'end_lease', events.c.status == 'UNDONE')
+
+    def amounts(table, amount, resource_types):
+        query = (
+            sa.select(reservations.c.lease_id, amount)
+            .select_from(reservations.join(
+                table, table.c.reservation_id == reservations.c.id))
+            .where(reservations.c.resource_type.in_(resource_types),
+                   reservations.c.lease_id.in_(unended))
+            .group_by(reservations.c.lease_id))
+        return {lease_id: int(value or 0)
+                for lease_id, value in connection.execute(query)}
+
+    lease_amounts = {
+        'hosts': amounts(host_allocations, sa.func.count(),
+                         ['physical:host']),
+        'instances': amounts(instance_reservations,
+                             sa.func.sum(instance_reservations.c.amount),
+                             ['virtual:instance', 'flavor:instance']),
+        'floatingips': amounts(fip_allocations, sa.func.count(),
+                               ['virtual:floatingip']),
+    }
+
+    now = timeutils.utcnow()
+    period_start = now.replace(day=1, hour=0, minute=0, second=0,
+                               microsecond=0)
+    usages = {}
+    for lease in connection.execute(
+            sa.select(leases).where(leases.c.id.in_(unended))):
+        usage = usages.setdefault(lease.project_id,
+                                  dict.fromkeys(COUNTERS, 0))
+        usage.setdefault('resource_hours', 0.0)
+        total = 0
+        for counter in COUNTERS:
+            amount = lease_amounts[counter].get(lease.id, 0)
+            usage[counter] += amount
+            total += amount
+        if lease.created_at is not None and lease.created_at >= period_start:
+            seconds = (lease.end_date - lease.start_date).total_seconds()
+            usage['resource_hours'] += total * max(seconds, 0) / 3600.0
+
+    if usages:
+        op.bulk_insert(project_usages, [
+            dict(usage, id=uuidutils.generate_uuid(), project_id=project_id,
+                 period=now.strftime('%Y-%m'), created_at=now)
+            for project_id, usage in usages.items()])
+
+
+def upgrade():
+    project_usages = op.create_table(
+        'project_usages',
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('project_id', sa.String(length=255), nullable=False),
+        sa.Column('period', sa.String(length=7), nullable=False),
+        sa.Column('hosts', sa.Integer(), nullable=False),
+        sa.Column('instances', sa.Integer(), nullable=False),
+        sa.Column('floatingips', sa.Integer(), nullable=False),
+        sa.Column('resource_hours', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('project_id')
+    )
+    _backfill_usages(project_usages)
+
+
+def downgrade():
+    op.drop_table('project_usages')
@@ -0,0 +1,62 @@
+# Copyright 2026 OpenStack Foundation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Add lease changes
+
+Revision ID: 9a4c2e7f1b3d
+Revises: 7d3f9b2e6c81
+Create Date: 2026-10-19 15:24:51.318274
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '9a4c2e7f1b3d'
+down_revision = '7d3f9b2e6c81'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    op.create_table(
+        'lease_changes',
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('id',
+                  sa.BigInteger().with_variant(sa.Integer(), 'sqlite'),
+                  autoincrement=False, nullable=False),
+        sa.Column('lease_id', sa.String(length=36), nullable=False),
+        sa.Column('project_id', sa.String(length=255), nullable=True),
+        sa.Column('change', sa.String(length=16), nullable=False),
+        sa.Column('status', sa.String(length=255), nullable=True),
+        sa.Column('degraded', sa.Boolean(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    lease_change_sequence = op.create_table(
+        'lease_change_sequence',
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('value',
+                  sa.BigInteger().with_variant(sa.Integer(), 'sqlite'),
+                  nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.bulk_insert(lease_change_sequence, [{'id': 1, 'value': 0}])
+
+
+def downgrade():
+    op.drop_table('lease_change_sequence')
+    op.drop_table('lease_changes')
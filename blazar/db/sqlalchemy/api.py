@@ -20,12 +20,14 @@ import sys
 from oslo_db import exception as common_db_exc
 from oslo_log import log as logging
 import sqlalchemy as sa
+from sqlalchemy import orm
 from sqlalchemy.sql.expression import asc
 from sqlalchemy.sql.expression import desc
 
 from blazar.db import exceptions as db_exc
 from blazar.db.sqlalchemy import facade_wrapper
 from blazar.db.sqlalchemy import models
+from blazar.db.sqlalchemy import query_stats
 
 RESOURCE_PROPERTY_MODELS = {
     'physical:host': models.ComputeHostExtraCapability,
@@ -63,6 +65,18 @@ def drop_db():
     return True
 
 
+def transaction(run_after_commit=True):
+    return facade_wrapper.transaction(run_after_commit=run_after_commit)
+
+
+def after_commit(func, *args, **kwargs):
+    facade_wrapper.after_commit(func, *args, **kwargs)
+
+
+def track_queries(operation):
+    return query_stats.track(operation)
+
+
 # Helpers for building constraints / equality checks
 
 
@@ -105,6 +119,43 @@ class InequalityCondition(object):
         return [field != value for value in self.values]
 
 
+def _fields_options(model, fields):
+    """Return the options of a query on model loading only some fields.
+
+    The primary key is always loaded, and the relationships which are not
+    among the fields are left unloaded.
+    """
+    if fields is None:
+        return []
+
+    mapper = sa.inspect(model)
+    columns = [attr.class_attribute for attr in mapper.column_attrs
+               if attr.key in fields or attr.columns[0].primary_key]
+    options = [orm.load_only(*columns)]
+    options.extend(orm.lazyload(rel.class_attribute)
+                   for rel in mapper.relationships if rel.key not in fields)
+    return options
+
+
+def _version_select(model, *criteria):
+    return sa.select(
+        sa.func.count(model.id),
+        sa.func.max(sa.func.coalesce(model.updated_at, model.created_at))
+    ).where(*criteria)
+
+
+def _get_version(session, *selects):
+    """Return the number of rows and the latest change of the selects."""
+    count = 0
+    updated_at = None
+    for rows, latest in session.execute(sa.union_all(*selects)):
+        count += rows
+        if latest is not None and (updated_at is None or
+                                   latest > updated_at):
+            updated_at = latest
+    return {'count': count, 'updated_at': updated_at}
+
+
 # Reservation
 def _reservation_get(session, reservation_id):
     query = session.query(models.Reservation)
@@ -161,8 +212,26 @@ def reservation_update(reservation_id, values):
         reservation = _reservation_get(session, reservation_id)
         reservation.update(values)
         reservation.save(session=session)
+        return reservation
+
+
+def reservation_update_flags_bulk(reservation_ids, flags):
+    """Set the same flags on all the given reservations at once.
+
+    :return: the ids of the leases of the updated reservations.
+    """
+    if not reservation_ids:
+        return []
 
-    return reservation_get(reservation_id)
+    with facade_wrapper.session_for_write() as session:
+        (session.query(models.Reservation)
+         .filter(models.Reservation.id.in_(reservation_ids))
+         .update(flags, synchronize_session=False))
+        lease_ids = (session.query(models.Reservation.lease_id)
+                     .filter(models.Reservation.id.in_(reservation_ids))
+                     .distinct().all())
+
+    return [lease_id for (lease_id,) in lease_ids]
 
 
 def reservation_destroy(reservation_id):
@@ -183,9 +252,11 @@ def _lease_get(session, lease_id):
     return query.filter_by(id=lease_id).first()
 
 
-def lease_get(lease_id):
+def lease_get(lease_id, fields=None):
     with facade_wrapper.session_for_read() as session:
-        return _lease_get(session, lease_id)
+        query = session.query(models.Lease).options(
+            *_fields_options(models.Lease, fields))
+        return query.filter_by(id=lease_id).first()
 
 
 def lease_get_all():
@@ -202,14 +273,81 @@ def lease_get_all_by_user(user_id):
     raise NotImplementedError
 
 
-def lease_list(project_id=None):
+def lease_get_all_by_status(lease_status):
     with facade_wrapper.session_for_read() as session:
-        query = session.query(models.Lease)
+        return session.query(models.Lease).filter_by(
+            status=lease_status).all()
+
+
+def lease_list(project_id=None, fields=None):
+    with facade_wrapper.session_for_read() as session:
+        query = session.query(models.Lease).options(
+            *_fields_options(models.Lease, fields))
         if project_id is not None:
             query = query.filter_by(project_id=project_id)
         return query.all()
 
 
+def lease_list_iter(project_id=None, fields=None, batch_size=100):
+    # NOTE: Leases are read by batches ordered by ID, each in its own
+    # transaction, rather than through a server-side cursor: the caller
+    # may be slow to consume them, e.g. when they are streamed to a client,
+    # and a cursor would keep a transaction open for that long.
+    last_id = None
+    while True:
+        with facade_wrapper.session_for_read() as session:
+            query = session.query(models.Lease).options(
+                *_fields_options(models.Lease, fields))
+            if project_id is not None:
+                query = query.filter_by(project_id=project_id)
+            if last_id is not None:
+                query = query.filter(models.Lease.id > last_id)
+            batch = query.order_by(models.Lease.id).limit(batch_size).all()
+
+        yield from batch
+        if len(batch) < batch_size:
+            return
+        last_id = batch[-1].id
+
+
+def lease_count_by_status():
+    with facade_wrapper.session_for_read() as session:
+        return [tuple(row) for row in
+                session.query(models.Lease.status, models.Lease.degraded,
+                              sa.func.count(models.Lease.id))
+                .group_by(models.Lease.status, models.Lease.degraded)]
+
+
+def lease_list_version(project_id=None):
+    criteria = []
+    if project_id is not None:
+        criteria.append(models.Lease.project_id == project_id)
+    lease_ids = sa.select(models.Lease.id).where(*criteria)
+    reservation_ids = sa.select(models.Reservation.id).where(
+        models.Reservation.lease_id.in_(lease_ids))
+
+    with facade_wrapper.session_for_read() as session:
+        return _get_version(
+            session,
+            _version_select(models.Lease, *criteria),
+            _version_select(models.Reservation,
+                            models.Reservation.lease_id.in_(lease_ids)),
+            _version_select(models.Event,
+                            models.Event.lease_id.in_(lease_ids)),
+            _version_select(
+                models.ComputeHostReservation,
+                models.ComputeHostReservation.reservation_id.in_(
+                    reservation_ids)),
+            _version_select(
+                models.InstanceReservations,
+                models.InstanceReservations.reservation_id.in_(
+                    reservation_ids)),
+            _version_select(
+                models.FloatingIPReservation,
+                models.FloatingIPReservation.reservation_id.in_(
+                    reservation_ids)))
+
+
 def lease_create(values):
     values = values.copy()
     lease = models.Lease()
@@ -247,16 +385,43 @@ def lease_create(values):
             raise db_exc.BlazarDBDuplicateEntry(
                 model=event.__class__.__name__, columns=e.columns)
 
+        _lease_change_create(session, lease, 'create')
+
     return lease_get(lease.id)
 
 
 def lease_update(lease_id, values):
     with facade_wrapper.session_for_write() as session:
         lease = _lease_get(session, lease_id)
+        if not lease:
+            raise db_exc.BlazarDBNotFound(id=lease_id, model='Lease')
         lease.update(values)
         lease.save(session=session)
+        _lease_change_create(session, lease, 'update')
+        return lease
+
+
+def lease_mark_degraded_bulk(lease_ids):
+    """Set the degraded flag on all the given leases at once.
+
+    :return: the ids of the updated leases.
+    """
+    if not lease_ids:
+        return []
 
-    return lease_get(lease_id)
+    with facade_wrapper.session_for_write() as session:
+        (session.query(models.Lease)
+         .filter(models.Lease.id.in_(lease_ids))
+         .update({'degraded': True}, synchronize_session=False))
+
+        leases = (session.query(models.Lease.id, models.Lease.project_id,
+                                models.Lease.status)
+                  .filter(models.Lease.id.in_(lease_ids)))
+        for lease_id, project_id, lease_status in leases:
+            _lease_change_add(session, lease_id, project_id, 'update',
+                              lease_status, True)
+
+    return list(lease_ids)
 
 
 def lease_destroy(lease_id):
@@ -267,9 +432,84 @@ def lease_destroy(lease_id):
             # raise not found error
             raise db_exc.BlazarDBNotFound(id=lease_id, model='Lease')
 
+        _lease_change_create(session, lease, 'delete')
         session.delete(lease)
 
 
+# LeaseChange
+def _lease_change_ids(session, count=1):
+    updated = (session.query(models.LeaseChangeSequence)
+               .filter_by(id=1)
+               .update({'value': models.LeaseChangeSequence.value + count},
+                       synchronize_session=False))
+    if not updated:
+        session.add(models.LeaseChangeSequence(id=1, value=count))
+        session.flush()
+    value = (session.query(models.LeaseChangeSequence.value)
+             .filter_by(id=1)
+             .scalar())
+    return range(value - count + 1, value + 1)
+
+
+def _lease_change_add(session, lease_id, project_id, change, lease_status,
+                      degraded):
+    session.info.setdefault('blazar_lease_changes', []).append(
+        {'lease_id': lease_id, 'project_id': project_id, 'change': change,
+         'status': lease_status, 'degraded': degraded})
+
+
+def _lease_change_create(session, lease, change):
+    _lease_change_add(session, lease.id, lease.project_id, change,
+                      lease.status, lease.degraded)
+
+
+@sa.event.listens_for(orm.Session, 'before_commit')
+def _lease_changes_write(session):
+    # NOTE: Change IDs are allocated from a counter row, rather than by the
+    # database, which may leave gaps between them, e.g. on rollback or with
+    # an auto_increment_increment over 1 on MySQL Galera clusters. The
+    # changes of a transaction are only written when it is committed, so
+    # that the counter row is locked for the commit alone: changes are
+    # committed in the order of their IDs, without gaps, and readers can
+    # return all the changes they see.
+    changes = session.info.pop('blazar_lease_changes', None)
+    if not changes:
+        return
+    change_ids = _lease_change_ids(session, len(changes))
+    session.add_all(models.LeaseChange(id=change_id, **values)
+                    for change_id, values in zip(change_ids, changes))
+    session.flush()
+
+
+@sa.event.listens_for(orm.Session, 'after_transaction_end')
+def _lease_changes_discard(session, transaction):
+    if transaction.parent is None:
+        session.info.pop('blazar_lease_changes', None)
+
+
+def lease_change_list(since=0, limit=100):
+    with facade_wrapper.session_for_read() as session:
+        return (session.query(models.LeaseChange)
+                .filter(models.LeaseChange.id > since)
+                .order_by(models.LeaseChange.id)
+                .limit(limit)
+                .all())
+
+
+def lease_change_latest():
+    with facade_wrapper.session_for_read() as session:
+        return (session.query(models.LeaseChangeSequence.value)
+                .filter_by(id=1)
+                .scalar()) or 0
+
+
+def lease_change_purge(before):
+    with facade_wrapper.session_for_write() as session:
+        return (session.query(models.LeaseChange)
+                .filter(models.LeaseChange.created_at < before)
+                .delete(synchronize_session=False))
+
+
 # Event
 def _event_get(session, event_id):
     query = session.query(models.Event)
@@ -361,13 +601,32 @@ def event_create(values):
     return event_get(event.id)
 
 
+def event_create_all(events):
+    """Create the given events at once."""
+    with facade_wrapper.session_for_write() as session:
+        for values in events:
+            event = models.Event()
+            event.update(values)
+            session.add(event)
+
+
 def event_update(event_id, values):
     with facade_wrapper.session_for_write() as session:
         event = _event_get(session, event_id)
         event.update(values)
         event.save(session=session)
+        return event
+
 
-    return event_get(event_id)
+def event_backlog(event_status, before):
+    with facade_wrapper.session_for_read() as session:
+        return [tuple(row) for row in
+                session.query(models.Event.event_type,
+                              sa.func.count(models.Event.id),
+                              sa.func.min(models.Event.time))
+                .filter(models.Event.status == event_status,
+                        models.Event.time <= before)
+                .group_by(models.Event.event_type)]
 
 
 def event_destroy(event_id):
@@ -429,8 +688,7 @@ def host_reservation_update(host_reservation_id, values):
         host_reservation = _host_reservation_get(session, host_reservation_id)
         host_reservation.update(values)
         host_reservation.save(session=session)
-
-    return host_reservation_get(host_reservation_id)
+        return host_reservation
 
 
 def host_reservation_destroy(host_reservation_id):
@@ -483,8 +741,7 @@ def instance_reservation_update(instance_reservation_id, values):
 
         instance_reservation.update(values)
         instance_reservation.save(session=session)
-
-    return instance_reservation_get(instance_reservation_id)
+        return instance_reservation
 
 
 def instance_reservation_destroy(instance_reservation_id):
@@ -547,8 +804,7 @@ def host_allocation_update(host_allocation_id, values):
                                                host_allocation_id)
         host_allocation.update(values)
         host_allocation.save(session=session)
-
-    return host_allocation_get(host_allocation_id)
+        return host_allocation
 
 
 def host_allocation_destroy(host_allocation_id):
@@ -564,6 +820,62 @@ def host_allocation_destroy(host_allocation_id):
         session.delete(host_allocation)
 
 
+def host_allocation_update_all(allocation_values, destroyed_ids=None):
+    """Update and delete host allocations in a single transaction.
+
+    :param allocation_values: a dictionary of {allocation id: values}
+    :param destroyed_ids: ids of the allocations to delete
+    """
+    with facade_wrapper.session_for_write() as session:
+        for host_allocation_id, values in allocation_values.items():
+            (session.query(models.ComputeHostAllocation)
+             .filter_by(id=host_allocation_id)
+             .update(values, synchronize_session=False))
+        if destroyed_ids:
+            (session.query(models.ComputeHostAllocation)
+             .filter(models.ComputeHostAllocation.id.in_(destroyed_ids))
+             .delete(synchronize_session=False))
+
+
+def host_allocation_create_all(reservation_id, host_ids, free_between=None):
+    """Create the allocations of a reservation in a single transaction.
+
+    :param free_between: optional (start, end) tuple. If set, the hosts are
+        first locked and checked to be reservable and free of allocations
+        overlapping the period. If they are not, nothing is created.
+    :return: whether the allocations were created
+    """
+    with facade_wrapper.session_for_write() as session:
+        if free_between is not None:
+            start_date, end_date = free_between
+            reservable_hosts = (
+                session.query(models.ComputeHost.id)
+                .filter(models.ComputeHost.id.in_(host_ids))
+                .filter(models.ComputeHost.reservable.is_(True))
+                .with_for_update().all())
+            if len(reservable_hosts) != len(set(host_ids)):
+                return False
+
+            conflict = (
+                session.query(models.ComputeHostAllocation.id)
+                .join(models.Reservation)
+                .join(models.Lease)
+                .filter(models.ComputeHostAllocation.compute_host_id.in_(
+                    host_ids))
+                .filter(models.Lease.start_date < end_date)
+                .filter(models.Lease.end_date > start_date)
+                .first())
+            if conflict is not None:
+                return False
+
+        session.add_all([
+            models.ComputeHostAllocation(compute_host_id=host_id,
+                                         reservation_id=reservation_id)
+            for host_id in host_ids])
+
+    return True
+
+
 # ComputeHost
 def _host_get(session, host_id):
     query = session.query(models.ComputeHost)
@@ -575,14 +887,109 @@ def _host_get_all(session):
     return query
 
 
-def host_get(host_id):
+def host_get(host_id, fields=None):
+    with facade_wrapper.session_for_read() as session:
+        query = session.query(models.ComputeHost).options(
+            *_fields_options(models.ComputeHost, fields))
+        return query.filter_by(id=host_id).first()
+
+
+def host_list(fields=None):
     with facade_wrapper.session_for_read() as session:
-        return _host_get(session, host_id)
+        query = session.query(models.ComputeHost).options(
+            *_fields_options(models.ComputeHost, fields))
+        return query.all()
 
 
-def host_list():
+def host_list_version():
     with facade_wrapper.session_for_read() as session:
-        return session.query(models.ComputeHost).all()
+        return _get_version(
+            session,
+            _version_select(models.ComputeHost),
+            _version_select(models.ComputeHostExtraCapability))
+
+
+def host_allocation_list_version():
+    with facade_wrapper.session_for_read() as session:
+        return _get_version(
+            session,
+            _version_select(models.ComputeHost),
+            _version_select(models.ComputeHostAllocation),
+            _version_select(models.Reservation),
+            _version_select(models.Lease))
+
+
+def _model_columns(model, fields):
+    columns = model.__table__.columns
+    return [columns[f] for f in ['id'] + sorted(set(fields) - {'id'})
+            if f in columns]
+
+
+def host_summary_get_all(host_ids, fields):
+    """Returns compact documents of the given hosts.
+
+    Each document only holds the host id and the requested fields, which
+    may be host columns or extra capabilities. Unknown fields are ignored.
+    """
+    if not host_ids:
+        return []
+
+    fields = set(fields)
+
+    with facade_wrapper.session_for_read() as session:
+        query = session.query(
+            *_model_columns(models.ComputeHost, fields)).filter(
+                models.ComputeHost.id.in_(host_ids))
+        summaries = {row.id: dict(row._mapping) for row in query}
+
+        capability_names = fields - set(models.ComputeHost.__table__.columns
+                                        .keys())
+        if capability_names and summaries:
+            query = (
+                session.query(
+                    models.ComputeHostExtraCapability.computehost_id,
+                    models.ComputeHostExtraCapability.capability_value,
+                    models.ResourceProperty.property_name)
+                .join(models.ResourceProperty)
+                .filter(
+                    models.ComputeHostExtraCapability.computehost_id.in_(
+                        list(summaries)),
+                    models.ResourceProperty.property_name.in_(
+                        capability_names)))
+            for host_id, value, name in query:
+                summaries[host_id][name] = value
+
+    return [summaries[host_id] for host_id in host_ids
+            if host_id in summaries]
+
+
+def host_get_all_by_ids(host_ids):
+    """Returns the given hosts merged with their extra capabilities."""
+    if not host_ids:
+        return []
+
+    with facade_wrapper.session_for_read() as session:
+        # NOTE: The joined relationships of the hosts are not used by
+        # to_dict(), and the extra capabilities are read by a separate query,
+        # so that each host is fetched as a single row.
+        query = (session.query(models.ComputeHost)
+                 .options(orm.lazyload('*'))
+                 .filter(models.ComputeHost.id.in_(host_ids)))
+        hosts = {host.id: host.to_dict() for host in query}
+
+        if hosts:
+            query = (
+                session.query(
+                    models.ComputeHostExtraCapability.computehost_id,
+                    models.ComputeHostExtraCapability.capability_value,
+                    models.ResourceProperty.property_name)
+                .join(models.ResourceProperty)
+                .filter(models.ComputeHostExtraCapability.computehost_id.in_(
+                    list(hosts))))
+            for host_id, value, name in query:
+                hosts[host_id][name] = value
+
+    return [hosts[host_id] for host_id in host_ids if host_id in hosts]
 
 
 def host_get_all_by_filters(filters):
@@ -723,8 +1130,7 @@ def host_update(host_id, values):
         host = _host_get(session, host_id)
         host.update(values)
         host.save(session=session)
-
-    return host_get(host_id)
+        return host
 
 
 def host_destroy(host_id):
@@ -873,6 +1279,93 @@ def host_trait_create(values):
     return None
 
 
+# HostHealingEntry
+
+def host_healing_entry_create_all_by_hosts(host_ids, start_date):
+    """Record the reservations allocated on failed hosts as to be healed.
+
+    Only reservations of leases ending after start_date are recorded and
+    pairs which are already recorded are skipped.
+
+    :return: the number of recorded pairs.
+    """
+    if not host_ids:
+        return 0
+
+    with facade_wrapper.session_for_write() as session:
+        allocations = (
+            session.query(models.ComputeHostAllocation.compute_host_id,
+                          models.ComputeHostAllocation.reservation_id)
+            .join(models.Reservation,
+                  models.Reservation.id ==
+                  models.ComputeHostAllocation.reservation_id)
+            .join(models.Lease)
+            .filter(models.ComputeHostAllocation.compute_host_id.in_(
+                host_ids))
+            .filter(models.Lease.end_date >= start_date)
+            .distinct().all())
+        existing = set(
+            session.query(models.HostHealingEntry.computehost_id,
+                          models.HostHealingEntry.reservation_id)
+            .filter(models.HostHealingEntry.computehost_id.in_(host_ids))
+            .all())
+
+        entries = [{'id': models._generate_unicode_uuid(),
+                    'computehost_id': host_id,
+                    'reservation_id': reservation_id}
+                   for host_id, reservation_id in allocations
+                   if (host_id, reservation_id) not in existing]
+        if entries:
+            session.execute(sa.insert(models.HostHealingEntry), entries)
+
+    return len(entries)
+
+
+def host_healing_entry_get_all_by_interval(start_date, end_date):
+    """Return entries whose lease overlaps the given interval."""
+    with facade_wrapper.session_for_read() as session:
+        query = (session.query(models.HostHealingEntry)
+                 .join(models.Reservation,
+                       models.Reservation.id ==
+                       models.HostHealingEntry.reservation_id)
+                 .join(models.Lease)
+                 .filter(models.Lease.end_date >= start_date)
+                 .filter(models.Lease.start_date <= end_date))
+        return query.all()
+
+
+def host_healing_entry_destroy_all(entry_ids):
+    """Delete the given entries."""
+    if not entry_ids:
+        return
+    with facade_wrapper.session_for_write() as session:
+        (session.query(models.HostHealingEntry)
+         .filter(models.HostHealingEntry.id.in_(entry_ids))
+         .delete(synchronize_session=False))
+
+
+def host_healing_entry_destroy_all_by_hosts(host_ids):
+    """Delete all the entries of the given hosts."""
+    if not host_ids:
+        return
+    with facade_wrapper.session_for_write() as session:
+        (session.query(models.HostHealingEntry)
+         .filter(models.HostHealingEntry.computehost_id.in_(host_ids))
+         .delete(synchronize_session=False))
+
+
+def host_healing_entry_destroy_all_expired(end_date):
+    """Delete all the entries of leases ended before end_date."""
+    with facade_wrapper.session_for_write() as session:
+        expired = (session.query(models.Reservation.id)
+                   .join(models.Lease)
+                   .filter(models.Lease.end_date < end_date))
+        (session.query(models.HostHealingEntry)
+         .filter(models.HostHealingEntry.reservation_id.in_(
+             expired.scalar_subquery()))
+         .delete(synchronize_session=False))
+
+
 # FloatingIP reservation
 
 def fip_reservation_create(fip_reservation_values):
@@ -906,8 +1399,7 @@ def fip_reservation_update(fip_reservation_id, fip_reservation_values):
         fip_reservation = _fip_reservation_get(session, fip_reservation_id)
         fip_reservation.update(fip_reservation_values)
         fip_reservation.save(session=session)
-
-    return fip_reservation_get(fip_reservation_id)
+        return fip_reservation
 
 
 def fip_reservation_destroy(fip_reservation_id):
@@ -955,8 +1447,7 @@ def required_fip_update(required_fip_id, required_fip_values):
         required_fip = _required_fip_get(session, required_fip_id)
         required_fip.update(required_fip_values)
         required_fip.save(session=session)
-
-    return required_fip_get(required_fip_id)
+        return required_fip
 
 
 def required_fip_destroy(required_fip_id):
@@ -1019,6 +1510,46 @@ def fip_allocation_get_all_by_values(**kwargs):
         return allocation_query.all()
 
 
+def fip_allocation_create_all(reservation_id, fip_ids, free_between=None):
+    """Create the allocations of a reservation in a single transaction.
+
+    :param free_between: optional (start, end) tuple. If set, the floating
+        IPs are first locked and checked to be reservable and free of
+        allocations overlapping the period. If they are not, nothing is
+        created.
+    :return: whether the allocations were created
+    """
+    with facade_wrapper.session_for_write() as session:
+        if free_between is not None:
+            start_date, end_date = free_between
+            reservable_fips = (
+                session.query(models.FloatingIP.id)
+                .filter(models.FloatingIP.id.in_(fip_ids))
+                .filter(models.FloatingIP.reservable.is_(True))
+                .with_for_update().all())
+            if len(reservable_fips) != len(set(fip_ids)):
+                return False
+
+            conflict = (
+                session.query(models.FloatingIPAllocation.id)
+                .join(models.Reservation)
+                .join(models.Lease)
+                .filter(models.FloatingIPAllocation.floatingip_id.in_(
+                    fip_ids))
+                .filter(models.Lease.start_date < end_date)
+                .filter(models.Lease.end_date > start_date)
+                .first())
+            if conflict is not None:
+                return False
+
+        session.add_all([
+            models.FloatingIPAllocation(floatingip_id=fip_id,
+                                        reservation_id=reservation_id)
+            for fip_id in fip_ids])
+
+    return True
+
+
 def fip_allocation_destroy(allocation_id):
     with facade_wrapper.session_for_write() as session:
         fip_allocation = _fip_allocation_get(session, allocation_id)
@@ -1036,8 +1567,7 @@ def fip_allocation_update(allocation_id, allocation_values):
         fip_allocation = _fip_allocation_get(session, allocation_id)
         fip_allocation.update(allocation_values)
         fip_allocation.save(session=session)
-
-    return fip_allocation_get(allocation_id)
+        return fip_allocation
 
 
 # Floating IP
@@ -1125,6 +1655,37 @@ def floatingip_list():
         return session.query(models.FloatingIP).all()
 
 
+def floatingip_get_all_by_ids(floatingip_ids):
+    if not floatingip_ids:
+        return []
+
+    with facade_wrapper.session_for_read() as session:
+        query = session.query(models.FloatingIP).filter(
+            models.FloatingIP.id.in_(floatingip_ids))
+        fips = {fip.id: fip for fip in query}
+
+    return [fips[fip_id] for fip_id in floatingip_ids if fip_id in fips]
+
+
+def floatingip_summary_get_all(floatingip_ids, fields):
+    """Returns compact documents of the given floating IPs.
+
+    Each document only holds the floating IP id and the requested fields.
+    Unknown fields are ignored.
+    """
+    if not floatingip_ids:
+        return []
+
+    with facade_wrapper.session_for_read() as session:
+        query = session.query(
+            *_model_columns(models.FloatingIP, fields)).filter(
+                models.FloatingIP.id.in_(floatingip_ids))
+        summaries = {row.id: dict(row._mapping) for row in query}
+
+    return [summaries[fip_id] for fip_id in floatingip_ids
+            if fip_id in summaries]
+
+
 def floatingip_create(values):
     values = values.copy()
     floatingip = models.FloatingIP()
@@ -1223,8 +1784,7 @@ def resource_property_update(resource_type, property_name, values):
 
         resource_property.update(values)
         resource_property.save(session=session)
-
-    return resource_property_get(resource_type, property_name)
+        return resource_property
 
 
 def _resource_property_get_or_create(session, resource_type, property_name):
@@ -1245,3 +1805,91 @@ def resource_property_get_or_create(resource_type, property_name):
     with facade_wrapper.session_for_write() as session:
         return _resource_property_get_or_create(
             session, resource_type, property_name)
+
+
+# ProjectUsage
+
+def project_usage_get(project_id):
+    with facade_wrapper.session_for_read() as session:
+        query = session.query(models.ProjectUsage)
+        return query.filter_by(project_id=project_id).first()
+
+
+def _project_usage_increment_stmt(project_id, period, values, limits):
+    usage = models.ProjectUsage
+
+    def not_negative(expr):
+        return sa.case((expr < 0, 0), else_=expr)
+
+    hours = values.get('resource_hours', 0)
+    new_hours = sa.case((usage.period == period, usage.resource_hours + hours),
+                        else_=hours)
+    # NOTE: MySQL evaluates the assignments in order, so resource_hours has
+    # to be computed before period is changed.
+    assignments = [
+        (usage.resource_hours, not_negative(new_hours)),
+        (usage.period, period),
+    ]
+    for counter in ('hosts', 'instances', 'floatingips'):
+        if values.get(counter):
+            column = getattr(usage, counter)
+            assignments.append(
+                (column, not_negative(column + values[counter])))
+
+    # NOTE: The limits are compared with the usage the statement updates,
+    # so that concurrent increments cannot exceed them together.
+    criteria = [usage.project_id == project_id]
+    for counter, limit in sorted(limits.items()):
+        if counter == 'resource_hours':
+            criteria.append(new_hours <= limit)
+        else:
+            criteria.append(
+                getattr(usage, counter) + values.get(counter, 0) <= limit)
+
+    return (sa.update(usage)
+            .where(*criteria)
+            .ordered_values(*assignments))
+
+
+def project_usage_increment(project_id, period, values, limits=None):
+    """Add amounts to the usage of a project in a single statement.
+
+    Counters never go below zero and resource_hours is reset when the
+    period changes.
+
+    :param values: a dictionary of {counter: amount to add}, counters being
+                   hosts, instances, floatingips and resource_hours.
+    :param limits: a dictionary of {counter: limit} the counters must not
+                   exceed once the amounts are added.
+    :return: False if a counter would exceed its limit, in which case the
+             usage is left unchanged, True otherwise.
+    """
+    limits = limits or {}
+    stmt = _project_usage_increment_stmt(project_id, period, values, limits)
+    with facade_wrapper.session_for_write() as session:
+        if session.execute(stmt).rowcount:
+            return True
+
+        if limits:
+            query = (session.query(models.ProjectUsage.project_id)
+                     .filter_by(project_id=project_id))
+            if query.first() is not None:
+                return False
+
+        project_usage = models.ProjectUsage()
+        project_usage.update({'project_id': project_id, 'period': period})
+        for counter in ('hosts', 'instances', 'floatingips',
+                        'resource_hours'):
+            project_usage[counter] = max(values.get(counter, 0), 0)
+            if project_usage[counter] > limits.get(counter, float('inf')):
+                return False
+
+        try:
+            # NOTE: The savepoint keeps the enclosing transaction, e.g. the
+            # one writing a lease, usable if the usage of the project is
+            # created concurrently.
+            with session.begin_nested():
+                project_usage.save(session=session)
+        except common_db_exc.DBDuplicateEntry:
+            return bool(session.execute(stmt).rowcount)
+        return True
@@ -12,6 +12,7 @@
 #    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 #    License for the specific language governing permissions and limitations
 #    under the License.
+import contextlib
 import threading
 
 from oslo_db.sqlalchemy import enginefacade
@@ -29,6 +30,45 @@ def session_for_write(sqlite_fk=False):
     return _get_facade(sqlite_fk=sqlite_fk).writer.using(_CONTEXT)
 
 
+@contextlib.contextmanager
+def transaction(run_after_commit=True):
+    """Run the enclosed sessions in a single write transaction.
+
+    Functions registered with after_commit() within the block are called
+    once the outermost transaction is committed. If run_after_commit is
+    False, they are not called and it is up to the caller to call the
+    (func, args, kwargs) tuples of the list yielded by the block.
+    """
+    callbacks = getattr(_CONTEXT, 'after_commit', None)
+    if callbacks is not None:
+        with session_for_write():
+            yield callbacks
+        return
+
+    callbacks = _CONTEXT.after_commit = []
+    try:
+        with session_for_write():
+            yield callbacks
+    finally:
+        _CONTEXT.after_commit = None
+
+    if run_after_commit:
+        for func, args, kwargs in callbacks:
+            func(*args, **kwargs)
+
+
+def after_commit(func, *args, **kwargs):
+    """Call func once the current transaction is committed.
+
+    Outside of a transaction, func is called immediately.
+    """
+    callbacks = getattr(_CONTEXT, 'after_commit', None)
+    if callbacks is None:
+        func(*args, **kwargs)
+    else:
+        callbacks.append((func, args, kwargs))
+
+
 def _clear_engine():
     global _engine_facade
     _engine_facade = None
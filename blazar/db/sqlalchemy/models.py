@@ -17,6 +17,7 @@
 from oslo_utils import uuidutils
 import sqlalchemy as sa
 from sqlalchemy.dialects.mysql import MEDIUMTEXT
+from sqlalchemy.orm import attributes
 from sqlalchemy.orm import relationship
 
 from blazar.db.sqlalchemy import model_base as mb
@@ -62,8 +63,13 @@ class Lease(mb.BlazarBase):
 
     def to_dict(self):
         d = super(Lease, self).to_dict()
-        d['reservations'] = [r.to_dict() for r in self.reservations]
-        d['events'] = [e.to_dict() for e in self.events]
+        # NOTE: Relationships are not loaded when only some fields of the
+        # lease are requested.
+        unloaded = attributes.instance_state(self).unloaded
+        if 'reservations' not in unloaded:
+            d['reservations'] = [r.to_dict() for r in self.reservations]
+        if 'events' not in unloaded:
+            d['events'] = [e.to_dict() for e in self.events]
         return d
 
 
@@ -312,6 +318,28 @@ class ComputeHostTrait(mb.BlazarBase):
         return super(ComputeHostTrait, self).to_dict()
 
 
+class HostHealingEntry(mb.BlazarBase):
+    """A pair of failed host and reservation which still needs healing."""
+
+    __tablename__ = 'host_healing_entries'
+
+    id = _id_column()
+    computehost_id = sa.Column(sa.String(36),
+                               sa.ForeignKey('computehosts.id',
+                                             ondelete='CASCADE'),
+                               nullable=False)
+    reservation_id = sa.Column(sa.String(36),
+                               sa.ForeignKey('reservations.id',
+                                             ondelete='CASCADE'),
+                               nullable=False)
+
+    __table_args__ = (sa.UniqueConstraint('computehost_id',
+                                          'reservation_id'),)
+
+    def to_dict(self):
+        return super(HostHealingEntry, self).to_dict()
+
+
 # Floating IP
 class FloatingIPReservation(mb.BlazarBase):
     """Description
@@ -376,3 +404,49 @@ class FloatingIP(mb.BlazarBase):
                            server_default=sa.true())
 
     __table_args__ = (sa.UniqueConstraint('subnet_id', 'floating_ip_address'),)
+
+
+# Usage enforcement
+class ProjectUsage(mb.BlazarBase):
+    """Resources held and resource-hours reserved by a project."""
+
+    __tablename__ = 'project_usages'
+
+    id = _id_column()
+    project_id = sa.Column(sa.String(255), nullable=False, unique=True)
+    period = sa.Column(sa.String(7), nullable=False)
+    hosts = sa.Column(sa.Integer, nullable=False, default=0)
+    instances = sa.Column(sa.Integer, nullable=False, default=0)
+    floatingips = sa.Column(sa.Integer, nullable=False, default=0)
+    resource_hours = sa.Column(sa.Float, nullable=False, default=0)
+
+    def to_dict(self):
+        return super(ProjectUsage, self).to_dict()
+
+
+# Lease change feed
+class LeaseChange(mb.BlazarBase):
+    """A change of a lease, numbered in the order of the changes."""
+
+    __tablename__ = 'lease_changes'
+
+    id = sa.Column(sa.BigInteger().with_variant(sa.Integer, 'sqlite'),
+                   primary_key=True, autoincrement=False)
+    lease_id = sa.Column(sa.String(36), nullable=False)
+    project_id = sa.Column(sa.String(255), nullable=True)
+    change = sa.Column(sa.String(16), nullable=False)
+    status = sa.Column(sa.String(255), nullable=True)
+    degraded = sa.Column(sa.Boolean, nullable=True)
+
+    def to_dict(self):
+        return super(LeaseChange, self).to_dict()
+
+
+class LeaseChangeSequence(mb.BlazarBase):
+    """The ID of the latest lease change, in a single row."""
+
+    __tablename__ = 'lease_change_sequence'
+
+    id = sa.Column(sa.Integer, primary_key=True, autoincrement=False)
+    value = sa.Column(sa.BigInteger().with_variant(sa.Integer, 'sqlite'),
+                      nullable=False)
@@ -0,0 +1,196 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Statistics of the database queries run by operations.
+
+The statements executed by a (green) thread are counted and timed for each
+operation it tracks, e.g. an RPC method or a lease event. Statements which
+only differ by their parameters, or by the number of values of an IN
+clause, have the same shape. Operations running more queries, or spending
+more time in them, than a budget are logged with their most frequent query
+shapes, which usually reveals N+1 querying.
+"""
+
+import collections
+import contextlib
+import re
+import threading
+import time
+
+from oslo_config import cfg
+from oslo_log import log as logging
+import sqlalchemy as sa
+
+opts = [
+    cfg.IntOpt('query_count_budget',
+               default=100,
+               min=0,
+               help='Operations of blazar-manager, i.e. RPC methods and '
+                    'lease events, running more database queries than this '
+                    'are logged with their most frequent queries. 0 '
+                    'disables the budget.'),
+    cfg.FloatOpt('query_time_budget',
+                 default=2.0,
+                 min=0,
+                 help='Operations of blazar-manager spending more time '
+                      '[seconds] than this in database queries are logged '
+                      'with their most frequent queries. 0 disables the '
+                      'budget.'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(opts)
+LOG = logging.getLogger(__name__)
+
+# Number of query shapes logged for an operation over budget.
+TOP_SHAPES = 5
+
+# Maximum length of the logged query shapes.
+SHAPE_LENGTH = 300
+
+_PARAMETER = r'(?:\?|%s|%\(\w+\)s|:\w+)'
+_PARAMETER_LIST = re.compile(
+    r'\(\s*%(p)s(?:\s*,\s*%(p)s)*\s*\)' % {'p': _PARAMETER})
+_WHITESPACE = re.compile(r'\s+')
+
+_local = threading.local()
+
+
+def shape(statement):
+    """Return the shape of a SQL statement."""
+    statement = _WHITESPACE.sub(' ', statement).strip()
+    return _PARAMETER_LIST.sub('(...)', statement)
+
+
+class QueryStats(object):
+    """Count and time of the queries run by an operation, by shape."""
+
+    def __init__(self, operation=None):
+        self.operation = operation
+        self.count = 0
+        self.time = 0.0
+        self.shapes = collections.Counter()
+        self.shape_times = collections.defaultdict(float)
+
+    def add(self, statement, seconds):
+        query_shape = shape(statement)
+        self.count += 1
+        self.time += seconds
+        self.shapes[query_shape] += 1
+        self.shape_times[query_shape] += seconds
+
+    def top(self, limit=TOP_SHAPES):
+        """Return the most frequent query shapes.
+
+        :return: a list of (shape, count, time) tuples, the most frequent
+                 and slowest shapes first.
+        """
+        shapes = sorted(self.shapes,
+                        key=lambda s: (self.shapes[s], self.shape_times[s]),
+                        reverse=True)
+        return [(s, self.shapes[s], self.shape_times[s])
+                for s in shapes[:limit]]
+
+    def format_top(self, limit=TOP_SHAPES):
+        return '\n'.join(
+            '%d queries in %.3fs: %s' % (count, seconds,
+                                         query_shape[:SHAPE_LENGTH])
+            for query_shape, count, seconds in self.top(limit))
+
+
+def _active():
+    stats = getattr(_local, 'stats', None)
+    if stats is None:
+        stats = _local.stats = []
+    return stats
+
+
+def start(operation=None):
+    """Start counting the queries run by the current thread.
+
+    :return: the QueryStats of the queries run until stop() is called with
+             it. The queries of nested operations are also counted by the
+             enclosing ones.
+    """
+    stats = QueryStats(operation)
+    _active().append(stats)
+    return stats
+
+
+def stop(stats):
+    """Stop counting queries in stats."""
+    active = _active()
+    if stats in active:
+        active.remove(stats)
+
+
+@contextlib.contextmanager
+def track(operation):
+    """Count the queries run by the block, and log them if over budget."""
+    stats = start(operation)
+    try:
+        yield stats
+    finally:
+        stop(stats)
+        _check_budget(stats)
+
+
+def _check_budget(stats):
+    count_budget = CONF.query_count_budget
+    time_budget = CONF.query_time_budget
+    if ((count_budget and stats.count > count_budget) or
+            (time_budget and stats.time > time_budget)):
+        LOG.warning('%(operation)s ran %(count)d database queries in '
+                    '%(time).3fs, over the budget of %(count_budget)d '
+                    'queries and %(time_budget).3fs. Most frequent '
+                    'queries:\n%(top)s',
+                    {'operation': stats.operation, 'count': stats.count,
+                     'time': stats.time, 'count_budget': count_budget,
+                     'time_budget': time_budget, 'top': stats.format_top()})
+    else:
+        LOG.debug('%(operation)s ran %(count)d database queries in '
+                  '%(time).3fs.',
+                  {'operation': stats.operation, 'count': stats.count,
+                   'time': stats.time})
+
+
+@sa.event.listens_for(sa.engine.Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+    if _active():
+        conn.info.setdefault('blazar_query_start', []).append(
+            time.monotonic())
+
+
+def _add(conn, statement):
+    starts = conn.info.get('blazar_query_start')
+    if not starts:
+        return
+    seconds = time.monotonic() - starts.pop()
+    for stats in _active():
+        stats.add(statement, seconds)
+
+
+@sa.event.listens_for(sa.engine.Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    _add(conn, statement)
+
+
+@sa.event.listens_for(sa.engine.Engine, 'handle_error')
+def _handle_error(exception_context):
+    # NOTE: Failed queries are counted too, and the time they started at
+    # must not be left behind on the connection.
+    if (exception_context.connection is not None and
+            exception_context.statement is not None):
+        _add(exception_context.connection, exception_context.statement)
@@ -82,7 +82,8 @@ def get_reservations_by_host_id(host_id, start_date, end_date):
         return query.all()
 
 
-def get_reservations_by_host_ids(host_ids, start_date, end_date):
+def get_reservations_by_host_ids(host_ids, start_date, end_date,
+                                 reservation_ids=None):
     with facade_wrapper.session_for_read() as session:
         border0 = start_date <= models.Lease.end_date
         border1 = models.Lease.start_date <= end_date
@@ -91,6 +92,8 @@ def get_reservations_by_host_ids(host_ids, start_date, end_date):
                  .filter(models.ComputeHostAllocation.compute_host_id
                          .in_(host_ids))
                  .filter(sa.and_(border0, border1)))
+        if reservation_ids is not None:
+            query = query.filter(models.Reservation.id.in_(reservation_ids))
         return query.all()
 
 
@@ -107,8 +107,10 @@ def get_reservations_by_host_id(host_id, start_date, end_date):
     return IMPL.get_reservations_by_host_id(host_id, start_date, end_date)
 
 
-def get_reservations_by_host_ids(host_ids, start_date, end_date):
-    return IMPL.get_reservations_by_host_ids(host_ids, start_date, end_date)
+def get_reservations_by_host_ids(host_ids, start_date, end_date,
+                                 reservation_ids=None):
+    return IMPL.get_reservations_by_host_ids(host_ids, start_date, end_date,
+                                             reservation_ids=reservation_ids)
 
 
 def get_reservation_allocations_by_host_ids(host_ids, start_date, end_date,
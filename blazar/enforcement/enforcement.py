@@ -13,7 +13,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import functools
+
+import eventlet
+
 from blazar.enforcement import filters
+from blazar.enforcement import usage
 from blazar.utils.openstack import base
 
 from oslo_config import cfg
@@ -47,6 +52,26 @@ class UsageEnforcement:
                 LOG.error("%s not in filters module.", filter_name)
 
         self.enabled_filters = list(self.enabled_filters)
+        self.allocation_fields = self._allocation_fields()
+        # NOTE: The usage of the projects is only read by the QuotaFilter,
+        # it is not recorded when the filter is not enabled.
+        self.quota_filter = None
+        for _filter in self.enabled_filters:
+            if isinstance(_filter, filters.QuotaFilter):
+                self.quota_filter = _filter
+
+    def _allocation_fields(self):
+        """Return the allocation fields needed by the enabled filters.
+
+        None means that at least one filter needs the full resource
+        documents.
+        """
+        fields = set()
+        for _filter in self.enabled_filters:
+            if _filter.allocation_fields is None:
+                return None
+            fields.update(_filter.allocation_fields)
+        return sorted(fields)
 
     def format_context(self, context, lease_values):
         ctx = context.to_dict()
@@ -71,29 +96,98 @@ class UsageEnforcement:
 
         return lease
 
+    def _run_filters(self, method, *args):
+        """Call the given method of all the enabled filters.
+
+        Filters are evaluated concurrently when several are enabled, so that
+        slow filters, e.g. calling an external service, don't add up. The
+        exception of the first failing filter, in the order of the enabled
+        filters, is raised once all of them have completed.
+        """
+        if len(self.enabled_filters) < 2:
+            for _filter in self.enabled_filters:
+                getattr(_filter, method)(*args)
+            return
+
+        def run(_filter):
+            try:
+                getattr(_filter, method)(*args)
+            except Exception as e:
+                return e
+
+        pool = eventlet.GreenPool(len(self.enabled_filters))
+        errors = list(pool.imap(run, self.enabled_filters))
+
+        for error in errors:
+            if error is not None:
+                raise error
+
     def check_create(self, context, lease_values, reservations, allocations):
+        """Run the filters on a lease creation.
+
+        :return: a function recording the usage of the lease, or None. It
+                 must be called within the transaction writing the lease,
+                 so that the usage is rolled back with it. It raises
+                 QuotaExceededException if the quota of the project would
+                 be exceeded.
+        """
         context = self.format_context(context, lease_values)
         lease = self.format_lease(lease_values, reservations, allocations)
 
-        for _filter in self.enabled_filters:
-            _filter.check_create(context, lease)
+        self._run_filters('check_create', context, lease)
+        if self.quota_filter is not None:
+            return functools.partial(self.quota_filter.record,
+                                     context['project_id'],
+                                     usage.lease_usage(lease))
 
     def check_update(self, context, current_lease, new_lease,
                      current_allocations, new_allocations,
                      current_reservations, new_reservations):
+        """Run the filters on a lease update, and record its usage change.
+
+        :raises: QuotaExceededException if the quota of the project would
+                 be exceeded by the update.
+        :return: a function reverting the recorded usage change, to be
+                 called if the update fails, or None.
+        """
         context = self.format_context(context, current_lease)
         current_lease = self.format_lease(current_lease, current_reservations,
                                           current_allocations)
         new_lease = self.format_lease(new_lease, new_reservations,
                                       new_allocations)
 
-        for _filter in self.enabled_filters:
-            _filter.check_update(context, current_lease, new_lease)
+        self._run_filters('check_update', context, current_lease, new_lease)
+        if self.quota_filter is None:
+            return
+
+        delta = usage.usage_delta(usage.lease_usage(current_lease),
+                                  usage.lease_usage(new_lease))
+        if not any(delta.values()):
+            return
+        self.quota_filter.record(context['project_id'], delta)
+        return functools.partial(
+            usage.increment, context['project_id'],
+            {counter: -amount for counter, amount in delta.items()})
 
     def on_end(self, context, lease, allocations):
         context = self.format_context(context, lease)
         lease_values = self.format_lease(lease, lease['reservations'],
                                          allocations)
 
-        for _filter in self.enabled_filters:
-            _filter.on_end(context, lease_values)
+        try:
+            self._run_filters('on_end', context, lease_values)
+        finally:
+            if self.quota_filter is not None:
+                usage.record_end(context['project_id'], lease_values)
+
+    def release(self, lease_values, reservations, allocations):
+        """Release the usage recorded for a lease which failed to be created.
+
+        This is only needed once the lease has been committed: otherwise its
+        usage is rolled back with it. Filters are not called because, from
+        their point of view, the lease has been allowed.
+        """
+        if self.quota_filter is None:
+            return
+        lease = self.format_lease(lease_values, reservations, allocations)
+        usage.record_end(lease_values['project_id'], lease)
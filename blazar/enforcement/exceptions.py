@@ -26,3 +26,9 @@ class MaxLeaseDurationException(exceptions.NotAuthorized):
 class ExternalServiceFilterException(exceptions.BlazarException):
     code = 400
     msg_fmt = _('%(message)s')
+
+
+class QuotaExceededException(exceptions.NotAuthorized):
+    code = 400
+    msg_fmt = _('Quota exceeded for %(resource)s: %(requested)s requested '
+                'while the limit is %(limit)s.')
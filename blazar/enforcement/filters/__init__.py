@@ -17,7 +17,8 @@ from blazar.enforcement.filters.external_service_filter import (
     ExternalServiceFilter)
 from blazar.enforcement.filters.max_lease_duration_filter import (
     MaxLeaseDurationFilter)
+from blazar.enforcement.filters.quota_filter import QuotaFilter
 
-__all__ = ['ExternalServiceFilter', 'MaxLeaseDurationFilter']
+__all__ = ['ExternalServiceFilter', 'MaxLeaseDurationFilter', 'QuotaFilter']
 
 all_filters = __all__
@@ -20,6 +20,10 @@ class BaseFilter(metaclass=abc.ABCMeta):
 
     enforcement_opts = []
 
+    # Fields of the allocated resources read by the filter, in addition to
+    # their id. None means that the full resource documents are needed.
+    allocation_fields = None
+
     def __init__(self, conf=None):
         self.conf = conf
         self.register_opts(conf)
@@ -14,10 +14,14 @@
 # limitations under the License.
 
 from datetime import datetime
+import hashlib
 import json
 import requests
+from requests import adapters
+import time
 from urllib.parse import urljoin
 from urllib.parse import urlparse
+from urllib3.util import retry
 
 from blazar.enforcement.exceptions import ExternalServiceFilterException
 from blazar.enforcement.filters import base_filter
@@ -67,9 +71,45 @@ class ExternalServiceFilter(base_filter.BaseFilter):
         cfg.StrOpt(
             'external_service_token',
             default="",
-            help='Token used for authentication with the external service.')
+            help='Token used for authentication with the external service.'),
+        cfg.FloatOpt(
+            'external_service_connect_timeout',
+            default=5.0,
+            min=0.1,
+            help='Timeout in seconds for connecting to the external '
+                 'service.'),
+        cfg.FloatOpt(
+            'external_service_read_timeout',
+            default=30.0,
+            min=0.1,
+            help='Timeout in seconds for reading the response of the '
+                 'external service.'),
+        cfg.IntOpt(
+            'external_service_retries',
+            default=3,
+            min=0,
+            help='Number of retries on connection errors with the external '
+                 'service. Requests which reached the service are never '
+                 'retried.'),
+        cfg.IntOpt(
+            'external_service_cache_ttl',
+            default=0,
+            min=0,
+            help='Time in seconds during which the result of a '
+                 'check-create or check-update request is reused for an '
+                 'identical request. If this is set to 0, results are not '
+                 'cached.'),
+        cfg.ListOpt(
+            'external_service_allocation_fields',
+            default=None,
+            help='Fields of the allocated resources sent to the external '
+                 'service, in addition to their id, e.g. '
+                 'hypervisor_hostname or extra capability names. If this '
+                 'is not set, the full resource documents are sent.'),
     ]
 
+    CACHE_MAX_SIZE = 1024
+
     def __init__(self, conf=None):
         super(ExternalServiceFilter, self).__init__(conf=conf)
 
@@ -97,6 +137,22 @@ class ExternalServiceFilter(base_filter.BaseFilter):
                 message=_("ExternalService has no endpoints set."))
 
         self.token = conf.enforcement.external_service_token
+        self.allocation_fields = (
+            conf.enforcement.external_service_allocation_fields)
+        self.timeout = (conf.enforcement.external_service_connect_timeout,
+                        conf.enforcement.external_service_read_timeout)
+        self.cache_ttl = conf.enforcement.external_service_cache_ttl
+        self._cache = {}
+
+        # A persistent session reuses the connections to the external
+        # service across requests.
+        self.session = requests.Session()
+        retries = retry.Retry(
+            total=conf.enforcement.external_service_retries,
+            read=0, status=0, backoff_factor=0.1)
+        adapter = adapters.HTTPAdapter(max_retries=retries)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
 
     @staticmethod
     def _validate_url(url):
@@ -129,11 +185,50 @@ class ExternalServiceFilter(base_filter.BaseFilter):
 
         return headers
 
-    def _post(self, url, body):
+    def _cache_get(self, key):
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at < time.monotonic():
+            del self._cache[key]
+            return None
+        return result
+
+    def _cache_set(self, key, result):
+        if len(self._cache) >= self.CACHE_MAX_SIZE:
+            now = time.monotonic()
+            self._cache = {k: v for k, v in self._cache.items()
+                           if v[0] >= now}
+            if len(self._cache) >= self.CACHE_MAX_SIZE:
+                # Evict the oldest entry
+                del self._cache[next(iter(self._cache))]
+        self._cache[key] = (time.monotonic() + self.cache_ttl, result)
+
+    def _post(self, url, body, cacheable=False):
         body = json.dumps(body, cls=ISODateTimeEncoder)
-        res = requests.post(url, headers=self._get_headers(), data=body)
+
+        cache_key = None
+        if cacheable and self.cache_ttl:
+            cache_key = hashlib.sha256(
+                (url + body).encode('utf-8')).hexdigest()
+            message = self._cache_get(cache_key)
+            if message is not None:
+                if message is True:
+                    return True
+                raise ExternalServiceFilterException(message=message)
+
+        try:
+            res = self.session.post(url, headers=self._get_headers(),
+                                    data=body, timeout=self.timeout)
+        except requests.RequestException as e:
+            LOG.warning("The External Service API request to %s failed: %s",
+                        url, e)
+            raise ExternalServiceFilterException(message=GENERIC_DENY_MSG)
 
         if res.status_code == 204:
+            if cache_key:
+                self._cache_set(cache_key, True)
             return True
         elif res.status_code == 403:
             try:
@@ -145,6 +240,8 @@ class ExternalServiceFilter(base_filter.BaseFilter):
                 LOG.debug("The External Service API returned a malformed "
                           "response (403): %s", res.content)
                 message = GENERIC_DENY_MSG
+            if cache_key:
+                self._cache_set(cache_key, message)
         else:
             # NOTE(yoctozepto): It is more secure not to send the actual
             # response to the end user as it may leak something.
@@ -157,13 +254,13 @@ class ExternalServiceFilter(base_filter.BaseFilter):
     def check_create(self, context, lease_values):
         if self.check_create_endpoint:
             self._post(self.check_create_endpoint, dict(
-                context=context, lease=lease_values))
+                context=context, lease=lease_values), cacheable=True)
 
     def check_update(self, context, current_lease_values, new_lease_values):
         if self.check_update_endpoint:
             self._post(self.check_update_endpoint, dict(
                 context=context, current_lease=current_lease_values,
-                lease=new_lease_values))
+                lease=new_lease_values), cacheable=True)
 
     def on_end(self, context, lease_values):
         if self.on_end_endpoint:
@@ -28,6 +28,8 @@ LOG = logging.getLogger(__name__)
 
 class MaxLeaseDurationFilter(base_filter.BaseFilter):
 
+    allocation_fields = ()
+
     enforcement_opts = [
         cfg.IntOpt(
             'max_lease_duration',
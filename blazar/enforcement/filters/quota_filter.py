@@ -0,0 +1,136 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from blazar.enforcement import exceptions
+from blazar.enforcement.filters import base_filter
+from blazar.enforcement import usage
+
+from oslo_config import cfg
+from oslo_log import log as logging
+
+
+UNLIMITED = -1
+
+
+LOG = logging.getLogger(__name__)
+
+
+class QuotaFilter(base_filter.BaseFilter):
+
+    allocation_fields = ()
+
+    enforcement_opts = [
+        cfg.IntOpt(
+            'quota_max_hosts',
+            default=UNLIMITED,
+            help='Maximum number of hosts a project can hold in leases which '
+                 'have not ended yet. If this is set to -1, there is no '
+                 'limit.'),
+        cfg.IntOpt(
+            'quota_max_instances',
+            default=UNLIMITED,
+            help='Maximum number of instances a project can hold in leases '
+                 'which have not ended yet. If this is set to -1, there is '
+                 'no limit.'),
+        cfg.IntOpt(
+            'quota_max_floatingips',
+            default=UNLIMITED,
+            help='Maximum number of floating IPs a project can hold in '
+                 'leases which have not ended yet. If this is set to -1, '
+                 'there is no limit.'),
+        cfg.FloatOpt(
+            'quota_max_resource_hours',
+            default=UNLIMITED,
+            help='Maximum number of resource-hours a project can reserve '
+                 'per calendar month. If this is set to -1, there is no '
+                 'limit.'),
+        cfg.ListOpt(
+            'quota_exempt_project_ids',
+            default=[],
+            help='Allow list of project ids exempt from filter constraints.'),
+    ]
+
+    def __init__(self, conf=None):
+        super(QuotaFilter, self).__init__(conf=conf)
+
+    def _exempt(self, context):
+        return (context['project_id'] in
+                self.conf.enforcement.quota_exempt_project_ids)
+
+    def _limits(self):
+        return {
+            'hosts': self.conf.enforcement.quota_max_hosts,
+            'instances': self.conf.enforcement.quota_max_instances,
+            'floatingips': self.conf.enforcement.quota_max_floatingips,
+            'resource_hours': self.conf.enforcement.quota_max_resource_hours,
+        }
+
+    def limits(self, project_id):
+        """Return the limits enforced on the usage of a project."""
+        if project_id in self.conf.enforcement.quota_exempt_project_ids:
+            return {}
+        return {k: v for k, v in self._limits().items() if v != UNLIMITED}
+
+    def check_for_quota_violation(self, project_id, delta):
+        limits = {k: v for k, v in self.limits(project_id).items()
+                  if delta[k] > 0}
+        if not limits:
+            return
+
+        current = usage.get(project_id)
+        for resource, limit in sorted(limits.items()):
+            requested = current[resource] + delta[resource]
+            if requested > limit:
+                raise exceptions.QuotaExceededException(
+                    resource=resource, requested=round(requested, 2),
+                    limit=limit)
+
+    def record(self, project_id, delta):
+        """Add a usage delta to the ledger, within the quota of a project.
+
+        The quota is checked by the statement updating the ledger, so that
+        concurrent leases cannot exceed it together, even though each of
+        them passed check_create() or check_update().
+
+        :raises: QuotaExceededException if the quota would be exceeded.
+        """
+        limits = self.limits(project_id)
+        if usage.increment(project_id, delta, limits):
+            return
+
+        self.check_for_quota_violation(project_id, delta)
+        # NOTE: The usage read by the check may predate the one the ledger
+        # compared with the limits, e.g. in a transaction of MySQL.
+        resource = min(k for k in limits if delta[k] > 0)
+        raise exceptions.QuotaExceededException(
+            resource=resource, requested='more than %s' % limits[resource],
+            limit=limits[resource])
+
+    def check_create(self, context, lease_values):
+        if self._exempt(context):
+            return
+
+        self.check_for_quota_violation(context['project_id'],
+                                       usage.lease_usage(lease_values))
+
+    def check_update(self, context, current_lease_values, new_lease_values):
+        if self._exempt(context):
+            return
+
+        self.check_for_quota_violation(
+            context['project_id'],
+            usage.usage_delta(usage.lease_usage(current_lease_values),
+                              usage.lease_usage(new_lease_values)))
+
+    def on_end(self, context, lease_values):
+        pass
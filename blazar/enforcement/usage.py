@@ -0,0 +1,113 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Per-project usage ledger.
+
+The ledger keeps, for each project, the number of hosts, instances and
+floating IPs held by its leases which have not ended yet, and the
+resource-hours reserved during the current calendar month. It is updated
+incrementally by the usage enforcement so that quota checks only read a
+single row.
+"""
+
+from oslo_utils import timeutils
+
+from blazar.db import api as db_api
+from blazar.plugins import flavor
+from blazar.plugins import floatingips
+from blazar.plugins import instances
+from blazar.plugins import oshosts
+
+COUNTERS = ('hosts', 'instances', 'floatingips')
+
+RESOURCE_COUNTERS = {
+    oshosts.RESOURCE_TYPE: 'hosts',
+    instances.RESOURCE_TYPE: 'instances',
+    flavor.RESOURCE_TYPE: 'instances',
+    floatingips.RESOURCE_TYPE: 'floatingips',
+}
+
+
+def current_period():
+    return timeutils.utcnow().strftime('%Y-%m')
+
+
+def _hours(start_date, end_date):
+    return max((end_date - start_date).total_seconds(), 0) / 3600.0
+
+
+def lease_usage(lease_values):
+    """Return the usage of a lease formatted by the usage enforcement.
+
+    :return: a dictionary of {counter: amount} with the hosts, instances and
+             floatingips counters and the resource_hours reserved by the
+             lease.
+    """
+    usage = dict.fromkeys(COUNTERS, 0)
+
+    for reservation in lease_values.get('reservations', []):
+        counter = RESOURCE_COUNTERS.get(reservation['resource_type'])
+        if counter is None:
+            continue
+        if counter == 'instances' and reservation.get('amount'):
+            usage[counter] += int(reservation['amount'])
+        else:
+            usage[counter] += len(reservation.get('allocations', []))
+
+    usage['resource_hours'] = sum(usage[c] for c in COUNTERS) * _hours(
+        lease_values['start_date'], lease_values['end_date'])
+    return usage
+
+
+def usage_delta(current_usage, new_usage):
+    return {k: new_usage[k] - current_usage[k] for k in new_usage}
+
+
+def get(project_id):
+    """Return the usage of a project for the current period."""
+    usage = db_api.project_usage_get(project_id)
+    if usage is None:
+        usage = dict.fromkeys(COUNTERS, 0)
+        usage['resource_hours'] = 0
+    elif usage['period'] != current_period():
+        usage['resource_hours'] = 0
+    return usage
+
+
+def increment(project_id, delta, limits=None):
+    """Add a usage delta to the ledger, within limits.
+
+    :param delta: a dictionary of {counter: amount}, as returned by
+                  lease_usage() or usage_delta().
+    :param limits: a dictionary of {counter: limit}. Only the counters which
+                   delta increases are checked against their limit.
+    :return: False if a counter would exceed its limit, in which case the
+             ledger is left unchanged, True otherwise.
+    """
+    if not any(delta.values()):
+        return True
+    limits = {counter: limit for counter, limit in (limits or {}).items()
+              if delta.get(counter, 0) > 0}
+    return db_api.project_usage_increment(project_id, current_period(),
+                                          delta, limits)
+
+
+def record_end(project_id, lease_values):
+    """Release the resources of a lease and refund its unused hours."""
+    usage = lease_usage(lease_values)
+    delta = {c: -usage[c] for c in COUNTERS}
+    unused_hours = _hours(
+        max(timeutils.utcnow(), lease_values['start_date']),
+        lease_values['end_date'])
+    delta['resource_hours'] = -sum(usage[c] for c in COUNTERS) * unused_hours
+    db_api.project_usage_increment(project_id, current_period(), delta)
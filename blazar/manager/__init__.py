@@ -20,6 +20,13 @@ opts = [
     cfg.StrOpt('rpc_topic',
                default='blazar.manager',
                help='The topic Blazar uses for blazar-manager messages.'),
+    cfg.IntOpt('rpc_packing_threshold',
+               default=64 * 1024,
+               min=0,
+               help='Size in bytes above which the results of RPC calls to '
+                    'blazar-manager are packed with msgpack and compressed '
+                    'with zlib, if the caller supports it. Set to 0 to '
+                    'never pack results.'),
 ]
 
 CONF = cfg.CONF
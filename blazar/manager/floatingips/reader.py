@@ -0,0 +1,35 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from blazar.plugins.floatingips import floatingip_plugin
+from blazar.utils import service
+
+
+class ManagerDBReader(object):
+    """Database backed version of the read calls of the Manager RPC API.
+
+    Used by blazar-api to serve read-only requests without going through
+    blazar-manager. The results are the same as those of the RPC calls.
+    """
+
+    def __init__(self):
+        self.plugin = floatingip_plugin.FloatingIpPlugin()
+
+    def get_floatingip(self, floatingip_id):
+        """Get detailed info about a floatingip."""
+        return service.rpc_primitive(
+            self.plugin.get_floatingip(floatingip_id))
+
+    def list_floatingips(self):
+        """List all floatingips."""
+        return service.rpc_primitive(self.plugin.list_floatingip())
@@ -0,0 +1,48 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from blazar.db import api as db_api
+from blazar.utils import service
+
+
+class ManagerDBReader(object):
+    """Database backed version of the read calls of the Manager RPC API.
+
+    Used by blazar-api to serve read-only requests without going through
+    blazar-manager. The results are the same as those of the RPC calls.
+    """
+
+    def get_lease(self, lease_id, fields=None):
+        """Get detailed info about some lease."""
+        return service.rpc_primitive(db_api.lease_get(lease_id, fields))
+
+    def list_leases(self, project_id=None, query=None, fields=None):
+        """List all leases.
+
+        The leases are returned by a generator reading them from the
+        database in batches, to be streamed to the client.
+        """
+        return (service.rpc_primitive(lease)
+                for lease in db_api.lease_list_iter(project_id, fields))
+
+    def get_leases_version(self, project_id=None):
+        """Get the version of the lease list."""
+        return service.rpc_primitive(db_api.lease_list_version(project_id))
+
+    def list_lease_changes(self, since, limit=100):
+        """List the lease changes following the change with ID since."""
+        return service.rpc_primitive(db_api.lease_change_list(since, limit))
+
+    def get_latest_lease_change_id(self):
+        """Get the ID of the latest lease change."""
+        return db_api.lease_change_latest()
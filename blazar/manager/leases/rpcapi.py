@@ -26,18 +26,50 @@ class ManagerRPCAPI(service.RPCClient):
         """Initiate RPC API client with needed topic and RPC version."""
         super(ManagerRPCAPI, self).__init__(manager.get_target())
 
-    def get_lease(self, lease_id):
-        """Get detailed info about some lease."""
+    def get_lease(self, lease_id, fields=None):
+        """Get detailed info about some lease.
+
+        If fields is set, only these fields of the lease are returned.
+        """
+        if fields is not None:
+            return self.call('get_lease', lease_id=lease_id, fields=fields)
         return self.call('get_lease', lease_id=lease_id)
 
-    def list_leases(self, project_id=None, query=None):
+    def list_leases(self, project_id=None, query=None, fields=None):
         """List all leases."""
+        if fields is not None:
+            return self.call('list_leases', project_id=project_id,
+                             query=query, fields=fields)
         return self.call('list_leases', project_id=project_id, query=query)
 
-    def create_lease(self, lease_values):
-        """Create lease with specified parameters."""
+    def get_leases_version(self, project_id=None):
+        """Get the version of the lease list."""
+        return self.call('get_leases_version', project_id=project_id)
+
+    def list_lease_changes(self, since, limit=100):
+        """List the lease changes following the change with ID since."""
+        return self.call('list_lease_changes', since=since, limit=limit)
+
+    def get_latest_lease_change_id(self):
+        """Get the ID of the latest lease change."""
+        return self.call('get_latest_lease_change_id')
+
+    def create_lease(self, lease_values, wait=True):
+        """Create lease with specified parameters.
+
+        If wait is False, the lease is returned before its remote resources
+        are created.
+        """
+        if not wait:
+            return self.call('create_lease', lease_values=lease_values,
+                             wait=False)
         return self.call('create_lease', lease_values=lease_values)
 
+    def create_leases(self, leases_values, trust_id, atomic=True):
+        """Create several leases sharing the same trust."""
+        return self.call('create_leases', leases_values=leases_values,
+                         trust_id=trust_id, atomic=atomic)
+
     def update_lease(self, lease_id, values):
         """Update lease with passes values dictionary."""
         return self.call('update_lease', lease_id=lease_id, values=values)
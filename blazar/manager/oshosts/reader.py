@@ -0,0 +1,60 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from blazar.plugins.oshosts import host_plugin
+from blazar.utils import service
+
+
+class ManagerDBReader(object):
+    """Database backed version of the read calls of the Manager RPC API.
+
+    Used by blazar-api to serve read-only requests without going through
+    blazar-manager. The results are the same as those of the RPC calls.
+    """
+
+    def __init__(self):
+        # NOTE: The plugin only creates its OpenStack clients when they are
+        # used, which never happens for reads.
+        self.plugin = host_plugin.PhysicalHostPlugin()
+
+    def get_computehost(self, host_id, fields=None):
+        """Get detailed info about some computehost."""
+        return service.rpc_primitive(
+            self.plugin.get_computehost(host_id, fields=fields))
+
+    def list_computehosts(self, query=None, fields=None):
+        """List all computehosts."""
+        return service.rpc_primitive(
+            self.plugin.list_computehosts(query, fields=fields))
+
+    def get_computehosts_version(self):
+        """Get the version of the computehost list."""
+        return service.rpc_primitive(self.plugin.get_computehosts_version())
+
+    def list_allocations(self, query):
+        """List all allocations on all computehosts."""
+        return service.rpc_primitive(self.plugin.list_allocations(query))
+
+    def get_allocations_version(self):
+        """Get the version of the allocation list."""
+        return service.rpc_primitive(self.plugin.get_allocations_version())
+
+    def get_allocations(self, host_id, query):
+        """List all allocations on a specified computehost."""
+        return service.rpc_primitive(
+            self.plugin.get_allocations(host_id, query))
+
+    def list_resource_properties(self, query):
+        """List resource properties and possible values for computehosts."""
+        return service.rpc_primitive(
+            self.plugin.list_resource_properties(query))
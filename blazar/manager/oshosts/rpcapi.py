@@ -33,14 +33,27 @@ class ManagerRPCAPI(service.RPCClient):
         """Initiate RPC API client with needed topic and RPC version."""
         super(ManagerRPCAPI, self).__init__(manager.get_target())
 
-    def get_computehost(self, host_id):
-        """Get detailed info about some computehost."""
+    def get_computehost(self, host_id, fields=None):
+        """Get detailed info about some computehost.
+
+        If fields is set, only these fields of the computehost are returned.
+        """
+        if fields is not None:
+            return self.call('physical:host:get_computehost', host_id=host_id,
+                             fields=fields)
         return self.call('physical:host:get_computehost', host_id=host_id)
 
-    def list_computehosts(self, query=None):
+    def list_computehosts(self, query=None, fields=None):
         """List all computehosts."""
+        if fields is not None:
+            return self.call('physical:host:list_computehosts', query=query,
+                             fields=fields)
         return self.call('physical:host:list_computehosts', query=query)
 
+    def get_computehosts_version(self):
+        """Get the version of the computehost list."""
+        return self.call('physical:host:get_computehosts_version')
+
     def create_computehost(self, host_values):
         """Create computehost with specified parameters."""
         return self.call('physical:host:create_computehost',
@@ -60,6 +73,10 @@ class ManagerRPCAPI(service.RPCClient):
         """List all allocations on all computehosts."""
         return self.call('physical:host:list_allocations', query=query)
 
+    def get_allocations_version(self):
+        """Get the version of the allocation list."""
+        return self.call('physical:host:get_allocations_version')
+
     def get_allocations(self, host_id, query):
         """List all allocations on a specified computehost."""
         return self.call('physical:host:get_allocations',
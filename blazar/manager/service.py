@@ -31,9 +31,12 @@ from blazar import enforcement
 from blazar import exceptions as common_ex
 from blazar import manager
 from blazar.manager import exceptions
+from blazar import metrics
 from blazar import monitor
 from blazar.notification import api as notification_api
 from blazar import status
+from blazar.utils import plugins as plugins_utils
+from blazar.utils import request_cache
 from blazar.utils import service as service_utils
 from blazar.utils import trusts
 
@@ -52,7 +55,13 @@ manager_opts = [
                default=1,
                min=0,
                max=50,
-               help='Number of times to retry an event action.')
+               help='Number of times to retry an event action.'),
+    cfg.IntOpt('lease_changes_retention',
+               default=24,
+               min=1,
+               help='Number of hours lease changes are kept for the lease '
+                    'change feed. Watchers which fall further behind have '
+                    'to read the leases again.'),
 ]
 
 CONF = cfg.CONF
@@ -63,6 +72,8 @@ LEASE_DATE_FORMAT = "%Y-%m-%d %H:%M"
 
 EVENT_INTERVAL = 10
 
+LEASE_CHANGES_PURGE_INTERVAL = 3600
+
 
 class ManagerService(service_utils.RPCServer):
     """Service class for the blazar-manager service.
@@ -77,17 +88,56 @@ class ManagerService(service_utils.RPCServer):
         self.plugins = self._get_plugins()
         self.resource_actions = self._setup_actions()
         self.monitors = monitor.load_monitors(self.plugins)
+        # Green threads creating the remote resources of leases created
+        # asynchronously, by lease ID.
+        self._lease_creations = {}
         self.enforcement = enforcement.UsageEnforcement()
 
     def start(self):
+        # NOTE: This runs before the RPC server accepts calls, so no lease
+        # is being created yet.
+        self._fail_interrupted_creations()
         super(ManagerService, self).start()
         # NOTE(jakecoll): stop_on_exception=False was added because database
         # exceptions would prevent threads from being scheduled again.
         # TODO(jakecoll): Find a way to test this.
         self.tg.add_timer_args(EVENT_INTERVAL, self._process_events,
                                stop_on_exception=False)
+        self.tg.add_timer_args(LEASE_CHANGES_PURGE_INTERVAL,
+                               self._purge_lease_changes,
+                               stop_on_exception=False)
         for m in self.monitors:
             m.start_monitoring()
+        metrics.start_server()
+
+    def stop(self):
+        super(ManagerService, self).stop()
+        # NOTE: Let the leases created asynchronously get their remote
+        # resources, rather than leave them in CREATING.
+        for creation in list(self._lease_creations.values()):
+            self._wait_lease_creation(creation)
+        # NOTE: Publish the notifications of the last lease operations,
+        # which are sent in the background.
+        notification_api.flush()
+
+    def _fail_interrupted_creations(self):
+        """Move the leases left in CREATING by a previous run to ERROR.
+
+        Their remote resources may have been partially created, and can only
+        be cleaned up by deleting them.
+        """
+        for lease in db_api.lease_get_all_by_status(status.lease.CREATING):
+            LOG.error("The creation of lease %s was interrupted. Setting its "
+                      "status to ERROR.", lease['id'])
+            db_api.lease_update(lease['id'], {'status': status.lease.ERROR})
+
+    @staticmethod
+    def _wait_lease_creation(creation):
+        try:
+            creation.wait()
+        except Exception:
+            # NOTE: The failures are logged by _complete_lease_creation().
+            pass
 
     def _get_plugins(self):
         """Return dict of resource-plugin class pairs."""
@@ -142,6 +192,7 @@ class ManagerService(service_utils.RPCServer):
             actions[resource_type]['on_start'] = plugin.on_start
             actions[resource_type]['on_end'] = plugin.on_end
             actions[resource_type]['before_end'] = plugin.before_end
+            actions[resource_type]['prepare'] = plugin.prepare
             plugin.setup(None)
         return actions
 
@@ -184,12 +235,14 @@ class ManagerService(service_utils.RPCServer):
 
         Events are selected to be executed concurrently if they are of the same
         type, while keeping strict time ordering and the following priority of
-        event types: before_end_lease, end_lease, and start_lease (except for
-        before_end_lease events where there is a start_lease event for the same
-        lease at the same time).
+        event types: prepare_lease, before_end_lease, end_lease, and
+        start_lease (except for before_end_lease events where there is a
+        start_lease event for the same lease at the same time).
 
         We ensure that:
 
+        - the prepare_lease event of a lease is executed before its
+          start_lease event,
         - the before_end_lease event of a lease is executed after the
           start_lease event and before the end_lease event of the same lease,
         - for two reservations using the same hosts back to back, the end_lease
@@ -218,6 +271,7 @@ class ManagerService(service_utils.RPCServer):
                     deferred_end_events.append(e)
 
         return [
+            events_by_type['prepare_lease'],
             events_by_type['before_end_lease'],
             events_by_type['end_lease'],
             events_by_type['start_lease'],
@@ -243,8 +297,21 @@ class ManagerService(service_utils.RPCServer):
         for batch in self._select_for_execution(events):
             self._process_events_concurrently(batch)
 
+    def _purge_lease_changes(self):
+        before = timeutils.utcnow() - datetime.timedelta(
+            hours=CONF.manager.lease_changes_retention)
+        purged = db_api.lease_change_purge(before)
+        LOG.debug('Purged %d lease changes.', purged)
+
     def _exec_event(self, event):
         """Execute an event function"""
+        with metrics.EVENT_DURATION.labels(event['event_type']).time():
+            with db_api.track_queries('Event %s of lease %s'
+                                      % (event['event_type'],
+                                         event['lease_id'])):
+                self._run_event(event)
+
+    def _run_event(self, event):
         event_fn = getattr(self, event['event_type'], None)
         if event_fn is None:
             raise exceptions.EventError(
@@ -330,24 +397,149 @@ class ManagerService(service_utils.RPCServer):
         if missing_attr:
             raise exceptions.MissingParameter(param=', '.join(missing_attr))
 
-    def get_lease(self, lease_id):
-        return db_api.lease_get(lease_id)
+    def get_lease(self, lease_id, fields=None):
+        return db_api.lease_get(lease_id, fields)
 
-    def list_leases(self, project_id=None, query=None):
-        return db_api.lease_list(project_id)
+    def _get_existing_lease(self, lease_id):
+        lease = db_api.lease_get(lease_id)
+        if lease is None:
+            raise common_ex.NotFound(object={'lease_id': lease_id})
+        return lease
+
+    def _rename_lease(self, lease_id, values):
+        try:
+            return db_api.lease_update(lease_id, values)
+        except db_ex.BlazarDBNotFound:
+            raise common_ex.NotFound(object={'lease_id': lease_id})
+
+    def list_leases(self, project_id=None, query=None, fields=None):
+        return db_api.lease_list(project_id, fields)
 
-    def create_lease(self, lease_values):
+    def get_leases_version(self, project_id=None):
+        return db_api.lease_list_version(project_id)
+
+    def list_lease_changes(self, since, limit=100):
+        return db_api.lease_change_list(since, limit)
+
+    def get_latest_lease_change_id(self):
+        return db_api.lease_change_latest()
+
+    def create_lease(self, lease_values, wait=True):
         """Create a lease with reservations.
 
         Return either the model of created lease or None if any error.
-        """
-        lease_values['status'] = status.lease.CREATING
 
+        If wait is False, the lease is returned in CREATING status once it
+        is stored, and its remote resources, e.g. Nova aggregates, are
+        created in the background.
+        """
         try:
             trust_id = lease_values.pop('trust_id')
         except KeyError:
             raise exceptions.MissingTrustId()
 
+        reservations, events = self._prepare_lease(lease_values)
+
+        # NOTE: The request cache lets reserve_resource() reuse the
+        # allocation candidates computed for the enforcement checks.
+        with trusts.create_ctx_from_trust(trust_id) as ctx, \
+                request_cache.scope():
+            return self._create_lease(ctx, trust_id, lease_values,
+                                      reservations, events, wait=wait)
+
+    def create_leases(self, leases_values, trust_id, atomic=True):
+        """Create several leases of a project sharing the same trust.
+
+        :param leases_values: list of lease values, as for create_lease().
+        :param trust_id: trust used by all the leases.
+        :param atomic: if True, either all the leases are created or none
+                       of them is. Otherwise leases are created one by one
+                       and failures are reported in the result.
+        :return: a list containing, for each lease, either {'lease': lease}
+                 or {'error': error}.
+        """
+        if not atomic:
+            return self._create_leases_best_effort(leases_values, trust_id)
+
+        prepared = [(lease_values,) + self._prepare_lease(lease_values)
+                    for lease_values in leases_values]
+
+        with trusts.create_ctx_from_trust(trust_id) as ctx, \
+                request_cache.scope():
+            # NOTE: All the enforcement filters run before any row is
+            # written, since they are not part of the transaction.
+            checked = []
+            leases = []
+            try:
+                for lease_values, reservations, events in prepared:
+                    allocations, record_usage = self._check_lease(
+                        ctx, trust_id, lease_values, reservations, events)
+                    checked.append((lease_values, reservations, allocations,
+                                    record_usage))
+
+                # Leases are written in order in a single transaction, so
+                # each reservation sees the allocations of the previous
+                # leases of the batch, and the usage of the project
+                # includes the previous leases of the batch.
+                with db_api.transaction():
+                    for (lease_values, reservations, events), check in zip(
+                            prepared, checked):
+                        leases.append(self._create_lease_rows(
+                            lease_values, reservations, events))
+                        self._record_lease_usage(check[3])
+            except Exception:
+                with save_and_reraise_exception():
+                    LOG.exception("Failed to create a batch of leases. "
+                                  "Rollback the leases and associated "
+                                  "reservations")
+                    committed = [self._destroy_lease_rows(lease['id'])
+                                 for lease in leases]
+                    if any(committed):
+                        for lease_values, reservations, allocations, _ in (
+                                checked):
+                            self.enforcement.release(
+                                lease_values, reservations, allocations)
+
+            return [{'lease': self._activate_lease(ctx, lease)}
+                    for lease in leases]
+
+    def _create_leases_best_effort(self, leases_values, trust_id):
+        results = []
+        with trusts.create_ctx_from_trust(trust_id) as ctx, \
+                request_cache.scope():
+            for lease_values in leases_values:
+                try:
+                    reservations, events = self._prepare_lease(lease_values)
+                    lease = self._create_lease(ctx, trust_id, lease_values,
+                                               reservations, events)
+                except common_ex.BlazarException as e:
+                    LOG.error("Failed to create lease %s of a batch. %s",
+                              lease_values.get('name'), str(e))
+                    results.append({'error': {'error_code': e.code,
+                                              'error_message': str(e),
+                                              'error_name': e.code}})
+                except Exception:
+                    # NOTE: The leases created before are committed, so
+                    # their results must be returned whatever the error of
+                    # a lease, e.g. a database deadlock.
+                    LOG.exception("Failed to create lease %s of a batch.",
+                                  lease_values.get('name'))
+                    results.append({'error': {
+                        'error_code': 500,
+                        'error_message': 'Internal error while creating '
+                                         'the lease',
+                        'error_name': 'INTERNAL_SERVER_ERROR'}})
+                else:
+                    results.append({'lease': lease})
+        return results
+
+    def _prepare_lease(self, lease_values):
+        """Validate the values of a new lease.
+
+        :return: the reservation and event values, removed from lease_values.
+        """
+        lease_values['status'] = status.lease.CREATING
+
         self.validate_params(lease_values, ['name', 'start_date', 'end_date'])
 
         # Remove and keep event and reservation values
@@ -368,98 +560,177 @@ class ManagerService(service_utils.RPCServer):
             raise common_ex.InvalidInput(
                 'End date must be later than start date.')
 
-        with trusts.create_ctx_from_trust(trust_id) as ctx:
-            # NOTE(priteau): We should not get user_id from ctx, because we are
-            # in the context of the trustee (blazar user).
-            # lease_values['user_id'] is set in blazar/api/v1/service.py
-            lease_values['project_id'] = ctx.project_id
-            lease_values['start_date'] = start_date
-            lease_values['end_date'] = end_date
+        lease_values['start_date'] = start_date
+        lease_values['end_date'] = end_date
+        return reservations, events
 
-            allocations = self._allocation_candidates(
-                lease_values, reservations)
-            try:
-                self.enforcement.check_create(
-                    context.current(), lease_values, reservations, allocations)
-            except common_ex.NotAuthorized as e:
-                LOG.error("Enforcement checks failed. %s", str(e))
-                raise common_ex.NotAuthorized(e)
+    def _check_lease(self, ctx, trust_id, lease_values, reservations, events):
+        """Run the enforcement checks and complete the lease values.
 
-            events.append({'event_type': 'start_lease',
-                           'time': start_date,
-                           'status': status.event.UNDONE})
-            events.append({'event_type': 'end_lease',
-                           'time': end_date,
+        :return: the allocation candidates of the reservations, and the
+                 function recording the usage of the lease, or None, to be
+                 passed to _record_lease_usage().
+        """
+        # NOTE(priteau): We should not get user_id from ctx, because we are
+        # in the context of the trustee (blazar user).
+        # lease_values['user_id'] is set in blazar/api/v1/service.py
+        lease_values['project_id'] = ctx.project_id
+
+        allocations = self._allocation_candidates(
+            lease_values, reservations)
+        try:
+            record_usage = self.enforcement.check_create(
+                context.current(), lease_values, reservations, allocations)
+        except common_ex.NotAuthorized as e:
+            LOG.error("Enforcement checks failed. %s", str(e))
+            raise common_ex.NotAuthorized(e)
+
+        events.append({'event_type': 'start_lease',
+                       'time': lease_values['start_date'],
+                       'status': status.event.UNDONE})
+        events.append({'event_type': 'end_lease',
+                       'time': lease_values['end_date'],
+                       'status': status.event.UNDONE})
+
+        prepare_date = plugins_utils.provisioning_date(
+            lease_values['start_date'])
+        if prepare_date:
+            events.append({'event_type': 'prepare_lease',
+                           'time': prepare_date,
                            'status': status.event.UNDONE})
 
-            before_end_date = lease_values.get('before_end_date', None)
-            if before_end_date:
-                # incoming param. Validation check
-                try:
-                    before_end_date = self._date_from_string(
-                        before_end_date)
-                    self._check_date_within_lease_limits(before_end_date,
-                                                         lease_values)
-                except common_ex.BlazarException as e:
-                    LOG.error("Invalid before_end_date param. %s", str(e))
-                    raise e
-            elif CONF.manager.minutes_before_end_lease > 0:
-                delta = datetime.timedelta(
-                    minutes=CONF.manager.minutes_before_end_lease)
-                before_end_date = lease_values['end_date'] - delta
+        before_end_date = lease_values.get('before_end_date', None)
+        if before_end_date:
+            # incoming param. Validation check
+            try:
+                before_end_date = self._date_from_string(
+                    before_end_date)
+                self._check_date_within_lease_limits(before_end_date,
+                                                     lease_values)
+            except common_ex.BlazarException as e:
+                LOG.error("Invalid before_end_date param. %s", str(e))
+                raise e
+        elif CONF.manager.minutes_before_end_lease > 0:
+            delta = datetime.timedelta(
+                minutes=CONF.manager.minutes_before_end_lease)
+            before_end_date = lease_values['end_date'] - delta
 
-            if before_end_date:
-                event = {'event_type': 'before_end_lease',
-                         'status': status.event.UNDONE}
-                events.append(event)
-                self._update_before_end_event_date(event, before_end_date,
-                                                   lease_values)
+        if before_end_date:
+            event = {'event_type': 'before_end_lease',
+                     'status': status.event.UNDONE}
+            events.append(event)
+            self._update_before_end_event_date(event, before_end_date,
+                                               lease_values)
 
-            try:
-                if trust_id:
-                    lease_values.update({'trust_id': trust_id})
-                lease = db_api.lease_create(lease_values)
-                lease_id = lease['id']
-            except db_ex.BlazarDBDuplicateEntry:
-                LOG.exception('Cannot create a lease - duplicated lease name')
-                raise exceptions.LeaseNameAlreadyExists(
-                    name=lease_values['name'])
-            except db_ex.BlazarDBException:
-                with save_and_reraise_exception():
-                    LOG.exception('Cannot create a lease')
-            else:
+        if trust_id:
+            lease_values.update({'trust_id': trust_id})
+
+        return allocations, record_usage
+
+    def _record_lease_usage(self, record_usage):
+        """Record the usage of a new lease, within its transaction.
+
+        The usage ledger is updated only if the quota of the project is not
+        exceeded, so that concurrent leases can't exceed it together.
+        """
+        if record_usage is None:
+            return
+        try:
+            record_usage()
+        except common_ex.NotAuthorized as e:
+            LOG.error("Enforcement checks failed. %s", str(e))
+            raise common_ex.NotAuthorized(e)
+
+    def _create_lease(self, ctx, trust_id, lease_values, reservations,
+                      events, wait=True):
+        allocations, record_usage = self._check_lease(
+            ctx, trust_id, lease_values, reservations, events)
+
+        # NOTE: The lease, reservation, allocation and event rows, and the
+        # usage of the lease, are written in a single transaction. Plugins
+        # create the remote resources, e.g. Nova aggregates, once it is
+        # committed.
+        lease = None
+        try:
+            with db_api.transaction(run_after_commit=wait) as callbacks:
+                lease = self._create_lease_rows(lease_values, reservations,
+                                                events)
+                self._record_lease_usage(record_usage)
+        except Exception as e:
+            with save_and_reraise_exception():
+                if not isinstance(e, (exceptions.LeaseNameAlreadyExists,
+                                      common_ex.NotAuthorized)):
+                    LOG.exception("Failed to create a lease. Rollback the "
+                                  "lease and associated reservations")
+                if (lease is not None and
+                        self._destroy_lease_rows(lease['id'])):
+                    self.enforcement.release(lease_values, reservations,
+                                             allocations)
+
+        if not wait:
+            self._lease_creations[lease['id']] = eventlet.spawn(
+                self._complete_lease_creation, ctx, lease, callbacks,
+                lease_values, reservations, allocations)
+            return db_api.lease_get(lease['id'])
+
+        return self._activate_lease(ctx, lease)
+
+    def _complete_lease_creation(self, ctx, lease, callbacks, lease_values,
+                                 reservations, allocations):
+        """Create the remote resources of a lease stored in CREATING."""
+        try:
+            with ctx:
                 try:
-                    for reservation in reservations:
-                        reservation['lease_id'] = lease['id']
-                        reservation['start_date'] = lease['start_date']
-                        reservation['end_date'] = lease['end_date']
-                        self._create_reservation(reservation)
+                    for func, args, kwargs in callbacks:
+                        func(*args, **kwargs)
                 except Exception:
-                    with save_and_reraise_exception():
-                        LOG.exception("Failed to create reservation for a "
-                                      "lease. Rollback the lease and "
-                                      "associated reservations")
-                        db_api.lease_destroy(lease_id)
+                    LOG.exception("Failed to create the resources of lease "
+                                  "%s. Rollback the lease and associated "
+                                  "reservations", lease['id'])
+                    if self._destroy_lease_rows(lease['id']):
+                        self.enforcement.release(lease_values, reservations,
+                                                 allocations)
+                    return
+
+                self._activate_lease(ctx, lease)
+        finally:
+            self._lease_creations.pop(lease['id'], None)
+
+    def _create_lease_rows(self, lease_values, reservations, events):
+        """Write a new lease, its reservations and its events."""
+        try:
+            lease = db_api.lease_create(lease_values)
+        except db_ex.BlazarDBDuplicateEntry:
+            LOG.exception('Cannot create a lease - duplicated lease name')
+            raise exceptions.LeaseNameAlreadyExists(
+                name=lease_values['name'])
 
-                try:
-                    for event in events:
-                        event['lease_id'] = lease['id']
-                        db_api.event_create(event)
-                except (exceptions.UnsupportedResourceType,
-                        common_ex.BlazarException):
-                    with save_and_reraise_exception():
-                        LOG.exception("Failed to create event for a lease. "
-                                      "Rollback the lease and associated "
-                                      "reservations")
-                        db_api.lease_destroy(lease_id)
+        for reservation in reservations:
+            reservation['lease_id'] = lease['id']
+            reservation['start_date'] = lease['start_date']
+            reservation['end_date'] = lease['end_date']
+            self._create_reservation(reservation)
+        for event in events:
+            event['lease_id'] = lease['id']
+        db_api.event_create_all(events)
+        return lease
 
-                else:
-                    db_api.lease_update(
-                        lease_id,
-                        {'status': status.lease.PENDING})
-                    lease = db_api.lease_get(lease_id)
-                    self._send_notification(lease, ctx, events=['create'])
-                    return lease
+    def _activate_lease(self, ctx, lease):
+        lease = db_api.lease_update(lease['id'],
+                                    {'status': status.lease.PENDING})
+        self._send_notification(lease, ctx, events=['create'])
+        return lease
+
+    def _destroy_lease_rows(self, lease_id):
+        """Delete a lease whose creation failed, if it was committed.
+
+        :return: True if the lease was committed, False otherwise.
+        """
+        try:
+            db_api.lease_destroy(lease_id)
+        except db_ex.BlazarDBNotFound:
+            return False
+        return True
 
     def _add_resource_type(self, reservations, existing_reservations):
         rsvns_by_id = {}
@@ -494,17 +765,17 @@ class ManagerService(service_utils.RPCServer):
             exceptions.InvalidPeriod,
             enforcement.exceptions.MaxLeaseDurationException,
             enforcement.exceptions.ExternalServiceFilterException,
+            enforcement.exceptions.QuotaExceededException,
         ]
     )
     def update_lease(self, lease_id, values):
         if not values:
-            return db_api.lease_get(lease_id)
+            return self._get_existing_lease(lease_id)
 
         if len(values) == 1 and 'name' in values:
-            db_api.lease_update(lease_id, values)
-            return db_api.lease_get(lease_id)
+            return self._rename_lease(lease_id, values)
 
-        lease = db_api.lease_get(lease_id)
+        lease = self._get_existing_lease(lease_id)
 
         self._handle_resource_type_exception(lease)
 
@@ -572,80 +843,117 @@ class ManagerService(service_utils.RPCServer):
                 new_reservations = existing_reservations
                 new_allocs = existing_allocs
 
+            # NOTE: The usage change is recorded by the checks, before the
+            # reservations are updated, since plugins update them outside of
+            # any transaction. It is reverted if the update fails.
             try:
-                self.enforcement.check_update(context.current(), lease, values,
-                                              existing_allocs, new_allocs,
-                                              existing_reservations,
-                                              new_reservations)
+                undo_usage = self.enforcement.check_update(
+                    context.current(), lease, values, existing_allocs,
+                    new_allocs, existing_reservations, new_reservations)
             except common_ex.NotAuthorized as e:
                 LOG.error("Enforcement checks failed. %s", str(e))
                 raise e
 
-            # TODO(frossigneux) rollback if an exception is raised
-            for reservation in existing_reservations:
-                v = {}
-                v['start_date'] = values['start_date']
-                v['end_date'] = values['end_date']
-                try:
-                    v.update([r for r in reservations
-                              if r['id'] == reservation['id']].pop())
-                except IndexError:
-                    pass
-                resource_type = v.get('resource_type',
-                                      reservation['resource_type'])
-
-                if resource_type != reservation['resource_type']:
-                    raise exceptions.CantUpdateParameter(
-                        param='resource_type')
-                self.plugins[resource_type].update_reservation(
-                    reservation['id'], v)
-
-        event = db_api.event_get_first_sorted_by_filters(
-            'lease_id',
-            'asc',
-            {
-                'lease_id': lease_id,
-                'event_type': 'start_lease'
-            }
-        )
-        if not event:
-            raise common_ex.BlazarException(
-                'Start lease event not found')
-        db_api.event_update(event['id'], {'time': values['start_date']})
-
-        event = db_api.event_get_first_sorted_by_filters(
-            'lease_id',
-            'asc',
-            {
-                'lease_id': lease_id,
-                'event_type': 'end_lease'
-            }
-        )
-        if not event:
-            raise common_ex.BlazarException(
-                'End lease event not found')
-        db_api.event_update(event['id'], {'time': values['end_date']})
-
-        notifications = ['update']
-        self._update_before_end_event(lease, values, notifications,
-                                      before_end_date)
+            try:
+                self._update_reservations(existing_reservations, reservations,
+                                          values)
+            except Exception:
+                with save_and_reraise_exception():
+                    if undo_usage is not None:
+                        undo_usage()
 
         try:
-            del values['reservations']
-        except KeyError:
-            pass
-        db_api.lease_update(lease_id, values)
+            lease, notifications = self._update_lease_rows(lease, values,
+                                                           before_end_date)
+        except Exception:
+            with save_and_reraise_exception():
+                if undo_usage is not None:
+                    undo_usage()
 
-        lease = db_api.lease_get(lease_id)
         with trusts.create_ctx_from_trust(lease['trust_id']) as ctx:
             self._send_notification(lease, ctx, events=notifications)
 
         return lease
 
+    def _update_reservations(self, existing_reservations, reservations,
+                             values):
+        # TODO(frossigneux) rollback if an exception is raised
+        for reservation in existing_reservations:
+            v = {}
+            v['start_date'] = values['start_date']
+            v['end_date'] = values['end_date']
+            try:
+                v.update([r for r in reservations
+                          if r['id'] == reservation['id']].pop())
+            except IndexError:
+                pass
+            resource_type = v.get('resource_type',
+                                  reservation['resource_type'])
+
+            if resource_type != reservation['resource_type']:
+                raise exceptions.CantUpdateParameter(
+                    param='resource_type')
+            self.plugins[resource_type].update_reservation(
+                reservation['id'], v)
+
+    def _update_lease_rows(self, lease, values, before_end_date):
+        """Update the events and the values of a lease.
+
+        :return: the updated lease and the notifications to send.
+        """
+        lease_id = lease['id']
+        with db_api.transaction():
+            event = db_api.event_get_first_sorted_by_filters(
+                'lease_id',
+                'asc',
+                {
+                    'lease_id': lease_id,
+                    'event_type': 'start_lease'
+                }
+            )
+            if not event:
+                raise common_ex.BlazarException(
+                    'Start lease event not found')
+            db_api.event_update(event['id'], {'time': values['start_date']})
+
+            event = db_api.event_get_first_sorted_by_filters(
+                'lease_id',
+                'asc',
+                {
+                    'lease_id': lease_id,
+                    'event_type': 'end_lease'
+                }
+            )
+            if not event:
+                raise common_ex.BlazarException(
+                    'End lease event not found')
+            db_api.event_update(event['id'], {'time': values['end_date']})
+
+            self._update_prepare_event(lease_id, values)
+
+            notifications = ['update']
+            self._update_before_end_event(lease, values, notifications,
+                                          before_end_date)
+
+            try:
+                del values['reservations']
+            except KeyError:
+                pass
+            lease = db_api.lease_update(lease_id, values)
+        return lease, notifications
+
+    def delete_lease(self, lease_id):
+        # NOTE: A lease created asynchronously is deleted once its remote
+        # resources are created, so that they are deleted too.
+        creation = self._lease_creations.get(lease_id)
+        if creation is not None:
+            self._wait_lease_creation(creation)
+        return self._delete_lease(lease_id=lease_id)
+
     @status.lease.lease_status(transition=status.lease.DELETING,
                                result_in=(status.lease.ERROR,))
-    def delete_lease(self, lease_id):
-        lease = self.get_lease(lease_id)
+    def _delete_lease(self, lease_id):
+        lease = self._get_existing_lease(lease_id)
 
         start_event = db_api.event_get_first_sorted_by_filters(
             'lease_id',
@@ -734,6 +1042,11 @@ class ManagerService(service_utils.RPCServer):
             self._basic_action(lease_id, event_id, 'on_end',
                                status.reservation.DELETED)
 
+    def prepare_lease(self, lease_id, event_id):
+        lease = self.get_lease(lease_id)
+        with trusts.create_ctx_from_trust(lease['trust_id']):
+            self._basic_action(lease_id, event_id, 'prepare')
+
     def before_end_lease(self, lease_id, event_id):
         lease = self.get_lease(lease_id)
         with trusts.create_ctx_from_trust(lease['trust_id']):
@@ -745,29 +1058,39 @@ class ManagerService(service_utils.RPCServer):
         lease = self.get_lease(lease_id)
 
         event_status = status.event.DONE
-        for reservation in lease['reservations']:
-            resource_type = reservation['resource_type']
-            try:
-                if reservation_status is not None:
-                    if not status.reservation.is_valid_transition(
-                            reservation['status'], reservation_status):
-                        raise common_ex.InvalidStatus
-                self.resource_actions[resource_type][action_time](
-                    reservation['resource_id']
-                )
-            except common_ex.BlazarException:
-                LOG.exception("Failed to execute action %(action)s "
-                              "for lease %(lease)s",
-                              {'action': action_time,
-                               'lease': lease_id})
-                event_status = status.event.ERROR
-                db_api.reservation_update(
-                    reservation['id'],
-                    {'status': status.reservation.ERROR})
-            else:
-                if reservation_status is not None:
-                    db_api.reservation_update(reservation['id'],
-                                              {'status': reservation_status})
+        reservation_statuses = []
+        try:
+            for reservation in lease['reservations']:
+                resource_type = reservation['resource_type']
+                try:
+                    if reservation_status is not None:
+                        if not status.reservation.is_valid_transition(
+                                reservation['status'], reservation_status):
+                            raise common_ex.InvalidStatus
+                    with metrics.PLUGIN_ACTION_DURATION.labels(
+                            resource_type, action_time).time():
+                        self.resource_actions[resource_type][action_time](
+                            reservation['resource_id']
+                        )
+                except common_ex.BlazarException:
+                    LOG.exception("Failed to execute action %(action)s "
+                                  "for lease %(lease)s",
+                                  {'action': action_time,
+                                   'lease': lease_id})
+                    event_status = status.event.ERROR
+                    reservation_statuses.append(
+                        (reservation['id'], status.reservation.ERROR))
+                else:
+                    if reservation_status is not None:
+                        reservation_statuses.append(
+                            (reservation['id'], reservation_status))
+        finally:
+            # Record the outcome of the actions which ran, even if a later
+            # one failed unexpectedly.
+            with db_api.transaction():
+                for reservation_id, new_status in reservation_statuses:
+                    db_api.reservation_update(reservation_id,
+                                              {'status': new_status})
 
         db_api.event_update(event_id, {'status': event_status})
 
@@ -784,10 +1107,12 @@ class ManagerService(service_utils.RPCServer):
             'status': status.reservation.PENDING
         }
         reservation = db_api.reservation_create(reservation_values)
-        resource_id = self.plugins[resource_type].reserve_resource(
-            reservation['id'],
-            values
-        )
+        with metrics.PLUGIN_ACTION_DURATION.labels(
+                resource_type, 'reserve_resource').time():
+            resource_id = self.plugins[resource_type].reserve_resource(
+                reservation['id'],
+                values
+            )
         db_api.reservation_update(reservation['id'],
                                   {'resource_id': resource_id})
 
@@ -811,10 +1136,10 @@ class ManagerService(service_utils.RPCServer):
                 raise common_ex.BlazarException(
                     'Invalid plugin names are specified: %s' % resource_type)
 
-            candidate_ids = plugin.allocation_candidates(res)
+            candidate_ids = plugin.cached_allocation_candidates(res)
 
-            allocations[resource_type] = [
-                plugin.get(cid) for cid in candidate_ids]
+            allocations[resource_type] = self._load_allocations(
+                plugin, candidate_ids)
 
         return allocations
 
@@ -834,16 +1159,25 @@ class ManagerService(service_utils.RPCServer):
                 raise common_ex.BlazarException(
                     'Invalid plugin names are specified: %s' % resource_type)
 
-            resource_ids = [
-                x['resource_id'] for x in plugin.list_allocations(
-                    dict(reservation_id=reservation['id']))
-                if x['reservations']]
+            resource_ids = plugin.list_allocations_for_reservation(
+                reservation['id'])
 
-            allocations[resource_type] = [
-                plugin.get(rid) for rid in resource_ids]
+            allocations[resource_type] = self._load_allocations(
+                plugin, resource_ids)
 
         return allocations
 
+    def _load_allocations(self, plugin, resource_ids):
+        """Returns the allocated resources in the form enforcement needs.
+
+        Compact documents are loaded in bulk unless an enforcement filter
+        needs the full resource documents.
+        """
+        fields = self.enforcement.allocation_fields
+        if fields is None:
+            return plugin.get_many(resource_ids)
+        return plugin.get_summaries(resource_ids, fields)
+
     def _send_notification(self, lease, ctx, events=[]):
         payload = notification_api.format_lease_payload(lease)
 
@@ -866,6 +1200,23 @@ class ManagerService(service_utils.RPCServer):
                          'id_name': lease.get('id', lease.get('name'))})
             event['time'] = lease['start_date']
 
+    def _update_prepare_event(self, lease_id, values):
+        """Move the prepare_lease event of a lease along with its start."""
+        event = db_api.event_get_first_sorted_by_filters(
+            'lease_id',
+            'asc',
+            {
+                'lease_id': lease_id,
+                'event_type': 'prepare_lease'
+            }
+        )
+        if not event or event['status'] != status.event.UNDONE:
+            return
+
+        prepare_date = (plugins_utils.provisioning_date(values['start_date'])
+                        or timeutils.utcnow())
+        db_api.event_update(event['id'], {'time': prepare_date})
+
     def _update_before_end_event(self, old_lease, new_lease,
                                  notifications, before_end_date=None):
         event = db_api.event_get_first_sorted_by_filters(
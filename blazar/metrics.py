@@ -0,0 +1,189 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Metrics of blazar-manager and blazar-api, in the Prometheus format.
+
+The metrics of blazar-manager are served over HTTP when [metrics]/enabled is
+set. The counts of leases and of due events are read from the database, and
+the counters of the notification queue from the queue, when the metrics are
+scraped. The latencies of the API requests are served by blazar-api on the
+/metrics path when [metrics]/api_enabled is set.
+"""
+
+from oslo_config import cfg
+from oslo_log import log as logging
+from oslo_utils import timeutils
+import prometheus_client
+from prometheus_client import core
+
+from blazar.db import api as db_api
+from blazar.notification import notifier
+from blazar import status
+
+metrics_opts = [
+    cfg.BoolOpt('enabled',
+                default=False,
+                help='Serve the metrics of blazar-manager over HTTP, in the '
+                     'Prometheus text format.'),
+    cfg.HostAddressOpt('bind_host',
+                       default='127.0.0.1',
+                       help='Address on which the metrics are served.'),
+    cfg.PortOpt('port',
+                default=9474,
+                help='Port on which the metrics are served.'),
+    cfg.BoolOpt('api_enabled',
+                default=False,
+                help='Serve the latencies of the requests handled by each '
+                     'blazar-api process on its /metrics path, without '
+                     'authentication, in the Prometheus text format.'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(metrics_opts, group='metrics')
+LOG = logging.getLogger(__name__)
+
+REGISTRY = prometheus_client.CollectorRegistry()
+
+# Registry of the metrics of blazar-api.
+API_REGISTRY = prometheus_client.CollectorRegistry()
+
+# Upper bounds [seconds] of the duration histogram buckets, from fast HTTP
+# requests to slow lease events.
+DURATION_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+                    30.0, 60.0, 120.0, 300.0)
+
+EVENT_DURATION = prometheus_client.Histogram(
+    'blazar_event_duration_seconds',
+    'Time taken to execute lease events.',
+    ['event_type'], buckets=DURATION_BUCKETS, registry=REGISTRY)
+
+PLUGIN_ACTION_DURATION = prometheus_client.Histogram(
+    'blazar_plugin_action_duration_seconds',
+    'Time taken by the actions of resource plugins.',
+    ['resource_type', 'action'], buckets=DURATION_BUCKETS, registry=REGISTRY)
+
+OPENSTACK_REQUEST_DURATION = prometheus_client.Histogram(
+    'blazar_openstack_request_duration_seconds',
+    'Time taken by the requests to other OpenStack services.',
+    ['service', 'method'], buckets=DURATION_BUCKETS, registry=REGISTRY)
+
+OPENSTACK_REQUESTS = prometheus_client.Counter(
+    'blazar_openstack_requests',
+    'Number of requests to other OpenStack services.',
+    ['service', 'method', 'code'], registry=REGISTRY)
+
+API_REQUEST_DURATION = prometheus_client.Histogram(
+    'blazar_api_request_duration_seconds',
+    'Time taken to handle API requests by method and route, excluding the '
+    'time requests wait for lease changes.',
+    ['method', 'route'], buckets=DURATION_BUCKETS, registry=API_REGISTRY)
+
+MONITOR_DURATION = prometheus_client.Histogram(
+    'blazar_monitor_duration_seconds',
+    'Time taken by the polling and healing of monitor plugins.',
+    ['plugin', 'operation'], buckets=DURATION_BUCKETS, registry=REGISTRY)
+
+
+class DBCollector(object):
+    """Collector of the metrics read from the database."""
+
+    def collect(self):
+        backlog = core.GaugeMetricFamily(
+            'blazar_event_backlog',
+            'Number of lease events due but not executed yet.',
+            labels=['event_type'])
+        lag = core.GaugeMetricFamily(
+            'blazar_event_lag_seconds',
+            'Time since the oldest lease event not executed yet was due.',
+            labels=['event_type'])
+        now = timeutils.utcnow()
+        for event_type, count, oldest in db_api.event_backlog(
+                status.event.UNDONE, now):
+            backlog.add_metric([event_type], count)
+            lag.add_metric([event_type], (now - oldest).total_seconds())
+        yield backlog
+        yield lag
+
+        leases = core.GaugeMetricFamily(
+            'blazar_leases',
+            'Number of leases by status and degraded flag.',
+            labels=['status', 'degraded'])
+        for lease_status, degraded, count in db_api.lease_count_by_status():
+            leases.add_metric([str(lease_status), str(bool(degraded))],
+                              count)
+        yield leases
+
+
+class NotificationCollector(object):
+    """Collector of the metrics of the notification queue, if enabled."""
+
+    def collect(self):
+        if notifier.QUEUE is None:
+            return
+
+        stats = notifier.QUEUE.stats()
+        yield core.GaugeMetricFamily(
+            'blazar_notification_queue_depth',
+            'Number of notifications waiting to be published.',
+            value=stats['depth'])
+
+        notifications = core.CounterMetricFamily(
+            'blazar_notifications',
+            'Number of notifications by outcome: queued, published, '
+            'dropped because the queue was full, or failed to be published.',
+            labels=['outcome'])
+        for outcome in ('queued', 'published', 'dropped', 'failed'):
+            notifications.add_metric([outcome], stats[outcome])
+        yield notifications
+
+
+_db_collector = None
+_notification_collector = None
+
+
+def start_server():
+    """Serve the metrics over HTTP, if enabled."""
+    global _db_collector, _notification_collector
+    if not CONF.metrics.enabled:
+        return
+
+    if _db_collector is None:
+        _db_collector = DBCollector()
+        REGISTRY.register(_db_collector)
+    if _notification_collector is None:
+        _notification_collector = NotificationCollector()
+        REGISTRY.register(_notification_collector)
+    prometheus_client.start_http_server(CONF.metrics.port,
+                                        addr=CONF.metrics.bind_host,
+                                        registry=REGISTRY)
+    LOG.info('Serving metrics on %s:%s.', CONF.metrics.bind_host,
+             CONF.metrics.port)
+
+
+def observe_openstack_request(service, response):
+    """Record a response of another OpenStack service.
+
+    The responses of Keystone authentication requests made by clients of
+    other services are counted as Keystone ones.
+    """
+    if '/auth/tokens' in response.request.path_url:
+        service = 'identity'
+    method = response.request.method
+    OPENSTACK_REQUESTS.labels(service, method, str(response.status_code)).inc()
+    OPENSTACK_REQUEST_DURATION.labels(service, method).observe(
+        response.elapsed.total_seconds())
+
+
+def api_metrics():
+    """Return the metrics of blazar-api, in the Prometheus text format."""
+    return prometheus_client.generate_latest(API_REGISTRY)
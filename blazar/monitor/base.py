@@ -11,10 +11,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
+
 from oslo_log import log as logging
 from oslo_service import threadgroup
 
 from blazar.db import api as db_api
+from blazar import metrics
 
 LOG = logging.getLogger(__name__)
 
@@ -60,7 +63,10 @@ class BaseMonitor(object):
             # The callback() has to return a dictionary of
             # {reservation id: flags to update}.
             # e.g. {'dummyid': {'missing_resources': True}}
-            reservation_flags = callback(*args, **kwargs)
+            with metrics.MONITOR_DURATION.labels(
+                    type(getattr(callback, '__self__', None)).__name__,
+                    getattr(callback, '__name__', 'callback')).time():
+                reservation_flags = callback(*args, **kwargs)
 
             if reservation_flags:
                 self._update_flags(reservation_flags)
@@ -70,15 +76,22 @@ class BaseMonitor(object):
 
     def _update_flags(self, reservation_flags):
         """Update lease/reservation flags."""
+        # Reservations sharing the same flags are updated in a single
+        # statement.
+        reservations_by_flags = collections.defaultdict(list)
+        for reservation_id, flags in reservation_flags.items():
+            reservations_by_flags[tuple(sorted(flags.items()))].append(
+                reservation_id)
+
         lease_ids = set([])
+        for flags, reservation_ids in reservations_by_flags.items():
+            flags = dict(flags)
+            lease_ids.update(db_api.reservation_update_flags_bulk(
+                reservation_ids, flags))
+            LOG.debug('Reservations %s were updated: %s',
+                      reservation_ids, flags)
 
-        for reservation_id, flags in reservation_flags.items():
-            db_api.reservation_update(reservation_id, flags)
-            LOG.debug('Reservation %s was updated: %s',
-                      reservation_id, flags)
-            reservation = db_api.reservation_get(reservation_id)
-            lease_ids.add(reservation['lease_id'])
-
-        for lease_id in lease_ids:
-            LOG.debug('Lease %s was updated: {"degraded": True}', lease_id)
-            db_api.lease_update(lease_id, {'degraded': True})
+        if lease_ids:
+            db_api.lease_mark_degraded_bulk(sorted(lease_ids))
+            LOG.debug('Leases %s were updated: {"degraded": True}',
+                      sorted(lease_ids))
@@ -21,6 +21,11 @@ from blazar.monitor import base
 
 LOG = logging.getLogger(__name__)
 
+# Maximum number of notifications delivered in one coalesced batch. A batch
+# is flushed either when this size is reached or when the coalescing window
+# expires, whichever comes first.
+NOTIFICATION_BATCH_SIZE = 1000
+
 
 class NotificationMonitor(base.BaseMonitor):
     """A notification based monitor."""
@@ -31,12 +36,33 @@ class NotificationMonitor(base.BaseMonitor):
         super(NotificationMonitor, self).__init__(monitor_plugins)
         try:
             self.handlers = defaultdict(list)
-            self.listener = oslo_messaging.get_notification_listener(
-                oslo_messaging.get_notification_transport(cfg.CONF),
-                self._get_targets(monitor_plugins),
-                self._get_endpoints(monitor_plugins),
-                executor='eventlet'
-            )
+            self.batch_handlers = defaultdict(list)
+            self.coalescing_window = self._get_coalescing_window(
+                monitor_plugins)
+            transport = oslo_messaging.get_notification_transport(cfg.CONF)
+            targets = self._get_targets(monitor_plugins)
+            if (self.coalescing_window and
+                    hasattr(oslo_messaging,
+                            'get_batch_notification_listener')):
+                self.listener = oslo_messaging.get_batch_notification_listener(
+                    transport,
+                    targets,
+                    self._get_batch_endpoints(monitor_plugins),
+                    executor='eventlet',
+                    batch_size=NOTIFICATION_BATCH_SIZE,
+                    batch_timeout=self.coalescing_window
+                )
+            else:
+                if self.coalescing_window:
+                    LOG.warning('Batch notification listener is not '
+                                'available. Notifications are handled '
+                                'one by one.')
+                self.listener = oslo_messaging.get_notification_listener(
+                    transport,
+                    targets,
+                    self._get_endpoints(monitor_plugins),
+                    executor='eventlet'
+                )
             LOG.debug('Notification listener is successfully created.')
         except Exception as e:
             LOG.exception('Failed to create a notification listener. (%s)',
@@ -62,6 +88,16 @@ class NotificationMonitor(base.BaseMonitor):
             LOG.exception('Failed to stop a notification monitor. (%s)',
                           str(e))
 
+    def _get_coalescing_window(self, monitor_plugins):
+        """Get the window in seconds to coalesce notifications over.
+
+        :param monitor_plugins: a list of resource monitor plugins.
+        :return: the largest coalescing window requested by the plugins. 0
+                 means notifications are handled one by one.
+        """
+        return max([plugin.get_notification_coalescing_window()
+                    for plugin in monitor_plugins] or [0])
+
     def _get_targets(self, monitor_plugins):
         """Get a list of targets to subscribe.
 
@@ -95,6 +131,22 @@ class NotificationMonitor(base.BaseMonitor):
 
         return [NotificationEndpoint(self)]
 
+    def _get_batch_endpoints(self, monitor_plugins):
+        """Get a list of endpoints which handle batches of notifications.
+
+        :param monitor_plugins: a list of resource monitor plugins. These
+                                plugins provide event types to handle and a
+                                batch handler which is called once per
+                                coalescing window with all the notifications
+                                of those event types received in the window.
+        :return: a list of endpoints.
+        """
+        for plugin in monitor_plugins:
+            for event_type in plugin.get_notification_event_types():
+                self.batch_handlers[event_type].append(plugin)
+
+        return [BatchNotificationEndpoint(self)]
+
 
 class NotificationEndpoint(object):
     """End point of notifications.
@@ -127,3 +179,39 @@ class NotificationEndpoint(object):
                   event_type, payload)
         for handler in self.monitor.handlers[str(event_type)]:
             handler(event_type, payload)
+
+
+class BatchNotificationEndpoint(object):
+    """End point of coalesced notifications.
+
+    It handles batches of notification messages delivered by a batch
+    notification listener. Messages are grouped by monitor plugin and each
+    plugin handles its messages of the batch at once, so that lease and
+    reservation flags are updated once per batch.
+    """
+
+    def __init__(self, monitor):
+        self.monitor = monitor
+
+    def info(self, messages):
+        self.handle_notifications('INFO', messages)
+
+    def warn(self, messages):
+        self.handle_notifications('WARN', messages)
+
+    def error(self, messages):
+        self.handle_notifications('ERROR', messages)
+
+    def handle_notifications(self, priority, messages):
+        LOG.debug('Received %d notifications: priority: %s',
+                  len(messages), priority)
+        notifications = defaultdict(list)
+        for message in messages:
+            event_type = str(message['event_type'])
+            for plugin in self.monitor.batch_handlers[event_type]:
+                notifications[plugin].append((event_type,
+                                              message['payload']))
+
+        for plugin, plugin_notifications in notifications.items():
+            self.monitor.call_monitor_plugin(
+                plugin.notification_batch_callback, plugin_notifications)
@@ -13,8 +13,11 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from oslo_config import cfg
+
 from blazar.notification import notifier
 
+CONF = cfg.CONF
 IMPL = notifier.Notifier()
 
 
@@ -22,7 +25,13 @@ def send_lease_notification(context, lease, notification):
     IMPL.send_lease_notification(context, lease, notification)
 
 
+def flush():
+    IMPL.flush()
+
+
 def format_lease_payload(lease):
+    if CONF.notifications.lease_payload == 'slim':
+        return format_slim_lease_payload(lease)
     return {
         'lease_id': lease['id'],
         'user_id': lease['user_id'],
@@ -38,3 +47,26 @@ def format_lease_payload(lease):
         'updated_at': lease.get('updated_at'),
         'degraded': lease.get('degraded')
     }
+
+
+def format_slim_lease_payload(lease):
+    return {
+        'lease_id': lease['id'],
+        'user_id': lease['user_id'],
+        'project_id': lease['project_id'],
+        'start_date': lease['start_date'],
+        'end_date': lease['end_date'],
+        'status': lease['status'],
+        'reservations': [{'id': reservation['id'],
+                          'resource_type': reservation['resource_type'],
+                          'status': reservation['status']}
+                         for reservation in lease['reservations']],
+        'events': [{'id': event['id'],
+                    'event_type': event['event_type'],
+                    'time': event['time'],
+                    'status': event['status']}
+                   for event in lease['events']],
+        'created_at': lease.get('created_at'),
+        'updated_at': lease.get('updated_at'),
+        'degraded': lease.get('degraded')
+    }
@@ -13,15 +13,57 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import eventlet
+from eventlet import queue
 from oslo_config import cfg
 from oslo_log import log as logging
 import oslo_messaging as messaging
 
 
+DROP_OLDEST = 'drop_oldest'
+DROP_NEWEST = 'drop_newest'
+BLOCK = 'block'
+
+# Queued by NotificationQueue.stop() for the publisher thread to exit once
+# the notifications queued before are published.
+_STOP = object()
+
 notification_opts = [
     cfg.StrOpt('publisher_id',
                default="blazar.lease",
-               help='Publisher ID for notifications')
+               help='Publisher ID for notifications'),
+    cfg.IntOpt('queue_size',
+               default=1000,
+               min=0,
+               help='Maximum number of notifications waiting to be '
+                    'published. Notifications are published by a background '
+                    'green thread, so that a slow notification transport '
+                    'does not delay lease operations. If 0, notifications '
+                    'are published synchronously.'),
+    cfg.StrOpt('queue_overflow',
+               default=DROP_OLDEST,
+               choices=[
+                   (DROP_OLDEST, 'Drop the oldest waiting notification.'),
+                   (DROP_NEWEST, 'Drop the new notification.'),
+                   (BLOCK, 'Wait for up to queue_block_timeout seconds for '
+                           'room in the queue, then drop the new '
+                           'notification.')],
+               help='What to do with a new notification when the queue of '
+                    'notifications waiting to be published is full.'),
+    cfg.IntOpt('queue_block_timeout',
+               default=10,
+               min=0,
+               help='Time [seconds] to wait for room in a full notification '
+                    'queue with the block overflow policy.'),
+    cfg.StrOpt('lease_payload',
+               default='full',
+               choices=[
+                   ('full', 'All the attributes of the lease, with its '
+                            'reservations and events.'),
+                   ('slim', 'The IDs, status and dates of the lease, and '
+                            'the IDs and status of its reservations and '
+                            'events.')],
+               help='Content of the payload of lease notifications.'),
 ]
 
 LOG = logging.getLogger(__name__)
@@ -30,19 +72,27 @@ CONF = cfg.CONF
 CONF.register_opts(notification_opts, 'notifications')
 TRANSPORT = None
 NOTIFIER = None
+QUEUE = None
 
 
 def init():
-    global TRANSPORT, NOTIFIER
+    global TRANSPORT, NOTIFIER, QUEUE
     TRANSPORT = messaging.get_notification_transport(CONF)
     NOTIFIER = messaging.Notifier(TRANSPORT,
                                   publisher_id=CONF.notifications.publisher_id)
+    if QUEUE is None and CONF.notifications.queue_size:
+        QUEUE = NotificationQueue(CONF.notifications.queue_size,
+                                  CONF.notifications.queue_overflow,
+                                  CONF.notifications.queue_block_timeout)
 
 
 def cleanup():
-    global TRANSPORT, NOTIFIER
+    global TRANSPORT, NOTIFIER, QUEUE
     assert TRANSPORT is not None
     assert NOTIFIER is not None
+    if QUEUE is not None:
+        QUEUE.stop()
+        QUEUE = None
     TRANSPORT.cleanup()
     TRANSPORT = NOTIFIER = None
 
@@ -59,10 +109,119 @@ class Notifier(object):
     """
 
     def send_lease_notification(self, context, lease, notification):
-        """Sends lease notification."""
-        self._notify(context, 'info', notification, lease)
+        """Sends lease notification.
+
+        The notification is published in the background if the notification
+        queue is enabled.
+        """
+        if QUEUE is not None:
+            QUEUE.put(self._notify, context, 'info', notification, lease)
+        else:
+            self._notify(context, 'info', notification, lease)
+
+    def flush(self):
+        """Publish the notifications waiting in the notification queue."""
+        if QUEUE is not None:
+            QUEUE.stop()
 
     def _notify(self, context, level, event_type, payload):
         notifier = get_notifier(CONF.notifications.publisher_id)
         method = getattr(notifier, level, notifier.info)
         method(context, event_type, payload)
+
+
+class NotificationQueue(object):
+    """Queue of notifications published by a background green thread.
+
+    The queue holds at most size notifications. When it is full, a new
+    notification is handled according to the overflow policy: the oldest
+    waiting notification is dropped, the new one is dropped, or the caller
+    waits for up to block_timeout seconds before the new one is dropped.
+    """
+
+    def __init__(self, size, overflow=DROP_OLDEST, block_timeout=10):
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self._queue = queue.LightQueue(size)
+        self._thread = None
+        # Whether notifications were dropped since the queue was last empty.
+        self._dropping = False
+        self.counters = {'queued': 0, 'published': 0, 'dropped': 0,
+                         'failed': 0}
+
+    def stats(self):
+        """Return the notification counters, and the current queue depth."""
+        return dict(self.counters, depth=self._queue.qsize())
+
+    def put(self, publish, *args):
+        """Queue the call of publish with args."""
+        if self._thread is None:
+            self._thread = eventlet.spawn(self._run)
+
+        notification = (publish, args)
+        try:
+            if self.overflow == BLOCK:
+                self._queue.put(notification, timeout=self.block_timeout)
+            else:
+                if self.overflow == DROP_OLDEST and self._queue.full():
+                    self._queue.get_nowait()
+                    self._drop()
+                self._queue.put_nowait(notification)
+        except queue.Full:
+            self._drop()
+        else:
+            self.counters['queued'] += 1
+
+    def stop(self, timeout=10):
+        """Publish the waiting notifications, for up to timeout seconds."""
+        if self._thread is None:
+            return
+        thread, self._thread = self._thread, None
+        with eventlet.Timeout(timeout, False):
+            self._queue.put(_STOP)
+            thread.wait()
+        # NOTE: The thread is only killed if it didn't exit in time, possibly
+        # in the middle of a publication.
+        thread.kill()
+
+        waiting = 0
+        while True:
+            try:
+                notification = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if notification is not _STOP:
+                waiting += 1
+        if waiting:
+            LOG.warning('%d notifications were not published before the '
+                        'notifier stopped.', waiting)
+
+    def _drop(self):
+        self.counters['dropped'] += 1
+        if not self._dropping:
+            self._dropping = True
+            LOG.warning('The notification queue is full, notifications are '
+                        'being dropped.')
+
+    def _run(self):
+        while True:
+            notification = self._queue.get()
+            if notification is _STOP:
+                return
+            self._publish(notification)
+
+            if self._dropping and self._queue.empty():
+                self._dropping = False
+                LOG.warning('The notification queue was drained, %d '
+                            'notifications were dropped so far.',
+                            self.counters['dropped'])
+
+    def _publish(self, notification):
+        publish, args = notification
+        try:
+            publish(*args)
+        except Exception:
+            self.counters['failed'] += 1
+            LOG.exception('Failed to publish a notification.')
+        else:
+            self.counters['published'] += 1
@@ -19,8 +19,10 @@ import blazar.cmd.api
 import blazar.config
 import blazar.db.base
 import blazar.db.migration.cli
+import blazar.db.sqlalchemy.query_stats
 import blazar.manager
 import blazar.manager.service
+import blazar.metrics
 import blazar.notification.notifier
 import blazar.plugins.oshosts.host_plugin
 import blazar.utils.openstack.keystone
@@ -38,6 +40,7 @@ def list_opts():
              blazar.config.lease_opts,
              blazar.config.os_opts,
              blazar.db.base.db_driver_opts,
+             blazar.db.sqlalchemy.query_stats.opts,
              blazar.db.migration.cli.command_opts,
              blazar.utils.openstack.keystone.opts,
              blazar.utils.openstack.keystone.keystone_opts)),
@@ -48,7 +51,10 @@ def list_opts():
             blazar.enforcement.filters.external_service_filter
             .ExternalServiceFilter.enforcement_opts,
             blazar.enforcement.filters.max_lease_duration_filter.MaxLeaseDurationFilter.enforcement_opts, # noqa
+            blazar.enforcement.filters.quota_filter.QuotaFilter
+            .enforcement_opts,
             blazar.enforcement.enforcement.enforcement_opts)),
+        ('metrics', blazar.metrics.metrics_opts),
         ('notifications', blazar.notification.notifier.notification_opts),
         ('nova', blazar.utils.openstack.nova.nova_opts),
         (blazar.plugins.oshosts.RESOURCE_TYPE,
@@ -15,10 +15,12 @@
 
 import abc
 import collections
+import json
 
 from blazar import context
 from blazar.db import api as db_api
 from blazar import policy
+from blazar.utils import request_cache
 from oslo_config import cfg
 from oslo_log import log as logging
 
@@ -66,6 +68,29 @@ class BasePlugin(object, metaclass=abc.ABCMeta):
         """Get resource by id"""
         pass
 
+    def get_many(self, resource_ids):
+        """Get resources by ids.
+
+        Plugins should override this with a bulk query.
+        """
+        return [self.get(resource_id) for resource_id in resource_ids]
+
+    def get_summaries(self, resource_ids, fields):
+        """Get compact documents of resources.
+
+        Each document holds the resource id and the requested fields which
+        the resource has. Plugins should override this with a bulk query.
+        """
+        summaries = []
+        for resource_id in resource_ids:
+            resource = self.get(resource_id)
+            if resource is None:
+                continue
+            summaries.append(
+                {k: v for k, v in resource.items()
+                 if k == 'id' or k in fields})
+        return summaries
+
     @abc.abstractmethod
     def reserve_resource(self, reservation_id, values):
         """Reserve resource."""
@@ -76,6 +101,17 @@ class BasePlugin(object, metaclass=abc.ABCMeta):
         """List resource allocations."""
         pass
 
+    def list_allocations_for_reservation(self, reservation_id):
+        """List ids of the resources allocated to a reservation.
+
+        Plugins should override this with a query restricted to the
+        reservation.
+        """
+        return [
+            x['resource_id'] for x in self.list_allocations(
+                dict(reservation_id=reservation_id))
+            if x['reservations']]
+
     @abc.abstractmethod
     def query_allocations(self, resource_id_list, lease_id=None,
                           reservation_id=None):
@@ -87,6 +123,31 @@ class BasePlugin(object, metaclass=abc.ABCMeta):
         """Get candidates for reservation allocation."""
         pass
 
+    def _candidates_cache_key(self, values):
+        inputs = {k: v for k, v in values.items()
+                  if k not in ('id', 'lease_id', 'resource_id', 'status')}
+        return ('allocation_candidates', self.resource_type,
+                json.dumps(inputs, sort_keys=True, default=str))
+
+    def cached_allocation_candidates(self, values):
+        """Get candidates and keep them for the rest of the request.
+
+        The candidates can then be reused once by reserve_resource() for a
+        reservation with the same values, see reusable_candidates().
+        """
+        key = self._candidates_cache_key(values)
+        candidate_ids = self.allocation_candidates(values)
+        request_cache.set(key, list(candidate_ids))
+        return candidate_ids
+
+    def reusable_candidates(self, values):
+        """Return candidates computed earlier in the request, if any.
+
+        Candidates are only returned once. They may be outdated, so they must
+        be revalidated before being allocated.
+        """
+        return request_cache.pop(self._candidates_cache_key(values))
+
     @abc.abstractmethod
     def update_reservation(self, reservation_id, values):
         """Update reservation."""
@@ -102,6 +163,16 @@ class BasePlugin(object, metaclass=abc.ABCMeta):
         """Wake up resource."""
         pass
 
+    def prepare(self, resource_id):
+        """Create the remote resources of a reservation before it starts.
+
+        Plugins which create remote resources, e.g. Nova aggregates, when
+        reserving create them here instead when the lease starts later than
+        CONF.provisioning_time minutes from now. This must be a no-op for a
+        reservation whose resources are already created.
+        """
+        pass
+
     def list_resource_properties(self, query):
         detail = False if not query else query.get('detail', False)
         all_properties = False if not query else query.get('all', False)
@@ -132,12 +203,13 @@ class BasePlugin(object, metaclass=abc.ABCMeta):
         pass
 
     def heal_reservations(self, failed_resources, interval_begin,
-                          interval_end):
+                          interval_end, reservation_ids=None):
         """Heal reservations which suffer from resource failures.
 
         :param failed_resources: failed resources
         :param interval_begin: start date of the period to heal.
         :param interval_end: end date of the period to heal.
+        :param reservation_ids: if given, only these reservations are healed.
         :return: a dictionary of {reservation id: flags to update}
                  e.g. {'de27786d-bd96-46bb-8363-19c13b2c6657':
                        {'missing_resources': True}}
@@ -185,6 +257,30 @@ class BaseMonitorPlugin(metaclass=abc.ABCMeta):
         """
         pass
 
+    def notification_batch_callback(self, notifications):
+        """Handle notification messages received in a coalescing window.
+
+        The default implementation calls notification_callback() for each
+        message. Plugins can override it to handle the messages at once.
+
+        :param notifications: a list of (event type, payload) tuples in the
+                              order they were received.
+        :return: a dictionary of {reservation id: flags to update}
+        """
+        reservation_flags = {}
+        for event_type, payload in notifications:
+            for reservation_id, flags in self.notification_callback(
+                    event_type, payload).items():
+                reservation_flags.setdefault(reservation_id, {}).update(flags)
+        return reservation_flags
+
+    def get_notification_coalescing_window(self):
+        """Get a window in seconds to coalesce notifications over.
+
+        0 means notifications are handled one by one.
+        """
+        return 0
+
     @abc.abstractmethod
     def is_polling_enabled(self):
         """Check if the polling monitor is enabled."""
@@ -28,6 +28,8 @@ from blazar.plugins.instances import instance_plugin
 from blazar.plugins.oshosts import host_plugin
 from blazar.utils.openstack import nova
 from blazar.utils.openstack import placement
+from blazar.utils import plugins as plugins_utils
+from blazar.utils import request_cache
 
 CONF = cfg.CONF
 LOG = logging.getLogger(__name__)
@@ -55,9 +57,19 @@ class FlavorPlugin(base.BasePlugin):
     def get(self, host_id):
         return self._host_plugin.get(host_id)
 
+    def get_many(self, host_ids):
+        return self._host_plugin.get_many(host_ids)
+
+    def get_summaries(self, host_ids, fields):
+        return self._host_plugin.get_summaries(host_ids, fields)
+
     def list_allocations(self, query):
         return self._host_plugin.list_allocations(query)
 
+    def list_allocations_for_reservation(self, reservation_id):
+        return self._host_plugin.list_allocations_for_reservation(
+            reservation_id)
+
     def query_allocations(self, hosts, lease_id=None, reservation_id=None):
         return self._host_plugin.query_allocations(
             hosts, lease_id, reservation_id)
@@ -289,6 +301,14 @@ class FlavorPlugin(base.BasePlugin):
         return max_usage
 
     def _get_flavor_details(self, flavor_id):
+        # NOTE: Within a request, e.g. a lease creation, the flavor is both
+        # needed for the enforcement checks and to reserve resources, so it
+        # is only looked up once.
+        return request_cache.get_or_set(
+            ('flavor_details', flavor_id),
+            lambda: self._fetch_flavor_details(flavor_id))
+
+    def _fetch_flavor_details(self, flavor_id):
         # access nova using the user token,
         # to ensure we can only see flavors they can see
         user_client = nova.NovaClientWrapper()
@@ -367,12 +387,26 @@ class FlavorPlugin(base.BasePlugin):
             db_api.host_allocation_create({'compute_host_id': host_id,
                                           'reservation_id': reservation_id})
 
+        if plugins_utils.provisioning_date(values['start_date']) is None:
+            db_api.after_commit(self._create_reservation_resources,
+                                instance_reservation)
+
+        return instance_reservation['id']
+
+    def prepare(self, resource_id):
+        """Create the Nova resources of the reservation if needed."""
+        instance_reservation = db_api.instance_reservation_get(resource_id)
+        if instance_reservation['aggregate_id'] is None:
+            self._create_reservation_resources(instance_reservation)
+
+    def _create_reservation_resources(self, instance_reservation):
         try:
             flavor_id, aggregate_id = \
                 self._create_resources(instance_reservation)
         except nova_exceptions.ClientException:
             LOG.exception("Failed to create Nova resources "
-                          "for reservation %s", reservation_id)
+                          "for reservation %s",
+                          instance_reservation['reservation_id'])
             self._cleanup_resources(instance_reservation)
             raise mgr_exceptions.NovaClientError()
 
@@ -380,8 +414,6 @@ class FlavorPlugin(base.BasePlugin):
                                            {'flavor_id': flavor_id,
                                             'aggregate_id': aggregate_id})
 
-        return instance_reservation['id']
-
     def _create_resources(self, instance_reservation):
         reservation_id = instance_reservation['reservation_id']
         # TODO(johngarbutt) we ignore affinity for now
@@ -447,6 +479,7 @@ class FlavorPlugin(base.BasePlugin):
             error="Flavor-based reservation update not yet supported")
 
     def on_start(self, resource_id):
+        self.prepare(resource_id)
         self._instance_plugin.on_start(resource_id)
 
     def on_end(self, resource_id):
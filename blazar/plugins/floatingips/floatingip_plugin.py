@@ -177,11 +177,21 @@ class FloatingIpPlugin(base.BasePlugin):
         if len(required_fips) > amount:
             raise manager_ex.TooLongFloatingIPs()
 
-        floatingip_ids = self._matching_fips(values['network_id'],
-                                             required_fips,
-                                             amount,
-                                             values['start_date'],
-                                             values['end_date'])
+        floatingip_ids = self.reusable_candidates(values)
+        free_between = None
+        if floatingip_ids is not None:
+            # The candidates may have been allocated since they were picked.
+            free_between = (
+                values['start_date'] -
+                datetime.timedelta(minutes=CONF.cleaning_time),
+                values['end_date'] +
+                datetime.timedelta(minutes=CONF.cleaning_time))
+        else:
+            floatingip_ids = self._matching_fips(values['network_id'],
+                                                 required_fips,
+                                                 amount,
+                                                 values['start_date'],
+                                                 values['end_date'])
 
         floatingip_rsrv_values = {
             'reservation_id': reservation_id,
@@ -196,9 +206,15 @@ class FloatingIpPlugin(base.BasePlugin):
                 'floatingip_reservation_id': fip_reservation['id']
             }
             db_api.required_fip_create(fip_address_values)
-        for fip_id in floatingip_ids:
-            db_api.fip_allocation_create({'floatingip_id': fip_id,
-                                          'reservation_id': reservation_id})
+        if not db_api.fip_allocation_create_all(reservation_id,
+                                                floatingip_ids,
+                                                free_between):
+            floatingip_ids = self._matching_fips(values['network_id'],
+                                                 required_fips,
+                                                 amount,
+                                                 values['start_date'],
+                                                 values['end_date'])
+            db_api.fip_allocation_create_all(reservation_id, floatingip_ids)
         return fip_reservation['id']
 
     def update_reservation(self, reservation_id, values):
@@ -367,6 +383,12 @@ class FloatingIpPlugin(base.BasePlugin):
     def get(self, fip_id):
         return self.get_floatingip(fip_id)
 
+    def get_many(self, fip_ids):
+        return db_api.floatingip_get_all_by_ids(fip_ids)
+
+    def get_summaries(self, fip_ids, fields):
+        return db_api.floatingip_summary_get_all(fip_ids, fields)
+
     def get_floatingip(self, fip_id):
         fip = db_api.floatingip_get(fip_id)
         if fip is None:
@@ -403,6 +425,12 @@ class FloatingIpPlugin(base.BasePlugin):
         return [{"resource_id": fip, "reservations": allocs}
                 for fip, allocs in fip_allocations.items()]
 
+    def list_allocations_for_reservation(self, reservation_id):
+        allocations = db_api.fip_allocation_get_all_by_values(
+            reservation_id=reservation_id)
+        return list(dict.fromkeys(
+            alloc['floatingip_id'] for alloc in allocations))
+
     def query_allocations(self, resource_id_list, detail=None, lease_id=None,
                           reservation_id=None):
         return self.query_fip_allocations(resource_id_list, detail=detail,
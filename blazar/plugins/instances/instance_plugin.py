@@ -153,6 +153,12 @@ class VirtualInstancePlugin(base.BasePlugin, nova.NovaClientWrapper):
         return [{"resource_id": host, "reservations": allocs}
                 for host, allocs in hosts_allocations.items()]
 
+    def list_allocations_for_reservation(self, reservation_id):
+        allocations = db_api.host_allocation_get_all_by_values(
+            reservation_id=reservation_id)
+        return list(dict.fromkeys(
+            alloc['compute_host_id'] for alloc in allocations))
+
     def query_allocations(self, hosts, lease_id=None, reservation_id=None):
         """Return dict of host and its allocations.
 
@@ -406,6 +412,11 @@ class VirtualInstancePlugin(base.BasePlugin, nova.NovaClientWrapper):
         """
         reservation = db_api.reservation_get(reservation_id)
 
+        if reservation['aggregate_id'] is None:
+            # The resources are created with the new values when the
+            # reservation is prepared.
+            return
+
         if reservation['status'] == 'active':
             pool = nova.ReservationPool()
 
@@ -488,11 +499,25 @@ class VirtualInstancePlugin(base.BasePlugin, nova.NovaClientWrapper):
             db_api.host_allocation_create({'compute_host_id': host_id,
                                           'reservation_id': reservation_id})
 
+        if plugins_utils.provisioning_date(values['start_date']) is None:
+            db_api.after_commit(self._create_reservation_resources,
+                                instance_reservation)
+
+        return instance_reservation['id']
+
+    def prepare(self, resource_id):
+        """Create the Nova resources of the reservation if needed."""
+        instance_reservation = db_api.instance_reservation_get(resource_id)
+        if instance_reservation['aggregate_id'] is None:
+            self._create_reservation_resources(instance_reservation)
+
+    def _create_reservation_resources(self, instance_reservation):
         try:
             flavor, group, pool = self._create_resources(instance_reservation)
         except nova_exceptions.ClientException:
             LOG.exception("Failed to create Nova resources "
-                          "for reservation %s", reservation_id)
+                          "for reservation %s",
+                          instance_reservation['reservation_id'])
             self.cleanup_resources(instance_reservation)
             raise mgr_exceptions.NovaClientError()
 
@@ -502,8 +527,6 @@ class VirtualInstancePlugin(base.BasePlugin, nova.NovaClientWrapper):
                                             'server_group_id': server_group_id,
                                             'aggregate_id': pool.id})
 
-        return instance_reservation['id']
-
     def update_host_allocations(self, added, removed, reservation_id):
         allocations = db_api.host_allocation_get_all_by_values(
             reservation_id=reservation_id)
@@ -587,6 +610,7 @@ class VirtualInstancePlugin(base.BasePlugin, nova.NovaClientWrapper):
 
     def on_start(self, resource_id):
         ctx = context.current()
+        self.prepare(resource_id)
         instance_reservation = db_api.instance_reservation_get(resource_id)
         reservation_id = instance_reservation['reservation_id']
 
@@ -624,6 +648,13 @@ class VirtualInstancePlugin(base.BasePlugin, nova.NovaClientWrapper):
         reservation_id = instance_reservation['reservation_id']
         ctx = context.current()
 
+        if instance_reservation['aggregate_id'] is None:
+            # The reservation ended before its resources were created.
+            for allocation in db_api.host_allocation_get_all_by_values(
+                    reservation_id=reservation_id):
+                db_api.host_allocation_destroy(allocation['id'])
+            return
+
         try:
             self.nova.flavor_access.remove_tenant_access(
                 reservation_id, ctx.project_id)
@@ -679,12 +710,13 @@ class VirtualInstancePlugin(base.BasePlugin, nova.NovaClientWrapper):
         return True
 
     def heal_reservations(self, failed_resources, interval_begin,
-                          interval_end):
+                          interval_end, reservation_ids=None):
         """Heal reservations which suffer from resource failures.
 
         :param failed_resources: failed resources
         :param interval_begin: start date of the period to heal.
         :param interval_end: end date of the period to heal.
+        :param reservation_ids: if given, only these reservations are healed.
         :return: a dictionary of {reservation id: flags to update}
                  e.g. {'de27786d-bd96-46bb-8363-19c13b2c6657':
                        {'missing_resources': True}}
@@ -693,7 +725,8 @@ class VirtualInstancePlugin(base.BasePlugin, nova.NovaClientWrapper):
 
         host_ids = [h['id'] for h in failed_resources]
         reservations = db_utils.get_reservations_by_host_ids(
-            host_ids, interval_begin, interval_end)
+            host_ids, interval_begin, interval_end,
+            reservation_ids=reservation_ids)
 
         for reservation in reservations:
             if reservation['resource_type'] != plugin.RESOURCE_TYPE:
@@ -712,6 +745,10 @@ class VirtualInstancePlugin(base.BasePlugin, nova.NovaClientWrapper):
     def _heal_reservation(self, reservation, host_ids):
         """Allocate alternative host(s) for the given reservation.
 
+        Alternative hosts for all the failed allocations are picked up in a
+        single pass and the allocation changes are written in a single
+        transaction.
+
         :param reservation: A reservation that has allocations to change
         :param host_ids: Failed host ids
         :return: True if all the allocations in the given reservation
@@ -719,58 +756,57 @@ class VirtualInstancePlugin(base.BasePlugin, nova.NovaClientWrapper):
         """
         lease = db_api.lease_get(reservation['lease_id'])
 
-        ret = True
         allocations = [
             alloc for alloc in reservation['computehost_allocations']
             if alloc['compute_host_id'] in host_ids]
 
         if reservation['affinity']:
-            old_host_id = allocations[0]['compute_host_id']
             new_host_id = self._select_host(reservation, lease)
+            new_host_ids = [new_host_id] * len(allocations)
+        else:
+            new_host_ids = self._select_hosts(reservation, lease,
+                                              len(allocations))
 
+        old_host_ids = []
+        for allocation in allocations:
+            if allocation['compute_host_id'] not in old_host_ids:
+                old_host_ids.append(allocation['compute_host_id'])
+        for old_host_id in old_host_ids:
             self._pre_reallocate(reservation, old_host_id)
 
+        allocation_values = {}
+        destroyed_ids = []
+        for allocation, new_host_id in zip(allocations, new_host_ids):
             if new_host_id is None:
-                for allocation in allocations:
-                    db_api.host_allocation_destroy(allocation['id'])
-                LOG.warning('Could not find alternative host for '
-                            'reservation %s (lease: %s).',
-                            reservation['id'], lease['name'])
-                ret = False
+                destroyed_ids.append(allocation['id'])
             else:
-                for allocation in allocations:
-                    db_api.host_allocation_update(
-                        allocation['id'], {'compute_host_id': new_host_id})
-                self._post_reallocate(
-                    reservation, lease, new_host_id, len(allocations))
-
-        else:
-            new_host_ids = []
-            for allocation in allocations:
-                old_host_id = allocation['compute_host_id']
-                new_host_id = self._select_host(reservation, lease)
-
-                self._pre_reallocate(reservation, old_host_id)
+                allocation_values[allocation['id']] = {
+                    'compute_host_id': new_host_id}
+        db_api.host_allocation_update_all(allocation_values,
+                                          destroyed_ids=destroyed_ids)
 
-                if new_host_id is None:
-                    db_api.host_allocation_destroy(allocation['id'])
-                    LOG.warning('Could not find alternative host for '
-                                'reservation %s (lease: %s).',
-                                reservation['id'], lease['name'])
-                    ret = False
-                    continue
-
-                db_api.host_allocation_update(
-                    allocation['id'], {'compute_host_id': new_host_id})
-                new_host_ids.append(new_host_id)
+        if destroyed_ids:
+            LOG.warning('Could not find alternative host for '
+                        'reservation %s (lease: %s).',
+                        reservation['id'], lease['name'])
 
-            for new_host, num in collections.Counter(new_host_ids).items():
-                self._post_reallocate(reservation, lease, new_host, num)
+        new_host_counts = collections.Counter(
+            new_host_id for new_host_id in new_host_ids
+            if new_host_id is not None)
+        for new_host, num in new_host_counts.items():
+            self._post_reallocate(reservation, lease, new_host, num)
 
-        return ret
+        return not destroyed_ids
 
     def _select_host(self, reservation, lease):
         """Returns the alternative host id or None if not found."""
+        return self._select_hosts(reservation, lease, 1)[0]
+
+    def _select_hosts(self, reservation, lease, count):
+        """Returns a list of count alternative host ids.
+
+        The list is padded with None if not enough hosts are found.
+        """
         values = {}
         values['start_date'] = max(timeutils.utcnow(), lease['start_date'])
         values['end_date'] = lease['end_date']
@@ -781,10 +817,11 @@ class VirtualInstancePlugin(base.BasePlugin, nova.NovaClientWrapper):
         try:
             changed_hosts = self.pickup_hosts(reservation['id'], values)
         except mgr_exceptions.NotEnoughHostsAvailable:
-            return None
-        # We should get at least one host to add because the old host can't
-        # be in the candidates.
-        return changed_hosts['added'][0]
+            return [None] * count
+        # We should get at least as many hosts to add as failed allocations
+        # because the old hosts can't be in the candidates.
+        new_host_ids = changed_hosts['added'][:count]
+        return new_host_ids + [None] * (count - len(new_host_ids))
 
     def _pre_reallocate(self, reservation, host_id):
         """Delete the reservation inventory/aggregates for the host."""
@@ -826,6 +863,12 @@ class VirtualInstancePlugin(base.BasePlugin, nova.NovaClientWrapper):
             extra_capabilities[key] = capability.capability_value
         return extra_capabilities
 
+    def get_many(self, host_ids):
+        return db_api.host_get_all_by_ids(host_ids)
+
+    def get_summaries(self, host_ids, fields):
+        return db_api.host_summary_get_all(host_ids, fields)
+
     def get(self, host_id):
         host = db_api.host_get(host_id)
         extra_capabilities = self._get_extra_capabilities(host_id)
@@ -14,6 +14,7 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import collections
 import datetime
 import random
 import retrying
@@ -52,6 +53,14 @@ plugin_opts = [
     cfg.ListOpt('notification_topics',
                 default=['notifications', 'versioned_notifications'],
                 help='Notification topics to subscribe to.'),
+    cfg.IntOpt('notification_coalescing_window',
+               default=0,
+               min=0,
+               help='Window (seconds) over which service notifications are '
+                    'coalesced. Failed and recovered hosts received in the '
+                    'window are deduplicated and handled with a single '
+                    'healing pass. If 0 is specified, notifications are '
+                    'handled one by one.'),
     cfg.BoolOpt('enable_polling_monitor',
                 default=False,
                 help='Enable polling-based resource monitoring. '
@@ -106,19 +115,24 @@ class PhysicalHostPlugin(base.BasePlugin, nova.NovaClientWrapper):
 
     def reserve_resource(self, reservation_id, values):
         """Create reservation."""
-        host_ids = self.allocation_candidates(values)
+        host_ids = self.reusable_candidates(values)
+        free_between = None
+        if host_ids is not None:
+            self._check_params(values)
+            # The candidates may have been allocated since they were picked.
+            free_between = (
+                values['start_date'] -
+                datetime.timedelta(minutes=CONF.cleaning_time),
+                values['end_date'] +
+                datetime.timedelta(minutes=CONF.cleaning_time))
+        else:
+            host_ids = self.allocation_candidates(values)
 
         if not host_ids:
             raise manager_ex.NotEnoughHostsAvailable()
 
-        pool = nova.ReservationPool()
-        pool_name = reservation_id
-        az_name = "%s%s" % (CONF[self.resource_type].blazar_az_prefix,
-                            pool_name)
-        pool_instance = pool.create(name=pool_name, az=az_name)
         host_rsrv_values = {
             'reservation_id': reservation_id,
-            'aggregate_id': pool_instance.id,
             'resource_properties': values['resource_properties'],
             'hypervisor_properties': values['hypervisor_properties'],
             'count_range': values['count_range'],
@@ -126,11 +140,26 @@ class PhysicalHostPlugin(base.BasePlugin, nova.NovaClientWrapper):
             'before_end': values['before_end']
         }
         host_reservation = db_api.host_reservation_create(host_rsrv_values)
-        for host_id in host_ids:
-            db_api.host_allocation_create({'compute_host_id': host_id,
-                                          'reservation_id': reservation_id})
+        if not db_api.host_allocation_create_all(reservation_id, host_ids,
+                                                 free_between):
+            host_ids = self.allocation_candidates(values)
+            if not host_ids:
+                raise manager_ex.NotEnoughHostsAvailable()
+            db_api.host_allocation_create_all(reservation_id, host_ids)
+        if plugins_utils.provisioning_date(values['start_date']) is None:
+            db_api.after_commit(self._create_pool, reservation_id,
+                                host_reservation['id'])
         return host_reservation['id']
 
+    def _create_pool(self, reservation_id, host_reservation_id):
+        pool = nova.ReservationPool()
+        pool_name = reservation_id
+        az_name = "%s%s" % (CONF[self.resource_type].blazar_az_prefix,
+                            pool_name)
+        pool_instance = pool.create(name=pool_name, az=az_name)
+        db_api.host_reservation_update(host_reservation_id,
+                                       {'aggregate_id': pool_instance.id})
+
     def update_reservation(self, reservation_id, values):
         """Update reservation."""
         reservation = db_api.reservation_get(reservation_id)
@@ -171,8 +200,16 @@ class PhysicalHostPlugin(base.BasePlugin, nova.NovaClientWrapper):
         if updates:
             db_api.host_reservation_update(host_reservation['id'], updates)
 
+    def prepare(self, resource_id):
+        """Create the pool of the reservation if it does not exist yet."""
+        host_reservation = db_api.host_reservation_get(resource_id)
+        if host_reservation['aggregate_id'] is None:
+            self._create_pool(host_reservation['reservation_id'],
+                              host_reservation['id'])
+
     def on_start(self, resource_id):
         """Add the hosts in the pool."""
+        self.prepare(resource_id)
         host_reservation = db_api.host_reservation_get(resource_id)
         pool = nova.ReservationPool()
         hosts = []
@@ -207,6 +244,9 @@ class PhysicalHostPlugin(base.BasePlugin, nova.NovaClientWrapper):
             reservation_id=reservation_id)
         for allocation in allocations:
             db_api.host_allocation_destroy(allocation['id'])
+        if host_reservation['aggregate_id'] is None:
+            # The reservation ended before its pool was created.
+            return
         pool = nova.ReservationPool()
         for host in pool.get_computehosts(host_reservation['aggregate_id']):
             for server in self.nova.servers.list(
@@ -248,12 +288,13 @@ class PhysicalHostPlugin(base.BasePlugin, nova.NovaClientWrapper):
         return True
 
     def heal_reservations(self, failed_resources, interval_begin,
-                          interval_end):
+                          interval_end, reservation_ids=None):
         """Heal reservations which suffer from resource failures.
 
         :param failed_resources: a list of failed hosts.
         :param interval_begin: start date of the period to heal.
         :param interval_end: end date of the period to heal.
+        :param reservation_ids: if given, only these reservations are healed.
         :return: a dictionary of {reservation id: flags to update}
                  e.g. {'de27786d-bd96-46bb-8363-19c13b2c6657':
                        {'missing_resources': True}}
@@ -261,74 +302,176 @@ class PhysicalHostPlugin(base.BasePlugin, nova.NovaClientWrapper):
         reservation_flags = {}
 
         host_ids = [h['id'] for h in failed_resources]
-        reservations = db_utils.get_reservations_by_host_ids(host_ids,
-                                                             interval_begin,
-                                                             interval_end)
+        reservations = db_utils.get_reservations_by_host_ids(
+            host_ids, interval_begin, interval_end,
+            reservation_ids=reservation_ids)
 
+        allocations = []
+        statuses = {}
         for reservation in reservations:
             if reservation['resource_type'] != plugin.RESOURCE_TYPE:
                 continue
 
-            for allocation in [alloc for alloc
+            statuses[reservation['id']] = reservation['status']
+            allocations.extend(alloc for alloc
                                in reservation['computehost_allocations']
-                               if alloc['compute_host_id'] in host_ids]:
-                if self._reallocate(allocation):
-                    if reservation['status'] == status.reservation.ACTIVE:
-                        if reservation['id'] not in reservation_flags:
-                            reservation_flags[reservation['id']] = {}
-                        reservation_flags[reservation['id']].update(
-                            {'resources_changed': True})
-                else:
-                    if reservation['id'] not in reservation_flags:
-                        reservation_flags[reservation['id']] = {}
-                    reservation_flags[reservation['id']].update(
-                        {'missing_resources': True})
+                               if alloc['compute_host_id'] in host_ids)
+
+        if not allocations:
+            return reservation_flags
+
+        results = self._reallocate_all(allocations)
+        for allocation in allocations:
+            reservation_id = allocation['reservation_id']
+            if results[allocation['id']]:
+                if statuses[reservation_id] == status.reservation.ACTIVE:
+                    if reservation_id not in reservation_flags:
+                        reservation_flags[reservation_id] = {}
+                    reservation_flags[reservation_id].update(
+                        {'resources_changed': True})
+            else:
+                if reservation_id not in reservation_flags:
+                    reservation_flags[reservation_id] = {}
+                reservation_flags[reservation_id].update(
+                    {'missing_resources': True})
 
         return reservation_flags
 
-    def _reallocate(self, allocation):
-        """Allocate an alternative host.
+    def _reallocate_all(self, allocations):
+        """Allocate alternative hosts for a batch of allocations.
 
-        :param allocation: allocation to change.
-        :return: True if an alternative host was successfully allocated.
+        Candidate hosts are looked up once per distinct set of properties and
+        time frame. The allocations are then matched to the candidates
+        jointly, so that allocations of overlapping leases never compete for
+        the same host, and all the allocation changes are written in a single
+        transaction.
+
+        :param allocations: allocations to change.
+        :return: a dictionary of {allocation id: True if an alternative host
+                 was successfully allocated}
         """
-        reservation = db_api.reservation_get(allocation['reservation_id'])
-        h_reservation = db_api.host_reservation_get(
-            reservation['resource_id'])
-        lease = db_api.lease_get(reservation['lease_id'])
+        now = timeutils.utcnow()
+        reservations = {}
+        h_reservations = {}
+        leases = {}
+        candidates = {}
+        requests = []
+        for allocation in allocations:
+            reservation_id = allocation['reservation_id']
+            if reservation_id not in reservations:
+                reservation = db_api.reservation_get(reservation_id)
+                reservations[reservation_id] = reservation
+                h_reservations[reservation_id] = db_api.host_reservation_get(
+                    reservation['resource_id'])
+                if reservation['lease_id'] not in leases:
+                    leases[reservation['lease_id']] = db_api.lease_get(
+                        reservation['lease_id'])
+            reservation = reservations[reservation_id]
+            lease = leases[reservation['lease_id']]
+
+            start_date = max(now, lease['start_date'])
+            key = (reservation['hypervisor_properties'],
+                   reservation['resource_properties'],
+                   start_date, lease['end_date'])
+            if key not in candidates:
+                candidates[key] = self._candidate_hosts(*key)
+            requests.append((start_date, lease['end_date'], candidates[key]))
+
+        new_hostids = self._match_hosts(requests)
+
         pool = nova.ReservationPool()
+        hosts = {}
 
-        # Remove the old host from the aggregate.
-        if reservation['status'] == status.reservation.ACTIVE:
-            host = db_api.host_get(allocation['compute_host_id'])
-            pool.remove_computehost(h_reservation['aggregate_id'],
-                                    host['service_name'])
-
-        # Allocate an alternative host.
-        start_date = max(timeutils.utcnow(), lease['start_date'])
-        new_hostids = self._matching_hosts(
-            reservation['hypervisor_properties'],
-            reservation['resource_properties'],
-            '1-1', start_date, lease['end_date']
-        )
-        if not new_hostids:
-            db_api.host_allocation_destroy(allocation['id'])
-            LOG.warning('Could not find alternative host for reservation %s '
-                        '(lease: %s).', reservation['id'], lease['name'])
+        def get_host(host_id):
+            if host_id not in hosts:
+                hosts[host_id] = db_api.host_get(host_id)
+            return hosts[host_id]
+
+        # Remove the old hosts from the aggregates.
+        for allocation in allocations:
+            reservation_id = allocation['reservation_id']
+            if reservations[reservation_id]['status'] == (
+                    status.reservation.ACTIVE):
+                pool.remove_computehost(
+                    h_reservations[reservation_id]['aggregate_id'],
+                    get_host(allocation['compute_host_id'])['service_name'])
+
+        allocation_values = {}
+        destroyed_ids = []
+        results = {}
+        for allocation, new_hostid in zip(allocations, new_hostids):
+            reservation = reservations[allocation['reservation_id']]
+            lease = leases[reservation['lease_id']]
+            if new_hostid is None:
+                destroyed_ids.append(allocation['id'])
+                LOG.warning('Could not find alternative host for reservation '
+                            '%s (lease: %s).', reservation['id'],
+                            lease['name'])
+            else:
+                allocation_values[allocation['id']] = {
+                    'compute_host_id': new_hostid}
+                LOG.warning('Resource changed for reservation %s (lease: %s).',
+                            reservation['id'], lease['name'])
+            results[allocation['id']] = new_hostid is not None
+
+        db_api.host_allocation_update_all(allocation_values,
+                                          destroyed_ids=destroyed_ids)
+
+        # Add the alternative hosts into the aggregates.
+        for allocation, new_hostid in zip(allocations, new_hostids):
+            reservation_id = allocation['reservation_id']
+            if (new_hostid is not None and
+                    reservations[reservation_id]['status'] ==
+                    status.reservation.ACTIVE):
+                pool.add_computehost(
+                    h_reservations[reservation_id]['aggregate_id'],
+                    get_host(new_hostid)['service_name'])
+
+        return results
+
+    def _match_hosts(self, requests):
+        """Assign a host to as many requests as possible.
+
+        This is a bipartite matching between the requests and their candidate
+        hosts, solved with augmenting paths. A host can serve several
+        requests as long as their time frames, including the cleaning time,
+        do not overlap.
+
+        :param requests: a list of (start_date, end_date, candidate host ids)
+                         with the candidates in order of preference.
+        :return: the host id assigned to each request, or None.
+        """
+        margin = datetime.timedelta(minutes=CONF.cleaning_time)
+        assigned = [None] * len(requests)
+        host_requests = collections.defaultdict(list)
+
+        def overlap(i, j):
+            return (requests[i][0] - margin < requests[j][1] and
+                    requests[j][0] - margin < requests[i][1])
+
+        def augment(i, visited):
+            for host_id in requests[i][2]:
+                if host_id in visited:
+                    continue
+                visited.add(host_id)
+                conflicts = [j for j in host_requests[host_id]
+                             if overlap(i, j)]
+                if len(conflicts) > 1:
+                    continue
+                if conflicts:
+                    # Try to move the conflicting request to another host.
+                    if not augment(conflicts[0], visited):
+                        continue
+                    host_requests[host_id].remove(conflicts[0])
+                host_requests[host_id].append(i)
+                assigned[i] = host_id
+                return True
             return False
-        else:
-            new_hostid = new_hostids.pop()
-            db_api.host_allocation_update(allocation['id'],
-                                          {'compute_host_id': new_hostid})
-            LOG.warning('Resource changed for reservation %s (lease: %s).',
-                        reservation['id'], lease['name'])
-            if reservation['status'] == status.reservation.ACTIVE:
-                # Add the alternative host into the aggregate.
-                new_host = db_api.host_get(new_hostid)
-                pool.add_computehost(h_reservation['aggregate_id'],
-                                     new_host['service_name'])
-
-            return True
+
+        for i in range(len(requests)):
+            augment(i, set())
+
+        return assigned
 
     def _get_extra_capabilities(self, host_id):
         extra_capabilities = {}
@@ -342,22 +485,46 @@ class PhysicalHostPlugin(base.BasePlugin, nova.NovaClientWrapper):
     def get(self, host_id):
         return self.get_computehost(host_id)
 
-    def get_computehost(self, host_id):
-        host = db_api.host_get(host_id)
+    def get_many(self, host_ids):
+        return db_api.host_get_all_by_ids(host_ids)
+
+    def get_summaries(self, host_ids, fields):
+        return db_api.host_summary_get_all(host_ids, fields)
+
+    def get_computehost(self, host_id, fields=None):
+        host = db_api.host_get(host_id, fields=fields)
+        if host is None:
+            return None
+
+        # NOTE: The requested fields which are not columns of the host are
+        # extra capabilities, only looked up if there are any.
+        capability_names = None
+        if fields is not None:
+            capability_names = set(fields) - set(host)
+            if not capability_names:
+                return host
+
         extra_capabilities = self._get_extra_capabilities(host_id)
-        if host is not None and extra_capabilities:
+        if capability_names is not None:
+            extra_capabilities = {k: v for k, v in extra_capabilities.items()
+                                  if k in capability_names}
+        if extra_capabilities:
             res = host.copy()
             res.update(extra_capabilities)
             return res
         else:
             return host
 
-    def list_computehosts(self, query=None):
-        raw_host_list = db_api.host_list()
-        host_list = []
-        for host in raw_host_list:
-            host_list.append(self.get_computehost(host['id']))
-        return host_list
+    def list_computehosts(self, query=None, fields=None):
+        # NOTE: The hosts and their extra capabilities are looked up for all
+        # the hosts at once, rather than host by host.
+        host_ids = [host['id'] for host in db_api.host_list(fields=['id'])]
+        if fields is None:
+            return db_api.host_get_all_by_ids(host_ids)
+        return db_api.host_summary_get_all(host_ids, fields)
+
+    def get_computehosts_version(self):
+        return db_api.host_list_version()
 
     def create_computehost(self, host_values):
         # TODO(sbauza):
@@ -482,6 +649,9 @@ class PhysicalHostPlugin(base.BasePlugin, nova.NovaClientWrapper):
         if not values:
             return self.get_computehost(host_id)
 
+        if db_api.host_get(host_id) is None:
+            raise manager_ex.HostNotFound(host=host_id)
+
         cant_update_extra_capability = []
         previous_capabilities = self._get_extra_capabilities(host_id)
         updated_keys = set(values.keys()) & set(previous_capabilities.keys())
@@ -566,7 +736,12 @@ class PhysicalHostPlugin(base.BasePlugin, nova.NovaClientWrapper):
         return [{"resource_id": host, "reservations": allocs}
                 for host, allocs in hosts_allocations.items()]
 
+    def get_allocations_version(self):
+        return db_api.host_allocation_list_version()
+
     def get_allocations(self, host_id, query):
+        if db_api.host_get(host_id) is None:
+            raise manager_ex.HostNotFound(host=host_id)
         options = self.get_query_options(query, QUERY_TYPE_ALLOCATION)
         host_allocations = self.query_allocations([host_id], **options)
         if host_id not in host_allocations:
@@ -574,6 +749,12 @@ class PhysicalHostPlugin(base.BasePlugin, nova.NovaClientWrapper):
         allocs = host_allocations[host_id]
         return {"resource_id": host_id, "reservations": allocs}
 
+    def list_allocations_for_reservation(self, reservation_id):
+        allocations = db_api.host_allocation_get_all_by_values(
+            reservation_id=reservation_id)
+        return list(dict.fromkeys(
+            alloc['compute_host_id'] for alloc in allocations))
+
     def query_allocations(self, hosts, lease_id=None, reservation_id=None):
         """Return dict of host and its allocations.
 
@@ -624,6 +805,37 @@ class PhysicalHostPlugin(base.BasePlugin, nova.NovaClientWrapper):
         count_range = count_range.split('-')
         min_host = count_range[0]
         max_host = count_range[1]
+        not_allocated_host_ids, allocated_host_ids = self._free_hosts(
+            hypervisor_properties, resource_properties, start_date, end_date)
+        if len(not_allocated_host_ids) >= int(min_host):
+            if CONF[self.resource_type].randomize_host_selection:
+                random.shuffle(not_allocated_host_ids)
+            return not_allocated_host_ids[:int(max_host)]
+        all_host_ids = allocated_host_ids + not_allocated_host_ids
+        if len(all_host_ids) >= int(min_host):
+            if CONF[self.resource_type].randomize_host_selection:
+                random.shuffle(all_host_ids)
+            return all_host_ids[:int(max_host)]
+        else:
+            return []
+
+    def _candidate_hosts(self, hypervisor_properties, resource_properties,
+                         start_date, end_date):
+        """Return all the free matching hosts in order of preference."""
+        not_allocated_host_ids, allocated_host_ids = self._free_hosts(
+            hypervisor_properties, resource_properties, start_date, end_date)
+        if CONF[self.resource_type].randomize_host_selection:
+            random.shuffle(not_allocated_host_ids)
+            random.shuffle(allocated_host_ids)
+        return not_allocated_host_ids + allocated_host_ids
+
+    def _free_hosts(self, hypervisor_properties, resource_properties,
+                    start_date, end_date):
+        """Return the matching hosts free during the given time frame.
+
+        :return: a tuple of (host ids without any allocation, host ids with
+                 allocations outside the time frame)
+        """
         allocated_host_ids = []
         not_allocated_host_ids = []
         filter_array = []
@@ -652,17 +864,7 @@ class PhysicalHostPlugin(base.BasePlugin, nova.NovaClientWrapper):
                 (start_date_with_margin, end_date_with_margin),
             ]:
                 allocated_host_ids.append(host['id'])
-        if len(not_allocated_host_ids) >= int(min_host):
-            if CONF[self.resource_type].randomize_host_selection:
-                random.shuffle(not_allocated_host_ids)
-            return not_allocated_host_ids[:int(max_host)]
-        all_host_ids = allocated_host_ids + not_allocated_host_ids
-        if len(all_host_ids) >= int(min_host):
-            if CONF[self.resource_type].randomize_host_selection:
-                random.shuffle(all_host_ids)
-            return all_host_ids[:int(max_host)]
-        else:
-            return []
+        return not_allocated_host_ids, allocated_host_ids
 
     def _convert_int_param(self, param, name):
         """Checks that the parameter is present and can be converted to int."""
@@ -816,6 +1018,7 @@ class PhysicalHostMonitorPlugin(base.BaseMonitorPlugin,
         if not cls._instance:
             cls._instance = super(PhysicalHostMonitorPlugin, cls).__new__(cls)
             cls._instance.healing_handlers = []
+            cls._instance.healing_entries_initialized = False
             super(PhysicalHostMonitorPlugin, cls._instance).__init__(
                 username=CONF.os_admin_username,
                 password=CONF.os_admin_password,
@@ -875,13 +1078,56 @@ class PhysicalHostMonitorPlugin(base.BaseMonitorPlugin,
                     ['reservable == 0',
                      'hypervisor_hostname == ' + data['host']])
                 if recovered_hosts:
-                    db_api.host_update(recovered_hosts[0]['id'],
-                                       {'reservable': True})
-                    LOG.warning('%s recovered.',
-                                recovered_hosts[0]['hypervisor_hostname'])
+                    self._handle_recoveries(recovered_hosts[:1])
 
         return reservation_flags
 
+    def notification_batch_callback(self, notifications):
+        """Handle notification messages received in a coalescing window.
+
+        Only the latest state of each host is considered. Failed hosts are
+        handled with a single healing pass.
+
+        :param notifications: a list of (event type, payload) tuples in the
+                              order they were received.
+        :return: a dictionary of {reservation id: flags to update}
+                 e.g. {'de27786d-bd96-46bb-8363-19c13b2c6657':
+                       {'missing_resources': True}}
+        """
+        LOG.trace('Handling %d notifications...', len(notifications))
+        reservation_flags = {}
+
+        host_states = {}
+        for event_type, payload in notifications:
+            data = payload.get('nova_object.data', None)
+            if data:
+                host_states[data['host']] = (data['disabled'] or
+                                             data['forced_down'])
+
+        recovered_names = sorted(h for h, down in host_states.items()
+                                 if not down)
+        if recovered_names:
+            recovered_hosts = db_api.host_get_all_by_queries(
+                ['reservable == 0',
+                 'hypervisor_hostname in ' + ','.join(recovered_names)])
+            if recovered_hosts:
+                self._handle_recoveries(recovered_hosts)
+
+        failed_names = sorted(h for h, down in host_states.items() if down)
+        if failed_names:
+            failed_hosts = db_api.reservable_host_get_all_by_queries(
+                ['hypervisor_hostname in ' + ','.join(failed_names)])
+            if failed_hosts:
+                for host in failed_hosts:
+                    LOG.warning('%s failed.', host['hypervisor_hostname'])
+                reservation_flags = self._handle_failures(failed_hosts)
+
+        return reservation_flags
+
+    def get_notification_coalescing_window(self):
+        """Get a window in seconds to coalesce notifications over."""
+        return CONF[plugin.RESOURCE_TYPE].notification_coalescing_window
+
     def is_polling_enabled(self):
         """Check if the polling monitor is enabled."""
         return CONF[plugin.RESOURCE_TYPE].enable_polling_monitor
@@ -906,9 +1152,7 @@ class PhysicalHostMonitorPlugin(base.BaseMonitorPlugin,
                 LOG.warning('%s failed.', host['hypervisor_hostname'])
             reservation_flags = self._handle_failures(failed_hosts)
         if recovered_hosts:
-            for host in recovered_hosts:
-                db_api.host_update(host['id'], {'reservable': True})
-                LOG.warning('%s recovered.', host['hypervisor_hostname'])
+            self._handle_recoveries(recovered_hosts)
 
         return reservation_flags
 
@@ -955,9 +1199,26 @@ class PhysicalHostMonitorPlugin(base.BaseMonitorPlugin,
                 LOG.exception('Failed to update %s. %s',
                               host['hypervisor_hostname'], str(e))
 
+        # Record the reservations allocated on the failed hosts
+        db_api.host_healing_entry_create_all_by_hosts(
+            [host['id'] for host in failed_hosts], timeutils.utcnow())
+
         # Heal related reservations
         return self.heal()
 
+    def _handle_recoveries(self, recovered_hosts):
+        """Handle resource recoveries.
+
+        :param recovered_hosts: a list of recovered hosts.
+        """
+        for host in recovered_hosts:
+            db_api.host_update(host['id'], {'reservable': True})
+            LOG.warning('%s recovered.', host['hypervisor_hostname'])
+
+        # Reservations on recovered hosts don't need to be healed anymore
+        db_api.host_healing_entry_destroy_all_by_hosts(
+            [host['id'] for host in recovered_hosts])
+
     def get_healing_interval(self):
         """Get interval of reservation healing in minutes."""
         return CONF[plugin.RESOURCE_TYPE].healing_interval
@@ -965,10 +1226,14 @@ class PhysicalHostMonitorPlugin(base.BaseMonitorPlugin,
     def heal(self):
         """Heal suffering reservations in the next healing interval.
 
+        Only the (host, reservation) pairs recorded as to be healed are
+        processed, i.e. reservations suffering from new failures or
+        reservations entering the healing interval. Processed pairs are
+        removed from the record.
+
         :return: a dictionary of {reservation id: flags to update}
         """
         reservation_flags = {}
-        hosts = db_api.unreservable_host_get_all_by_queries([])
 
         interval_begin = timeutils.utcnow()
         interval = self.get_healing_interval()
@@ -978,9 +1243,36 @@ class PhysicalHostMonitorPlugin(base.BaseMonitorPlugin,
             interval_end = interval_begin + datetime.timedelta(
                 minutes=interval)
 
+        if not self.healing_entries_initialized:
+            # Record failures which happened before the manager started,
+            # e.g. before upgrading to a release recording them.
+            hosts = db_api.unreservable_host_get_all_by_queries([])
+            db_api.host_healing_entry_create_all_by_hosts(
+                [h['id'] for h in hosts], interval_begin)
+            self.healing_entries_initialized = True
+
+        db_api.host_healing_entry_destroy_all_expired(interval_begin)
+        entries = db_api.host_healing_entry_get_all_by_interval(
+            interval_begin, interval_end)
+        if not entries:
+            LOG.debug('Healing pass touched 0 reservations.')
+            return reservation_flags
+
+        host_ids = sorted(set(e['computehost_id'] for e in entries))
+        reservation_ids = sorted(set(e['reservation_id'] for e in entries))
+        hosts = db_api.host_get_all_by_queries(
+            ['id in ' + ','.join(host_ids)])
+
         for handler in self.healing_handlers:
             reservation_flags.update(handler(hosts,
                                              interval_begin,
-                                             interval_end))
+                                             interval_end,
+                                             reservation_ids=reservation_ids))
+
+        db_api.host_healing_entry_destroy_all([e['id'] for e in entries])
+        LOG.info('Healing pass touched %(reservations)d reservations on '
+                 '%(hosts)d failed hosts.',
+                 {'reservations': len(reservation_ids),
+                  'hosts': len(host_ids)})
 
         return reservation_flags
@@ -41,6 +41,10 @@ leases_policies = [
             {
                 'path': '/{api_version}/leases',
                 'method': 'POST'
+            },
+            {
+                'path': '/{api_version}/leases:batch',
+                'method': 'POST'
             }
         ],
         scope_types=['project']
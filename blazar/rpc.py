@@ -9,13 +9,35 @@
 #    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 #    License for the specific language governing permissions and limitations
 #    under the License.
+import base64
+import datetime
+import struct
+import zlib
+
+import msgpack
 from oslo_config import cfg
 import oslo_messaging as messaging
+from oslo_serialization import jsonutils
 
 
 CONF = cfg.CONF
+CONF.import_opt('rpc_packing_threshold', 'blazar.manager', 'manager')
 TRANSPORT = None
 
+# Key of the request context telling which version of the packed format the
+# caller can decode. Servers not knowing it ignore it, and send their
+# results as they are.
+PACKING_CONTEXT_KEY = 'blazar_rpc_packing'
+PACKING_VERSION = 1
+
+# Key of a packed result, whose value is the version of the packed format.
+PACKED_KEY = 'blazar_packed'
+
+_DATETIME_EXT = 1
+_DATETIME = struct.Struct('!q')
+_EPOCH = datetime.datetime(1970, 1, 1)
+_ONE_MICROSECOND = datetime.timedelta(microseconds=1)
+
 
 def init():
     global TRANSPORT
@@ -33,6 +55,7 @@ def get_client(target):
     return messaging.RPCClient(
         TRANSPORT,
         target,
+        serializer=RPCSerializer(),
     )
 
 
@@ -44,8 +67,105 @@ def get_server(target, endpoints):
         target,
         endpoints,
         executor='eventlet',
+        serializer=RPCSerializer(CONF.manager.rpc_packing_threshold),
     )
 
 
 def create_transport(url):
     return messaging.get_rpc_transport(CONF, url=url)
+
+
+def _pack_default(value):
+    if isinstance(value, datetime.datetime):
+        delta = value.replace(tzinfo=None) - _EPOCH
+        return msgpack.ExtType(_DATETIME_EXT,
+                               _DATETIME.pack(delta // _ONE_MICROSECOND))
+    return jsonutils.to_primitive(value, convert_instances=True)
+
+
+def _unpack_ext(code, data):
+    if code == _DATETIME_EXT:
+        value = _EPOCH + _DATETIME.unpack(data)[0] * _ONE_MICROSECOND
+        # NOTE: Datetimes are handed to callers in the same format as when
+        # they are sent as JSON, i.e. timeutils.PERFECT_TIME_FORMAT, which
+        # is faster to build this way than with strftime().
+        return '%04d-%02d-%02dT%02d:%02d:%02d.%06d' % (
+            value.year, value.month, value.day, value.hour, value.minute,
+            value.second, value.microsecond)
+    return msgpack.ExtType(code, data)
+
+
+def _unpack_map(pairs):
+    # NOTE: Keys are turned into strings the way JSON does, so that results
+    # are the same whether they are packed or not.
+    return {key if isinstance(key, str) else jsonutils.dumps(key): value
+            for key, value in pairs}
+
+
+def _packb(entity):
+    return msgpack.packb(entity, default=_pack_default, use_bin_type=True)
+
+
+def _compress(data):
+    return {PACKED_KEY: PACKING_VERSION,
+            'data': base64.b64encode(zlib.compress(data)).decode('ascii')}
+
+
+def pack(entity):
+    """Return entity packed with msgpack and compressed with zlib.
+
+    Datetimes are stored in eight bytes rather than as strings.
+    """
+    return _compress(_packb(entity))
+
+
+def unpack(packed):
+    """Return the entity packed by pack()."""
+    data = zlib.decompress(base64.b64decode(packed['data']))
+    return msgpack.unpackb(data, ext_hook=_unpack_ext,
+                           object_pairs_hook=_unpack_map, raw=False,
+                           strict_map_key=False)
+
+
+def is_packed(entity):
+    return (isinstance(entity, dict) and
+            set(entity) == {PACKED_KEY, 'data'} and
+            entity[PACKED_KEY] == PACKING_VERSION)
+
+
+class RPCSerializer(messaging.NoOpSerializer):
+    """Serializer sending large RPC results in a compact form.
+
+    Messages are encoded as JSON by the transport, which makes large
+    results, e.g. leases with many reservations and events, costly to send.
+    Results taking more than packing_threshold bytes once packed with
+    msgpack are sent compressed instead, if the caller can unpack them.
+
+    Smaller results are sent as they are: the packed data has to be base64
+    encoded to fit in JSON, which outweighs what msgpack alone saves.
+    """
+
+    def __init__(self, packing_threshold=0):
+        super(RPCSerializer, self).__init__()
+        self.packing_threshold = packing_threshold
+
+    def serialize_context(self, ctxt):
+        ctxt = dict(ctxt)
+        ctxt[PACKING_CONTEXT_KEY] = PACKING_VERSION
+        return ctxt
+
+    def serialize_entity(self, ctxt, entity):
+        if (not self.packing_threshold or
+                not isinstance(entity, (dict, list)) or
+                ctxt.get(PACKING_CONTEXT_KEY) != PACKING_VERSION):
+            return entity
+
+        data = _packb(entity)
+        if len(data) < self.packing_threshold:
+            return entity
+        return _compress(data)
+
+    def deserialize_entity(self, ctxt, entity):
+        if is_packed(entity):
+            return unpack(entity)
+        return entity
@@ -117,7 +117,7 @@ class LeaseStatus(BaseStatus):
         ACTIVE: (TERMINATING, UPDATING, DELETING),
         TERMINATED: (UPDATING, DELETING),
         ERROR: (TERMINATING, UPDATING, DELETING),
-        CREATING: (PENDING, DELETING),
+        CREATING: (PENDING, ERROR, DELETING),
         STARTING: (ACTIVE, ERROR, DELETING),
         UPDATING: STABLE + (DELETING,),
         TERMINATING: (TERMINATED, ERROR, DELETING),
@@ -201,22 +201,27 @@ class LeaseStatus(BaseStatus):
             def wrapper(*args, **kwargs):
                 # Update a lease status
                 lease_id = kwargs['lease_id']
-                lease = db_api.lease_get(lease_id)
-                original_status = lease['status']
-                if cls.is_valid_transition(original_status,
-                                           transition,
-                                           lease_id=lease_id):
-                    db_api.lease_update(lease_id,
-                                        {'status': transition})
-                    LOG.debug('Status of lease %s changed from %s to %s.',
-                              lease_id, original_status, transition)
-                else:
-                    LOG.warning('Aborting %s. '
-                                'Invalid lease status transition '
-                                'from %s to %s.',
-                                func.__name__, original_status,
-                                transition)
-                    raise exceptions.InvalidStatus
+                with db_api.transaction():
+                    lease = db_api.lease_get(lease_id)
+                    if lease is None:
+                        raise exceptions.NotFound(
+                            object={'lease_id': lease_id})
+                    original_status = lease['status']
+                    if cls.is_valid_transition(original_status,
+                                               transition,
+                                               lease_id=lease_id):
+                        db_api.lease_update(lease_id,
+                                            {'status': transition})
+                        LOG.debug('Status of lease %s changed from %s to '
+                                  '%s.', lease_id, original_status,
+                                  transition)
+                    else:
+                        LOG.warning('Aborting %s. '
+                                    'Invalid lease status transition '
+                                    'from %s to %s.',
+                                    func.__name__, original_status,
+                                    transition)
+                        raise exceptions.InvalidStatus
 
                 # Executing the wrapped function
                 try:
@@ -237,21 +242,29 @@ class LeaseStatus(BaseStatus):
                                                 {'status': cls.ERROR})
 
                 # Update a lease status if it exists
-                if db_api.lease_get(lease_id):
-                    next_status = cls.derive_stable_status(lease_id)
-                    if (next_status in result_in
-                            and cls.is_valid_transition(transition,
-                                                        next_status,
-                                                        lease_id=lease_id)):
-                        db_api.lease_update(lease_id,
-                                            {'status': next_status})
-                        LOG.debug('Status of lease %s changed from %s to %s.',
-                                  lease_id, transition, next_status)
-                    else:
-                        LOG.error('Lease %s went into ERROR status.',
-                                  lease_id)
-                        db_api.lease_update(lease_id, {'status': cls.ERROR})
-                        raise exceptions.InvalidStatus
+                with db_api.transaction():
+                    valid = True
+                    if db_api.lease_get(lease_id):
+                        next_status = cls.derive_stable_status(lease_id)
+                        valid = (next_status in result_in
+                                 and cls.is_valid_transition(
+                                     transition, next_status,
+                                     lease_id=lease_id))
+                        if valid:
+                            db_api.lease_update(lease_id,
+                                                {'status': next_status})
+                            LOG.debug('Status of lease %s changed from %s '
+                                      'to %s.', lease_id, transition,
+                                      next_status)
+                        else:
+                            LOG.error('Lease %s went into ERROR status.',
+                                      lease_id)
+                            db_api.lease_update(lease_id,
+                                                {'status': cls.ERROR})
+
+                # NOTE: raise once the ERROR status has been committed.
+                if not valid:
+                    raise exceptions.InvalidStatus
 
                 return result
             return wrapper
@@ -13,6 +13,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import contextlib
 import fixtures
 import tempfile
 import testscenarios
@@ -24,6 +25,7 @@ from blazar import config as cfg
 from blazar import context
 from blazar.db.sqlalchemy import api as db_api
 from blazar.db.sqlalchemy import facade_wrapper
+from blazar.db.sqlalchemy import query_stats
 
 cfg.CONF.set_override('use_stderr', False)
 
@@ -47,6 +49,23 @@ class Database(fixtures.Fixture):
         self.addCleanup(db_api.drop_db)
 
 
+class QueryCounter(fixtures.Fixture):
+    """Count the database queries run while the fixture is set up.
+
+    The queries are available as a QueryStats in the stats attribute.
+    """
+
+    def setUp(self):
+        super(QueryCounter, self).setUp()
+
+        self.stats = query_stats.start()
+        self.addCleanup(query_stats.stop, self.stats)
+
+    @property
+    def count(self):
+        return self.stats.count
+
+
 class TestCase(testscenarios.WithScenarios, base.BaseTestCase):
     """Test case base class for all unit tests.
 
@@ -86,6 +105,16 @@ class DBTestCase(TestCase):
 
         self.useFixture(_DB_CACHE)
 
+    @contextlib.contextmanager
+    def assertMaxQueries(self, maximum):
+        """Assert that the block runs at most maximum database queries."""
+        with QueryCounter() as counter:
+            yield counter
+        if counter.count > maximum:
+            self.fail('%d database queries run, expected at most %d. Most '
+                      'frequent queries:\n%s'
+                      % (counter.count, maximum, counter.stats.format_top()))
+
 
 class FakeServiceCatalog(object):
     def __init__(self, catalog):
@@ -71,6 +71,11 @@ class APITest(tests.TestCase):
 
         self.rpcapi = leases_api.ManagerRPCAPI
         self.hosts_rpcapi = hosts_rpcapi.ManagerRPCAPI
+        self.patch(self.rpcapi, 'get_leases_version').return_value = {
+            'count': 0, 'updated_at': None}
+        self.patch(self.hosts_rpcapi,
+                   'get_computehosts_version').return_value = {
+            'count': 0, 'updated_at': None}
 
         # self.patch(rpcapi.ManagerRPCAPI, 'list_leases').return_value = []
 
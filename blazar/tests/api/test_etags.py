@@ -0,0 +1,67 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+
+from oslo_utils import timeutils
+import webob
+
+from blazar.api import etags
+from blazar import tests
+
+
+class EtagsTestCase(tests.TestCase):
+    def setUp(self):
+        super(EtagsTestCase, self).setUp()
+
+        self.now = datetime.datetime(2030, 1, 1, 12, 0, 0)
+        self.patch(timeutils, 'utcnow').return_value = self.now
+
+    def test_last_modified(self):
+        version = {'count': 1,
+                   'updated_at': datetime.datetime(2030, 1, 1, 11, 0)}
+        self.assertEqual(datetime.datetime(2030, 1, 1, 11, 0),
+                         etags.last_modified(version))
+
+    def test_last_modified_from_string(self):
+        version = {'count': 1, 'updated_at': '2030-01-01T11:00:00.000000'}
+        self.assertEqual(datetime.datetime(2030, 1, 1, 11, 0),
+                         etags.last_modified(version))
+
+    def test_etag_empty_collection(self):
+        self.assertEqual('0', etags.etag({'count': 0, 'updated_at': None}))
+
+    def test_etag(self):
+        version = {'count': 3, 'updated_at': '2030-01-01T11:00:00.000000'}
+        self.assertEqual('3-20300101110000000000', etags.etag(version))
+
+    def test_etag_count_changes(self):
+        updated_at = datetime.datetime(2030, 1, 1, 11, 0)
+        self.assertNotEqual(
+            etags.etag({'count': 3, 'updated_at': updated_at}),
+            etags.etag({'count': 2, 'updated_at': updated_at}))
+
+    def test_no_etag_within_settle_time(self):
+        version = {'count': 3,
+                   'updated_at': self.now - datetime.timedelta(seconds=1)}
+        self.assertIsNone(etags.etag(version))
+
+    def test_is_fresh(self):
+        request = webob.Request.blank('/', headers={'If-None-Match': '"3"'})
+        self.assertTrue(etags.is_fresh(request, '3'))
+        self.assertFalse(etags.is_fresh(request, '4'))
+        self.assertFalse(etags.is_fresh(request, None))
+
+    def test_is_fresh_without_condition(self):
+        request = webob.Request.blank('/')
+        self.assertFalse(etags.is_fresh(request, '3'))
@@ -13,11 +13,14 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from oslo_config import cfg
 from oslo_serialization import jsonutils
+import prometheus_client
 
 from blazar.api import app as api
 from blazar.api.v1 import app as v1_app
 from blazar.api.v2 import app as v2_app
+from blazar import metrics
 from blazar import tests
 
 
@@ -149,3 +152,29 @@ class TestVersionSelectorApplication(tests.TestCase):
         versions_raw = version_selector(environ, self.start_response)
         versions = jsonutils.loads(versions_raw.pop())
         self.assertEqual(self.v2_make_app().versions, versions)
+
+    def test_get_metrics(self):
+        cfg.CONF.set_override('api_enabled', True, group='metrics')
+        self.addCleanup(cfg.CONF.clear_override, 'api_enabled',
+                        group='metrics')
+        api_metrics = self.patch(metrics, 'api_metrics')
+        start_response = self.patch(self, 'start_response')
+        version_selector = api.VersionSelectorApplication()
+
+        body = version_selector({'PATH_INFO': '/metrics'},
+                                self.start_response)
+
+        self.assertEqual([api_metrics.return_value], body)
+        start_response.assert_called_once_with('200 OK', [
+            ('Content-Type', prometheus_client.CONTENT_TYPE_LATEST)])
+
+    def test_get_metrics_disabled(self):
+        api_metrics = self.patch(metrics, 'api_metrics')
+        version_selector = api.VersionSelectorApplication()
+
+        body = version_selector({'PATH_INFO': '/metrics'},
+                                self.start_response)
+
+        api_metrics.assert_not_called()
+        self.assertEqual(self.v2_make_app().versions,
+                         jsonutils.loads(body.pop()))
@@ -0,0 +1,103 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+
+import fixtures
+from oslo_config import cfg
+
+from blazar.api.v1.leases import changes
+from blazar import tests
+
+
+class FakeReader(object):
+    def __init__(self):
+        self.changes = []
+
+    def add(self, project_id='project'):
+        self.changes.append({'id': len(self.changes) + 1,
+                             'project_id': project_id})
+
+    def list_lease_changes(self, since, limit=100):
+        return [change for change in self.changes
+                if change['id'] > since][:limit]
+
+    def get_latest_lease_change_id(self):
+        return len(self.changes)
+
+
+class ChangeFeedTestCase(tests.TestCase):
+    def setUp(self):
+        super(ChangeFeedTestCase, self).setUp()
+
+        cfg.CONF.set_override('lease_changes_poll_interval', 0.1)
+        self.reader = FakeReader()
+        self.reader.add()
+        self.feed = changes.ChangeFeed(self.reader)
+
+    def _add_later(self, **kwargs):
+        timer = threading.Timer(0.2, self.reader.add, kwargs=kwargs)
+        timer.start()
+        self.addCleanup(timer.cancel)
+
+    def _wait_stopped(self):
+        deadline = time.monotonic() + 5
+        while self.feed._polling and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertFalse(self.feed._polling)
+
+    def test_latest_id(self):
+        self.assertEqual(1, self.feed.latest_id())
+
+    def test_wait_for_change(self):
+        self._add_later()
+
+        result = self.feed.wait(1, 5)
+
+        self.assertEqual(([{'id': 2, 'project_id': 'project'}], 2), result)
+        self._wait_stopped()
+
+    def test_wait_timeout(self):
+        self.assertEqual(([], 1), self.feed.wait(1, 0.3))
+        self._wait_stopped()
+
+    def test_wait_other_project(self):
+        self._add_later(project_id='other')
+
+        self.assertEqual(([], 2), self.feed.wait(1, 0.6, project_id='project'))
+
+    def test_wait_older_changes(self):
+        self.reader.add()
+        self.reader.add(project_id='other')
+
+        result = self.feed.wait(0, 5, project_id='project')
+
+        self.assertEqual(([{'id': 1, 'project_id': 'project'},
+                           {'id': 2, 'project_id': 'project'}], 3), result)
+
+    def test_wait_poll_failure(self):
+        self.reader.get_latest_lease_change_id = None
+
+        self.assertEqual(([], 1), self.feed.wait(1, 0.3))
+        self._wait_stopped()
+
+    def test_add_trims_buffer(self):
+        self.useFixture(fixtures.MockPatchObject(changes, 'BUFFER_SIZE', 2))
+        self.feed._start_id = 0
+
+        self.feed._add([{'id': 1}, {'id': 2}, {'id': 3}])
+
+        self.assertEqual([{'id': 2}, {'id': 3}], list(self.feed._changes))
+        self.assertEqual(1, self.feed._start_id)
+        self.assertEqual(3, self.feed._latest_id)
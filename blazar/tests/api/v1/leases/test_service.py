@@ -13,7 +13,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from oslo_config import cfg
+
+from blazar.api.v1.leases import changes
 from blazar.api.v1.leases import service as service_api
+from blazar import context
+from blazar.manager.leases import reader as manager_reader
+from blazar.manager.leases import rpcapi as manager_rpcapi
 from blazar import tests
 
 
@@ -46,3 +52,56 @@ class RPCApiTestCase(tests.TestCase):
 
     def get_plugins(self):
         pass
+
+
+class ManagerReaderTestCase(tests.TestCase):
+    def setUp(self):
+        super(ManagerReaderTestCase, self).setUp()
+        self.patch(manager_rpcapi, 'ManagerRPCAPI')
+
+    def test_reads_through_rpc(self):
+        api = service_api.API()
+
+        self.assertIs(api.manager_rpcapi, api.manager_reader)
+
+    def test_reads_from_db(self):
+        cfg.CONF.set_override('api_db_reads', True)
+        self.addCleanup(cfg.CONF.clear_override, 'api_db_reads')
+
+        api = service_api.API()
+
+        self.assertIsInstance(api.manager_reader,
+                              manager_reader.ManagerDBReader)
+
+
+class LeaseChangesTestCase(tests.TestCase):
+    def setUp(self):
+        super(LeaseChangesTestCase, self).setUp()
+        self.patch(manager_rpcapi, 'ManagerRPCAPI')
+        self.change_feed = self.patch(changes, 'ChangeFeed').return_value
+        self.api = service_api.API()
+        ctx = context.BlazarContext(user_id='fake', project_id='fake',
+                                    roles=['member', 'reader'])
+        ctx.__enter__()
+        self.addCleanup(ctx.__exit__, None, None, None)
+
+    def test_get_latest_change(self):
+        self.change_feed.latest_id.return_value = 42
+
+        self.assertEqual(([], 42), self.api.get_lease_changes())
+        self.change_feed.wait.assert_not_called()
+
+    def test_get_lease_changes(self):
+        self.change_feed.wait.return_value = ([{'id': 43}], 43)
+
+        result = self.api.get_lease_changes(since=42, wait=10)
+
+        self.assertEqual(([{'id': 43}], 43), result)
+        self.change_feed.wait.assert_called_once_with(42, 10,
+                                                      project_id='fake')
+
+    def test_get_lease_changes_max_wait(self):
+        self.api.get_lease_changes(since=42, wait=3600)
+
+        self.change_feed.wait.assert_called_once_with(42, 60,
+                                                      project_id='fake')
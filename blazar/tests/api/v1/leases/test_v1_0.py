@@ -14,6 +14,8 @@
 # limitations under the License.
 
 import flask
+from oslo_config import cfg
+import oslo_messaging as messaging
 from oslo_utils import uuidutils
 from testtools import matchers
 
@@ -26,6 +28,8 @@ from blazar.api.v1.leases import v1_0 as leases_api_v1_0
 from blazar.api.v1 import request_id
 from blazar.api.v1 import request_log
 from blazar import context
+from blazar import exceptions
+from blazar import metrics
 from blazar import tests
 
 
@@ -86,8 +90,17 @@ class LeaseAPITestCase(tests.TestCase):
         self.mock_ctx.return_value = context.BlazarContext(
             user_id='fake', project_id='fake', roles=['member'])
         self.create_lease = self.patch(service_api.API, 'create_lease')
+        self.create_leases = self.patch(service_api.API, 'create_leases')
+        self.create_lease_async = self.patch(service_api.API,
+                                             'create_lease_async')
         self.get_leases = self.patch(service_api.API, 'get_leases')
+        self.get_leases_version = self.patch(service_api.API,
+                                             'get_leases_version')
+        self.get_leases_version.return_value = {'count': 0,
+                                                'updated_at': None}
         self.get_lease = self.patch(service_api.API, 'get_lease')
+        self.get_lease_changes = self.patch(service_api.API,
+                                            'get_lease_changes')
         self.update_lease = self.patch(service_api.API, 'update_lease')
         self.delete_lease = self.patch(service_api.API, 'delete_lease')
 
@@ -115,6 +128,38 @@ class LeaseAPITestCase(tests.TestCase):
             res = c.get('/v1/leases', headers=self.headers)
             self._assert_response(res, 200, [], key='leases')
 
+    def test_list_etag(self):
+        self.get_leases_version.return_value = {
+            'count': 1, 'updated_at': '2020-01-01T00:00:00.000000'}
+        with self.app.test_client() as c:
+            self.get_leases.return_value = [fake_lease(id=self.lease_uuid)]
+            res = c.get('/v1/leases', headers=self.headers)
+            self._assert_response(res, 200, [fake_lease(id=self.lease_uuid)],
+                                  key='leases')
+            self.assertEqual(('1-20200101000000000000', False),
+                             res.get_etag())
+
+    def test_list_not_modified(self):
+        self.get_leases_version.return_value = {
+            'count': 1, 'updated_at': '2020-01-01T00:00:00.000000'}
+        headers = dict(self.headers,
+                       **{'If-None-Match': '"1-20200101000000000000"'})
+        with self.app.test_client() as c:
+            res = c.get('/v1/leases', headers=headers)
+            self.assertEqual(304, res.status_code)
+            self.assertEqual(b'', res.data)
+            self.assertFalse(self.get_leases.called)
+
+    def test_list_modified(self):
+        self.get_leases_version.return_value = {
+            'count': 2, 'updated_at': '2020-01-01T00:00:00.000000'}
+        headers = dict(self.headers,
+                       **{'If-None-Match': '"1-20200101000000000000"'})
+        with self.app.test_client() as c:
+            self.get_leases.return_value = []
+            res = c.get('/v1/leases', headers=headers)
+            self._assert_response(res, 200, [], key='leases')
+
     def test_list_with_non_acceptable_api_version(self):
         headers = {'Accept': 'application/json',
                    'OpenStack-API-Version': 'reservation 1.2'}
@@ -129,6 +174,55 @@ class LeaseAPITestCase(tests.TestCase):
                 id=self.lease_uuid), headers=self.headers)
             self._assert_response(res, 201, fake_lease(id=self.lease_uuid))
 
+    def test_create_async(self):
+        headers = dict(self.headers, Prefer='respond-async')
+        with self.app.test_client() as c:
+            lease = fake_lease(id=self.lease_uuid, status='CREATING')
+            self.create_lease_async.return_value = lease
+            res = c.post('/v1/leases', json=fake_lease_request_body(
+                id=self.lease_uuid), headers=headers)
+            self._assert_response(res, 202, lease)
+            self.assertEqual('respond-async',
+                             res.headers.get('Preference-Applied'))
+            self.create_lease.assert_not_called()
+
+    def test_create_batch(self):
+        with self.app.test_client() as c:
+            results = [{'lease': fake_lease(id=self.lease_uuid)}]
+            self.create_leases.return_value = results
+            res = c.post('/v1/leases:batch',
+                         json={'leases': [fake_lease_request_body()]},
+                         headers=self.headers)
+            self._assert_response(res, 200, results, key='leases')
+            self.create_leases.assert_called_once_with(
+                {'leases': [fake_lease_request_body()], 'atomic': True})
+
+    def test_create_batch_without_leases(self):
+        with self.app.test_client() as c:
+            res = c.post('/v1/leases:batch', json={'leases': []},
+                         headers=self.headers)
+            self.assertEqual(400, res.status_code)
+            self.create_leases.assert_not_called()
+
+    def test_create_batch_too_many_leases(self):
+        cfg.CONF.set_override('max_batch_leases', 2)
+        self.addCleanup(cfg.CONF.clear_override, 'max_batch_leases')
+        with self.app.test_client() as c:
+            res = c.post('/v1/leases:batch',
+                         json={'leases': [fake_lease_request_body()] * 3},
+                         headers=self.headers)
+            self.assertEqual(400, res.status_code)
+            self.create_leases.assert_not_called()
+
+    def test_create_batch_with_invalid_atomic(self):
+        with self.app.test_client() as c:
+            res = c.post('/v1/leases:batch',
+                         json={'leases': [fake_lease_request_body()],
+                               'atomic': 'yes'},
+                         headers=self.headers)
+            self.assertEqual(400, res.status_code)
+            self.create_leases.assert_not_called()
+
     def test_create_with_bad_api_version(self):
         headers = {'Accept': 'application/json',
                    'OpenStack-API-Version': 'reservation 1.a'}
@@ -144,6 +238,74 @@ class LeaseAPITestCase(tests.TestCase):
                         headers=self.headers)
             self._assert_response(res, 200, fake_lease(id=self.lease_uuid))
 
+    def test_get_fields(self):
+        with self.app.test_client() as c:
+            self.get_lease.return_value = {'id': self.lease_uuid,
+                                           'name': 'lease'}
+            res = c.get('/v1/leases/{0}?fields=name'.format(self.lease_uuid),
+                        headers=self.headers)
+            self._assert_response(res, 200, {'id': self.lease_uuid,
+                                             'name': 'lease'})
+            self.get_lease.assert_called_once_with(self.lease_uuid,
+                                                   fields=['id', 'name'])
+
+    def test_list_fields(self):
+        with self.app.test_client() as c:
+            self.get_leases.return_value = []
+            res = c.get('/v1/leases?fields=name,status', headers=self.headers)
+            self._assert_response(res, 200, [], key='leases')
+            self.get_leases.assert_called_once_with(
+                {}, fields=['id', 'name', 'status'])
+
+    def test_timing(self):
+        labels = {'method': 'GET', 'route': '/v1/leases/<lease_id>'}
+        count = metrics.API_REGISTRY.get_sample_value(
+            'blazar_api_request_duration_seconds_count', labels) or 0
+        with self.app.test_client() as c:
+            self.get_lease.return_value = fake_lease(id=self.lease_uuid)
+            res = c.get('/v1/leases/{0}'.format(self.lease_uuid),
+                        headers=self.headers)
+            res.close()
+        self.assertEqual(count + 1, metrics.API_REGISTRY.get_sample_value(
+            'blazar_api_request_duration_seconds_count', labels))
+
+    def test_changes(self):
+        with self.app.test_client() as c:
+            changes = [{'id': 43, 'lease_id': self.lease_uuid,
+                        'change': 'update', 'status': 'ACTIVE'}]
+            self.get_lease_changes.return_value = (changes, 43)
+            res = c.get('/v1/leases/changes?since=42&wait=30',
+                        headers=self.headers)
+            self._assert_response(res, 200, changes, key='changes')
+            self.assertEqual(43, res.get_json()['next_since'])
+            self.get_lease_changes.assert_called_once_with(since=42, wait=30)
+
+    def test_changes_without_since(self):
+        with self.app.test_client() as c:
+            self.get_lease_changes.return_value = ([], 42)
+            res = c.get('/v1/leases/changes', headers=self.headers)
+            self._assert_response(res, 200, 42, key='next_since')
+            self.get_lease_changes.assert_called_once_with(since=None,
+                                                           wait=0)
+
+    def test_changes_with_invalid_since(self):
+        with self.app.test_client() as c:
+            for since in ('abc', '-1'):
+                res = c.get('/v1/leases/changes?since=%s' % since,
+                            headers=self.headers)
+                self.assertEqual(400, res.status_code)
+            self.get_lease_changes.assert_not_called()
+
+    def test_get_not_found(self):
+        with self.app.test_client() as c:
+            self.get_lease.side_effect = exceptions.NotFound(
+                object={'lease_id': self.lease_uuid})
+            res = c.get('/v1/leases/{0}'.format(self.lease_uuid),
+                        headers=self.headers)
+            self.assertEqual(404, res.status_code)
+            self.get_lease.assert_called_once_with(self.lease_uuid,
+                                                   fields=None)
+
     def test_get_with_latest_api_version(self):
         headers = {'Accept': 'application/json',
                    'OpenStack-API-Version': 'reservation latest'}
@@ -168,6 +330,15 @@ class LeaseAPITestCase(tests.TestCase):
             res = c.put('/v1/leases/{0}'.format(self.lease_uuid),
                         json=self.fake_lease_body, headers=headers)
             self._assert_response(res, 200, self.fake_lease)
+            self.get_lease.assert_not_called()
+
+    def test_update_not_found(self):
+        with self.app.test_client() as c:
+            self.update_lease.side_effect = messaging.RemoteError(
+                'NotFound', 'Object with lease not found')
+            res = c.put('/v1/leases/{0}'.format(self.lease_uuid),
+                        json={'name': 'updated'}, headers=self.headers)
+            self.assertEqual(404, res.status_code)
 
     def test_update_with_no_service_type_in_header(self):
         headers = {'Accept': 'application/json',
@@ -193,3 +364,12 @@ class LeaseAPITestCase(tests.TestCase):
             self.assertEqual(204, res.status_code)
             self.assertIn(id.HTTP_RESP_HEADER_REQUEST_ID, res.headers)
             self.assertThat(res_id, matchers.StartsWith('req-'))
+            self.get_lease.assert_not_called()
+
+    def test_delete_not_found(self):
+        with self.app.test_client() as c:
+            self.delete_lease.side_effect = messaging.RemoteError(
+                'NotFound', 'Object with lease not found')
+            res = c.delete('/v1/leases/{0}'.format(self.lease_uuid),
+                           headers=self.headers)
+            self.assertEqual(404, res.status_code)
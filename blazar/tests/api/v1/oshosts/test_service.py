@@ -13,7 +13,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from oslo_config import cfg
+
 from blazar.api.v1.oshosts import service as service_api
+from blazar.manager.oshosts import reader as manager_reader
+from blazar.manager.oshosts import rpcapi as manager_rpcapi
 from blazar import tests
 
 
@@ -44,3 +48,23 @@ class RPCApiTestCase(tests.TestCase):
 
     def test_delete_computehost(self):
         pass
+
+
+class ManagerReaderTestCase(tests.TestCase):
+    def setUp(self):
+        super(ManagerReaderTestCase, self).setUp()
+        self.patch(manager_rpcapi, 'ManagerRPCAPI')
+
+    def test_reads_through_rpc(self):
+        api = service_api.API()
+
+        self.assertIs(api.manager_rpcapi, api.manager_reader)
+
+    def test_reads_from_db(self):
+        cfg.CONF.set_override('api_db_reads', True)
+        self.addCleanup(cfg.CONF.clear_override, 'api_db_reads')
+
+        api = service_api.API()
+
+        self.assertIsInstance(api.manager_reader,
+                              manager_reader.ManagerDBReader)
@@ -27,6 +27,7 @@ from blazar.api.v1.oshosts import v1_0 as hosts_api_v1_0
 from blazar.api.v1 import request_id
 from blazar.api.v1 import request_log
 from blazar import context
+from blazar import exceptions
 from blazar import tests
 
 
@@ -99,6 +100,14 @@ class OsHostAPITestCase(tests.TestCase):
                                              'delete_computehost')
         self.list_allocations = self.patch(service_api.API,
                                            'list_allocations')
+        self.get_computehosts_version = self.patch(
+            service_api.API, 'get_computehosts_version')
+        self.get_computehosts_version.return_value = {'count': 0,
+                                                      'updated_at': None}
+        self.get_allocations_version = self.patch(
+            service_api.API, 'get_allocations_version')
+        self.get_allocations_version.return_value = {'count': 0,
+                                                     'updated_at': None}
         self.get_allocations = self.patch(service_api.API, 'get_allocations')
         self.list_resource_properties = self.patch(service_api.API,
                                                    'list_resource_properties')
@@ -160,6 +169,25 @@ class OsHostAPITestCase(tests.TestCase):
             res = c.get('/v1/{0}'.format(self.host_id), headers=self.headers)
             self._assert_response(res, 200, fake_computehost(id=self.host_id))
 
+    def test_get_fields(self):
+        with self.app.test_client() as c:
+            self.get_computehost.return_value = {'id': self.host_id,
+                                                 'vcpus': 1}
+            res = c.get('/v1/{0}?fields=vcpus'.format(self.host_id),
+                        headers=self.headers)
+            self._assert_response(res, 200, {'id': self.host_id, 'vcpus': 1})
+            self.get_computehost.assert_called_once_with(
+                self.host_id, fields=['id', 'vcpus'])
+
+    def test_get_not_found(self):
+        with self.app.test_client() as c:
+            self.get_computehost.side_effect = exceptions.NotFound(
+                object={'host_id': self.host_id})
+            res = c.get('/v1/{0}'.format(self.host_id), headers=self.headers)
+            self.assertEqual(404, res.status_code)
+            self.get_computehost.assert_called_once_with(self.host_id,
+                                                         fields=None)
+
     def test_get_with_latest_api_version(self):
         headers = {'Accept': 'application/json',
                    'OpenStack-API-Version': 'reservation latest'}
@@ -184,6 +212,7 @@ class OsHostAPITestCase(tests.TestCase):
             res = c.put('/v1/{0}'.format(self.host_id),
                         json=self.fake_computehost_body, headers=headers)
             self._assert_response(res, 200, self.fake_computehost, 'host')
+            self.get_computehost.assert_not_called()
 
     def test_update_with_no_service_type_in_header(self):
         headers = {'Accept': 'application/json',
@@ -230,9 +259,10 @@ class OsHostAPITestCase(tests.TestCase):
                'reservation_id': str(uuidutils.generate_uuid())})
     def test_allocation_list_with_query_params(self, query_params):
         with self.app.test_client() as c:
+            self.list_allocations.return_value = []
             res = c.get('/v1/allocations?{0}'.format(query_params),
                         headers=self.headers)
-            self._assert_response(res, 200, {}, key='allocations')
+            self._assert_response(res, 200, [], key='allocations')
 
     @ddt.data({'lease_id': str(uuidutils.generate_uuid()),
                'reservation_id': str(uuidutils.generate_uuid())})
@@ -0,0 +1,91 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest import mock
+
+from blazar.api.v1 import request_log
+from blazar import metrics
+from blazar import tests
+from blazar.utils import timing
+
+
+class RequestLogTestCase(tests.TestCase):
+
+    def setUp(self):
+        super(RequestLogTestCase, self).setUp()
+        self.log = self.patch(request_log, 'LOG')
+        self.start_response = mock.Mock()
+        self.environ = {'REMOTE_ADDR': '127.0.0.1',
+                        'REQUEST_METHOD': 'GET',
+                        'PATH_INFO': '/v1/leases',
+                        'QUERY_STRING': 'fields=name'}
+
+    def _call(self, app):
+        body = request_log.RequestLog(app)(self.environ, self.start_response)
+        chunks = list(body)
+        body.close()
+        return chunks
+
+    def _logged(self):
+        self.log.info.assert_called_once_with(request_log.RequestLog.format,
+                                              mock.ANY)
+        return self.log.info.call_args[0][1]
+
+    def _count(self, route):
+        return metrics.API_REGISTRY.get_sample_value(
+            'blazar_api_request_duration_seconds_count',
+            {'method': 'GET', 'route': route}) or 0
+
+    def test_request(self):
+        count = self._count('/v1/leases')
+
+        def app(environ, start_response):
+            environ[timing.ROUTE_KEY] = '/v1/leases'
+            with timing.rpc():
+                pass
+            start_response('200 OK', [('Content-Length', '2')])
+            return [b'{}']
+
+        self.assertEqual([b'{}'], self._call(app))
+
+        self.start_response.assert_called_once_with(
+            '200 OK', [('Content-Length', '2')], None)
+        logged = self._logged()
+        self.assertEqual('/v1/leases?fields=name', logged['REQUEST_URI'])
+        self.assertEqual('200', logged['status'])
+        self.assertEqual('2', logged['bytes'])
+        self.assertGreaterEqual(logged['time'], logged['rpc_time'])
+        self.assertEqual(count + 1, self._count('/v1/leases'))
+
+    def test_streamed_request(self):
+        count = self._count(timing.UNMATCHED_ROUTE)
+
+        def app(environ, start_response):
+            start_response('200 OK', [])
+            yield b'{"leases": ['
+            yield b']}'
+
+        self.assertEqual([b'{"leases": [', b']}'], self._call(app))
+
+        self.assertEqual(14, self._logged()['bytes'])
+        self.assertEqual(count + 1, self._count(timing.UNMATCHED_ROUTE))
+
+    def test_failed_request(self):
+        app = mock.Mock(side_effect=ValueError)
+
+        self.assertRaises(ValueError, request_log.RequestLog(app),
+                          self.environ, self.start_response)
+
+        logged = self._logged()
+        self.assertEqual('500', logged['status'])
+        self.assertEqual('-', logged['bytes'])
@@ -13,6 +13,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import fixtures
 import flask
 
 from blazar.api.v1 import app as v1_app
@@ -104,6 +105,26 @@ class UtilsTestCase(tests.TestCase):
         self.flask.request.args = 'foo'
         self.assertEqual('foo', self.utils.get_request_args())
 
+    def test_get_fields(self):
+        query = {'fields': 'name, status,,name', 'lease_id': '1'}
+        self.assertEqual(['id', 'name', 'status'],
+                         self.utils.get_fields(query))
+        self.assertEqual({'lease_id': '1'}, query)
+
+    def test_get_fields_not_requested(self):
+        self.assertIsNone(self.utils.get_fields({'lease_id': '1'}))
+        self.assertIsNone(self.utils.get_fields(None))
+
+    def test_prefers_async(self):
+        self.flask.request.headers = {'Prefer': 'wait=10, respond-async'}
+        self.assertTrue(self.utils.prefers_async(self.flask.request))
+
+    def test_prefers_async_no_preference(self):
+        self.flask.request.headers = {'Prefer': 'return=minimal'}
+        self.assertFalse(self.utils.prefers_async(self.flask.request))
+        self.flask.request.headers = {}
+        self.assertFalse(self.utils.prefers_async(self.flask.request))
+
     def test_abort_and_log(self):
         self.utils.abort_and_log(400, "Funny error")
         self.abort.assert_called_once_with(400, description="Funny error")
@@ -148,3 +169,49 @@ class UtilsTestCase(tests.TestCase):
         error = Error("message")
         self.utils.not_found(error)
         error_message.assert_called_once_with(404, 'message', 404)
+
+
+class RenderStreamTestCase(tests.TestCase):
+    def setUp(self):
+        super(RenderStreamTestCase, self).setUp()
+        self.app = v1_app.make_app()
+
+    def _render_stream(self, key, rows):
+        with self.app.test_request_context():
+            resp = utils.render_stream(key, rows)
+            return resp, b''.join(resp.response)
+
+    def test_render_stream(self):
+        resp, body = self._render_stream('leases',
+                                         ({'id': i} for i in range(3)))
+
+        self.assertEqual(200, resp.status_code)
+        self.assertEqual('application/json', resp.mimetype)
+        self.assertEqual({'leases': [{'id': 0}, {'id': 1}, {'id': 2}]},
+                         flask.json.loads(body))
+
+    def test_render_stream_empty(self):
+        resp, body = self._render_stream('leases', iter([]))
+
+        self.assertEqual({'leases': []}, flask.json.loads(body))
+
+    def test_render_stream_in_chunks(self):
+        self.useFixture(
+            fixtures.MockPatchObject(utils, 'STREAM_CHUNK_SIZE', 20))
+        rows = [{'id': 'x' * 10} for i in range(10)]
+
+        with self.app.test_request_context():
+            resp = utils.render_stream('leases', rows)
+            chunks = list(resp.response)
+
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual({'leases': rows},
+                         flask.json.loads(b''.join(chunks)))
+
+    def test_render_stream_fetches_first_row(self):
+        def rows():
+            raise Error('message', 'code')
+            yield
+
+        with self.app.test_request_context():
+            self.assertRaises(Error, utils.render_stream, 'leases', rows())
@@ -16,6 +16,7 @@ Tests for API /leases/ methods
 """
 from oslo_utils import uuidutils
 
+from blazar import metrics
 from blazar.tests import api
 from blazar.utils import trusts
 
@@ -98,6 +99,34 @@ class TestListLeases(api.APITest):
         response = self.get_json(self.path)
         self.assertEqual([self.fake_lease], response)
 
+    def test_not_modified(self):
+        self.rpcapi.get_leases_version.return_value = {
+            'count': 1, 'updated_at': '2020-01-01T00:00:00.000000'}
+        list_leases = self.patch(self.rpcapi, 'list_leases')
+        response = self.app.get(
+            api.PATH_PREFIX + self.path,
+            headers={'If-None-Match': '"1-20200101000000000000"'})
+        self.assertEqual(304, response.status_int)
+        self.assertEqual('"1-20200101000000000000"', response.headers['ETag'])
+        self.assertFalse(list_leases.called)
+
+    def test_etag(self):
+        self.rpcapi.get_leases_version.return_value = {
+            'count': 1, 'updated_at': '2020-01-01T00:00:00.000000'}
+        response = self.app.get(api.PATH_PREFIX + self.path)
+        self.assertEqual(200, response.status_int)
+        self.assertEqual('"1-20200101000000000000"', response.headers['ETag'])
+
+    def test_timing(self):
+        labels = {'method': 'GET', 'route': 'LeasesController.get_all'}
+        count = metrics.API_REGISTRY.get_sample_value(
+            'blazar_api_request_duration_seconds_count', labels) or 0
+
+        self.get_json(self.path)
+
+        self.assertEqual(count + 1, metrics.API_REGISTRY.get_sample_value(
+            'blazar_api_request_duration_seconds_count', labels))
+
     def test_multiple(self):
         id1 = str(uuidutils.generate_uuid())
         id2 = str(uuidutils.generate_uuid())
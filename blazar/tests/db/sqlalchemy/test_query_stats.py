@@ -0,0 +1,126 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from oslo_config import cfg
+from oslo_db import exception as db_exc
+import sqlalchemy as sa
+
+from blazar.db.sqlalchemy import api as db_api
+from blazar.db.sqlalchemy import facade_wrapper
+from blazar.db.sqlalchemy import query_stats
+from blazar import tests
+
+
+class ShapeTestCase(tests.TestCase):
+    def test_shape(self):
+        self.assertEqual(
+            'SELECT a FROM t WHERE b = ? AND c IN (...)',
+            query_stats.shape('SELECT a\n  FROM t\n  WHERE b = ? '
+                              'AND c IN (?, ?, ?)'))
+
+    def test_shape_named_parameters(self):
+        self.assertEqual(
+            'INSERT INTO t (a, b) VALUES (...)',
+            query_stats.shape('INSERT INTO t (a, b) '
+                              'VALUES (%(a)s, %(b)s)'))
+
+    def test_top(self):
+        stats = query_stats.QueryStats()
+        stats.add('SELECT a FROM t WHERE b IN (?)', 0.1)
+        stats.add('SELECT a FROM t WHERE b IN (?, ?)', 0.1)
+        stats.add('SELECT c FROM t', 0.5)
+
+        self.assertEqual(3, stats.count)
+        self.assertAlmostEqual(0.7, stats.time)
+        self.assertEqual([('SELECT a FROM t WHERE b IN (...)', 2, 0.2),
+                          ('SELECT c FROM t', 1, 0.5)], stats.top())
+        self.assertEqual([('SELECT a FROM t WHERE b IN (...)', 2, 0.2)],
+                         stats.top(limit=1))
+
+
+class TrackTestCase(tests.DBTestCase):
+    def setUp(self):
+        super(TrackTestCase, self).setUp()
+
+        self.log = self.patch(query_stats, 'LOG')
+
+    def _select(self, value):
+        with facade_wrapper.session_for_read() as session:
+            session.execute(sa.text('SELECT :value'), {'value': value})
+
+    def test_track(self):
+        with db_api.track_queries('operation') as stats:
+            for value in range(3):
+                self._select(value)
+
+        self.assertEqual(3, stats.shapes['SELECT ?'])
+        self.assertEqual(stats.count, sum(stats.shapes.values()))
+        self.log.debug.assert_called_once()
+        self.log.warning.assert_not_called()
+
+    def test_track_nested(self):
+        with db_api.track_queries('outer') as outer:
+            self._select(1)
+            with db_api.track_queries('inner') as inner:
+                self._select(2)
+
+        self.assertEqual(1, inner.shapes['SELECT ?'])
+        self.assertEqual(2, outer.shapes['SELECT ?'])
+
+    def test_not_tracked(self):
+        stats = query_stats.start()
+        query_stats.stop(stats)
+
+        self._select(1)
+
+        self.assertEqual(0, stats.count)
+
+    def test_over_count_budget(self):
+        cfg.CONF.set_override('query_count_budget', 2)
+        self.addCleanup(cfg.CONF.clear_override, 'query_count_budget')
+
+        with db_api.track_queries('operation'):
+            for value in range(3):
+                self._select(value)
+
+        self.log.warning.assert_called_once()
+        values = self.log.warning.call_args[0][1]
+        self.assertEqual('operation', values['operation'])
+        self.assertIn('SELECT ?', values['top'])
+
+    def test_failed_query(self):
+        with db_api.track_queries('operation') as stats:
+            self.assertRaises(db_exc.DBError, self._select_unknown_table)
+            self._select(1)
+
+        self.assertEqual(1, stats.shapes['SELECT ?'])
+        self.assertEqual(1, stats.shapes['SELECT * FROM unknown'])
+
+    def _select_unknown_table(self):
+        with facade_wrapper.session_for_read() as session:
+            session.execute(sa.text('SELECT * FROM unknown'))
+
+
+class QueryCounterTestCase(tests.DBTestCase):
+    def test_assert_max_queries(self):
+        with self.assertMaxQueries(10) as counter:
+            db_api.lease_get('lease-id')
+
+        self.assertGreater(counter.count, 0)
+
+    def test_assert_max_queries_exceeded(self):
+        def _run():
+            with self.assertMaxQueries(0):
+                db_api.lease_get('lease-id')
+
+        self.assertRaises(self.failureException, _run)
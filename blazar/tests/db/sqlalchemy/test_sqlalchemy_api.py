@@ -15,12 +15,16 @@
 
 import datetime
 import operator
+from unittest import mock
 
 from oslo_utils import timeutils
 from oslo_utils import uuidutils
+import sqlalchemy as sa
 
 from blazar.db import exceptions as db_exceptions
 from blazar.db.sqlalchemy import api as db_api
+from blazar.db.sqlalchemy import facade_wrapper
+from blazar.db.sqlalchemy import models
 from blazar.plugins import oshosts as host_plugin
 from blazar import tests
 
@@ -326,6 +330,49 @@ class SQLAlchemyDBApiTestCase(tests.DBTestCase):
             values=_get_fake_phys_lease_values(id='2', name='fake2'))
         self.assertEqual(['1', '2'], db_api.lease_list())
 
+    def test_lease_list_iter(self):
+        for lease_id in ('3', '1', '5', '2', '4'):
+            _create_physical_lease(
+                values=_get_fake_phys_lease_values(id=lease_id))
+
+        leases = db_api.lease_list_iter(batch_size=2)
+
+        self.assertEqual(['1', '2', '3', '4', '5'],
+                         [lease.id for lease in leases])
+
+    def test_lease_list_iter_by_project(self):
+        _create_physical_lease(values=_get_fake_phys_lease_values(id='1'))
+
+        self.assertEqual(['1'], [lease.id for lease in
+                                 db_api.lease_list_iter(project_id='fake')])
+        self.assertEqual([], list(db_api.lease_list_iter(project_id='other')))
+
+    def test_lease_list_iter_loads_reservations(self):
+        _create_physical_lease(values=_get_fake_phys_lease_values(id='1'))
+
+        lease = next(db_api.lease_list_iter()).to_dict()
+
+        self.assertEqual(1, len(lease['reservations']))
+
+    def test_lease_get_fields(self):
+        _create_physical_lease(values=_get_fake_phys_lease_values(id='1'))
+
+        lease = db_api.lease_get('1', fields=['name', 'start_date']).to_dict()
+
+        self.assertEqual({'id': '1', 'name': 'fake_phys_lease',
+                          'start_date': _get_datetime('2030-01-01 00:00')},
+                         lease)
+
+    def test_lease_list_fields_with_relationship(self):
+        _create_physical_lease(values=_get_fake_phys_lease_values(id='1'))
+
+        leases = db_api.lease_list(fields=['reservations'])
+
+        self.assertEqual(1, len(leases))
+        lease = leases[0].to_dict()
+        self.assertEqual({'id', 'reservations'}, set(lease))
+        self.assertEqual(1, len(lease['reservations']))
+
     def test_lease_update(self):
         """Update both start_date and name and check lease has been updated."""
         result = _create_physical_lease()
@@ -338,6 +385,197 @@ class SQLAlchemyDBApiTestCase(tests.DBTestCase):
         self.assertEqual(_get_datetime('2014-02-01 00:00'),
                          result['start_date'])
 
+    def test_lease_update_returns_updated_lease(self):
+        lease = _create_physical_lease()
+        result = db_api.lease_update(lease['id'], {'status': 'ACTIVE'})
+
+        self.assertEqual('ACTIVE', result.status)
+        self.assertIsNotNone(result.updated_at)
+        self.assertEqual(result.to_dict(),
+                         db_api.lease_get(lease['id']).to_dict())
+
+    def test_lease_get_all_by_status(self):
+        for status in ('CREATING', 'PENDING'):
+            values = _get_fake_phys_lease_values(
+                name=_get_fake_random_uuid())
+            values['status'] = status
+            db_api.lease_create(values)
+
+        self.assertEqual(['CREATING'],
+                         [lease['status'] for lease in
+                          db_api.lease_get_all_by_status('CREATING')])
+
+    def test_lease_count_by_status(self):
+        self.assertEqual([], db_api.lease_count_by_status())
+
+        for status in ('ACTIVE', 'ACTIVE', 'PENDING'):
+            values = _get_fake_phys_lease_values(
+                name=_get_fake_random_uuid())
+            values['status'] = status
+            db_api.lease_create(values)
+        db_api.lease_create(dict(_get_fake_phys_lease_values(
+            name=_get_fake_random_uuid()), status='ACTIVE', degraded=True))
+
+        self.assertEqual([('ACTIVE', False, 2), ('ACTIVE', True, 1),
+                          ('PENDING', False, 1)],
+                         sorted(db_api.lease_count_by_status()))
+
+    def test_lease_list_version(self):
+        self.assertEqual({'count': 0, 'updated_at': None},
+                         db_api.lease_list_version())
+
+        lease = _create_physical_lease()
+        version = db_api.lease_list_version()
+        # The lease, its reservation and its host reservation.
+        self.assertEqual(3, version['count'])
+        self.assertIsInstance(version['updated_at'], datetime.datetime)
+        self.assertEqual({'count': 0, 'updated_at': None},
+                         db_api.lease_list_version(project_id='other'))
+        self.assertEqual(version,
+                         db_api.lease_list_version(project_id='fake'))
+
+        with mock.patch.object(timeutils, 'utcnow') as patched:
+            patched.return_value = (version['updated_at'] +
+                                    datetime.timedelta(seconds=10))
+            db_api.event_create({'lease_id': lease['id'],
+                                 'event_type': 'start_lease',
+                                 'time': lease['start_date'],
+                                 'status': 'UNDONE'})
+        new_version = db_api.lease_list_version()
+        self.assertEqual(4, new_version['count'])
+        self.assertEqual(patched.return_value, new_version['updated_at'])
+
+    def test_lease_update_not_found(self):
+        self.assertRaises(db_exceptions.BlazarDBNotFound,
+                          db_api.lease_update, 'unknown-lease',
+                          {'status': 'ACTIVE'})
+
+    def test_lease_mark_degraded_bulk(self):
+        lease1 = _create_physical_lease(random=True)
+        lease2 = _create_physical_lease(random=True)
+        lease3 = _create_physical_lease(random=True)
+
+        result = db_api.lease_mark_degraded_bulk([lease1['id'],
+                                                  lease2['id']])
+
+        self.assertEqual([lease1['id'], lease2['id']], result)
+        self.assertTrue(db_api.lease_get(lease1['id'])['degraded'])
+        self.assertTrue(db_api.lease_get(lease2['id'])['degraded'])
+        self.assertFalse(db_api.lease_get(lease3['id'])['degraded'])
+
+    # Lease changes
+
+    def _create_lease_change(self, change_id, created_at):
+        with db_api.facade_wrapper.session_for_write() as session:
+            session.add(models.LeaseChange(id=change_id, lease_id='1',
+                                           change='update',
+                                           created_at=created_at))
+
+    def test_lease_changes_recorded(self):
+        values = _get_fake_phys_lease_values()
+        values['status'] = 'PENDING'
+        lease = _create_physical_lease(values=values)
+        db_api.lease_update(lease['id'], {'status': 'ACTIVE'})
+        db_api.lease_mark_degraded_bulk([lease['id']])
+        db_api.lease_destroy(lease['id'])
+
+        changes = [change.to_dict() for change in db_api.lease_change_list()]
+
+        self.assertEqual([1, 2, 3, 4], [c['id'] for c in changes])
+        self.assertEqual(['create', 'update', 'update', 'delete'],
+                         [c['change'] for c in changes])
+        self.assertEqual(['PENDING', 'ACTIVE', 'ACTIVE', 'ACTIVE'],
+                         [c['status'] for c in changes])
+        self.assertEqual([False, False, True, True],
+                         [c['degraded'] for c in changes])
+        self.assertEqual({lease['id']}, {c['lease_id'] for c in changes})
+        self.assertEqual({'fake'}, {c['project_id'] for c in changes})
+
+    def test_lease_change_not_recorded_on_failure(self):
+        self.assertRaises(db_exceptions.BlazarDBNotFound,
+                          db_api.lease_update, 'unknown-lease',
+                          {'status': 'ACTIVE'})
+        self.assertEqual([], db_api.lease_change_list())
+
+    def test_lease_change_list_since_and_limit(self):
+        old = timeutils.utcnow() - datetime.timedelta(minutes=1)
+        for change_id in range(1, 5):
+            self._create_lease_change(change_id, old)
+
+        changes = db_api.lease_change_list(since=1, limit=2)
+
+        self.assertEqual([2, 3], [change.id for change in changes])
+
+    def test_lease_change_list_non_unit_steps(self):
+        now = timeutils.utcnow()
+        for change_id in (10, 20, 30):
+            self._create_lease_change(change_id, now)
+
+        self.assertEqual([10, 20, 30],
+                         [c.id for c in db_api.lease_change_list()])
+        self.assertEqual([30], [c.id for c in db_api.lease_change_list(20)])
+
+    def test_lease_change_ids_continue_after_purge(self):
+        lease = _create_physical_lease()
+        db_api.lease_change_purge(timeutils.utcnow() +
+                                  datetime.timedelta(hours=1))
+
+        db_api.lease_update(lease['id'], {'status': 'ACTIVE'})
+
+        self.assertEqual([2], [c.id for c in db_api.lease_change_list()])
+
+    def test_lease_change_written_on_commit(self):
+        lease = _create_physical_lease()
+
+        with db_api.facade_wrapper.transaction():
+            db_api.lease_update(lease['id'], {'status': 'ACTIVE'})
+            self.assertEqual(1, db_api.lease_change_latest())
+            self.assertEqual([1], [c.id for c in db_api.lease_change_list()])
+
+        self.assertEqual(2, db_api.lease_change_latest())
+        self.assertEqual([1, 2], [c.id for c in db_api.lease_change_list()])
+
+    def test_lease_change_latest_after_purge(self):
+        lease = _create_physical_lease()
+        db_api.lease_update(lease['id'], {'status': 'ACTIVE'})
+
+        db_api.lease_change_purge(timeutils.utcnow() +
+                                  datetime.timedelta(hours=1))
+
+        self.assertEqual([], db_api.lease_change_list())
+        self.assertEqual(2, db_api.lease_change_latest())
+
+    def test_lease_change_ids_rolled_back(self):
+        lease = _create_physical_lease()
+
+        def _update():
+            with db_api.facade_wrapper.transaction():
+                db_api.lease_update(lease['id'], {'status': 'ACTIVE'})
+                raise db_exceptions.BlazarDBException()
+
+        self.assertRaises(db_exceptions.BlazarDBException, _update)
+        db_api.lease_update(lease['id'], {'status': 'ACTIVE'})
+
+        self.assertEqual([1, 2], [c.id for c in db_api.lease_change_list()])
+
+    def test_lease_change_latest_empty(self):
+        self.assertEqual(0, db_api.lease_change_latest())
+
+    def test_lease_change_purge(self):
+        now = timeutils.utcnow()
+        old = now - datetime.timedelta(hours=2)
+        self._create_lease_change(1, old)
+        self._create_lease_change(2, now)
+        self._create_lease_change(3, old)
+
+        purged = db_api.lease_change_purge(now - datetime.timedelta(hours=1))
+
+        self.assertEqual(2, purged)
+        self.assertEqual([2], [c.id for c in db_api.lease_change_list()])
+
+    def test_lease_change_purge_empty(self):
+        self.assertEqual(0, db_api.lease_change_purge(timeutils.utcnow()))
+
     # Reservations
 
     def test_create_reservation(self):
@@ -376,6 +614,27 @@ class SQLAlchemyDBApiTestCase(tests.DBTestCase):
                                            {"resource_type": 'fake'})
         self.assertEqual('fake', result.resource_type)
 
+    def test_reservation_update_flags_bulk(self):
+        rsv1 = db_api.reservation_create(_get_fake_phys_reservation_values(
+            lease_id='lease1'))
+        rsv2 = db_api.reservation_create(_get_fake_phys_reservation_values(
+            lease_id='lease1'))
+        rsv3 = db_api.reservation_create(_get_fake_phys_reservation_values(
+            lease_id='lease2'))
+
+        result = db_api.reservation_update_flags_bulk(
+            [rsv1.id, rsv2.id], {'missing_resources': True})
+
+        self.assertEqual(['lease1'], result)
+        self.assertTrue(db_api.reservation_get(rsv1.id).missing_resources)
+        self.assertTrue(db_api.reservation_get(rsv2.id).missing_resources)
+        self.assertFalse(db_api.reservation_get(rsv3.id).missing_resources)
+
+    def test_reservation_update_flags_bulk_empty(self):
+        self.assertEqual(
+            [], db_api.reservation_update_flags_bulk(
+                [], {'missing_resources': True}))
+
     def test_reservation_destroy_for_reservation_not_found(self):
         self.assertFalse(db_api.reservation_get('1'))
         self.assertRaises(db_exceptions.BlazarDBNotFound,
@@ -470,6 +729,39 @@ class SQLAlchemyDBApiTestCase(tests.DBTestCase):
         result = db_api.host_create(_get_fake_host_values(id='1'))
         self.assertEqual(result['id'], _get_fake_host_values(id='1')['id'])
 
+    def test_host_get_fields(self):
+        db_api.host_create(_get_fake_host_values(id='1'))
+
+        host = db_api.host_get('1', fields=['vcpus', 'unknown']).to_dict()
+
+        self.assertEqual({'id': '1', 'vcpus': 1}, host)
+
+    def test_host_list_fields(self):
+        db_api.host_create(_get_fake_host_values(id='1'))
+
+        hosts = db_api.host_list(fields=['memory_mb'])
+
+        self.assertEqual([{'id': '1', 'memory_mb': 8192}],
+                         [host.to_dict() for host in hosts])
+
+    def test_host_list_version(self):
+        db_api.host_create(_get_fake_host_values(id='1'))
+        version = db_api.host_list_version()
+
+        self.assertEqual(1, version['count'])
+        db_api.host_destroy('1')
+        self.assertEqual(0, db_api.host_list_version()['count'])
+
+    def test_host_allocation_list_version(self):
+        db_api.host_create(_get_fake_host_values(id='1'))
+        _create_physical_lease()
+
+        version = db_api.host_allocation_list_version()
+
+        # The host, the allocation, the reservation and the lease.
+        self.assertEqual(4, version['count'])
+        self.assertIsNotNone(version['updated_at'])
+
     def test_create_duplicated_host(self):
         """Create a duplicated host and verify that an exception is raised."""
         db_api.host_create(_get_fake_host_values(id='1'))
@@ -575,6 +867,92 @@ class SQLAlchemyDBApiTestCase(tests.DBTestCase):
         db_api.host_create(_get_fake_host_values(id=2))
         self.assertEqual(2, len(db_api.host_list()))
 
+    def test_host_get_all_by_ids(self):
+        db_api.host_create(_get_fake_host_values(id='1'))
+        db_api.host_create(_get_fake_host_values(id='2'))
+        db_api.host_create(_get_fake_host_values(id='3'))
+        db_api.host_extra_capability_create(
+            _get_fake_host_extra_capabilities(computehost_id='2', name='gpu',
+                                              value='4'))
+        db_api.host_extra_capability_create(
+            _get_fake_host_extra_capabilities(computehost_id='2', name='vgpu',
+                                              value='2'))
+
+        hosts = db_api.host_get_all_by_ids(['2', '1', '4'])
+
+        self.assertEqual(['2', '1'], [h['id'] for h in hosts])
+        expected = db_api.host_get('2').to_dict()
+        expected.update({'gpu': '4', 'vgpu': '2'})
+        self.assertEqual(expected, hosts[0])
+        self.assertEqual(db_api.host_get('1').to_dict(), hosts[1])
+        self.assertEqual([], db_api.host_get_all_by_ids([]))
+
+    def _rows_fetched(self, func, *args):
+        """Return the number of rows fetched by the SELECTs of func."""
+        selects = []
+
+        def _before_cursor_execute(conn, cursor, statement, parameters,
+                                   context, executemany):
+            if statement.lstrip().upper().startswith('SELECT'):
+                selects.append((statement, parameters))
+
+        sa.event.listen(sa.engine.Engine, 'before_cursor_execute',
+                        _before_cursor_execute)
+        try:
+            func(*args)
+        finally:
+            sa.event.remove(sa.engine.Engine, 'before_cursor_execute',
+                            _before_cursor_execute)
+
+        engine = facade_wrapper._get_facade().writer.get_engine()
+        connection = engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            return sum(len(cursor.execute(statement, parameters).fetchall())
+                       for statement, parameters in selects)
+        finally:
+            connection.close()
+
+    def test_host_get_all_by_ids_rows(self):
+        db_api.host_create(_get_fake_host_values(id='1'))
+        for i in range(5):
+            db_api.host_extra_capability_create(
+                _get_fake_host_extra_capabilities(computehost_id='1',
+                                                  name='cap%d' % i))
+        for i in range(6):
+            db_api.host_resource_inventory_create({
+                'computehost_id': '1', 'resource_class': 'CLASS%d' % i,
+                'total': 1, 'reserved': 0, 'min_unit': 1, 'max_unit': 1,
+                'step_size': 1, 'allocation_ratio': 1.0})
+        for i in range(40):
+            db_api.host_trait_create({'computehost_id': '1',
+                                      'trait': 'TRAIT%d' % i})
+
+        # NOTE: One row for the host and one per extra capability, rather
+        # than the product of the capabilities, inventories and traits.
+        self.assertEqual(6, self._rows_fetched(db_api.host_get_all_by_ids,
+                                               ['1']))
+
+    def test_host_summary_get_all(self):
+        db_api.host_create(_get_fake_host_values(id='1'))
+        db_api.host_create(_get_fake_host_values(id='2', mem=4096))
+        db_api.host_create(_get_fake_host_values(id='3'))
+        db_api.host_extra_capability_create(
+            _get_fake_host_extra_capabilities(computehost_id='2', name='gpu',
+                                              value='4'))
+        db_api.host_extra_capability_create(
+            _get_fake_host_extra_capabilities(computehost_id='2', name='vgpu',
+                                              value='2'))
+
+        summaries = db_api.host_summary_get_all(
+            ['2', '1', '4'], ['memory_mb', 'gpu', 'unknown'])
+
+        self.assertEqual([{'id': '2', 'memory_mb': 4096, 'gpu': '4'},
+                          {'id': '1', 'memory_mb': 8192}], summaries)
+        self.assertEqual([{'id': '1'}],
+                         db_api.host_summary_get_all(['1'], []))
+        self.assertEqual([], db_api.host_summary_get_all([], ['memory_mb']))
+
     def test_get_hosts_per_filter(self):
         db_api.host_create(_get_fake_host_values(id=1))
         db_api.host_create(_get_fake_host_values(id=2))
@@ -845,6 +1223,232 @@ class SQLAlchemyDBApiTestCase(tests.DBTestCase):
         self.assertEqual(1, len(db_api.host_allocation_get_all_by_values(
             reservation_id='1234')))
 
+    def test_host_allocation_update_all(self):
+        db_api.host_allocation_create(_get_fake_host_allocation_values(
+            id='1', compute_host_id='1'))
+        db_api.host_allocation_create(_get_fake_host_allocation_values(
+            id='2', compute_host_id='1'))
+        db_api.host_allocation_create(_get_fake_host_allocation_values(
+            id='3', compute_host_id='1'))
+
+        db_api.host_allocation_update_all(
+            {'1': {'compute_host_id': '2'}, '2': {'compute_host_id': '3'}},
+            destroyed_ids=['3'])
+
+        self.assertEqual('2', db_api.host_allocation_get('1').compute_host_id)
+        self.assertEqual('3', db_api.host_allocation_get('2').compute_host_id)
+        self.assertIsNone(db_api.host_allocation_get('3'))
+
+    def test_host_allocation_create_all(self):
+        db_api.host_create(_get_fake_host_values(id='1'))
+        db_api.host_create(_get_fake_host_values(id='2'))
+        reservation_id = self._create_healing_leases()[0]
+
+        self.assertTrue(db_api.host_allocation_create_all(
+            reservation_id, ['1', '2']))
+        self.assertEqual(2, len(db_api.host_allocation_get_all_by_values(
+            reservation_id=reservation_id, compute_host_id='1')))
+
+    def test_host_allocation_create_all_free_between(self):
+        db_api.host_create(_get_fake_host_values(id='1'))
+        db_api.host_create(_get_fake_host_values(id='2'))
+        db_api.host_create(dict(_get_fake_host_values(id='3'),
+                                reservable=False))
+        self._create_healing_leases()
+
+        self.assertFalse(db_api.host_allocation_create_all(
+            'r1', ['1', '2'], free_between=(
+                _get_datetime('2030-01-01 12:00'),
+                _get_datetime('2030-01-03 00:00'))))
+        self.assertFalse(db_api.host_allocation_create_all(
+            'r1', ['2', '3'], free_between=(
+                _get_datetime('2030-01-01 12:00'),
+                _get_datetime('2030-01-03 00:00'))))
+        self.assertEqual([], db_api.host_allocation_get_all_by_values(
+            reservation_id='r1'))
+
+        self.assertTrue(db_api.host_allocation_create_all(
+            'r1', ['1', '2'], free_between=(
+                _get_datetime('2030-01-02 00:00'),
+                _get_datetime('2030-02-01 00:00'))))
+        self.assertEqual(2, len(db_api.host_allocation_get_all_by_values(
+            reservation_id='r1')))
+
+    # HostHealingEntry
+
+    def _create_healing_leases(self):
+        leases = []
+        for name, start, end in [
+                ('lease1', '2030-01-01 00:00', '2030-01-02 00:00'),
+                ('lease2', '2030-02-01 00:00', '2030-02-02 00:00')]:
+            leases.append(_create_physical_lease(
+                values=_get_fake_phys_lease_values(
+                    name=name, start_date=_get_datetime(start),
+                    end_date=_get_datetime(end), resource_id='1')))
+        return [lease['reservations'][0]['id'] for lease in leases]
+
+    def test_host_healing_entry_create_all_by_hosts(self):
+        reservation_ids = self._create_healing_leases()
+
+        self.assertEqual(2, db_api.host_healing_entry_create_all_by_hosts(
+            ['1'], _get_datetime('2029-12-01 00:00')))
+        # Already recorded pairs are skipped
+        self.assertEqual(0, db_api.host_healing_entry_create_all_by_hosts(
+            ['1'], _get_datetime('2029-12-01 00:00')))
+        entries = db_api.host_healing_entry_get_all_by_interval(
+            _get_datetime('2029-12-01 00:00'),
+            _get_datetime('2030-12-01 00:00'))
+        self.assertEqual(sorted(reservation_ids),
+                         sorted(e['reservation_id'] for e in entries))
+
+    def test_host_healing_entry_create_all_by_hosts_ended_leases(self):
+        reservation_ids = self._create_healing_leases()
+
+        self.assertEqual(1, db_api.host_healing_entry_create_all_by_hosts(
+            ['1'], _get_datetime('2030-01-15 00:00')))
+        entries = db_api.host_healing_entry_get_all_by_interval(
+            _get_datetime('2030-01-15 00:00'),
+            _get_datetime('2030-12-01 00:00'))
+        self.assertEqual([reservation_ids[1]],
+                         [e['reservation_id'] for e in entries])
+        self.assertEqual(0, db_api.host_healing_entry_create_all_by_hosts(
+            ['2'], _get_datetime('2029-12-01 00:00')))
+
+    def test_host_healing_entry_get_all_by_interval(self):
+        reservation_ids = self._create_healing_leases()
+        db_api.host_healing_entry_create_all_by_hosts(
+            ['1'], _get_datetime('2029-12-01 00:00'))
+
+        entries = db_api.host_healing_entry_get_all_by_interval(
+            _get_datetime('2030-01-01 12:00'),
+            _get_datetime('2030-01-10 00:00'))
+        self.assertEqual([reservation_ids[0]],
+                         [e['reservation_id'] for e in entries])
+
+    def test_host_healing_entry_destroy_all(self):
+        self._create_healing_leases()
+        db_api.host_healing_entry_create_all_by_hosts(
+            ['1'], _get_datetime('2029-12-01 00:00'))
+        start = _get_datetime('2029-12-01 00:00')
+        end = _get_datetime('2030-12-01 00:00')
+        entries = db_api.host_healing_entry_get_all_by_interval(start, end)
+
+        db_api.host_healing_entry_destroy_all([entries[0]['id']])
+        self.assertEqual(
+            1, len(db_api.host_healing_entry_get_all_by_interval(start, end)))
+
+    def test_host_healing_entry_destroy_all_by_hosts(self):
+        self._create_healing_leases()
+        db_api.host_healing_entry_create_all_by_hosts(
+            ['1'], _get_datetime('2029-12-01 00:00'))
+        start = _get_datetime('2029-12-01 00:00')
+        end = _get_datetime('2030-12-01 00:00')
+
+        db_api.host_healing_entry_destroy_all_by_hosts(['2'])
+        self.assertEqual(
+            2, len(db_api.host_healing_entry_get_all_by_interval(start, end)))
+        db_api.host_healing_entry_destroy_all_by_hosts(['1'])
+        self.assertEqual(
+            0, len(db_api.host_healing_entry_get_all_by_interval(start, end)))
+
+    def test_host_healing_entry_destroy_all_expired(self):
+        reservation_ids = self._create_healing_leases()
+        db_api.host_healing_entry_create_all_by_hosts(
+            ['1'], _get_datetime('2029-12-01 00:00'))
+
+        db_api.host_healing_entry_destroy_all_expired(
+            _get_datetime('2030-01-15 00:00'))
+        entries = db_api.host_healing_entry_get_all_by_interval(
+            _get_datetime('2029-12-01 00:00'),
+            _get_datetime('2030-12-01 00:00'))
+        self.assertEqual([reservation_ids[1]],
+                         [e['reservation_id'] for e in entries])
+
+    # ProjectUsage
+
+    def test_project_usage_increment_creates_usage(self):
+        self.assertIsNone(db_api.project_usage_get('project1'))
+
+        db_api.project_usage_increment(
+            'project1', '2030-01', {'hosts': 2, 'resource_hours': 48.0})
+
+        usage = db_api.project_usage_get('project1')
+        self.assertEqual('2030-01', usage.period)
+        self.assertEqual(2, usage.hosts)
+        self.assertEqual(0, usage.instances)
+        self.assertEqual(48.0, usage.resource_hours)
+
+    def test_project_usage_increment(self):
+        db_api.project_usage_increment(
+            'project1', '2030-01', {'hosts': 2, 'resource_hours': 48.0})
+        db_api.project_usage_increment(
+            'project1', '2030-01',
+            {'hosts': -3, 'instances': 1, 'resource_hours': 2.0})
+
+        usage = db_api.project_usage_get('project1')
+        self.assertEqual(0, usage.hosts)
+        self.assertEqual(1, usage.instances)
+        self.assertEqual(50.0, usage.resource_hours)
+
+    def test_project_usage_increment_new_period(self):
+        db_api.project_usage_increment(
+            'project1', '2030-01', {'hosts': 2, 'resource_hours': 48.0})
+        db_api.project_usage_increment(
+            'project1', '2030-02', {'resource_hours': 5.0})
+
+        usage = db_api.project_usage_get('project1')
+        self.assertEqual('2030-02', usage.period)
+        self.assertEqual(2, usage.hosts)
+        self.assertEqual(5.0, usage.resource_hours)
+
+    def test_project_usage_increment_within_limits(self):
+        db_api.project_usage_increment(
+            'project1', '2030-01', {'hosts': 2, 'resource_hours': 48.0})
+
+        self.assertTrue(db_api.project_usage_increment(
+            'project1', '2030-01', {'hosts': 1, 'resource_hours': 24.0},
+            limits={'hosts': 3, 'resource_hours': 72.0}))
+        self.assertFalse(db_api.project_usage_increment(
+            'project1', '2030-01', {'hosts': 1}, limits={'hosts': 3}))
+        self.assertFalse(db_api.project_usage_increment(
+            'project1', '2030-01', {'resource_hours': 1.0},
+            limits={'resource_hours': 72.0}))
+
+        usage = db_api.project_usage_get('project1')
+        self.assertEqual(3, usage.hosts)
+        self.assertEqual(72.0, usage.resource_hours)
+
+    def test_project_usage_increment_limits_new_period(self):
+        db_api.project_usage_increment(
+            'project1', '2030-01', {'resource_hours': 48.0})
+
+        self.assertTrue(db_api.project_usage_increment(
+            'project1', '2030-02', {'resource_hours': 24.0},
+            limits={'resource_hours': 48.0}))
+
+        self.assertEqual(24.0,
+                         db_api.project_usage_get('project1').resource_hours)
+
+    def test_project_usage_increment_creates_usage_within_limits(self):
+        self.assertFalse(db_api.project_usage_increment(
+            'project1', '2030-01', {'hosts': 4}, limits={'hosts': 3}))
+        self.assertIsNone(db_api.project_usage_get('project1'))
+
+        self.assertTrue(db_api.project_usage_increment(
+            'project1', '2030-01', {'hosts': 3}, limits={'hosts': 3}))
+        self.assertEqual(3, db_api.project_usage_get('project1').hosts)
+
+    def test_project_usage_increment_rolled_back(self):
+        def _increment():
+            with db_api.facade_wrapper.transaction():
+                db_api.project_usage_increment(
+                    'project1', '2030-01', {'hosts': 2}, limits={'hosts': 3})
+                raise db_exceptions.BlazarDBException()
+
+        self.assertRaises(db_exceptions.BlazarDBException, _increment)
+
+        self.assertIsNone(db_api.project_usage_get('project1'))
+
     # Event
 
     def test_event_create(self):
@@ -865,6 +1469,53 @@ class SQLAlchemyDBApiTestCase(tests.DBTestCase):
         self.assertRaises(db_exceptions.BlazarDBDuplicateEntry,
                           db_api.event_create, fake_values)
 
+    def test_event_create_all(self):
+        db_api.event_create_all([_get_fake_event_values(id='1'),
+                                 _get_fake_event_values(id='2')])
+
+        self.assertTrue(db_api.event_get('1'))
+        self.assertTrue(db_api.event_get('2'))
+
+    def test_transaction_runs_callbacks_after_commit(self):
+        called = []
+
+        with db_api.transaction():
+            db_api.event_create(_get_fake_event_values(id='1'))
+            with db_api.transaction():
+                db_api.after_commit(called.append, 'inner')
+            db_api.after_commit(called.append, 'outer')
+            self.assertEqual([], called)
+
+        self.assertEqual(['inner', 'outer'], called)
+        self.assertTrue(db_api.event_get('1'))
+
+    def test_transaction_rollback_skips_callbacks(self):
+        called = []
+
+        def _create():
+            with db_api.transaction():
+                db_api.event_create(_get_fake_event_values(id='1'))
+                db_api.after_commit(called.append, 'callback')
+                raise RuntimeError()
+
+        self.assertRaises(RuntimeError, _create)
+        self.assertEqual([], called)
+        self.assertFalse(db_api.event_get('1'))
+
+    def test_transaction_without_running_callbacks(self):
+        called = []
+
+        with db_api.transaction(run_after_commit=False) as callbacks:
+            db_api.after_commit(called.append, 'callback')
+
+        self.assertEqual([], called)
+        self.assertEqual([(called.append, ('callback',), {})], callbacks)
+
+    def test_after_commit_outside_transaction(self):
+        called = []
+        db_api.after_commit(called.append, 'callback')
+        self.assertEqual(['callback'], called)
+
     def test_event_update(self):
         self.assertFalse(db_api.event_get('1'))
 
@@ -876,6 +1527,25 @@ class SQLAlchemyDBApiTestCase(tests.DBTestCase):
 
         self.assertEqual('changed', test_event.status)
 
+    def test_event_backlog(self):
+        for id, event_type, time, status in [
+                ('1', 'start_lease', '2030-03-01 00:00', 'UNDONE'),
+                ('2', 'start_lease', '2030-03-02 00:00', 'UNDONE'),
+                ('3', 'end_lease', '2030-03-01 00:00', 'UNDONE'),
+                ('4', 'end_lease', '2030-03-01 00:00', 'DONE'),
+                ('5', 'end_lease', '2030-03-04 00:00', 'UNDONE')]:
+            db_api.event_create(_get_fake_event_values(
+                id=id, event_type=event_type, time=_get_datetime(time),
+                status=status))
+
+        result = db_api.event_backlog('UNDONE',
+                                      _get_datetime('2030-03-03 00:00'))
+
+        self.assertEqual(
+            [('end_lease', 1, _get_datetime('2030-03-01 00:00')),
+             ('start_lease', 2, _get_datetime('2030-03-01 00:00'))],
+            sorted(result))
+
     def test_event_destroy(self):
         self.assertFalse(db_api.event_get('1'))
 
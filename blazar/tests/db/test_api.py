@@ -34,3 +34,11 @@ class DBApiTestCase(tests.TestCase):
 
     def test_drop_db(self):
         self.assertTrue(self.db_api.drop_db())
+
+    def test_lease_update(self):
+        lease = {'id': 'lease-id', 'status': 'ACTIVE'}
+        lease_update = self.patch(self.db_api.IMPL, "lease_update")
+        lease_update.return_value.to_dict.return_value = lease
+
+        self.assertEqual(lease, self.db_api.lease_update('lease-id',
+                                                         {'status': 'ACTIVE'}))
@@ -15,6 +15,7 @@
 
 import datetime
 import json
+import requests
 from unittest import mock
 
 from blazar.enforcement.exceptions import ExternalServiceFilterException
@@ -130,6 +131,32 @@ class ConfiguringExternalServiceFilterTestCase(TestCase):
 
         external_service_filter.ExternalServiceFilter(CONF)
 
+    def test_allocation_fields(self):
+        CONF.set_override(
+            'external_service_base_endpoint', 'http://localhost',
+            group='enforcement')
+        self.addCleanup(CONF.clear_override, 'external_service_base_endpoint',
+                        group='enforcement')
+
+        _filter = external_service_filter.ExternalServiceFilter(CONF)
+        self.assertIsNone(_filter.allocation_fields)
+
+        CONF.set_override(
+            'external_service_allocation_fields', ['hypervisor_hostname'],
+            group='enforcement')
+        self.addCleanup(CONF.clear_override,
+                        'external_service_allocation_fields',
+                        group='enforcement')
+
+        _filter = external_service_filter.ExternalServiceFilter(CONF)
+        self.assertEqual(['hypervisor_hostname'], _filter.allocation_fields)
+
+    def test_timeouts_must_be_positive(self):
+        for name in ('external_service_connect_timeout',
+                     'external_service_read_timeout'):
+            self.assertRaises(ValueError, CONF.set_override, name, 0,
+                              group='enforcement')
+
 
 class ExternalServiceFilterTestCase(TestCase):
     def setUp(self):
@@ -157,17 +184,18 @@ class ExternalServiceFilterTestCase(TestCase):
             "is_old_lease": True
         }
 
-    @mock.patch("requests.post")
+    @mock.patch("requests.Session.post")
     def test_check_create_allowed(self, post_mock):
         post_mock.return_value = FakeResponse204()
         self.filter.check_create(self.ctx, self.lease)
         post_mock.assert_called_with(
             "http://localhost/check-create",
             headers={'Content-Type': 'application/json'},
+            timeout=(5.0, 30.0),
             data='{"context": {"is_context": true}, '
                  '"lease": {"is_lease": true}}')
 
-    @mock.patch("requests.post")
+    @mock.patch("requests.Session.post")
     def test_check_create_denied(self, post_mock):
         post_mock.return_value = FakeResponse403WithMessage()
         self.assertRaises(ExternalServiceFilterException,
@@ -176,10 +204,11 @@ class ExternalServiceFilterTestCase(TestCase):
         post_mock.assert_called_with(
             "http://localhost/check-create",
             headers={'Content-Type': 'application/json'},
+            timeout=(5.0, 30.0),
             data='{"context": {"is_context": true}, '
                  '"lease": {"is_lease": true}}')
 
-    @mock.patch("requests.post")
+    @mock.patch("requests.Session.post")
     def test_check_create_failed(self, post_mock):
         post_mock.return_value = FakeResponse403Empty()
         self.assertRaises(ExternalServiceFilterException,
@@ -188,21 +217,23 @@ class ExternalServiceFilterTestCase(TestCase):
         post_mock.assert_called_with(
             "http://localhost/check-create",
             headers={'Content-Type': 'application/json'},
+            timeout=(5.0, 30.0),
             data='{"context": {"is_context": true}, '
                  '"lease": {"is_lease": true}}')
 
-    @mock.patch("requests.post")
+    @mock.patch("requests.Session.post")
     def test_check_update_allowed(self, post_mock):
         post_mock.return_value = FakeResponse204()
         self.filter.check_update(self.ctx, self.old_lease, self.lease)
         post_mock.assert_called_with(
             "http://localhost/check-update",
             headers={'Content-Type': 'application/json'},
+            timeout=(5.0, 30.0),
             data='{"context": {"is_context": true}, '
                  '"current_lease": {"is_old_lease": true}, '
                  '"lease": {"is_lease": true}}')
 
-    @mock.patch("requests.post")
+    @mock.patch("requests.Session.post")
     def test_check_update_denied(self, post_mock):
         post_mock.return_value = FakeResponse403WithMessage()
         self.assertRaises(ExternalServiceFilterException,
@@ -211,11 +242,12 @@ class ExternalServiceFilterTestCase(TestCase):
         post_mock.assert_called_with(
             "http://localhost/check-update",
             headers={'Content-Type': 'application/json'},
+            timeout=(5.0, 30.0),
             data='{"context": {"is_context": true}, '
                  '"current_lease": {"is_old_lease": true}, '
                  '"lease": {"is_lease": true}}')
 
-    @mock.patch("requests.post")
+    @mock.patch("requests.Session.post")
     @mock.patch("requests.JSONDecodeError", FakeJSONDecodeError)
     def test_check_update_failed(self, post_mock):
         post_mock.return_value = FakeResponse403InvalidJSON()
@@ -225,21 +257,23 @@ class ExternalServiceFilterTestCase(TestCase):
         post_mock.assert_called_with(
             "http://localhost/check-update",
             headers={'Content-Type': 'application/json'},
+            timeout=(5.0, 30.0),
             data='{"context": {"is_context": true}, '
                  '"current_lease": {"is_old_lease": true}, '
                  '"lease": {"is_lease": true}}')
 
-    @mock.patch("requests.post")
+    @mock.patch("requests.Session.post")
     def test_on_end_success(self, post_mock):
         post_mock.return_value = FakeResponse204()
         self.filter.on_end(self.ctx, self.lease)
         post_mock.assert_called_with(
             "http://localhost/on-end",
             headers={'Content-Type': 'application/json'},
+            timeout=(5.0, 30.0),
             data='{"context": {"is_context": true}, '
                  '"lease": {"is_lease": true}}')
 
-    @mock.patch("requests.post")
+    @mock.patch("requests.Session.post")
     def test_on_end_failure(self, post_mock):
         post_mock.return_value = FakeResponse500()
         self.assertRaises(ExternalServiceFilterException,
@@ -248,5 +282,95 @@ class ExternalServiceFilterTestCase(TestCase):
         post_mock.assert_called_with(
             "http://localhost/on-end",
             headers={'Content-Type': 'application/json'},
+            timeout=(5.0, 30.0),
             data='{"context": {"is_context": true}, '
                  '"lease": {"is_lease": true}}')
+
+    @mock.patch("requests.Session.post")
+    def test_check_create_connection_error(self, post_mock):
+        post_mock.side_effect = requests.ConnectTimeout()
+        self.assertRaises(ExternalServiceFilterException,
+                          self.filter.check_create,
+                          self.ctx, self.lease)
+
+    @mock.patch("requests.Session.post")
+    def test_check_create_not_cached_by_default(self, post_mock):
+        post_mock.return_value = FakeResponse204()
+        self.filter.check_create(self.ctx, self.lease)
+        self.filter.check_create(self.ctx, self.lease)
+        self.assertEqual(2, post_mock.call_count)
+
+    def test_session_retries(self):
+        adapter = self.filter.session.get_adapter('http://localhost')
+        self.assertEqual(3, adapter.max_retries.total)
+        self.assertEqual(0, adapter.max_retries.read)
+
+
+class CachingExternalServiceFilterTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+
+        external_service_filter.ExternalServiceFilter.register_opts(CONF)
+
+        CONF.set_override(
+            'external_service_base_endpoint', 'http://localhost',
+            group='enforcement')
+        self.addCleanup(CONF.clear_override, 'external_service_base_endpoint',
+                        group='enforcement')
+        CONF.set_override(
+            'external_service_cache_ttl', 60, group='enforcement')
+        self.addCleanup(CONF.clear_override, 'external_service_cache_ttl',
+                        group='enforcement')
+
+        self.filter = external_service_filter.ExternalServiceFilter(CONF)
+
+        self.ctx = {
+            "is_context": True
+        }
+
+        self.lease = {
+            "is_lease": True
+        }
+
+    @mock.patch("requests.Session.post")
+    def test_check_create_allowed_cached(self, post_mock):
+        post_mock.return_value = FakeResponse204()
+        self.filter.check_create(self.ctx, self.lease)
+        self.filter.check_create(self.ctx, self.lease)
+        post_mock.assert_called_once()
+
+    @mock.patch("requests.Session.post")
+    def test_check_create_denied_cached(self, post_mock):
+        post_mock.return_value = FakeResponse403WithMessage()
+        for i in range(2):
+            exc = self.assertRaises(ExternalServiceFilterException,
+                                    self.filter.check_create,
+                                    self.ctx, self.lease)
+            self.assertEqual("Hello!", str(exc))
+        post_mock.assert_called_once()
+
+    @mock.patch("requests.Session.post")
+    def test_check_create_failure_not_cached(self, post_mock):
+        post_mock.return_value = FakeResponse500()
+        for i in range(2):
+            self.assertRaises(ExternalServiceFilterException,
+                              self.filter.check_create,
+                              self.ctx, self.lease)
+        self.assertEqual(2, post_mock.call_count)
+
+    @mock.patch("requests.Session.post")
+    def test_check_create_cache_expired(self, post_mock):
+        post_mock.return_value = FakeResponse204()
+        with mock.patch("time.monotonic") as monotonic:
+            monotonic.return_value = 100
+            self.filter.check_create(self.ctx, self.lease)
+            monotonic.return_value = 161
+            self.filter.check_create(self.ctx, self.lease)
+        self.assertEqual(2, post_mock.call_count)
+
+    @mock.patch("requests.Session.post")
+    def test_on_end_not_cached(self, post_mock):
+        post_mock.return_value = FakeResponse204()
+        self.filter.on_end(self.ctx, self.lease)
+        self.filter.on_end(self.ctx, self.lease)
+        self.assertEqual(2, post_mock.call_count)
@@ -24,6 +24,7 @@ from blazar import context
 from blazar import enforcement
 from blazar.enforcement import exceptions
 from blazar.enforcement import filters
+from blazar.enforcement import usage
 from blazar import tests
 
 
@@ -69,6 +70,9 @@ class MaxLeaseDurationTestCase(tests.TestCase):
     def setUp(self):
         super(MaxLeaseDurationTestCase, self).setUp()
 
+        for record in ('increment', 'record_end'):
+            self.patch(usage, record)
+
         self.cfg = cfg
         self.region = 'RegionOne'
         filters.all_filters = ['MaxLeaseDurationFilter']
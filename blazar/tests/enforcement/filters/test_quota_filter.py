@@ -0,0 +1,156 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+
+from oslo_config import cfg
+
+from blazar.enforcement import exceptions
+from blazar.enforcement.filters import quota_filter
+from blazar.enforcement import usage
+from blazar import tests
+
+
+def get_fake_lease(hosts=1, hours=24):
+    start_date = datetime.datetime(2030, 1, 1, 0, 0)
+    return {
+        'start_date': start_date,
+        'end_date': start_date + datetime.timedelta(hours=hours),
+        'reservations': [
+            {'resource_type': 'physical:host',
+             'allocations': [{'id': str(i)} for i in range(hosts)]},
+        ],
+    }
+
+
+class QuotaFilterTestCase(tests.TestCase):
+    def setUp(self):
+        super(QuotaFilterTestCase, self).setUp()
+
+        self.cfg = cfg
+        self.filter = quota_filter.QuotaFilter(conf=cfg.CONF)
+        self.ctx = {'project_id': 'project1'}
+        self.usage_get = self.patch(usage, 'get')
+        self.usage_get.return_value = {
+            'hosts': 2, 'instances': 0, 'floatingips': 0,
+            'resource_hours': 100}
+
+    def set_limit(self, name, value):
+        self.cfg.CONF.set_override(name, value, group='enforcement')
+        self.addCleanup(self.cfg.CONF.clear_override, name,
+                        group='enforcement')
+
+    def test_check_create_unlimited(self):
+        self.filter.check_create(self.ctx, get_fake_lease(hosts=10))
+        self.usage_get.assert_not_called()
+
+    def test_check_create_allowed(self):
+        self.set_limit('quota_max_hosts', 3)
+        self.filter.check_create(self.ctx, get_fake_lease(hosts=1))
+        self.usage_get.assert_called_once_with('project1')
+
+    def test_check_create_hosts_exceeded(self):
+        self.set_limit('quota_max_hosts', 3)
+        self.assertRaises(exceptions.QuotaExceededException,
+                          self.filter.check_create,
+                          self.ctx, get_fake_lease(hosts=2))
+
+    def test_check_create_resource_hours_exceeded(self):
+        self.set_limit('quota_max_resource_hours', 120)
+        self.assertRaises(exceptions.QuotaExceededException,
+                          self.filter.check_create,
+                          self.ctx, get_fake_lease(hosts=1, hours=24))
+
+    def test_check_create_exempt(self):
+        self.set_limit('quota_max_hosts', 0)
+        self.set_limit('quota_exempt_project_ids', ['project1'])
+        self.filter.check_create(self.ctx, get_fake_lease(hosts=1))
+
+    def test_check_update_shrinking_allowed(self):
+        self.set_limit('quota_max_hosts', 1)
+        self.filter.check_update(self.ctx, get_fake_lease(hosts=2),
+                                 get_fake_lease(hosts=1))
+        self.usage_get.assert_not_called()
+
+    def test_check_update_growing_exceeded(self):
+        self.set_limit('quota_max_hosts', 3)
+        self.assertRaises(exceptions.QuotaExceededException,
+                          self.filter.check_update, self.ctx,
+                          get_fake_lease(hosts=1), get_fake_lease(hosts=3))
+
+    def test_on_end(self):
+        self.filter.on_end(self.ctx, get_fake_lease())
+        self.usage_get.assert_not_called()
+
+    def test_limits(self):
+        self.set_limit('quota_max_hosts', 3)
+        self.set_limit('quota_max_resource_hours', 120)
+
+        self.assertEqual({'hosts': 3, 'resource_hours': 120},
+                         self.filter.limits('project1'))
+
+        self.set_limit('quota_exempt_project_ids', ['project1'])
+        self.assertEqual({}, self.filter.limits('project1'))
+
+    def test_record(self):
+        increment = self.patch(usage, 'increment')
+        increment.return_value = True
+        self.set_limit('quota_max_hosts', 3)
+        delta = usage.lease_usage(get_fake_lease(hosts=2))
+
+        self.filter.record('project1', delta)
+
+        increment.assert_called_once_with('project1', delta, {'hosts': 3})
+
+    def test_record_exceeded(self):
+        self.patch(usage, 'increment').return_value = False
+        self.set_limit('quota_max_hosts', 3)
+
+        e = self.assertRaises(exceptions.QuotaExceededException,
+                              self.filter.record, 'project1',
+                              usage.lease_usage(get_fake_lease(hosts=2)))
+        self.assertIn('4 requested', str(e))
+
+    def test_record_exceeded_concurrently(self):
+        # The usage read after the ledger refused the delta can be older.
+        self.patch(usage, 'increment').return_value = False
+        self.set_limit('quota_max_hosts', 3)
+
+        e = self.assertRaises(exceptions.QuotaExceededException,
+                              self.filter.record, 'project1',
+                              usage.lease_usage(get_fake_lease(hosts=1)))
+        self.assertIn('hosts: more than 3 requested', str(e))
+
+
+class QuotaFilterRecordTestCase(tests.DBTestCase):
+    def setUp(self):
+        super(QuotaFilterRecordTestCase, self).setUp()
+
+        self.filter = quota_filter.QuotaFilter(conf=cfg.CONF)
+        cfg.CONF.set_override('quota_max_hosts', 3, group='enforcement')
+        self.addCleanup(cfg.CONF.clear_override, 'quota_max_hosts',
+                        group='enforcement')
+        self.ctx = {'project_id': 'project1'}
+
+    def test_concurrent_leases(self):
+        leases = [get_fake_lease(hosts=2), get_fake_lease(hosts=2)]
+        # Both leases are checked before either of them is recorded.
+        for lease in leases:
+            self.filter.check_create(self.ctx, lease)
+
+        self.filter.record('project1', usage.lease_usage(leases[0]))
+        self.assertRaises(exceptions.QuotaExceededException,
+                          self.filter.record, 'project1',
+                          usage.lease_usage(leases[1]))
+
+        self.assertEqual(2, usage.get('project1')['hosts'])
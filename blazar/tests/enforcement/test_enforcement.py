@@ -14,6 +14,8 @@
 # limitations under the License.
 
 import datetime
+from unittest import mock
+
 import ddt
 
 from oslo_utils import timeutils
@@ -21,6 +23,7 @@ from oslo_utils import timeutils
 from blazar import context
 from blazar import enforcement
 from blazar.enforcement import filters
+from blazar.enforcement import usage
 from blazar import exceptions
 from blazar.manager import service
 from blazar import tests
@@ -102,6 +105,9 @@ class EnforcementTestCase(tests.TestCase):
     def setUp(self):
         super(EnforcementTestCase, self).setUp()
 
+        for record in ('increment', 'record_end'):
+            self.patch(usage, record)
+
         self.cfg = cfg
         self.region = 'RegionOne'
         filters.FakeFilter = FakeFilter
@@ -166,6 +172,30 @@ class EnforcementTestCase(tests.TestCase):
         self.assertIsInstance(fake_filter, FakeFilter)
         self.assertEqual(fake_filter.conf.enforcement.fake_opt, 1)
 
+    def test_load_filters_allocation_fields(self):
+        self.assertIsNone(self.enforcement.allocation_fields)
+
+    def test_allocation_fields_union(self):
+        first, second = FakeFilter(conf=cfg.CONF), FakeFilter(conf=cfg.CONF)
+        first.allocation_fields = ('hypervisor_hostname',)
+        second.allocation_fields = ('gpu', 'hypervisor_hostname')
+        self.enforcement.enabled_filters = [first, second]
+
+        self.assertEqual(['gpu', 'hypervisor_hostname'],
+                         self.enforcement._allocation_fields())
+
+    def test_allocation_fields_full_documents(self):
+        first, second = FakeFilter(conf=cfg.CONF), FakeFilter(conf=cfg.CONF)
+        first.allocation_fields = ()
+        self.enforcement.enabled_filters = [first, second]
+
+        self.assertIsNone(self.enforcement._allocation_fields())
+
+    def test_allocation_fields_no_filters(self):
+        self.enforcement.enabled_filters = []
+
+        self.assertEqual([], self.enforcement._allocation_fields())
+
     def test_format_context(self):
 
         formatted_context = self.enforcement.format_context(
@@ -306,3 +336,191 @@ class EnforcementTestCase(tests.TestCase):
 
         self.assertDictEqual(expected_context, formatted_context)
         self.assertDictEqual(expected_lease, formatted_lease)
+
+    def test_check_create_multiple_filters(self):
+        lease_values, rsv, allocs = get_lease_rsv_allocs()
+        ctx = context.current()
+        other_filter = FakeFilter(conf=cfg.CONF)
+        self.enforcement.enabled_filters.append(other_filter)
+
+        check_create = self.patch(self.enforcement.enabled_filters[0],
+                                  'check_create')
+        other_check_create = self.patch(other_filter, 'check_create')
+
+        self.enforcement.check_create(ctx, lease_values, rsv, allocs)
+
+        formatted_lease = self.enforcement.format_lease(lease_values, rsv,
+                                                        allocs)
+        formatted_context = self.enforcement.format_context(ctx, lease_values)
+        check_create.assert_called_once_with(formatted_context,
+                                             formatted_lease)
+        other_check_create.assert_called_once_with(formatted_context,
+                                                   formatted_lease)
+
+    def test_check_create_multiple_filters_with_exception(self):
+        lease_values, rsv, allocs = get_lease_rsv_allocs()
+        ctx = context.current()
+        other_filter = FakeFilter(conf=cfg.CONF)
+        self.enforcement.enabled_filters.append(other_filter)
+
+        check_create = self.patch(self.enforcement.enabled_filters[0],
+                                  'check_create')
+        other_check_create = self.patch(other_filter, 'check_create')
+        other_check_create.side_effect = exceptions.BlazarException
+
+        self.assertRaises(exceptions.BlazarException,
+                          self.enforcement.check_create,
+                          context=ctx, lease_values=lease_values,
+                          reservations=rsv, allocations=allocs)
+        # All the filters are evaluated
+        check_create.assert_called_once()
+
+    def test_usage_ledger(self):
+        self.assertIsNone(self.enforcement.quota_filter)
+
+        filters.all_filters = ['FakeFilter', 'QuotaFilter']
+        cfg.CONF.set_override('enabled_filters', ['QuotaFilter'],
+                              group='enforcement')
+        self.enforcement.load_filters()
+
+        self.assertIsInstance(self.enforcement.quota_filter,
+                              filters.QuotaFilter)
+
+    def _enable_quota_filter(self):
+        self.enforcement.quota_filter = mock.Mock()
+        return self.enforcement.quota_filter
+
+    def _get_lease_rsv_allocs(self):
+        # The manager gives the enforcement parsed dates.
+        lease_values, rsv, allocs = get_lease_rsv_allocs()
+        lease_values['start_date'] = datetime.datetime(2014, 2, 1, 13, 37)
+        lease_values['end_date'] = datetime.datetime(2014, 2, 2, 13, 37)
+        return lease_values, rsv, allocs
+
+    def test_check_create_without_ledger(self):
+        lease_values, rsv, allocs = get_lease_rsv_allocs()
+        ctx = context.current()
+
+        self.assertIsNone(self.enforcement.check_create(ctx, lease_values,
+                                                        rsv, allocs))
+
+    def test_check_create_returns_usage_recorder(self):
+        quota_filter = self._enable_quota_filter()
+        lease_values, rsv, allocs = self._get_lease_rsv_allocs()
+        ctx = context.current()
+
+        record_usage = self.enforcement.check_create(ctx, lease_values, rsv,
+                                                     allocs)
+
+        # The usage is recorded by the transaction writing the lease.
+        quota_filter.record.assert_not_called()
+        record_usage()
+        formatted_lease = self.enforcement.format_lease(lease_values, rsv,
+                                                        allocs)
+        quota_filter.record.assert_called_once_with(
+            '222', usage.lease_usage(formatted_lease))
+
+    def test_check_create_with_exception_does_not_record_usage(self):
+        quota_filter = self._enable_quota_filter()
+        lease_values, rsv, allocs = self._get_lease_rsv_allocs()
+        ctx = context.current()
+
+        check_create = self.patch(self.enforcement.enabled_filters[0],
+                                  'check_create')
+        check_create.side_effect = exceptions.BlazarException
+
+        self.assertRaises(exceptions.BlazarException,
+                          self.enforcement.check_create,
+                          context=ctx, lease_values=lease_values,
+                          reservations=rsv, allocations=allocs)
+        quota_filter.record.assert_not_called()
+
+    def test_check_update_records_usage(self):
+        quota_filter = self._enable_quota_filter()
+        lease, rsv, allocs = self._get_lease_rsv_allocs()
+        new_lease_values = get_fake_lease(
+            start_date=lease['start_date'],
+            end_date=datetime.datetime(2014, 2, 7, 13, 37))
+        new_reservations = list(new_lease_values.pop('reservations'))
+        ctx = context.current()
+
+        undo_usage = self.enforcement.check_update(
+            ctx, lease, new_lease_values, allocs, allocs, rsv,
+            new_reservations)
+
+        delta = usage.usage_delta(
+            usage.lease_usage(self.enforcement.format_lease(lease, rsv,
+                                                            allocs)),
+            usage.lease_usage(self.enforcement.format_lease(
+                new_lease_values, new_reservations, allocs)))
+        quota_filter.record.assert_called_once_with('222', delta)
+        usage.increment.assert_not_called()
+        undo_usage()
+        usage.increment.assert_called_once_with(
+            '222', {counter: -amount for counter, amount in delta.items()})
+
+    def test_check_update_unchanged_usage(self):
+        quota_filter = self._enable_quota_filter()
+        lease, rsv, allocs = self._get_lease_rsv_allocs()
+        ctx = context.current()
+
+        self.assertIsNone(self.enforcement.check_update(
+            ctx, lease, dict(lease), allocs, allocs, rsv, rsv))
+        quota_filter.record.assert_not_called()
+
+    def test_check_update_without_ledger(self):
+        lease, rsv, allocs = get_lease_rsv_allocs()
+        new_lease_values = get_fake_lease(end_date='2014-02-07 13:37')
+        new_reservations = list(new_lease_values.pop('reservations'))
+        ctx = context.current()
+
+        self.assertIsNone(self.enforcement.check_update(
+            ctx, lease, new_lease_values, allocs, allocs, rsv,
+            new_reservations))
+
+    def test_check_update_with_exception_does_not_record_usage(self):
+        quota_filter = self._enable_quota_filter()
+        lease, rsv, allocs = get_lease_rsv_allocs()
+        new_lease_values = get_fake_lease(end_date='2014-02-07 13:37')
+        new_reservations = list(new_lease_values.pop('reservations'))
+        ctx = context.current()
+
+        check_update = self.patch(self.enforcement.enabled_filters[0],
+                                  'check_update')
+        check_update.side_effect = exceptions.BlazarException
+
+        self.assertRaises(exceptions.BlazarException,
+                          self.enforcement.check_update, ctx, lease,
+                          new_lease_values, allocs, allocs, rsv,
+                          new_reservations)
+        quota_filter.record.assert_not_called()
+
+    def test_on_end_with_exception_records_usage(self):
+        self._enable_quota_filter()
+        allocations = {'virtual:instance': [get_fake_host('1')]}
+        lease = get_fake_lease()
+        ctx = context.current()
+
+        on_end = self.patch(self.enforcement.enabled_filters[0], 'on_end')
+        on_end.side_effect = exceptions.BlazarException
+
+        self.assertRaises(exceptions.BlazarException,
+                          self.enforcement.on_end, ctx, lease, allocations)
+        usage.record_end.assert_called_once()
+
+    def test_release(self):
+        self._enable_quota_filter()
+        lease_values, rsv, allocs = get_lease_rsv_allocs()
+
+        self.enforcement.release(lease_values, rsv, allocs)
+
+        formatted_lease = self.enforcement.format_lease(lease_values, rsv,
+                                                        allocs)
+        usage.record_end.assert_called_once_with('222', formatted_lease)
+
+    def test_release_without_ledger(self):
+        lease_values, rsv, allocs = get_lease_rsv_allocs()
+
+        self.enforcement.release(lease_values, rsv, allocs)
+
+        usage.record_end.assert_not_called()
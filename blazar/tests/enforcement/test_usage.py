@@ -0,0 +1,101 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+from unittest import mock
+
+from oslo_utils import timeutils
+
+from blazar.db import api as db_api
+from blazar.enforcement import usage
+from blazar import tests
+
+
+def get_fake_lease(start_date=datetime.datetime(2030, 1, 1, 0, 0)):
+    return {
+        'start_date': start_date,
+        'end_date': start_date + datetime.timedelta(hours=10),
+        'reservations': [
+            {'resource_type': 'physical:host',
+             'allocations': [{'id': '1'}, {'id': '2'}]},
+            {'resource_type': 'virtual:instance', 'amount': 3,
+             'allocations': [{'id': '1'}]},
+            {'resource_type': 'virtual:floatingip',
+             'allocations': [{'id': 'fip1'}]},
+        ],
+    }
+
+
+class UsageTestCase(tests.TestCase):
+    def setUp(self):
+        super(UsageTestCase, self).setUp()
+
+        self.usage_increment = self.patch(db_api, 'project_usage_increment')
+        patcher = mock.patch.object(timeutils, 'utcnow')
+        self.utcnow = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.utcnow.return_value = datetime.datetime(2029, 12, 15, 0, 0)
+
+    def test_lease_usage(self):
+        self.assertEqual(
+            {'hosts': 2, 'instances': 3, 'floatingips': 1,
+             'resource_hours': 60.0},
+            usage.lease_usage(get_fake_lease()))
+
+    def test_get_no_usage(self):
+        self.patch(db_api, 'project_usage_get').return_value = None
+        self.assertEqual(
+            {'hosts': 0, 'instances': 0, 'floatingips': 0,
+             'resource_hours': 0},
+            usage.get('project1'))
+
+    def test_get_previous_period(self):
+        self.patch(db_api, 'project_usage_get').return_value = {
+            'period': '2029-11', 'hosts': 1, 'instances': 0,
+            'floatingips': 0, 'resource_hours': 42}
+        result = usage.get('project1')
+        self.assertEqual(1, result['hosts'])
+        self.assertEqual(0, result['resource_hours'])
+
+    def test_increment(self):
+        self.usage_increment.return_value = True
+        delta = {'hosts': 2, 'instances': -1, 'floatingips': 0,
+                 'resource_hours': 60.0}
+
+        self.assertTrue(usage.increment(
+            'project1', delta,
+            limits={'hosts': 3, 'instances': 0, 'floatingips': 0}))
+
+        self.usage_increment.assert_called_once_with(
+            'project1', '2029-12', delta, {'hosts': 3})
+
+    def test_increment_exceeded(self):
+        self.usage_increment.return_value = False
+
+        self.assertFalse(usage.increment('project1', {'hosts': 2},
+                                         limits={'hosts': 1}))
+
+    def test_increment_unchanged(self):
+        self.assertTrue(usage.increment(
+            'project1', usage.usage_delta(usage.lease_usage(get_fake_lease()),
+                                          usage.lease_usage(get_fake_lease())),
+            limits={'hosts': 1}))
+        self.usage_increment.assert_not_called()
+
+    def test_record_end_refunds_unused_hours(self):
+        self.utcnow.return_value = datetime.datetime(2030, 1, 1, 4, 0)
+        usage.record_end('project1', get_fake_lease())
+        self.usage_increment.assert_called_once_with(
+            'project1', '2030-01',
+            {'hosts': -2, 'instances': -3, 'floatingips': -1,
+             'resource_hours': -36.0})
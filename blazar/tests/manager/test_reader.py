@@ -0,0 +1,158 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+
+from blazar.db import api as db_api
+from blazar.manager.floatingips import reader as fip_reader
+from blazar.manager.leases import reader as lease_reader
+from blazar.manager.oshosts import reader as host_reader
+from blazar.plugins.floatingips import floatingip_plugin
+from blazar.plugins.oshosts import host_plugin
+from blazar import tests
+
+
+class LeaseDBReaderTestCase(tests.DBTestCase):
+    def setUp(self):
+        super(LeaseDBReaderTestCase, self).setUp()
+
+        self.reader = lease_reader.ManagerDBReader()
+        self.lease = db_api.lease_create({
+            'id': 'lease-id',
+            'name': 'lease-name',
+            'user_id': 'user-id',
+            'project_id': 'project-id',
+            'start_date': datetime.datetime(2030, 1, 1, 0, 0),
+            'end_date': datetime.datetime(2030, 1, 2, 0, 0),
+            'trust_id': 'trust-id',
+            'events': [{'event_type': 'start_lease',
+                        'time': datetime.datetime(2030, 1, 1, 0, 0),
+                        'status': 'UNDONE'}],
+        })
+
+    def test_get_lease(self):
+        lease = self.reader.get_lease('lease-id')
+
+        self.assertIsInstance(lease, dict)
+        self.assertEqual('lease-name', lease['name'])
+        self.assertEqual('2030-01-01T00:00:00.000000', lease['start_date'])
+        self.assertEqual(['start_lease'],
+                         [event['event_type'] for event in lease['events']])
+
+    def test_get_unknown_lease(self):
+        self.assertIsNone(self.reader.get_lease('unknown'))
+
+    def test_list_leases(self):
+        self.assertEqual(['lease-id'],
+                         [lease['id'] for lease in
+                          self.reader.list_leases(project_id='project-id')])
+        self.assertEqual([], list(self.reader.list_leases(project_id='other')))
+
+    def test_list_leases_queries(self):
+        for i in range(5):
+            db_api.lease_create({
+                'name': 'lease-%d' % i,
+                'user_id': 'user-id',
+                'project_id': 'project-id',
+                'start_date': datetime.datetime(2030, 1, 1, 0, 0),
+                'end_date': datetime.datetime(2030, 1, 2, 0, 0),
+                'trust_id': 'trust-id',
+                'events': [{'event_type': 'start_lease',
+                            'time': datetime.datetime(2030, 1, 1, 0, 0),
+                            'status': 'UNDONE'}],
+            })
+
+        # NOTE: The number of queries must not depend on the number of
+        # leases.
+        with self.assertMaxQueries(2):
+            leases = list(self.reader.list_leases(project_id='project-id'))
+
+        self.assertEqual(6, len(leases))
+
+    def test_get_leases_version(self):
+        version = self.reader.get_leases_version(project_id='project-id')
+
+        self.assertEqual(2, version['count'])
+        self.assertIsInstance(version['updated_at'], str)
+        self.assertEqual({'count': 0, 'updated_at': None},
+                         self.reader.get_leases_version(project_id='other'))
+
+    def test_list_lease_changes(self):
+        changes = self.reader.list_lease_changes(0)
+
+        self.assertEqual([1], [change['id'] for change in changes])
+        self.assertEqual('lease-id', changes[0]['lease_id'])
+        self.assertEqual('create', changes[0]['change'])
+        self.assertIsInstance(changes[0]['created_at'], str)
+        self.assertEqual([], self.reader.list_lease_changes(1))
+
+    def test_get_latest_lease_change_id(self):
+        self.assertEqual(1, self.reader.get_latest_lease_change_id())
+
+
+class HostDBReaderTestCase(tests.TestCase):
+    def setUp(self):
+        super(HostDBReaderTestCase, self).setUp()
+
+        self.reader = host_reader.ManagerDBReader()
+        self.host = {'id': '1',
+                     'hypervisor_hostname': 'host1',
+                     'created_at': datetime.datetime(2030, 1, 1, 0, 0)}
+
+    def test_get_computehost(self):
+        get_computehost = self.patch(host_plugin.PhysicalHostPlugin,
+                                     'get_computehost')
+        get_computehost.return_value = self.host
+
+        host = self.reader.get_computehost('1')
+
+        get_computehost.assert_called_once_with('1', fields=None)
+        self.assertEqual('2030-01-01T00:00:00.000000', host['created_at'])
+
+    def test_list_computehosts(self):
+        list_computehosts = self.patch(host_plugin.PhysicalHostPlugin,
+                                       'list_computehosts')
+        list_computehosts.return_value = [self.host]
+
+        hosts = self.reader.list_computehosts({})
+
+        list_computehosts.assert_called_once_with({}, fields=None)
+        self.assertEqual(['1'], [host['id'] for host in hosts])
+
+    def test_get_allocations(self):
+        get_allocations = self.patch(host_plugin.PhysicalHostPlugin,
+                                     'get_allocations')
+        get_allocations.return_value = {'resource_id': '1',
+                                        'reservations': []}
+
+        allocations = self.reader.get_allocations('1', {'lease_id': 'l1'})
+
+        get_allocations.assert_called_once_with('1', {'lease_id': 'l1'})
+        self.assertEqual({'resource_id': '1', 'reservations': []},
+                         allocations)
+
+
+class FloatingIPDBReaderTestCase(tests.TestCase):
+    def setUp(self):
+        super(FloatingIPDBReaderTestCase, self).setUp()
+
+        self.reader = fip_reader.ManagerDBReader()
+
+    def test_get_floatingip(self):
+        get_floatingip = self.patch(floatingip_plugin.FloatingIpPlugin,
+                                    'get_floatingip')
+        get_floatingip.return_value = {'id': 'fip-id'}
+
+        self.assertEqual({'id': 'fip-id'},
+                         self.reader.get_floatingip('fip-id'))
+        get_floatingip.assert_called_once_with('fip-id')
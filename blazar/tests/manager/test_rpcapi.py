@@ -39,10 +39,46 @@ class RPCAPITestCase(tests.TestCase):
         self.call.assert_called_once_with('list_leases', project_id='fake',
                                           query=None)
 
+    def test_get_lease_fields(self):
+        self.manager.get_lease(self.fake_id, fields=['id', 'name'])
+        self.call.assert_called_once_with('get_lease', lease_id=self.fake_id,
+                                          fields=['id', 'name'])
+
+    def test_list_leases_fields(self):
+        self.manager.list_leases('fake', fields=['id', 'name'])
+        self.call.assert_called_once_with('list_leases', project_id='fake',
+                                          query=None, fields=['id', 'name'])
+
+    def test_get_leases_version(self):
+        self.manager.get_leases_version('fake')
+        self.call.assert_called_once_with('get_leases_version',
+                                          project_id='fake')
+
+    def test_list_lease_changes(self):
+        self.manager.list_lease_changes(5, limit=10)
+        self.call.assert_called_once_with('list_lease_changes', since=5,
+                                          limit=10)
+
+    def test_get_latest_lease_change_id(self):
+        self.manager.get_latest_lease_change_id()
+        self.call.assert_called_once_with('get_latest_lease_change_id')
+
     def test_create_lease(self):
         self.manager.create_lease(self.fake_values)
         self.call.assert_called_once_with('create_lease', lease_values={})
 
+    def test_create_lease_without_waiting(self):
+        self.manager.create_lease(self.fake_values, wait=False)
+        self.call.assert_called_once_with('create_lease', lease_values={},
+                                          wait=False)
+
+    def test_create_leases(self):
+        self.manager.create_leases([self.fake_values], 'trust', atomic=False)
+        self.call.assert_called_once_with('create_leases',
+                                          leases_values=[{}],
+                                          trust_id='trust',
+                                          atomic=False)
+
     def test_update_lease(self):
         self.manager.update_lease(self.fake_id,
                                   self.fake_values)
@@ -21,6 +21,7 @@ import ddt
 import eventlet
 import importlib
 from oslo_config import cfg
+from oslo_db import exception as common_db_exc
 import oslo_messaging as messaging
 from oslo_utils import timeutils
 from stevedore import enabled
@@ -41,6 +42,7 @@ from blazar.plugins.oshosts import host_plugin
 from blazar import status
 from blazar import tests
 from blazar.utils.openstack import base as base_utils
+from blazar.utils import service as service_utils
 from blazar.utils import trusts
 
 
@@ -154,6 +156,7 @@ class ServiceTestCase(tests.DBTestCase):
         self.service = service
         self.manager = self.service.ManagerService()
         self.enforcement = self.patch(self.manager, 'enforcement')
+        self.enforcement.allocation_fields = None
 
         self.lease_id = '11-22-33'
         self.user_id = '123'
@@ -206,10 +209,12 @@ class ServiceTestCase(tests.DBTestCase):
         self.lease_list = self.patch(self.db_api, 'lease_list')
         self.lease_create = self.patch(self.db_api, 'lease_create')
         self.lease_update = self.patch(self.db_api, 'lease_update')
+        self.lease_update.return_value = self.lease
         self.lease_destroy = self.patch(self.db_api, 'lease_destroy')
         self.reservation_create = self.patch(self.db_api, 'reservation_create')
         self.reservation_update = self.patch(self.db_api, 'reservation_update')
         self.event_create = self.patch(self.db_api, 'event_create')
+        self.event_create_all = self.patch(self.db_api, 'event_create_all')
         self.event_update = self.patch(self.db_api, 'event_update')
         self.manager.plugins = {'virtual:instance': self.fake_plugin}
         self.manager.resource_actions = (
@@ -231,6 +236,29 @@ class ServiceTestCase(tests.DBTestCase):
         # future it become useful
         pass
 
+    def test_stop(self):
+        rpc_stop = self.patch(service_utils.RPCServer, 'stop')
+        flush = self.patch(self.notifier_api, 'flush')
+        creation = mock.Mock()
+        self.manager._lease_creations[self.lease_id] = creation
+
+        self.manager.stop()
+
+        rpc_stop.assert_called_once_with()
+        creation.wait.assert_called_once_with()
+        flush.assert_called_once_with()
+
+    def test_fail_interrupted_creations(self):
+        get_all_by_status = self.patch(self.db_api, 'lease_get_all_by_status')
+        get_all_by_status.return_value = [self.lease]
+
+        self.manager._fail_interrupted_creations()
+
+        get_all_by_status.assert_called_once_with(
+            status.LeaseStatus.CREATING)
+        self.lease_update.assert_called_once_with(
+            self.lease_id, {'status': status.LeaseStatus.ERROR})
+
     def test_multiple_plugins_same_resource_type(self):
         config = self.patch(cfg.CONF, "manager")
         config.plugins = ['fake.plugin.1', 'fake.plugin.2']
@@ -263,7 +291,8 @@ class ServiceTestCase(tests.DBTestCase):
         actions = {'virtual:instance':
                    {'on_start': self.fake_plugin.on_start,
                     'on_end': self.fake_plugin.on_end,
-                    'before_end': self.fake_plugin.before_end}}
+                    'before_end': self.fake_plugin.before_end,
+                    'prepare': self.fake_plugin.prepare}}
         self.assertEqual(actions, self.manager._setup_actions())
 
     def test_no_events(self):
@@ -275,6 +304,17 @@ class ServiceTestCase(tests.DBTestCase):
 
         self.assertFalse(event_update.called)
 
+    def test_purge_lease_changes(self):
+        lease_change_purge = self.patch(self.db_api, 'lease_change_purge')
+        lease_change_purge.return_value = 3
+
+        with mock.patch.object(timeutils, 'utcnow') as patched:
+            patched.return_value = datetime.datetime(2030, 1, 2, 0, 0)
+            self.manager._purge_lease_changes()
+
+        lease_change_purge.assert_called_once_with(
+            datetime.datetime(2030, 1, 1, 0, 0))
+
     def test_event_success(self):
         events = self.patch(self.db_api, 'event_get_all_sorted_by_filters')
         event_update = self.patch(self.db_api, 'event_update')
@@ -340,6 +380,26 @@ class ServiceTestCase(tests.DBTestCase):
             # start_lease event
             mock.call([events_values[4]])])
 
+    def test_process_prepare_lease_events_first(self):
+        events = self.patch(self.db_api, 'event_get_all_sorted_by_filters')
+        self.patch(self.db_api, 'event_update')
+        events.return_value = [{'id': '111-222-333', 'time': self.good_date,
+                                'lease_id': 'aaa-bbb-ccc',
+                                'event_type': 'start_lease'},
+                               {'id': '222-333-444', 'time': self.good_date,
+                                'lease_id': 'aaa-bbb-ccc',
+                                'event_type': 'prepare_lease'}]
+        events_values = copy.copy(events.return_value)
+        _process_events_concurrently = self.patch(
+            self.manager, '_process_events_concurrently')
+
+        self.manager._process_events()
+
+        self.assertEqual(
+            [mock.call([events_values[1]]), mock.call([]), mock.call([]),
+             mock.call([events_values[0]]), mock.call([]), mock.call([])],
+            _process_events_concurrently.call_args_list)
+
     def test_process_events_concurrently(self):
         events = [{'id': '111-222-333', 'time': self.good_date,
                    'lease_id': 'aaa-bbb-ccc',
@@ -407,6 +467,18 @@ class ServiceTestCase(tests.DBTestCase):
             notifier_api.format_lease_payload(self.lease),
             'lease.event.start_lease')
 
+    def test_exec_event_tracks_queries(self):
+        event = {'id': '111-222-333',
+                 'event_type': 'start_lease',
+                 'lease_id': self.lease_id}
+        self.patch(self.manager, 'start_lease')
+        track_queries = self.patch(self.db_api, 'track_queries')
+
+        self.manager._exec_event(event)
+
+        track_queries.assert_called_once_with(
+            'Event start_lease of lease %s' % self.lease_id)
+
     def test_exec_event_invalid_event_type(self):
         event = {'id': '111-222-333',
                  'event_type': 'invalid',
@@ -476,7 +548,7 @@ class ServiceTestCase(tests.DBTestCase):
     def test_get_lease(self):
         lease = self.manager.get_lease(self.lease_id)
 
-        self.lease_get.assert_called_once_with('11-22-33')
+        self.lease_get.assert_called_once_with('11-22-33', None)
         self.assertEqual(lease, self.lease)
 
     @testtools.skip('incorrect decorator')
@@ -503,6 +575,120 @@ class ServiceTestCase(tests.DBTestCase):
             notifier_api.format_lease_payload(lease),
             'lease.create')
 
+    def test_create_lease_without_waiting(self):
+        lease_values = self.lease_values.copy()
+        spawn = self.patch(eventlet, 'spawn')
+
+        lease = self.manager.create_lease(lease_values, wait=False)
+
+        self.assertEqual(self.lease, lease)
+        spawn.assert_called_once_with(
+            self.manager._complete_lease_creation,
+            self.trust_ctx.return_value.__enter__.return_value,
+            self.lease_create.return_value, [], lease_values,
+            mock.ANY, mock.ANY)
+        self.assertIs(spawn.return_value, self.manager._lease_creations[
+            self.lease_create.return_value['id']])
+        self.lease_update.assert_not_called()
+        self.fake_notifier.assert_not_called()
+
+    def test_complete_lease_creation(self):
+        ctx = self.context.BlazarContext()
+        callback = mock.MagicMock()
+        self.manager._lease_creations[self.lease_id] = mock.Mock()
+
+        self.manager._complete_lease_creation(
+            ctx, self.lease, [(callback, ('arg',), {})], {}, [], {})
+
+        callback.assert_called_once_with('arg')
+        self.assertNotIn(self.lease_id, self.manager._lease_creations)
+        self.lease_update.assert_called_once_with(
+            self.lease_id, {'status': status.LeaseStatus.PENDING})
+        self.enforcement.release.assert_not_called()
+
+    def test_complete_lease_creation_failure(self):
+        ctx = self.context.BlazarContext()
+        callback = mock.MagicMock(side_effect=Exception)
+        self.manager._lease_creations[self.lease_id] = mock.Mock()
+
+        self.manager._complete_lease_creation(
+            ctx, self.lease, [(callback, (), {})], {}, [], {})
+
+        self.assertNotIn(self.lease_id, self.manager._lease_creations)
+        self.lease_destroy.assert_called_once_with(self.lease_id)
+        self.enforcement.release.assert_called_once_with({}, [], {})
+        self.lease_update.assert_not_called()
+
+    def _get_batch_values(self, count=2):
+        leases_values = []
+        for i in range(count):
+            values = copy.deepcopy(self.lease_values)
+            del values['trust_id']
+            values['name'] = 'lease-%d' % i
+            leases_values.append(values)
+        return leases_values
+
+    def test_create_leases(self):
+        leases_values = self._get_batch_values()
+
+        results = self.manager.create_leases(leases_values, 'trust-id')
+
+        self.trust_ctx.assert_called_once_with('trust-id')
+        self.assertEqual(2, self.enforcement.check_create.call_count)
+        self.assertEqual(2, self.lease_create.call_count)
+        self.assertEqual([{'lease': self.lease}, {'lease': self.lease}],
+                         results)
+        for values in leases_values:
+            self.assertEqual('trust-id', values['trust_id'])
+        self.enforcement.release.assert_not_called()
+
+    def test_create_leases_atomic_failure(self):
+        leases_values = self._get_batch_values()
+        self.lease_create.side_effect = [dict(self.lease, id='lease-0'),
+                                         db_ex.BlazarDBDuplicateEntry]
+
+        self.assertRaises(manager_ex.LeaseNameAlreadyExists,
+                          self.manager.create_leases, leases_values,
+                          'trust-id')
+
+        self.assertEqual(2, self.enforcement.release.call_count)
+        self.lease_destroy.assert_called_once_with('lease-0')
+        self.lease_update.assert_not_called()
+        self.fake_notifier.assert_not_called()
+
+    def test_create_leases_best_effort(self):
+        leases_values = self._get_batch_values()
+        self.lease_create.side_effect = [db_ex.BlazarDBDuplicateEntry,
+                                         dict(self.lease, id='lease-1')]
+
+        results = self.manager.create_leases(leases_values, 'trust-id',
+                                             atomic=False)
+
+        self.trust_ctx.assert_called_once_with('trust-id')
+        self.assertEqual(409, results[0]['error']['error_code'])
+        self.assertEqual({'lease': self.lease}, results[1])
+        # The usage of the first lease is rolled back with it.
+        self.enforcement.release.assert_not_called()
+        self.lease_update.assert_called_once_with(
+            'lease-1', {'status': status.LeaseStatus.PENDING})
+
+    def test_create_leases_best_effort_unexpected_error(self):
+        leases_values = self._get_batch_values()
+        self.lease_create.side_effect = [dict(self.lease, id='lease-0'),
+                                         common_db_exc.DBDeadlock]
+
+        results = self.manager.create_leases(leases_values, 'trust-id',
+                                             atomic=False)
+
+        self.assertEqual({'lease': self.lease}, results[0])
+        self.assertEqual({'error_code': 500,
+                          'error_message': 'Internal error while creating '
+                                           'the lease',
+                          'error_name': 'INTERNAL_SERVER_ERROR'},
+                         results[1]['error'])
+        self.lease_update.assert_called_once_with(
+            'lease-0', {'status': status.LeaseStatus.PENDING})
+
     def test_create_lease_some_time(self):
         lease_values = self.lease_values.copy()
         self.lease['start_date'] = '2046-11-13 13:13'
@@ -682,6 +868,28 @@ class ServiceTestCase(tests.DBTestCase):
         self.assertEqual(str(expected_before_end_time), event['time'])
         self.assertEqual('UNDONE', event['status'])
 
+    def test_create_lease_with_provisioning_time(self):
+        self.cfg.CONF.set_override('provisioning_time', 60)
+        self.addCleanup(self.cfg.CONF.clear_override, 'provisioning_time')
+        lease_values = self.lease_values.copy()
+
+        self.manager.create_lease(lease_values)
+
+        events = {event['event_type']: event
+                  for event in self.event_create_all.call_args[0][0]}
+        self.assertEqual(datetime.datetime(2046, 11, 13, 12, 13),
+                         events['prepare_lease']['time'])
+        self.assertEqual('UNDONE', events['prepare_lease']['status'])
+
+    def test_create_lease_without_provisioning_time(self):
+        lease_values = self.lease_values.copy()
+
+        self.manager.create_lease(lease_values)
+
+        events = self.event_create_all.call_args[0][0]
+        self.assertNotIn('prepare_lease',
+                         [event['event_type'] for event in events])
+
     def test_create_lease_wrong_date(self):
         lease_values = self.lease_values.copy()
         lease_values['start_date'] = '2025-13-35 13:13'
@@ -778,6 +986,31 @@ class ServiceTestCase(tests.DBTestCase):
                           lease_values=lease_values)
         self.lease_create.assert_not_called()
 
+    def test_create_lease_records_usage(self):
+        record_usage = self.enforcement.check_create.return_value
+        record_usage.side_effect = lambda: self.lease_create.assert_called()
+
+        self.manager.create_lease(self.lease_values)
+
+        record_usage.assert_called_once_with()
+        self.enforcement.release.assert_not_called()
+
+    def test_create_lease_with_quota_exceeded(self):
+        record_usage = self.enforcement.check_create.return_value
+        record_usage.side_effect = enforcement_ex.QuotaExceededException(
+            resource='hosts', requested='more than 1', limit=1)
+        # The lease is rolled back with the transaction recording its usage.
+        self.lease_destroy.side_effect = db_ex.BlazarDBNotFound(
+            id=self.lease_id, model='Lease')
+
+        self.assertRaises(exceptions.NotAuthorized,
+                          self.manager.create_lease, self.lease_values)
+
+        self.lease_destroy.assert_called_once()
+        self.enforcement.release.assert_not_called()
+        self.lease_update.assert_not_called()
+        self.fake_notifier.assert_not_called()
+
     def test_update_lease_completed_lease_rename(self):
         lease_values = {'name': 'renamed'}
         target = datetime.datetime(2015, 1, 1)
@@ -837,6 +1070,90 @@ class ServiceTestCase(tests.DBTestCase):
         self.event_update.assert_has_calls(calls)
         self.lease_update.assert_called_once_with(self.lease_id, lease_values)
 
+    def _update_lease_dates(self):
+        def fake_event_get(sort_key, sort_dir, filters):
+            if filters['event_type'] == 'start_lease':
+                return {'id': '2eeb784a-2d84-4a89-a201-9d42d61eecb1'}
+            elif filters['event_type'] == 'end_lease':
+                return {'id': '7085381b-45e0-4e5d-b24a-f965f5e6e5d7'}
+
+        reservation_get_all = (
+            self.patch(self.db_api, 'reservation_get_all_by_lease_id'))
+        reservation_get_all.return_value = [
+            {
+                'id': '593e7028-c0d1-4d76-8642-2ffd890b324c',
+                'resource_type': 'virtual:instance',
+            }
+        ]
+        event_get = self.patch(db_api, 'event_get_first_sorted_by_filters')
+        event_get.side_effect = fake_event_get
+        target = datetime.datetime(2013, 12, 15)
+        with mock.patch.object(timeutils, 'utcnow') as patched:
+            patched.return_value = target
+            self.manager.update_lease(
+                lease_id=self.lease_id,
+                values={'start_date': '2015-12-01 20:00',
+                        'end_date': '2015-12-01 22:00'})
+
+    def test_update_lease_records_usage(self):
+        undo_usage = self.enforcement.check_update.return_value
+
+        self._update_lease_dates()
+
+        self.enforcement.check_update.assert_called_once()
+        self.lease_update.assert_called_once()
+        undo_usage.assert_not_called()
+
+    def test_update_lease_failure_reverts_usage(self):
+        undo_usage = self.enforcement.check_update.return_value
+        self.lease_update.side_effect = exceptions.BlazarException
+
+        self.assertRaises(exceptions.BlazarException,
+                          self._update_lease_dates)
+
+        undo_usage.assert_called_once_with()
+
+    def test_update_lease_reservation_failure_reverts_usage(self):
+        undo_usage = self.enforcement.check_update.return_value
+        self.fake_plugin.update_reservation.side_effect = (
+            exceptions.BlazarException)
+
+        self.assertRaises(exceptions.BlazarException,
+                          self._update_lease_dates)
+
+        undo_usage.assert_called_once_with()
+        self.lease_update.assert_not_called()
+
+    def test_update_lease_not_started_move_prepare_event(self):
+        def fake_event_get(sort_key, sort_dir, filters):
+            if filters['event_type'] == 'prepare_lease':
+                return {'id': 'c3d0e5a8-5d0f-4a3e-9e57-6e6c4f1b2a90',
+                        'status': 'UNDONE'}
+            elif filters['event_type'] == 'before_end_lease':
+                return {'id': '452bf850-e223-4035-9d13-eb0b0197228f',
+                        'time': self.lease['end_date'],
+                        'status': 'UNDONE'}
+            return {'id': '2eeb784a-2d84-4a89-a201-9d42d61eecb1'}
+
+        self.cfg.CONF.set_override('provisioning_time', 60)
+        self.addCleanup(self.cfg.CONF.clear_override, 'provisioning_time')
+        lease_values = {
+            'start_date': '2015-12-01 20:00',
+            'end_date': '2015-12-01 22:00'
+        }
+        self.patch(self.db_api, 'reservation_get_all_by_lease_id')
+        event_get = self.patch(db_api, 'event_get_first_sorted_by_filters')
+        event_get.side_effect = fake_event_get
+        target = datetime.datetime(2013, 12, 15)
+        with mock.patch.object(timeutils, 'utcnow') as patched:
+            patched.return_value = target
+            self.manager.update_lease(lease_id=self.lease_id,
+                                      values=lease_values)
+
+        self.event_update.assert_any_call(
+            'c3d0e5a8-5d0f-4a3e-9e57-6e6c4f1b2a90',
+            {'time': datetime.datetime(2015, 12, 1, 19, 00)})
+
     def test_update_modify_reservations(self):
         def fake_event_get(sort_key, sort_dir, filters):
             if filters['event_type'] == 'start_lease':
@@ -1267,6 +1584,22 @@ class ServiceTestCase(tests.DBTestCase):
         self.lease_get.assert_called_once_with(self.lease_id)
         self.assertEqual(lease, self.lease)
 
+    def test_update_lease_not_found(self):
+        self.lease_get.return_value = None
+
+        self.assertRaises(exceptions.NotFound, self.manager.update_lease,
+                          lease_id=self.lease_id,
+                          values={'end_date': '2046-12-13 13:13'})
+        self.lease_update.assert_not_called()
+
+    def test_update_lease_rename_not_found(self):
+        self.lease_update.side_effect = db_ex.BlazarDBNotFound(
+            id=self.lease_id, model='Lease')
+
+        self.assertRaises(exceptions.NotFound, self.manager.update_lease,
+                          lease_id=self.lease_id, values={'name': 'renamed'})
+        self.lease_get.assert_not_called()
+
     def test_update_lease_started_modify_start_date(self):
         lease_values = {
             'name': 'renamed',
@@ -1400,6 +1733,36 @@ class ServiceTestCase(tests.DBTestCase):
 
         self.lease_update.assert_not_called()
 
+    def test_delete_lease_not_found(self):
+        self.lease_get.return_value = None
+
+        self.assertRaises(exceptions.NotFound, self.manager.delete_lease,
+                          self.lease_id)
+        self.lease_destroy.assert_not_called()
+
+    def test_delete_lease_waits_for_creation(self):
+        calls = []
+        creation = mock.Mock()
+        creation.wait.side_effect = lambda: calls.append('wait')
+        self.manager._lease_creations[self.lease_id] = creation
+        delete_lease = self.patch(self.manager, '_delete_lease')
+        delete_lease.side_effect = lambda lease_id: calls.append('delete')
+
+        self.manager.delete_lease(self.lease_id)
+
+        self.assertEqual(['wait', 'delete'], calls)
+        delete_lease.assert_called_once_with(lease_id=self.lease_id)
+
+    def test_delete_lease_after_failed_creation(self):
+        creation = mock.Mock()
+        creation.wait.side_effect = Exception
+        self.manager._lease_creations[self.lease_id] = creation
+        delete_lease = self.patch(self.manager, '_delete_lease')
+
+        self.manager.delete_lease(self.lease_id)
+
+        delete_lease.assert_called_once_with(lease_id=self.lease_id)
+
     def test_delete_lease_before_start(self):
         def fake_event_get(sort_key, sort_dir, filters):
             if filters['event_type'] == 'start_lease':
@@ -1542,6 +1905,14 @@ class ServiceTestCase(tests.DBTestCase):
                                              'deleted')
         enforcement_on_end.assert_called_once()
 
+    def test_prepare_lease(self):
+        basic_action = self.patch(self.manager, '_basic_action')
+
+        self.manager.prepare_lease(self.lease_id, '1')
+
+        self.trust_ctx.assert_called_once_with(self.lease['trust_id'])
+        basic_action.assert_called_once_with(self.lease_id, '1', 'prepare')
+
     def test_before_end_lease(self):
         basic_action = self.patch(self.manager, '_basic_action')
         self.manager.before_end_lease(self.lease_id, '1')
@@ -1603,6 +1974,32 @@ class ServiceTestCase(tests.DBTestCase):
             '111', {'status': 'error'})
         self.event_update.assert_called_once_with('1', {'status': 'ERROR'})
 
+    def test_basic_action_unexpected_exception(self):
+        def on_end(resource_id):
+            if resource_id == '222':
+                raise RuntimeError()
+
+        self.manager.resource_actions = (
+            {'virtual:instance':
+             {'on_start': self.fake_plugin.on_start,
+              'on_end': on_end}})
+        self.patch(self.status.reservation,
+                   'is_valid_transition').return_value = True
+        lease = copy.deepcopy(self.lease)
+        lease['reservations'].append({'id': '222',
+                                      'resource_id': '222',
+                                      'resource_type': 'virtual:instance',
+                                      'status': 'FAKE PROGRESS'})
+        self.patch(self.manager, 'get_lease').return_value = lease
+
+        self.assertRaises(RuntimeError, self.manager._basic_action,
+                          self.lease_id, '1', 'on_end',
+                          reservation_status='done')
+
+        self.reservation_update.assert_called_once_with(
+            '111', {'status': 'done'})
+        self.event_update.assert_not_called()
+
     def test_getattr_with_correct_plugin_and_method(self):
         self.fake_list_computehosts = (
             self.patch(self.fake_phys_plugin, 'list_computehosts'))
@@ -1630,6 +2027,59 @@ class ServiceTestCase(tests.DBTestCase):
         self.assertRaises(manager_ex.UnsupportedResourceType, getattr,
                           self.manager, 'plugin:not_present:list_computehosts')
 
+    def test_allocation_candidates_full_documents(self):
+        self.manager.plugins = {'virtual:instance': self.fake_plugin}
+        self.fake_plugin.cached_allocation_candidates.return_value = [
+            'h1', 'h2']
+        self.fake_plugin.get_many.return_value = [{'id': 'h1', 'vcpus': 2},
+                                                  {'id': 'h2', 'vcpus': 2}]
+
+        allocations = self.manager._allocation_candidates(
+            self.lease_values, self.lease_values['reservations'])
+
+        self.assertEqual(
+            {'virtual:instance': [{'id': 'h1', 'vcpus': 2},
+                                  {'id': 'h2', 'vcpus': 2}]},
+            allocations)
+        self.fake_plugin.get_many.assert_called_once_with(['h1', 'h2'])
+        self.fake_plugin.get_summaries.assert_not_called()
+
+    def test_allocation_candidates_compact_documents(self):
+        self.enforcement.allocation_fields = ['hypervisor_hostname']
+        self.manager.plugins = {'virtual:instance': self.fake_plugin}
+        self.fake_plugin.cached_allocation_candidates.return_value = [
+            'h1', 'h2']
+        self.fake_plugin.get_summaries.return_value = [
+            {'id': 'h1', 'hypervisor_hostname': 'host1'},
+            {'id': 'h2', 'hypervisor_hostname': 'host2'}]
+
+        allocations = self.manager._allocation_candidates(
+            self.lease_values, self.lease_values['reservations'])
+
+        self.assertEqual(
+            {'virtual:instance': [
+                {'id': 'h1', 'hypervisor_hostname': 'host1'},
+                {'id': 'h2', 'hypervisor_hostname': 'host2'}]},
+            allocations)
+        self.fake_plugin.get_summaries.assert_called_once_with(
+            ['h1', 'h2'], ['hypervisor_hostname'])
+        self.fake_plugin.get_many.assert_not_called()
+
+    def test_existing_allocations_compact_documents(self):
+        self.enforcement.allocation_fields = []
+        self.manager.plugins = {'virtual:instance': self.fake_plugin}
+        self.fake_plugin.list_allocations_for_reservation.return_value = [
+            'h1']
+        self.fake_plugin.get_summaries.return_value = [{'id': 'h1'}]
+
+        allocations = self.manager._existing_allocations(
+            self.lease['reservations'])
+
+        self.assertEqual({'virtual:instance': [{'id': 'h1'}]}, allocations)
+        (self.fake_plugin.list_allocations_for_reservation
+         .assert_called_once_with('111'))
+        self.fake_plugin.get_summaries.assert_called_once_with(['h1'], [])
+
     def test_getattr_with_missing_method_in_plugin(self):
         self.fake_list_computehosts = (
             self.patch(self.fake_phys_plugin, 'list_computehosts'))
@@ -1747,3 +2197,30 @@ class ServiceTestCase(tests.DBTestCase):
             self.lease_update.assert_called_with(
                 '11-22-33', {'status': 'ERROR'}
             )
+
+
+class UnknownLeaseTestCase(tests.DBTestCase):
+    """Test the lease calls of the manager on unknown leases.
+
+    The lease status decorator and the database are not mocked.
+    """
+
+    def setUp(self):
+        super(UnknownLeaseTestCase, self).setUp()
+
+        ext_manager = self.patch(enabled, 'EnabledExtensionManager')
+        ext_manager.return_value.extensions = [
+            FakeExtension('fake.plugin', FakePlugin)]
+        cfg.CONF.set_override('plugins', ['fake.plugin'], group='manager')
+        self.addCleanup(cfg.CONF.clear_override, 'plugins', group='manager')
+
+        importlib.reload(service)
+        self.manager = service.ManagerService()
+
+    def test_update_unknown_lease(self):
+        self.assertRaises(exceptions.NotFound, self.manager.update_lease,
+                          lease_id='unknown', values={'name': 'renamed'})
+
+    def test_delete_unknown_lease(self):
+        self.assertRaises(exceptions.NotFound, self.manager.delete_lease,
+                          lease_id='unknown')
@@ -16,6 +16,7 @@ from oslo_service import threadgroup
 
 from blazar.db import api as db_api
 from blazar import exceptions
+from blazar import metrics
 from blazar.monitor import base as base_monitor
 from blazar.plugins import base
 from blazar import tests
@@ -88,6 +89,16 @@ class BaseMonitorTestCase(tests.TestCase):
         update_flags.assert_called_once_with(
             {'dummy_id1': {'missing_resources': True}})
 
+    def test_call_monitor_plugin_duration(self):
+        labels = {'plugin': 'DummyMonitorPlugin', 'operation': 'heal'}
+        before = metrics.REGISTRY.get_sample_value(
+            'blazar_monitor_duration_seconds_count', labels) or 0
+
+        self.monitor.call_monitor_plugin(self.monitor_plugins[0].heal)
+
+        self.assertEqual(before + 1, metrics.REGISTRY.get_sample_value(
+            'blazar_monitor_duration_seconds_count', labels))
+
     def test_error_in_callback(self):
         callback = self.patch(DummyMonitorPlugin, 'poll')
         callback.side_effect = exceptions.BlazarException('error')
@@ -96,19 +107,31 @@ class BaseMonitorTestCase(tests.TestCase):
         self.monitor.call_monitor_plugin(callback)
 
     def test_call_update_flags(self):
-        reservation_update = self.patch(db_api, 'reservation_update')
-        reservation_get = self.patch(db_api, 'reservation_get')
-        reservation_get.return_value = {
-            'lease_id': 'dummy_id2'
-        }
-        lease_update = self.patch(db_api, 'lease_update')
+        update_flags_bulk = self.patch(db_api,
+                                       'reservation_update_flags_bulk')
+        update_flags_bulk.return_value = ['dummy_id2']
+        mark_degraded_bulk = self.patch(db_api, 'lease_mark_degraded_bulk')
 
         self.monitor._update_flags({'dummy_id1': {'missing_resources': True}})
-        reservation_update.assert_called_once_with(
-            'dummy_id1', {'missing_resources': True})
-        reservation_get.assert_called_once_with('dummy_id1')
-        lease_update.assert_called_once_with('dummy_id2',
-                                             {'degraded': True})
+        update_flags_bulk.assert_called_once_with(
+            ['dummy_id1'], {'missing_resources': True})
+        mark_degraded_bulk.assert_called_once_with(['dummy_id2'])
+
+    def test_call_update_flags_grouped(self):
+        update_flags_bulk = self.patch(db_api,
+                                       'reservation_update_flags_bulk')
+        update_flags_bulk.side_effect = [['lease2', 'lease1'], ['lease1']]
+        mark_degraded_bulk = self.patch(db_api, 'lease_mark_degraded_bulk')
+
+        self.monitor._update_flags({
+            'rsrv1': {'missing_resources': True},
+            'rsrv2': {'resources_changed': True},
+            'rsrv3': {'missing_resources': True},
+        })
+        update_flags_bulk.assert_has_calls([
+            mock.call(['rsrv1', 'rsrv3'], {'missing_resources': True}),
+            mock.call(['rsrv2'], {'resources_changed': True})])
+        mark_degraded_bulk.assert_called_once_with(['lease1', 'lease2'])
 
     def test_error_in_update_flags(self):
         callback = self.patch(DummyMonitorPlugin, 'poll')
@@ -72,6 +72,44 @@ class NotificationMonitorTestCase(tests.TestCase):
         self.monitor._get_endpoints(self.plugins)
         endpoint.assert_called_once()
 
+    def test_get_batch_endpoints(self):
+        get_event_types = self.patch(self.plugins[0],
+                                     'get_notification_event_types')
+        get_event_types.return_value = ['event_type1', 'event_type2']
+
+        endpoints = self.monitor._get_batch_endpoints(self.plugins)
+        self.assertEqual(1, len(endpoints))
+        self.assertIsInstance(endpoints[0],
+                              notification_monitor.BatchNotificationEndpoint)
+        self.assertEqual([self.plugins[0]],
+                         self.monitor.batch_handlers['event_type1'])
+        self.assertEqual([self.plugins[0]],
+                         self.monitor.batch_handlers['event_type2'])
+
+    def test_coalescing_window_disabled(self):
+        batch_listener = self.patch(oslo_messaging,
+                                    'get_batch_notification_listener')
+        monitor = notification_monitor.NotificationMonitor(self.plugins)
+        self.assertEqual(0, monitor.coalescing_window)
+        batch_listener.assert_not_called()
+
+    def test_coalescing_window_enabled(self):
+        get_window = self.patch(self.plugins[0],
+                                'get_notification_coalescing_window')
+        get_window.return_value = 5
+        batch_listener = self.patch(oslo_messaging,
+                                    'get_batch_notification_listener')
+        listener = self.patch(oslo_messaging, 'get_notification_listener')
+
+        monitor = notification_monitor.NotificationMonitor(self.plugins)
+        self.assertEqual(5, monitor.coalescing_window)
+        listener.assert_not_called()
+        batch_listener.assert_called_once()
+        self.assertEqual(
+            notification_monitor.NOTIFICATION_BATCH_SIZE,
+            batch_listener.call_args[1]['batch_size'])
+        self.assertEqual(5, batch_listener.call_args[1]['batch_timeout'])
+
 
 class NotificationEndpointTestCase(tests.TestCase):
     def setUp(self):
@@ -98,3 +136,49 @@ class NotificationEndpointTestCase(tests.TestCase):
         self.endpoint.error('dummy_ctxt', 'dummy_id', 'event_type1',
                             'hello', 'dummy_metadata')
         self.handler.assert_called_once_with('event_type1', 'hello')
+
+
+class BatchNotificationEndpointTestCase(tests.TestCase):
+    def setUp(self):
+        super(BatchNotificationEndpointTestCase, self).setUp()
+        self.patch(oslo_messaging, 'get_notification_listener')
+        self.plugin = DummyMonitorPlugin()
+        self.handler = self.patch(self.plugin, 'notification_batch_callback')
+        self.handler.return_value = {}
+        self.monitor = notification_monitor.NotificationMonitor([self.plugin])
+        self.monitor.batch_handlers['event_type1'].append(self.plugin)
+        self.endpoint = notification_monitor.BatchNotificationEndpoint(
+            self.monitor)
+
+    def _message(self, event_type, payload):
+        return {'ctxt': 'dummy_ctxt', 'publisher_id': 'dummy_id',
+                'event_type': event_type, 'payload': payload,
+                'metadata': 'dummy_metadata'}
+
+    def test_info(self):
+        self.endpoint.info([self._message('event_type1', 'hello'),
+                            self._message('event_type2', 'ignored'),
+                            self._message('event_type1', 'world')])
+        self.handler.assert_called_once_with([('event_type1', 'hello'),
+                                              ('event_type1', 'world')])
+
+    def test_warn(self):
+        self.endpoint.warn([self._message('event_type1', 'hello')])
+        self.handler.assert_called_once_with([('event_type1', 'hello')])
+
+    def test_error(self):
+        self.endpoint.error([self._message('event_type1', 'hello')])
+        self.handler.assert_called_once_with([('event_type1', 'hello')])
+
+    def test_no_matching_notifications(self):
+        self.endpoint.info([self._message('event_type2', 'hello')])
+        self.handler.assert_not_called()
+
+    def test_flags_updated_once_per_batch(self):
+        self.handler.return_value = {'rsrv-1': {'missing_resources': True}}
+        update_flags = self.patch(self.monitor, '_update_flags')
+
+        self.endpoint.info([self._message('event_type1', 'hello'),
+                            self._message('event_type1', 'world')])
+        update_flags.assert_called_once_with(
+            {'rsrv-1': {'missing_resources': True}})
@@ -0,0 +1,81 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import datetime
+
+from oslo_config import cfg
+
+from blazar.notification import api as notification_api
+from blazar import tests
+
+CONF = cfg.CONF
+
+
+class FormatLeasePayloadTestCase(tests.TestCase):
+    def setUp(self):
+        super(FormatLeasePayloadTestCase, self).setUp()
+
+        self.lease = {
+            'id': 'lease-id',
+            'name': 'lease-name',
+            'user_id': 'user-id',
+            'project_id': 'project-id',
+            'trust_id': 'trust-id',
+            'start_date': datetime.datetime(2030, 1, 1, 0, 0),
+            'end_date': datetime.datetime(2030, 1, 2, 0, 0),
+            'status': 'ACTIVE',
+            'degraded': False,
+            'created_at': datetime.datetime(2029, 12, 1, 0, 0),
+            'updated_at': None,
+            'reservations': [{'id': 'reservation-id',
+                              'lease_id': 'lease-id',
+                              'resource_type': 'physical:host',
+                              'hypervisor_properties': '',
+                              'status': 'active'}],
+            'events': [{'id': 'event-id',
+                        'lease_id': 'lease-id',
+                        'event_type': 'start_lease',
+                        'time': datetime.datetime(2030, 1, 1, 0, 0),
+                        'status': 'DONE'}],
+        }
+
+    def test_full_payload(self):
+        payload = notification_api.format_lease_payload(self.lease)
+
+        self.assertEqual('lease-id', payload['lease_id'])
+        self.assertEqual('trust-id', payload['trust_id'])
+        self.assertEqual(self.lease['reservations'], payload['reservations'])
+        self.assertEqual(self.lease['events'], payload['events'])
+
+    def test_slim_payload(self):
+        CONF.set_override('lease_payload', 'slim', 'notifications')
+
+        payload = notification_api.format_lease_payload(self.lease)
+
+        self.assertEqual({
+            'lease_id': 'lease-id',
+            'user_id': 'user-id',
+            'project_id': 'project-id',
+            'start_date': datetime.datetime(2030, 1, 1, 0, 0),
+            'end_date': datetime.datetime(2030, 1, 2, 0, 0),
+            'status': 'ACTIVE',
+            'reservations': [{'id': 'reservation-id',
+                              'resource_type': 'physical:host',
+                              'status': 'active'}],
+            'events': [{'id': 'event-id',
+                        'event_type': 'start_lease',
+                        'time': datetime.datetime(2030, 1, 1, 0, 0),
+                        'status': 'DONE'}],
+            'created_at': datetime.datetime(2029, 12, 1, 0, 0),
+            'updated_at': None,
+            'degraded': False,
+        }, payload)
@@ -13,6 +13,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from unittest import mock
+
+import eventlet
 from oslo_config import cfg
 import oslo_messaging as messaging
 
@@ -33,6 +36,9 @@ class NotifierTestCase(tests.TestCase):
 
         self.group = 'notifications'
         CONF.set_override('publisher_id', 'lease-service', self.group)
+        CONF.set_override('queue_size', 0, self.group)
+        self.addCleanup(setattr, notification, 'QUEUE', notification.QUEUE)
+        notification.QUEUE = None
 
         # Fake Oslo notifier
         self.fake_notifier = self.patch(messaging, 'Notifier')
@@ -80,3 +86,179 @@ class NotifierTestCase(tests.TestCase):
         notification.init()
         self.assertIs(prev_notifier, notification.NOTIFIER)
         self.assertIs(prev_transport, notification.TRANSPORT)
+
+    def test_init_with_queue(self):
+        CONF.set_override('queue_size', 10, self.group)
+        CONF.set_override('queue_overflow', 'block', self.group)
+
+        notification.init()
+
+        self.assertEqual(10, notification.QUEUE._queue.maxsize)
+        self.assertEqual('block', notification.QUEUE.overflow)
+
+    def test_send_lease_event_queued(self):
+        notification.QUEUE = notification.NotificationQueue(10)
+        self.addCleanup(notification.QUEUE.stop)
+
+        self.notifier.send_lease_notification(self.context, self.payload,
+                                              'start')
+
+        self.info_method.assert_not_called()
+        eventlet.sleep(0)
+        self.info_method.assert_called_once_with(self.context,
+                                                 'start',
+                                                 self.payload)
+
+    def test_flush(self):
+        notification.QUEUE = mock.Mock()
+
+        self.notifier.flush()
+
+        notification.QUEUE.stop.assert_called_once_with()
+
+    def test_flush_without_queue(self):
+        self.notifier.flush()
+
+    def test_cleanup_stops_queue(self):
+        notification.QUEUE = mock.Mock()
+        queue = notification.QUEUE
+
+        notification.cleanup()
+
+        queue.stop.assert_called_once_with()
+        self.assertIsNone(notification.QUEUE)
+
+
+class NotificationQueueTestCase(tests.TestCase):
+    def setUp(self):
+        super(NotificationQueueTestCase, self).setUp()
+
+        self.publish = mock.Mock()
+        self.spawn = self.patch(eventlet, 'spawn')
+
+    def _published(self):
+        return [call.args[0] for call in self.publish.call_args_list]
+
+    def _run(self, q):
+        # Run the publisher thread until the notifications are published.
+        q._queue.resize(q._queue.maxsize + 1)
+        q._queue.put(notification._STOP)
+        q._run()
+
+    def test_publish(self):
+        q = notification.NotificationQueue(10)
+        q.put(self.publish, 1)
+        q.put(self.publish, 2)
+
+        self.spawn.assert_called_once_with(q._run)
+        self.assertEqual([], self._published())
+
+        self._run(q)
+
+        self.assertEqual([1, 2], self._published())
+        self.assertEqual({'queued': 2, 'published': 2, 'dropped': 0,
+                          'failed': 0, 'depth': 0}, q.stats())
+
+    def test_publish_failure(self):
+        self.publish.side_effect = [Exception, None]
+        q = notification.NotificationQueue(10)
+        q.put(self.publish, 1)
+        q.put(self.publish, 2)
+
+        self._run(q)
+
+        self.assertEqual([1, 2], self._published())
+        self.assertEqual({'queued': 2, 'published': 1, 'dropped': 0,
+                          'failed': 1, 'depth': 0}, q.stats())
+
+    def test_drop_oldest(self):
+        q = notification.NotificationQueue(2, notification.DROP_OLDEST)
+        for i in range(4):
+            q.put(self.publish, i)
+
+        self.assertEqual({'queued': 4, 'published': 0, 'dropped': 2,
+                          'failed': 0, 'depth': 2}, q.stats())
+        self._run(q)
+        self.assertEqual([2, 3], self._published())
+
+    def test_drop_newest(self):
+        q = notification.NotificationQueue(2, notification.DROP_NEWEST)
+        for i in range(4):
+            q.put(self.publish, i)
+
+        self.assertEqual({'queued': 2, 'published': 0, 'dropped': 2,
+                          'failed': 0, 'depth': 2}, q.stats())
+        self._run(q)
+        self.assertEqual([0, 1], self._published())
+
+    def test_block(self):
+        q = notification.NotificationQueue(1, notification.BLOCK,
+                                           block_timeout=0.01)
+        q.put(self.publish, 0)
+        q.put(self.publish, 1)
+
+        self.assertEqual({'queued': 1, 'published': 0, 'dropped': 1,
+                          'failed': 0, 'depth': 1}, q.stats())
+
+    def test_stop_not_started(self):
+        notification.NotificationQueue(10).stop()
+
+        self.spawn.assert_not_called()
+
+
+class NotificationQueueStopTestCase(tests.TestCase):
+    def setUp(self):
+        super(NotificationQueueStopTestCase, self).setUp()
+
+        self.published = []
+        self.log = self.patch(notification, 'LOG')
+
+    def _publish(self, value, seconds=0):
+        eventlet.sleep(seconds)
+        self.published.append(value)
+
+    def test_stop_publishes_waiting(self):
+        q = notification.NotificationQueue(10)
+        q.put(self._publish, 1)
+        q.put(self._publish, 2)
+
+        q.stop()
+
+        self.assertEqual([1, 2], self.published)
+        self.assertEqual({'queued': 2, 'published': 2, 'dropped': 0,
+                          'failed': 0, 'depth': 0}, q.stats())
+        self.log.warning.assert_not_called()
+
+    def test_stop_waits_for_publication(self):
+        q = notification.NotificationQueue(10)
+        q.put(self._publish, 1, 0.01)
+        # The publisher thread starts publishing the notification.
+        eventlet.sleep(0)
+
+        q.stop()
+
+        self.assertEqual([1], self.published)
+        self.assertEqual(1, q.counters['published'])
+
+    def test_stop_timeout(self):
+        q = notification.NotificationQueue(10)
+        q.put(self._publish, 1, 1)
+        q.put(self._publish, 2)
+
+        q.stop(timeout=0.01)
+
+        self.assertEqual([], self.published)
+        self.assertEqual(0, q.stats()['depth'])
+        self.log.warning.assert_called_once_with(
+            '%d notifications were not published before the notifier '
+            'stopped.', 1)
+
+    def test_restart(self):
+        q = notification.NotificationQueue(10)
+        q.put(self._publish, 1)
+        q.stop()
+
+        q.put(self._publish, 2)
+        q.stop()
+
+        self.assertEqual([1, 2], self.published)
@@ -467,3 +467,34 @@ class TestFlavorPlugin(tests.DBTestCase):
         self.assertEqual(3, len(ret))
         for host in ret:
             self.assertEqual(host["id"], '456')
+
+    def test__max_usages_queries(self):
+        start_date = datetime.datetime(2030, 1, 1)
+        end_date = datetime.datetime(2030, 1, 2)
+        flavor = {"disk": 10, "OS-FLV-EXT-DATA:ephemeral": 0, "ram": 1024,
+                  "vcpus": 2, "extra_specs": {}}
+        reservations = []
+        for i in range(4):
+            lease_id = 'lease-%d' % i
+            db_api.lease_create({
+                'id': lease_id, 'name': lease_id, 'user_id': 'user',
+                'project_id': 'project', 'start_date': start_date,
+                'end_date': end_date, 'trust_id': 'trust',
+                'status': 'ACTIVE', 'reservations': [],
+                'events': [
+                    {'event_type': 'start_lease', 'time': start_date,
+                     'status': 'DONE'},
+                    {'event_type': 'end_lease', 'time': end_date,
+                     'status': 'UNDONE'}]})
+            reservations.append({
+                'lease_id': lease_id,
+                'instance_reservation': {
+                    'amount': 1, 'resource_properties': json.dumps(flavor)}})
+        plugin = flavor_plugin.FlavorPlugin()
+
+        # NOTE: The events of each reservation are looked up separately.
+        with self.assertMaxQueries(2 * len(reservations)):
+            max_usage = plugin._max_usages(reservations)
+
+        self.assertEqual({'VCPU': 8, 'MEMORY_MB': 4096, 'DISK_GB': 40},
+                         dict(max_usage))
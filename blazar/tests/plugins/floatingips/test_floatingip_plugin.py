@@ -26,6 +26,7 @@ from blazar.plugins.floatingips import floatingip_plugin
 from blazar import tests
 from blazar.utils.openstack import exceptions as opst_exceptions
 from blazar.utils.openstack import neutron
+from blazar.utils import request_cache
 
 
 CONF = cfg.CONF
@@ -203,8 +204,8 @@ class FloatingIpPluginTest(tests.TestCase):
         matching_fips.return_value = ['fip1', 'fip2']
         fip_reservation_create = self.patch(self.db_api,
                                             'fip_reservation_create')
-        fip_allocation_create = self.patch(
-            self.db_api, 'fip_allocation_create')
+        fip_allocation_create_all = self.patch(
+            self.db_api, 'fip_allocation_create_all')
         fip_plugin.reserve_resource(
             '441c1476-9f8f-4700-9f30-cd9b6fef3509',
             values)
@@ -214,17 +215,8 @@ class FloatingIpPluginTest(tests.TestCase):
             'amount': 2
         }
         fip_reservation_create.assert_called_once_with(fip_values)
-        calls = [
-            mock.call(
-                {'floatingip_id': 'fip1',
-                 'reservation_id': '441c1476-9f8f-4700-9f30-cd9b6fef3509',
-                 }),
-            mock.call(
-                {'floatingip_id': 'fip2',
-                 'reservation_id': '441c1476-9f8f-4700-9f30-cd9b6fef3509',
-                 }),
-        ]
-        fip_allocation_create.assert_has_calls(calls)
+        fip_allocation_create_all.assert_called_once_with(
+            '441c1476-9f8f-4700-9f30-cd9b6fef3509', ['fip1', 'fip2'], None)
 
     def test_create_reservation_fips_with_required(self):
         fip_plugin = floatingip_plugin.FloatingIpPlugin()
@@ -242,8 +234,8 @@ class FloatingIpPluginTest(tests.TestCase):
         fip_reservation_create = self.patch(self.db_api,
                                             'fip_reservation_create')
         fip_reservation_create.return_value = {'id': 'fip_resv_id1'}
-        fip_allocation_create = self.patch(
-            self.db_api, 'fip_allocation_create')
+        fip_allocation_create_all = self.patch(
+            self.db_api, 'fip_allocation_create_all')
         required_addr_create = self.patch(self.db_api, 'required_fip_create')
         fip_plugin.reserve_resource(
             '441c1476-9f8f-4700-9f30-cd9b6fef3509',
@@ -259,17 +251,36 @@ class FloatingIpPluginTest(tests.TestCase):
                 'address': '172.24.4.100',
                 'floatingip_reservation_id': 'fip_resv_id1'
             })
-        calls = [
-            mock.call(
-                {'floatingip_id': 'fip1',
-                 'reservation_id': '441c1476-9f8f-4700-9f30-cd9b6fef3509',
-                 }),
-            mock.call(
-                {'floatingip_id': 'fip2',
-                 'reservation_id': '441c1476-9f8f-4700-9f30-cd9b6fef3509',
-                 }),
-        ]
-        fip_allocation_create.assert_has_calls(calls)
+        fip_allocation_create_all.assert_called_once_with(
+            '441c1476-9f8f-4700-9f30-cd9b6fef3509', ['fip1', 'fip2'], None)
+
+    def test_create_reservation_reuses_candidates(self):
+        fip_plugin = floatingip_plugin.FloatingIpPlugin()
+        values = {
+            'lease_id': '018c1b43-e69e-4aef-a543-09681539cf4c',
+            'network_id': 'f548089e-fb3e-4013-a043-c5ed809c7a67',
+            'start_date': datetime.datetime(2013, 12, 19, 20, 0),
+            'end_date': datetime.datetime(2013, 12, 19, 21, 0),
+            'resource_type': plugin.RESOURCE_TYPE,
+            'amount': 2
+        }
+        matching_fips = self.patch(fip_plugin, '_matching_fips')
+        matching_fips.return_value = ['fip1', 'fip2']
+        self.patch(self.db_api, 'fip_reservation_create')
+        fip_allocation_create_all = self.patch(
+            self.db_api, 'fip_allocation_create_all')
+        fip_allocation_create_all.return_value = True
+
+        with request_cache.scope():
+            fip_plugin.cached_allocation_candidates(values.copy())
+            fip_plugin.reserve_resource(
+                '441c1476-9f8f-4700-9f30-cd9b6fef3509', values)
+
+        matching_fips.assert_called_once()
+        fip_allocation_create_all.assert_called_once_with(
+            '441c1476-9f8f-4700-9f30-cd9b6fef3509', ['fip1', 'fip2'],
+            (datetime.datetime(2013, 12, 19, 20, 0),
+             datetime.datetime(2013, 12, 19, 21, 0)))
 
     def test_create_reservation_with_missing_param_network(self):
         values = {
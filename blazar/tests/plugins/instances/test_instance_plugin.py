@@ -919,7 +919,8 @@ class TestVirtualInstancePlugin(tests.TestCase):
             'id': 'reservation-id1',
             'status': 'pending',
             'vcpus': 2, 'memory_mb': 1024,
-            'disk_gb': 10, 'server_group_id': 'group-1'}
+            'disk_gb': 10, 'server_group_id': 'group-1',
+            'aggregate_id': 1}
         mock_reservation_get = self.patch(db_api, 'reservation_get')
         mock_reservation_get.return_value = reservation
         fake_client = mock.MagicMock()
@@ -1184,7 +1185,8 @@ class TestVirtualInstancePlugin(tests.TestCase):
 
         plugin = instance_plugin.VirtualInstancePlugin()
 
-        fake_instance_reservation = {'reservation_id': 'reservation-id1'}
+        fake_instance_reservation = {'reservation_id': 'reservation-id1',
+                                     'aggregate_id': 1}
         mock_inst_get = self.patch(db_api, 'instance_reservation_get')
         mock_inst_get.return_value = fake_instance_reservation
 
@@ -1416,7 +1418,7 @@ class TestVirtualInstancePlugin(tests.TestCase):
         lease_get.return_value = dummy_lease
         pickup_hosts = self.patch(plugin, 'pickup_hosts')
         pickup_hosts.return_value = {'added': [new_host['id']], 'removed': []}
-        alloc_update = self.patch(db_api, 'host_allocation_update')
+        alloc_update = self.patch(db_api, 'host_allocation_update_all')
 
         with mock.patch.object(timeutils, 'utcnow') as patched:
             patched.return_value = datetime.datetime(2020, 1, 1, 11, 00)
@@ -1425,7 +1427,8 @@ class TestVirtualInstancePlugin(tests.TestCase):
 
         pickup_hosts.assert_called_once()
         alloc_update.assert_called_once_with(
-            'alloc-1', {'compute_host_id': new_host['id']})
+            {'alloc-1': {'compute_host_id': new_host['id']}},
+            destroyed_ids=[])
         self.assertEqual(True, result)
 
     def test_reallocate_active(self):
@@ -1469,7 +1472,7 @@ class TestVirtualInstancePlugin(tests.TestCase):
         mock_pool.return_value = fake_pool
         pickup_hosts = self.patch(plugin, 'pickup_hosts')
         pickup_hosts.return_value = {'added': [new_host['id']], 'removed': []}
-        alloc_update = self.patch(db_api, 'host_allocation_update')
+        alloc_update = self.patch(db_api, 'host_allocation_update_all')
         mock_delete_reservation_inventory = self.patch(
             plugin.placement_client, 'delete_reservation_inventory')
         mock_update_reservation_inventory = self.patch(
@@ -1485,7 +1488,8 @@ class TestVirtualInstancePlugin(tests.TestCase):
             failed_host['service_name'])
         pickup_hosts.assert_called_once()
         alloc_update.assert_called_once_with(
-            'alloc-1', {'compute_host_id': new_host['id']})
+            {'alloc-1': {'compute_host_id': new_host['id']}},
+            destroyed_ids=[])
         fake_pool.add_computehost.assert_called_once_with(
             dummy_reservation['aggregate_id'],
             new_host['service_name'],
@@ -1528,7 +1532,7 @@ class TestVirtualInstancePlugin(tests.TestCase):
         lease_get.return_value = dummy_lease
         pickup_hosts = self.patch(plugin, 'pickup_hosts')
         pickup_hosts.side_effect = mgr_exceptions.NotEnoughHostsAvailable
-        alloc_destroy = self.patch(db_api, 'host_allocation_destroy')
+        alloc_update = self.patch(db_api, 'host_allocation_update_all')
 
         with mock.patch.object(timeutils, 'utcnow') as patched:
             patched.return_value = datetime.datetime(2020, 1, 1, 11, 00)
@@ -1536,7 +1540,7 @@ class TestVirtualInstancePlugin(tests.TestCase):
                 dummy_reservation, list(failed_host.values()))
 
         pickup_hosts.assert_called_once()
-        alloc_destroy.assert_called_once_with('alloc-1')
+        alloc_update.assert_called_once_with({}, destroyed_ids=['alloc-1'])
         self.assertEqual(False, result)
 
     def test_reallocate_before_start_affinity(self):
@@ -1572,7 +1576,7 @@ class TestVirtualInstancePlugin(tests.TestCase):
         lease_get.return_value = dummy_lease
         pickup_hosts = self.patch(plugin, 'pickup_hosts')
         pickup_hosts.return_value = {'added': [new_host['id']], 'removed': []}
-        alloc_update = self.patch(db_api, 'host_allocation_update')
+        alloc_update = self.patch(db_api, 'host_allocation_update_all')
 
         with mock.patch.object(timeutils, 'utcnow') as patched:
             patched.return_value = datetime.datetime(2020, 1, 1, 11, 00)
@@ -1580,9 +1584,10 @@ class TestVirtualInstancePlugin(tests.TestCase):
                 dummy_reservation, list(failed_host.values()))
 
         pickup_hosts.assert_called_once()
-        update_calls = [mock.call('alloc-1', {'compute_host_id': '2'}),
-                        mock.call('alloc-2', {'compute_host_id': '2'})]
-        alloc_update.assert_has_calls(update_calls)
+        alloc_update.assert_called_once_with(
+            {'alloc-1': {'compute_host_id': '2'},
+             'alloc-2': {'compute_host_id': '2'}},
+            destroyed_ids=[])
         self.assertEqual(True, result)
 
     def test_reallocate_active_affinity(self):
@@ -1629,7 +1634,7 @@ class TestVirtualInstancePlugin(tests.TestCase):
         mock_pool.return_value = fake_pool
         pickup_hosts = self.patch(plugin, 'pickup_hosts')
         pickup_hosts.return_value = {'added': [new_host['id']], 'removed': []}
-        alloc_update = self.patch(db_api, 'host_allocation_update')
+        alloc_update = self.patch(db_api, 'host_allocation_update_all')
         mock_delete_reservation_inventory = self.patch(
             plugin.placement_client, 'delete_reservation_inventory')
         mock_update_reservation_inventory = self.patch(
@@ -1644,9 +1649,10 @@ class TestVirtualInstancePlugin(tests.TestCase):
             dummy_reservation['aggregate_id'],
             failed_host['service_name'])
         pickup_hosts.assert_called_once()
-        update_calls = [mock.call('alloc-1', {'compute_host_id': '2'}),
-                        mock.call('alloc-2', {'compute_host_id': '2'})]
-        alloc_update.assert_has_calls(update_calls)
+        alloc_update.assert_called_once_with(
+            {'alloc-1': {'compute_host_id': '2'},
+             'alloc-2': {'compute_host_id': '2'}},
+            destroyed_ids=[])
         fake_pool.add_computehost.assert_called_once_with(
             dummy_reservation['aggregate_id'],
             new_host['service_name'],
@@ -1692,7 +1698,7 @@ class TestVirtualInstancePlugin(tests.TestCase):
         lease_get.return_value = dummy_lease
         pickup_hosts = self.patch(plugin, 'pickup_hosts')
         pickup_hosts.side_effect = mgr_exceptions.NotEnoughHostsAvailable
-        alloc_destroy = self.patch(db_api, 'host_allocation_destroy')
+        alloc_update = self.patch(db_api, 'host_allocation_update_all')
 
         with mock.patch.object(timeutils, 'utcnow') as patched:
             patched.return_value = datetime.datetime(2020, 1, 1, 11, 00)
@@ -1700,10 +1706,59 @@ class TestVirtualInstancePlugin(tests.TestCase):
                 dummy_reservation, list(failed_host.values()))
 
         pickup_hosts.assert_called_once()
-        destroy_calls = [mock.call('alloc-1'), mock.call('alloc-2')]
-        alloc_destroy.assert_has_calls(destroy_calls)
+        alloc_update.assert_called_once_with(
+            {}, destroyed_ids=['alloc-1', 'alloc-2'])
         self.assertEqual(False, result)
 
+    def test_reallocate_multiple_allocations(self):
+        plugin = instance_plugin.VirtualInstancePlugin()
+        failed_hosts = [{'id': '1'}, {'id': '2'}]
+        dummy_reservation = {
+            'id': 'rsrv-1',
+            'resource_type': instances.RESOURCE_TYPE,
+            'lease_id': 'lease-1',
+            'status': 'pending',
+            'vcpus': 2,
+            'memory_mb': 1024,
+            'disk_gb': 256,
+            'aggregate_id': 'agg-1',
+            'affinity': False,
+            'amount': 3,
+            'resource_properties': '',
+            'computehost_allocations': [
+                {'id': 'alloc-1', 'compute_host_id': '1',
+                 'reservation_id': 'rsrv-1'},
+                {'id': 'alloc-2', 'compute_host_id': '2',
+                 'reservation_id': 'rsrv-1'},
+                {'id': 'alloc-3', 'compute_host_id': '3',
+                 'reservation_id': 'rsrv-1'},
+            ]
+        }
+        dummy_lease = {
+            'name': 'lease-name',
+            'start_date': datetime.datetime(2020, 1, 1, 12, 00),
+            'end_date': datetime.datetime(2020, 1, 2, 12, 00),
+            'trust_id': 'trust-1'
+        }
+        lease_get = self.patch(db_api, 'lease_get')
+        lease_get.return_value = dummy_lease
+        pickup_hosts = self.patch(plugin, 'pickup_hosts')
+        pickup_hosts.return_value = {'added': ['4', '5'],
+                                     'removed': ['1', '2']}
+        alloc_update = self.patch(db_api, 'host_allocation_update_all')
+
+        with mock.patch.object(timeutils, 'utcnow') as patched:
+            patched.return_value = datetime.datetime(2020, 1, 1, 11, 00)
+            result = plugin._heal_reservation(
+                dummy_reservation, [h['id'] for h in failed_hosts])
+
+        pickup_hosts.assert_called_once()
+        alloc_update.assert_called_once_with(
+            {'alloc-1': {'compute_host_id': '4'},
+             'alloc-2': {'compute_host_id': '5'}},
+            destroyed_ids=[])
+        self.assertEqual(True, result)
+
     @ddt.data(False, True, None)
     def test_cleanup_resources(self, affinity):
         instance_reservation = {
@@ -1733,3 +1788,78 @@ class TestVirtualInstancePlugin(tests.TestCase):
                 'group-1')
         mock_nova.nova.flavors.delete.assert_called_once_with(
             'reservation-id1')
+
+
+class VirtualInstancePluginQueriesTestCase(tests.DBTestCase):
+    """Number of database queries of the host lookups.
+
+    The bounds fail the tests when a lookup runs more queries, e.g. more
+    queries per host.
+    """
+
+    def setUp(self):
+        super(VirtualInstancePluginQueriesTestCase, self).setUp()
+
+        self.plugin = instance_plugin.VirtualInstancePlugin()
+        self.start_date = datetime.datetime(2030, 1, 1)
+        self.end_date = datetime.datetime(2030, 1, 2)
+
+    def _create_reserved_hosts(self, count):
+        hosts = []
+        for i in range(count):
+            host = db_api.host_create({
+                'id': str(i), 'hypervisor_hostname': 'host%d' % i,
+                'service_name': 'host%d' % i, 'vcpus': 8, 'cpu_info': 'foo',
+                'hypervisor_type': 'QEMU', 'hypervisor_version': 1,
+                'memory_mb': 8192, 'local_gb': 100, 'reservable': True,
+                'availability_zone': 'az1', 'trust_id': 'trust'})
+            lease_id = 'lease-%d' % i
+            reservation_id = 'reservation-%d' % i
+            db_api.lease_create({
+                'id': lease_id, 'name': lease_id, 'user_id': 'user',
+                'project_id': 'project', 'start_date': self.start_date,
+                'end_date': self.end_date, 'trust_id': 'trust',
+                'status': 'ACTIVE',
+                'reservations': [{
+                    'id': reservation_id, 'resource_id': 'resource',
+                    'status': 'active',
+                    'resource_type': instances.RESOURCE_TYPE}],
+                'events': [
+                    {'event_type': 'start_lease', 'time': self.start_date,
+                     'status': 'DONE'},
+                    {'event_type': 'end_lease', 'time': self.end_date,
+                     'status': 'UNDONE'}]})
+            db_api.instance_reservation_create({
+                'reservation_id': reservation_id, 'vcpus': 1,
+                'memory_mb': 1024, 'disk_gb': 10, 'amount': 1,
+                'affinity': None})
+            db_api.host_allocation_create({
+                'compute_host_id': host['id'],
+                'reservation_id': reservation_id})
+            hosts.append(host)
+        return hosts
+
+    def test_filter_hosts_by_reservation_queries(self):
+        hosts = self._create_reserved_hosts(4)
+
+        # NOTE: The reservations of each host are looked up separately.
+        with self.assertMaxQueries(2 * len(hosts)):
+            free, non_free = self.plugin.filter_hosts_by_reservation(
+                hosts, self.start_date, self.end_date, [])
+
+        self.assertEqual([], free)
+        self.assertEqual(['0', '1', '2', '3'],
+                         [h['host']['id'] for h in non_free])
+
+    def test_max_usages_queries(self):
+        hosts = self._create_reserved_hosts(4)
+        reservations = [
+            reservation for host in hosts
+            for reservation in db_utils.get_reservations_by_host_id(
+                host['id'], self.start_date, self.end_date)]
+
+        # NOTE: The events of each reservation are looked up separately.
+        with self.assertMaxQueries(2 * len(reservations)):
+            max_usages = self.plugin.max_usages(hosts[0], reservations)
+
+        self.assertEqual((4, 4096, 40), max_usages)
@@ -38,6 +38,7 @@ from blazar import tests
 from blazar.utils.openstack import base
 from blazar.utils.openstack import nova
 from blazar.utils.openstack import placement
+from blazar.utils import request_cache
 from blazar.utils import trusts
 
 CONF = cfg.CONF
@@ -197,7 +198,7 @@ class PhysicalHostPluginTestCase(tests.TestCase):
 
     def test_get_host(self):
         host = self.fake_phys_plugin.get_computehost(self.fake_host_id)
-        self.db_host_get.assert_called_once_with('1')
+        self.db_host_get.assert_called_once_with('1', fields=None)
         expected = self.fake_host.copy()
         expected.update({'foo': 'bar', 'buzz': 'word'})
         self.assertEqual(expected, host)
@@ -205,9 +206,28 @@ class PhysicalHostPluginTestCase(tests.TestCase):
     def test_get_host_without_extracapabilities(self):
         self.get_extra_capabilities.return_value = {}
         host = self.fake_phys_plugin.get_computehost(self.fake_host_id)
-        self.db_host_get.assert_called_once_with('1')
+        self.db_host_get.assert_called_once_with('1', fields=None)
         self.assertEqual(self.fake_host, host)
 
+    def test_get_host_fields(self):
+        self.db_host_get.return_value = {'id': '1', 'vcpus': 1}
+        host = self.fake_phys_plugin.get_computehost(
+            self.fake_host_id, fields=['id', 'vcpus'])
+        self.db_host_get.assert_called_once_with('1', fields=['id', 'vcpus'])
+        self.get_extra_capabilities.assert_not_called()
+        self.assertEqual({'id': '1', 'vcpus': 1}, host)
+
+    def test_get_host_fields_with_extra_capability(self):
+        self.db_host_get.return_value = {'id': '1'}
+        host = self.fake_phys_plugin.get_computehost(
+            self.fake_host_id, fields=['id', 'foo'])
+        self.assertEqual({'id': '1', 'foo': 'bar'}, host)
+
+    def test_get_unknown_host(self):
+        self.db_host_get.return_value = None
+        self.assertIsNone(self.fake_phys_plugin.get_computehost('1'))
+        self.get_extra_capabilities.assert_not_called()
+
     @testtools.skip('incorrect decorator')
     def test_list_hosts(self):
         self.fake_phys_plugin.list_computehosts({})
@@ -400,6 +420,14 @@ class PhysicalHostPluginTestCase(tests.TestCase):
         self.db_host_extra_capability_update.assert_called_once_with(
             'extra_id1', {'capability_value': 'baz'})
 
+    def test_update_host_not_found(self):
+        self.db_host_get.return_value = None
+
+        self.assertRaises(manager_exceptions.HostNotFound,
+                          self.fake_phys_plugin.update_computehost,
+                          self.fake_host_id, {'foo': 'baz'})
+        self.db_host_extra_capability_update.assert_not_called()
+
     def test_update_host_having_issue_when_storing_extra_capability(self):
         def fake_db_host_extra_capability_update(*args, **kwargs):
             raise RuntimeError
@@ -739,6 +767,30 @@ class PhysicalHostPluginTestCase(tests.TestCase):
 
         self.assertListEqual(expected, ret)
 
+    def test_list_allocations_for_reservation(self):
+        allocation_get_all = self.patch(
+            self.db_api, 'host_allocation_get_all_by_values')
+        allocation_get_all.return_value = [
+            {'id': 'a1', 'compute_host_id': '3003', 'reservation_id': '1002'},
+            {'id': 'a2', 'compute_host_id': '3004', 'reservation_id': '1002'},
+            {'id': 'a3', 'compute_host_id': '3003', 'reservation_id': '1002'},
+        ]
+
+        ret = self.fake_phys_plugin.list_allocations_for_reservation('1002')
+
+        self.assertEqual(['3003', '3004'], ret)
+        allocation_get_all.assert_called_once_with(reservation_id='1002')
+        self.db_host_list.assert_not_called()
+
+    def test_get_many(self):
+        host_get_all = self.patch(self.db_api, 'host_get_all_by_ids')
+        host_get_all.return_value = [{'id': '3001', 'vgpu': '2'}]
+
+        ret = self.fake_phys_plugin.get_many(['3001', '3002'])
+
+        self.assertEqual([{'id': '3001', 'vgpu': '2'}], ret)
+        host_get_all.assert_called_once_with(['3001', '3002'])
+
     def test_get_allocations(self):
         self.db_get_reserv_allocs = self.patch(
             self.db_utils, 'get_reservation_allocations_by_host_ids')
@@ -908,6 +960,13 @@ class PhysicalHostPluginTestCase(tests.TestCase):
 
         self.assertDictEqual(expected, ret)
 
+    def test_get_allocations_with_unknown_host(self):
+        self.db_host_get.return_value = None
+
+        self.assertRaises(manager_exceptions.HostNotFound,
+                          self.fake_phys_plugin.get_allocations,
+                          'unknown-host', {})
+
     def test_create_reservation_no_hosts_available(self):
         now = timeutils.utcnow()
         values = {
@@ -947,15 +1006,16 @@ class PhysicalHostPluginTestCase(tests.TestCase):
                                              'host_reservation_create')
         matching_hosts = self.patch(self.fake_phys_plugin, '_matching_hosts')
         matching_hosts.return_value = ['host1', 'host2']
-        host_allocation_create = self.patch(
+        host_allocation_create_all = self.patch(
             self.db_api,
-            'host_allocation_create')
+            'host_allocation_create_all')
+        host_reservation_update = self.patch(self.db_api,
+                                             'host_reservation_update')
         self.fake_phys_plugin.reserve_resource(
             '441c1476-9f8f-4700-9f30-cd9b6fef3509',
             values)
         host_values = {
             'reservation_id': '441c1476-9f8f-4700-9f30-cd9b6fef3509',
-            'aggregate_id': 1,
             'resource_properties': '',
             'hypervisor_properties': '["=", "$memory_mb", "256"]',
             'count_range': '1-1',
@@ -963,17 +1023,102 @@ class PhysicalHostPluginTestCase(tests.TestCase):
             'before_end': 'default'
         }
         host_reservation_create.assert_called_once_with(host_values)
-        calls = [
-            mock.call(
-                {'compute_host_id': 'host1',
-                 'reservation_id': '441c1476-9f8f-4700-9f30-cd9b6fef3509',
-                 }),
-            mock.call(
-                {'compute_host_id': 'host2',
-                 'reservation_id': '441c1476-9f8f-4700-9f30-cd9b6fef3509',
-                 }),
-        ]
-        host_allocation_create.assert_has_calls(calls)
+        host_allocation_create_all.assert_called_once_with(
+            '441c1476-9f8f-4700-9f30-cd9b6fef3509', ['host1', 'host2'], None)
+        host_reservation_update.assert_called_once_with(
+            host_reservation_create.return_value['id'], {'aggregate_id': 1})
+
+    def test_create_reservation_defers_pool_creation(self):
+        self.cfg.CONF.set_override('provisioning_time', 60)
+        self.addCleanup(self.cfg.CONF.clear_override, 'provisioning_time')
+        values = {
+            'lease_id': '018c1b43-e69e-4aef-a543-09681539cf4c',
+            'min': 1,
+            'max': 1,
+            'hypervisor_properties': '["=", "$memory_mb", "256"]',
+            'resource_properties': '',
+            'start_date': datetime.datetime(2046, 12, 19, 20, 00),
+            'end_date': datetime.datetime(2046, 12, 19, 21, 00),
+            'resource_type': plugin.RESOURCE_TYPE,
+        }
+        self.patch(self.db_api, 'host_reservation_create')
+        matching_hosts = self.patch(self.fake_phys_plugin, '_matching_hosts')
+        matching_hosts.return_value = ['host1', 'host2']
+        self.patch(self.db_api, 'host_allocation_create_all')
+        host_reservation_update = self.patch(self.db_api,
+                                             'host_reservation_update')
+
+        self.fake_phys_plugin.reserve_resource(
+            '441c1476-9f8f-4700-9f30-cd9b6fef3509',
+            values)
+
+        self.rp_create.assert_not_called()
+        host_reservation_update.assert_not_called()
+
+    def test_create_reservation_reuses_candidates(self):
+        values = {
+            'lease_id': '018c1b43-e69e-4aef-a543-09681539cf4c',
+            'min': 1,
+            'max': 2,
+            'hypervisor_properties': '',
+            'resource_properties': '',
+            'start_date': datetime.datetime(2013, 12, 19, 20, 00),
+            'end_date': datetime.datetime(2013, 12, 19, 21, 00),
+            'resource_type': plugin.RESOURCE_TYPE,
+        }
+        self.cfg.CONF.set_override('cleaning_time', 5)
+        self.addCleanup(CONF.clear_override, 'cleaning_time')
+        self.rp_create.return_value = mock.MagicMock(id=1)
+        host_reservation_create = self.patch(self.db_api,
+                                             'host_reservation_create')
+        matching_hosts = self.patch(self.fake_phys_plugin, '_matching_hosts')
+        matching_hosts.return_value = ['host1', 'host2']
+        host_allocation_create_all = self.patch(
+            self.db_api, 'host_allocation_create_all')
+        self.patch(self.db_api, 'host_reservation_update')
+        host_allocation_create_all.return_value = True
+
+        with request_cache.scope():
+            self.fake_phys_plugin.cached_allocation_candidates(values.copy())
+            self.fake_phys_plugin.reserve_resource(
+                '441c1476-9f8f-4700-9f30-cd9b6fef3509', values)
+
+        matching_hosts.assert_called_once()
+        self.assertEqual(
+            'default', host_reservation_create.call_args[0][0]['before_end'])
+        host_allocation_create_all.assert_called_once_with(
+            '441c1476-9f8f-4700-9f30-cd9b6fef3509', ['host1', 'host2'],
+            (datetime.datetime(2013, 12, 19, 19, 55),
+             datetime.datetime(2013, 12, 19, 21, 5)))
+
+    def test_create_reservation_candidates_taken(self):
+        values = {
+            'lease_id': '018c1b43-e69e-4aef-a543-09681539cf4c',
+            'min': 1,
+            'max': 2,
+            'hypervisor_properties': '',
+            'resource_properties': '',
+            'start_date': datetime.datetime(2013, 12, 19, 20, 00),
+            'end_date': datetime.datetime(2013, 12, 19, 21, 00),
+            'resource_type': plugin.RESOURCE_TYPE,
+        }
+        self.rp_create.return_value = mock.MagicMock(id=1)
+        self.patch(self.db_api, 'host_reservation_create')
+        matching_hosts = self.patch(self.fake_phys_plugin, '_matching_hosts')
+        matching_hosts.side_effect = [['host1', 'host2'], ['host3']]
+        host_allocation_create_all = self.patch(
+            self.db_api, 'host_allocation_create_all')
+        self.patch(self.db_api, 'host_reservation_update')
+        host_allocation_create_all.side_effect = [False, True]
+
+        with request_cache.scope():
+            self.fake_phys_plugin.cached_allocation_candidates(values.copy())
+            self.fake_phys_plugin.reserve_resource(
+                '441c1476-9f8f-4700-9f30-cd9b6fef3509', values)
+
+        self.assertEqual(2, matching_hosts.call_count)
+        host_allocation_create_all.assert_called_with(
+            '441c1476-9f8f-4700-9f30-cd9b6fef3509', ['host3'])
 
     @ddt.data("min", "max", "hypervisor_properties", "resource_properties")
     def test_create_reservation_with_missing_param(self, missing_param):
@@ -1947,6 +2092,34 @@ class PhysicalHostPluginTestCase(tests.TestCase):
 
         add_computehost.assert_called_with(1, ['host1_hostname'])
 
+    def test_prepare(self):
+        host_reservation_get = self.patch(self.db_api, 'host_reservation_get')
+        host_reservation_get.return_value = {
+            'id': '04de74e8-193a-49d2-9ab8-cba7b49e45e8',
+            'reservation_id': '593e7028-c0d1-4d76-8642-2ffd890b324c',
+            'aggregate_id': None,
+        }
+        create_pool = self.patch(self.fake_phys_plugin, '_create_pool')
+
+        self.fake_phys_plugin.prepare('04de74e8-193a-49d2-9ab8-cba7b49e45e8')
+
+        create_pool.assert_called_once_with(
+            '593e7028-c0d1-4d76-8642-2ffd890b324c',
+            '04de74e8-193a-49d2-9ab8-cba7b49e45e8')
+
+    def test_prepare_with_existing_pool(self):
+        host_reservation_get = self.patch(self.db_api, 'host_reservation_get')
+        host_reservation_get.return_value = {
+            'id': '04de74e8-193a-49d2-9ab8-cba7b49e45e8',
+            'reservation_id': '593e7028-c0d1-4d76-8642-2ffd890b324c',
+            'aggregate_id': 1,
+        }
+        create_pool = self.patch(self.fake_phys_plugin, '_create_pool')
+
+        self.fake_phys_plugin.prepare('04de74e8-193a-49d2-9ab8-cba7b49e45e8')
+
+        create_pool.assert_not_called()
+
     def test_before_end_with_no_action(self):
         host_reservation_get = self.patch(self.db_api, 'host_reservation_get')
         host_reservation_get.return_value = {'before_end': ''}
@@ -2075,15 +2248,15 @@ class PhysicalHostPluginTestCase(tests.TestCase):
         get_reservations = self.patch(self.db_utils,
                                       'get_reservations_by_host_ids')
         get_reservations.return_value = [dummy_reservation]
-        reallocate = self.patch(self.fake_phys_plugin, '_reallocate')
-        reallocate.return_value = True
+        reallocate = self.patch(self.fake_phys_plugin, '_reallocate_all')
+        reallocate.return_value = {'alloc-1': True}
 
         result = self.fake_phys_plugin.heal_reservations(
             [failed_host],
             datetime.datetime(2020, 1, 1, 12, 00),
             datetime.datetime(2020, 1, 1, 13, 00))
         reallocate.assert_called_once_with(
-            dummy_reservation['computehost_allocations'][0])
+            dummy_reservation['computehost_allocations'])
         self.assertEqual({}, result)
 
     def test_heal_reservations_before_start_and_missing_resources(self):
@@ -2104,15 +2277,15 @@ class PhysicalHostPluginTestCase(tests.TestCase):
         get_reservations = self.patch(self.db_utils,
                                       'get_reservations_by_host_ids')
         get_reservations.return_value = [dummy_reservation]
-        reallocate = self.patch(self.fake_phys_plugin, '_reallocate')
-        reallocate.return_value = False
+        reallocate = self.patch(self.fake_phys_plugin, '_reallocate_all')
+        reallocate.return_value = {'alloc-1': False}
 
         result = self.fake_phys_plugin.heal_reservations(
             [failed_host],
             datetime.datetime(2020, 1, 1, 12, 00),
             datetime.datetime(2020, 1, 1, 13, 00))
         reallocate.assert_called_once_with(
-            dummy_reservation['computehost_allocations'][0])
+            dummy_reservation['computehost_allocations'])
         self.assertEqual(
             {dummy_reservation['id']: {'missing_resources': True}},
             result)
@@ -2135,15 +2308,15 @@ class PhysicalHostPluginTestCase(tests.TestCase):
         get_reservations = self.patch(self.db_utils,
                                       'get_reservations_by_host_ids')
         get_reservations.return_value = [dummy_reservation]
-        reallocate = self.patch(self.fake_phys_plugin, '_reallocate')
-        reallocate.return_value = True
+        reallocate = self.patch(self.fake_phys_plugin, '_reallocate_all')
+        reallocate.return_value = {'alloc-1': True}
 
         result = self.fake_phys_plugin.heal_reservations(
             [failed_host],
             datetime.datetime(2020, 1, 1, 12, 00),
             datetime.datetime(2020, 1, 1, 13, 00))
         reallocate.assert_called_once_with(
-            dummy_reservation['computehost_allocations'][0])
+            dummy_reservation['computehost_allocations'])
         self.assertEqual(
             {dummy_reservation['id']: {'resources_changed': True}},
             result)
@@ -2166,15 +2339,15 @@ class PhysicalHostPluginTestCase(tests.TestCase):
         get_reservations = self.patch(self.db_utils,
                                       'get_reservations_by_host_ids')
         get_reservations.return_value = [dummy_reservation]
-        reallocate = self.patch(self.fake_phys_plugin, '_reallocate')
-        reallocate.return_value = False
+        reallocate = self.patch(self.fake_phys_plugin, '_reallocate_all')
+        reallocate.return_value = {'alloc-1': False}
 
         result = self.fake_phys_plugin.heal_reservations(
             [failed_host],
             datetime.datetime(2020, 1, 1, 12, 00),
             datetime.datetime(2020, 1, 1, 13, 00))
         reallocate.assert_called_once_with(
-            dummy_reservation['computehost_allocations'][0])
+            dummy_reservation['computehost_allocations'])
         self.assertEqual(
             {dummy_reservation['id']: {'missing_resources': True}},
             result)
@@ -2192,8 +2365,8 @@ class PhysicalHostPluginTestCase(tests.TestCase):
             'resource_type': plugin.RESOURCE_TYPE,
             'lease_id': 'lease-1',
             'status': 'pending',
-            'hypervisor_properties': [],
-            'resource_properties': [],
+            'hypervisor_properties': '',
+            'resource_properties': '',
             'resource_id': 'resource-1'
         }
         dummy_host_reservation = {
@@ -2211,24 +2384,25 @@ class PhysicalHostPluginTestCase(tests.TestCase):
         host_reservation_get.return_value = dummy_host_reservation
         lease_get = self.patch(self.db_api, 'lease_get')
         lease_get.return_value = dummy_lease
-        matching_hosts = self.patch(host_plugin.PhysicalHostPlugin,
-                                    '_matching_hosts')
-        matching_hosts.return_value = [new_host['id']]
-        alloc_update = self.patch(self.db_api, 'host_allocation_update')
+        candidate_hosts = self.patch(host_plugin.PhysicalHostPlugin,
+                                     '_candidate_hosts')
+        candidate_hosts.return_value = [new_host['id']]
+        alloc_update = self.patch(self.db_api, 'host_allocation_update_all')
 
         with mock.patch.object(timeutils, 'utcnow') as patched:
             patched.return_value = datetime.datetime(
                 2020, 1, 1, 11, 00)
-            result = self.fake_phys_plugin._reallocate(dummy_allocation)
+            result = self.fake_phys_plugin._reallocate_all(
+                [dummy_allocation])
 
-        matching_hosts.assert_called_once_with(
+        candidate_hosts.assert_called_once_with(
             dummy_reservation['hypervisor_properties'],
             dummy_reservation['resource_properties'],
-            '1-1', dummy_lease['start_date'], dummy_lease['end_date'])
+            dummy_lease['start_date'], dummy_lease['end_date'])
         alloc_update.assert_called_once_with(
-            dummy_allocation['id'],
-            {'compute_host_id': new_host['id']})
-        self.assertEqual(True, result)
+            {dummy_allocation['id']: {'compute_host_id': new_host['id']}},
+            destroyed_ids=[])
+        self.assertEqual({dummy_allocation['id']: True}, result)
 
     def test_reallocate_active(self):
         failed_host = {'id': '1',
@@ -2245,8 +2419,8 @@ class PhysicalHostPluginTestCase(tests.TestCase):
             'resource_type': plugin.RESOURCE_TYPE,
             'lease_id': 'lease-1',
             'status': 'active',
-            'hypervisor_properties': [],
-            'resource_properties': [],
+            'hypervisor_properties': '',
+            'resource_properties': '',
             'resource_id': 'resource-1'
         }
         dummy_host_reservation = {
@@ -2266,31 +2440,32 @@ class PhysicalHostPluginTestCase(tests.TestCase):
         host_reservation_get.return_value = dummy_host_reservation
         host_get = self.patch(self.db_api, 'host_get')
         host_get.side_effect = [failed_host, new_host]
-        matching_hosts = self.patch(host_plugin.PhysicalHostPlugin,
-                                    '_matching_hosts')
-        matching_hosts.return_value = [new_host['id']]
-        alloc_update = self.patch(self.db_api, 'host_allocation_update')
+        candidate_hosts = self.patch(host_plugin.PhysicalHostPlugin,
+                                     '_candidate_hosts')
+        candidate_hosts.return_value = [new_host['id']]
+        alloc_update = self.patch(self.db_api, 'host_allocation_update_all')
 
         with mock.patch.object(timeutils, 'utcnow') as patched:
             patched.return_value = datetime.datetime(
                 2020, 1, 1, 13, 00)
-            result = self.fake_phys_plugin._reallocate(dummy_allocation)
+            result = self.fake_phys_plugin._reallocate_all(
+                [dummy_allocation])
 
         self.remove_compute_host.assert_called_once_with(
             dummy_host_reservation['aggregate_id'],
             failed_host['service_name'])
-        matching_hosts.assert_called_once_with(
+        candidate_hosts.assert_called_once_with(
             dummy_reservation['hypervisor_properties'],
             dummy_reservation['resource_properties'],
-            '1-1', datetime.datetime(2020, 1, 1, 13, 00),
+            datetime.datetime(2020, 1, 1, 13, 00),
             dummy_lease['end_date'])
         alloc_update.assert_called_once_with(
-            dummy_allocation['id'],
-            {'compute_host_id': new_host['id']})
+            {dummy_allocation['id']: {'compute_host_id': new_host['id']}},
+            destroyed_ids=[])
         self.add_compute_host(
             dummy_host_reservation['aggregate_id'],
             new_host['service_name'])
-        self.assertEqual(True, result)
+        self.assertEqual({dummy_allocation['id']: True}, result)
 
     def test_reallocate_missing_resources(self):
         failed_host = {'id': '1'}
@@ -2304,8 +2479,8 @@ class PhysicalHostPluginTestCase(tests.TestCase):
             'resource_type': plugin.RESOURCE_TYPE,
             'lease_id': 'lease-1',
             'status': 'pending',
-            'hypervisor_properties': [],
-            'resource_properties': [],
+            'hypervisor_properties': '',
+            'resource_properties': '',
             'resource_id': 'resource-1'
         }
         dummy_host_reservation = {
@@ -2323,22 +2498,114 @@ class PhysicalHostPluginTestCase(tests.TestCase):
         host_reservation_get.return_value = dummy_host_reservation
         lease_get = self.patch(self.db_api, 'lease_get')
         lease_get.return_value = dummy_lease
-        matching_hosts = self.patch(host_plugin.PhysicalHostPlugin,
-                                    '_matching_hosts')
-        matching_hosts.return_value = []
-        alloc_destroy = self.patch(self.db_api, 'host_allocation_destroy')
+        candidate_hosts = self.patch(host_plugin.PhysicalHostPlugin,
+                                     '_candidate_hosts')
+        candidate_hosts.return_value = []
+        alloc_update = self.patch(self.db_api, 'host_allocation_update_all')
 
         with mock.patch.object(timeutils, 'utcnow') as patched:
             patched.return_value = datetime.datetime(
                 2020, 1, 1, 11, 00)
-            result = self.fake_phys_plugin._reallocate(dummy_allocation)
+            result = self.fake_phys_plugin._reallocate_all(
+                [dummy_allocation])
 
-        matching_hosts.assert_called_once_with(
+        candidate_hosts.assert_called_once_with(
             dummy_reservation['hypervisor_properties'],
             dummy_reservation['resource_properties'],
-            '1-1', dummy_lease['start_date'], dummy_lease['end_date'])
-        alloc_destroy.assert_called_once_with(dummy_allocation['id'])
-        self.assertEqual(False, result)
+            dummy_lease['start_date'], dummy_lease['end_date'])
+        alloc_update.assert_called_once_with(
+            {}, destroyed_ids=[dummy_allocation['id']])
+        self.assertEqual({dummy_allocation['id']: False}, result)
+
+    def test_reallocate_all_shares_candidate_lookup(self):
+        new_host = {'id': '3', 'service_name': 'compute-3'}
+        dummy_allocations = [
+            {'id': 'alloc-1', 'compute_host_id': '1',
+             'reservation_id': 'rsrv-1'},
+            {'id': 'alloc-2', 'compute_host_id': '2',
+             'reservation_id': 'rsrv-1'},
+        ]
+        dummy_reservation = {
+            'id': 'rsrv-1',
+            'resource_type': plugin.RESOURCE_TYPE,
+            'lease_id': 'lease-1',
+            'status': 'pending',
+            'hypervisor_properties': '',
+            'resource_properties': '',
+            'resource_id': 'resource-1'
+        }
+        dummy_lease = {
+            'name': 'lease-name',
+            'start_date': datetime.datetime(2020, 1, 1, 12, 00),
+            'end_date': datetime.datetime(2020, 1, 2, 12, 00),
+            'trust_id': 'trust-1'
+        }
+        reservation_get = self.patch(self.db_api, 'reservation_get')
+        reservation_get.return_value = dummy_reservation
+        host_reservation_get = self.patch(self.db_api, 'host_reservation_get')
+        host_reservation_get.return_value = {'aggregate_id': 1}
+        lease_get = self.patch(self.db_api, 'lease_get')
+        lease_get.return_value = dummy_lease
+        candidate_hosts = self.patch(host_plugin.PhysicalHostPlugin,
+                                     '_candidate_hosts')
+        candidate_hosts.return_value = [new_host['id']]
+        alloc_update = self.patch(self.db_api, 'host_allocation_update_all')
+
+        with mock.patch.object(timeutils, 'utcnow') as patched:
+            patched.return_value = datetime.datetime(
+                2020, 1, 1, 11, 00)
+            result = self.fake_phys_plugin._reallocate_all(dummy_allocations)
+
+        reservation_get.assert_called_once_with('rsrv-1')
+        lease_get.assert_called_once_with('lease-1')
+        candidate_hosts.assert_called_once()
+        # Both allocations belong to the same lease, so they can't share the
+        # only candidate host.
+        alloc_update.assert_called_once_with(
+            {'alloc-1': {'compute_host_id': new_host['id']}},
+            destroyed_ids=['alloc-2'])
+        self.assertEqual({'alloc-1': True, 'alloc-2': False}, result)
+
+    def test_match_hosts_augmenting_path(self):
+        start = datetime.datetime(2020, 1, 1, 12, 00)
+        end = datetime.datetime(2020, 1, 2, 12, 00)
+        requests = [
+            (start, end, ['host1', 'host2']),
+            (start, end, ['host1']),
+        ]
+
+        result = self.fake_phys_plugin._match_hosts(requests)
+
+        self.assertEqual(['host2', 'host1'], result)
+
+    def test_match_hosts_not_overlapping(self):
+        start = datetime.datetime(2020, 1, 1, 12, 00)
+        end = datetime.datetime(2020, 1, 2, 12, 00)
+        requests = [
+            (start, end, ['host1']),
+            (end + datetime.timedelta(days=1),
+             end + datetime.timedelta(days=2), ['host1']),
+            (start, end, ['host1']),
+        ]
+
+        result = self.fake_phys_plugin._match_hosts(requests)
+
+        self.assertEqual(['host1', 'host1', None], result)
+
+    def test_match_hosts_with_cleaning_time(self):
+        self.cfg.CONF.set_override('cleaning_time', '5')
+        self.addCleanup(CONF.clear_override, 'cleaning_time')
+        start = datetime.datetime(2020, 1, 1, 12, 00)
+        end = datetime.datetime(2020, 1, 2, 12, 00)
+        requests = [
+            (start, end, ['host1']),
+            (end + datetime.timedelta(minutes=1),
+             end + datetime.timedelta(days=1), ['host1']),
+        ]
+
+        result = self.fake_phys_plugin._match_hosts(requests)
+
+        self.assertEqual(['host1', None], result)
 
     def test_matching_hosts_not_allocated_hosts(self):
         def host_allocation_get_all_by_values(**kwargs):
@@ -2770,6 +3037,8 @@ class PhysicalHostMonitorPluginTestCase(tests.TestCase):
         handle_failures = self.patch(self.host_monitor_plugin,
                                      '_handle_failures')
         host_update = self.patch(db_api, 'host_update')
+        entry_destroy = self.patch(db_api,
+                                   'host_healing_entry_destroy_all_by_hosts')
 
         result = self.host_monitor_plugin.notification_callback(event_type,
                                                                 payload)
@@ -2778,6 +3047,67 @@ class PhysicalHostMonitorPluginTestCase(tests.TestCase):
              'hypervisor_hostname == ' + payload['nova_object.data']['host']])
         host_update.assert_called_once_with(recovered_host['id'],
                                             {'reservable': True})
+        entry_destroy.assert_called_once_with([recovered_host['id']])
+        handle_failures.assert_not_called()
+        self.assertEqual({}, result)
+
+    def _service_update(self, host, disabled=False, forced_down=False):
+        return ('service.update', {
+            'nova_object.namespace': 'nova',
+            'nova_object.name': 'ServiceStatusPayload',
+            'nova_object.version': '1.1',
+            'nova_object.data': {
+                'host': host,
+                'disabled': disabled,
+                'binary': 'nova-compute',
+                'forced_down': forced_down,
+            }
+        })
+
+    def test_notification_batch_callback_dedupes_failures(self):
+        failed_hosts = [{'id': '1', 'hypervisor_hostname': 'hypvsr1'},
+                        {'id': '2', 'hypervisor_hostname': 'hypvsr2'}]
+        reservable_get_all = self.patch(db_api,
+                                        'reservable_host_get_all_by_queries')
+        reservable_get_all.return_value = failed_hosts
+        host_get_all = self.patch(db_api, 'host_get_all_by_queries')
+        handle_failures = self.patch(self.host_monitor_plugin,
+                                     '_handle_failures')
+        handle_failures.return_value = {'rsrv-1': {'missing_resources': True}}
+
+        result = self.host_monitor_plugin.notification_batch_callback([
+            self._service_update('hypvsr1', disabled=True),
+            self._service_update('hypvsr2', forced_down=True),
+            self._service_update('hypvsr1', disabled=True),
+            self._service_update('hypvsr2', forced_down=True),
+        ])
+
+        reservable_get_all.assert_called_once_with(
+            ['hypervisor_hostname in hypvsr1,hypvsr2'])
+        host_get_all.assert_not_called()
+        handle_failures.assert_called_once_with(failed_hosts)
+        self.assertEqual({'rsrv-1': {'missing_resources': True}}, result)
+
+    def test_notification_batch_callback_latest_state_wins(self):
+        recovered_host = {'id': '1', 'hypervisor_hostname': 'hypvsr1'}
+        reservable_get_all = self.patch(db_api,
+                                        'reservable_host_get_all_by_queries')
+        host_get_all = self.patch(db_api, 'host_get_all_by_queries')
+        host_get_all.return_value = [recovered_host]
+        host_update = self.patch(db_api, 'host_update')
+        self.patch(db_api, 'host_healing_entry_destroy_all_by_hosts')
+        handle_failures = self.patch(self.host_monitor_plugin,
+                                     '_handle_failures')
+
+        result = self.host_monitor_plugin.notification_batch_callback([
+            self._service_update('hypvsr1', disabled=True),
+            self._service_update('hypvsr1'),
+        ])
+
+        host_get_all.assert_called_once_with(
+            ['reservable == 0', 'hypervisor_hostname in hypvsr1'])
+        host_update.assert_called_once_with('1', {'reservable': True})
+        reservable_get_all.assert_not_called()
         handle_failures.assert_not_called()
         self.assertEqual({}, result)
 
@@ -2875,13 +3205,32 @@ class PhysicalHostMonitorPluginTestCase(tests.TestCase):
              'hypervisor_hostname': 'hypvsr1'}
         ]
         host_update = self.patch(db_api, 'host_update')
+        entry_create = self.patch(db_api,
+                                  'host_healing_entry_create_all_by_hosts')
         heal = self.patch(self.host_monitor_plugin, 'heal')
+        start_date = datetime.datetime(2020, 1, 1, 12, 00)
 
-        self.host_monitor_plugin._handle_failures(failed_hosts)
+        with mock.patch.object(timeutils, 'utcnow') as patched:
+            patched.return_value = start_date
+            self.host_monitor_plugin._handle_failures(failed_hosts)
         host_update.assert_called_once_with(failed_hosts[0]['id'],
                                             {'reservable': False})
+        entry_create.assert_called_once_with(['1'], start_date)
         heal.assert_called_once()
 
+    def test_handle_recoveries(self):
+        recovered_hosts = [
+            {'id': '1',
+             'hypervisor_hostname': 'hypvsr1'}
+        ]
+        host_update = self.patch(db_api, 'host_update')
+        entry_destroy = self.patch(db_api,
+                                   'host_healing_entry_destroy_all_by_hosts')
+
+        self.host_monitor_plugin._handle_recoveries(recovered_hosts)
+        host_update.assert_called_once_with('1', {'reservable': True})
+        entry_destroy.assert_called_once_with(['1'])
+
     def test_heal(self):
         failed_hosts = [
             {'id': '1',
@@ -2890,7 +3239,17 @@ class PhysicalHostMonitorPluginTestCase(tests.TestCase):
         reservation_flags = {
             'rsrv-1': {'missing_resources': True}
         }
-        hosts_get = self.patch(db_api, 'unreservable_host_get_all_by_queries')
+        entries = [
+            {'id': 'entry-1', 'computehost_id': '1',
+             'reservation_id': 'rsrv-1'},
+        ]
+        self.host_monitor_plugin.healing_entries_initialized = True
+        self.patch(db_api, 'host_healing_entry_destroy_all_expired')
+        entries_get = self.patch(db_api,
+                                 'host_healing_entry_get_all_by_interval')
+        entries_get.return_value = entries
+        entries_destroy = self.patch(db_api, 'host_healing_entry_destroy_all')
+        hosts_get = self.patch(db_api, 'host_get_all_by_queries')
         hosts_get.return_value = failed_hosts
         get_healing_interval = self.patch(self.host_monitor_plugin,
                                           'get_healing_interval')
@@ -2904,8 +3263,128 @@ class PhysicalHostMonitorPluginTestCase(tests.TestCase):
             patched.return_value = start_date
             result = self.host_monitor_plugin.heal()
 
+        entries_get.assert_called_once_with(
+            start_date, start_date + datetime.timedelta(minutes=60))
+        hosts_get.assert_called_once_with(['id in 1'])
         healing_handler.assert_called_once_with(
             failed_hosts, start_date,
-            start_date + datetime.timedelta(minutes=60)
+            start_date + datetime.timedelta(minutes=60),
+            reservation_ids=['rsrv-1']
         )
+        entries_destroy.assert_called_once_with(['entry-1'])
         self.assertEqual(reservation_flags, result)
+
+    def test_heal_nothing_to_heal(self):
+        self.host_monitor_plugin.healing_entries_initialized = True
+        self.patch(db_api, 'host_healing_entry_destroy_all_expired')
+        entries_get = self.patch(db_api,
+                                 'host_healing_entry_get_all_by_interval')
+        entries_get.return_value = []
+        entries_destroy = self.patch(db_api, 'host_healing_entry_destroy_all')
+        healing_handler = mock.Mock()
+        self.host_monitor_plugin.healing_handlers = [healing_handler]
+
+        result = self.host_monitor_plugin.heal()
+
+        healing_handler.assert_not_called()
+        entries_destroy.assert_not_called()
+        self.assertEqual({}, result)
+
+    def test_heal_initializes_entries(self):
+        unreservable_hosts = [{'id': '1', 'hypervisor_hostname': 'hypvsr1'}]
+        self.host_monitor_plugin.healing_entries_initialized = False
+        hosts_get = self.patch(db_api, 'unreservable_host_get_all_by_queries')
+        hosts_get.return_value = unreservable_hosts
+        entry_create = self.patch(db_api,
+                                  'host_healing_entry_create_all_by_hosts')
+        self.patch(db_api, 'host_healing_entry_destroy_all_expired')
+        entries_get = self.patch(db_api,
+                                 'host_healing_entry_get_all_by_interval')
+        entries_get.return_value = []
+        start_date = datetime.datetime(2020, 1, 1, 12, 00)
+
+        with mock.patch.object(timeutils, 'utcnow') as patched:
+            patched.return_value = start_date
+            self.host_monitor_plugin.heal()
+            self.host_monitor_plugin.heal()
+
+        hosts_get.assert_called_once_with([])
+        entry_create.assert_called_once_with(['1'], start_date)
+        self.assertTrue(self.host_monitor_plugin.healing_entries_initialized)
+
+
+class PhysicalHostPluginQueriesTestCase(tests.DBTestCase):
+    """Number of database queries of the host lookups.
+
+    The bounds fail the tests when a lookup runs more queries, e.g. more
+    queries per host.
+    """
+
+    def setUp(self):
+        super(PhysicalHostPluginQueriesTestCase, self).setUp()
+
+        self.patch(nova_client, 'Client')
+        self.plugin = host_plugin.PhysicalHostPlugin()
+        self.start_date = datetime.datetime(2030, 1, 1)
+        self.end_date = datetime.datetime(2030, 1, 2)
+
+    def _create_hosts(self, count):
+        hosts = []
+        for i in range(count):
+            host = db_api.host_create({
+                'id': str(i), 'hypervisor_hostname': 'host%d' % i,
+                'service_name': 'host%d' % i, 'vcpus': 1, 'cpu_info': 'foo',
+                'hypervisor_type': 'QEMU', 'hypervisor_version': 1,
+                'memory_mb': 8192, 'local_gb': 10, 'reservable': True,
+                'availability_zone': 'az1', 'trust_id': 'trust'})
+            db_api.host_extra_capability_create({
+                'computehost_id': host['id'], 'property_name': 'gpu',
+                'capability_value': str(i)})
+            hosts.append(host)
+
+        # Every other host is allocated before the time frame.
+        for host in hosts[::2]:
+            lease = db_api.lease_create({
+                'id': 'lease-%s' % host['id'], 'name': host['id'],
+                'user_id': 'user', 'project_id': 'project',
+                'start_date': self.start_date - datetime.timedelta(days=2),
+                'end_date': self.start_date - datetime.timedelta(days=1),
+                'trust_id': 'trust', 'status': 'TERMINATED',
+                'reservations': [{
+                    'id': 'reservation-%s' % host['id'],
+                    'resource_id': 'resource', 'status': 'deleted',
+                    'resource_type': plugin.RESOURCE_TYPE}],
+                'events': []})
+            db_api.host_allocation_create({
+                'compute_host_id': host['id'],
+                'reservation_id': lease['reservations'][0]['id']})
+        return hosts
+
+    def test_list_computehosts_queries(self):
+        self._create_hosts(4)
+
+        with self.assertMaxQueries(5):
+            hosts = self.plugin.list_computehosts()
+
+        self.assertEqual(['0', '1', '2', '3'], [h['id'] for h in hosts])
+        self.assertEqual(['0', '1', '2', '3'], [h['gpu'] for h in hosts])
+
+    def test_list_computehosts_fields_queries(self):
+        self._create_hosts(4)
+
+        with self.assertMaxQueries(5):
+            hosts = self.plugin.list_computehosts(fields=['id', 'gpu'])
+
+        self.assertEqual([{'id': str(i), 'gpu': str(i)} for i in range(4)],
+                         hosts)
+
+    def test_matching_hosts_queries(self):
+        hosts = self._create_hosts(4)
+
+        # NOTE: The allocations of each host are looked up separately, and
+        # so are the leases of each allocated host, in their own sessions.
+        with self.assertMaxQueries(2 + 2 * len(hosts) + 2 * 2):
+            host_ids = self.plugin._matching_hosts(
+                '', '', '1-4', self.start_date, self.end_date)
+
+        self.assertEqual(['1', '3'], sorted(host_ids))
@@ -0,0 +1,175 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+from unittest import mock
+
+import fixtures
+from oslo_config import cfg
+from oslo_utils import timeutils
+import prometheus_client
+
+from blazar.db import api as db_api
+from blazar import metrics
+from blazar.notification import notifier
+from blazar import tests
+
+
+class DBCollectorTestCase(tests.DBTestCase):
+    def setUp(self):
+        super(DBCollectorTestCase, self).setUp()
+
+        self.registry = prometheus_client.CollectorRegistry()
+        self.registry.register(metrics.DBCollector())
+
+    def _value(self, name, **labels):
+        return self.registry.get_sample_value(name, labels)
+
+    def test_collect(self):
+        now = datetime.datetime(2030, 1, 1, 12, 0)
+        self.useFixture(fixtures.MockPatchObject(
+            timeutils, 'utcnow', return_value=now))
+        db_api.lease_create({'id': 'lease1', 'name': 'lease1',
+                             'user_id': 'user', 'project_id': 'project',
+                             'start_date': now, 'end_date': now,
+                             'trust_id': 'trust', 'status': 'ACTIVE',
+                             'reservations': [], 'events': []})
+        for event_id, event_type, minutes, status in [
+                ('1', 'end_lease', 10, 'UNDONE'),
+                ('2', 'end_lease', 1, 'UNDONE'),
+                ('3', 'start_lease', 5, 'DONE'),
+                ('4', 'start_lease', -5, 'UNDONE')]:
+            db_api.event_create({
+                'id': event_id, 'lease_id': 'lease1',
+                'event_type': event_type,
+                'time': now - datetime.timedelta(minutes=minutes),
+                'status': status})
+
+        self.assertEqual(2, self._value('blazar_event_backlog',
+                                        event_type='end_lease'))
+        self.assertEqual(600, self._value('blazar_event_lag_seconds',
+                                          event_type='end_lease'))
+        self.assertIsNone(self._value('blazar_event_backlog',
+                                      event_type='start_lease'))
+        self.assertEqual(1, self._value('blazar_leases', status='ACTIVE',
+                                        degraded='False'))
+
+
+class NotificationCollectorTestCase(tests.TestCase):
+    def setUp(self):
+        super(NotificationCollectorTestCase, self).setUp()
+
+        self.registry = prometheus_client.CollectorRegistry()
+        self.registry.register(metrics.NotificationCollector())
+        self.addCleanup(setattr, notifier, 'QUEUE', notifier.QUEUE)
+
+    def test_collect(self):
+        notifier.QUEUE = mock.Mock()
+        notifier.QUEUE.stats.return_value = {
+            'queued': 5, 'published': 2, 'dropped': 1, 'failed': 1,
+            'depth': 2}
+
+        self.assertEqual(2, self.registry.get_sample_value(
+            'blazar_notification_queue_depth'))
+        for outcome, value in [('queued', 5), ('published', 2),
+                               ('dropped', 1), ('failed', 1)]:
+            self.assertEqual(value, self.registry.get_sample_value(
+                'blazar_notifications_total', {'outcome': outcome}))
+
+    def test_collect_without_queue(self):
+        notifier.QUEUE = None
+
+        self.assertIsNone(self.registry.get_sample_value(
+            'blazar_notification_queue_depth'))
+
+
+class APIMetricsTestCase(tests.TestCase):
+    def test_api_metrics(self):
+        metrics.API_REQUEST_DURATION.labels('DELETE', '/v1/tests').observe(
+            0.02)
+
+        self.assertIn(b'blazar_api_request_duration_seconds_count'
+                      b'{method="DELETE",route="/v1/tests"} 1.0',
+                      metrics.api_metrics())
+
+
+class StartServerTestCase(tests.TestCase):
+    def setUp(self):
+        super(StartServerTestCase, self).setUp()
+
+        self.start_http_server = self.patch(prometheus_client,
+                                            'start_http_server')
+        self.register = self.patch(metrics.REGISTRY, 'register')
+        self.addCleanup(setattr, metrics, '_db_collector',
+                        metrics._db_collector)
+        self.addCleanup(setattr, metrics, '_notification_collector',
+                        metrics._notification_collector)
+        metrics._db_collector = None
+        metrics._notification_collector = None
+
+    def test_disabled(self):
+        metrics.start_server()
+
+        self.start_http_server.assert_not_called()
+        self.register.assert_not_called()
+
+    def test_enabled(self):
+        cfg.CONF.set_override('enabled', True, group='metrics')
+        cfg.CONF.set_override('port', 9999, group='metrics')
+        self.addCleanup(cfg.CONF.clear_override, 'enabled', group='metrics')
+        self.addCleanup(cfg.CONF.clear_override, 'port', group='metrics')
+
+        metrics.start_server()
+
+        self.register.assert_has_calls([
+            mock.call(metrics._db_collector),
+            mock.call(metrics._notification_collector)])
+        self.start_http_server.assert_called_once_with(
+            9999, addr='127.0.0.1', registry=metrics.REGISTRY)
+
+
+class ObserveOpenStackRequestTestCase(tests.TestCase):
+    def _response(self, path_url, status_code=200):
+        response = mock.Mock(status_code=status_code,
+                             elapsed=datetime.timedelta(seconds=0.2))
+        response.request.path_url = path_url
+        response.request.method = 'GET'
+        return response
+
+    def _value(self, name, **labels):
+        return metrics.REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_observe(self):
+        labels = {'service': 'compute', 'method': 'GET'}
+        count = self._value('blazar_openstack_requests_total', code='404',
+                            **labels)
+        duration = self._value(
+            'blazar_openstack_request_duration_seconds_sum', **labels)
+
+        metrics.observe_openstack_request(
+            'compute', self._response('/v2.1/servers/1', 404))
+
+        self.assertEqual(count + 1, self._value(
+            'blazar_openstack_requests_total', code='404', **labels))
+        self.assertAlmostEqual(duration + 0.2, self._value(
+            'blazar_openstack_request_duration_seconds_sum', **labels))
+
+    def test_observe_token_request(self):
+        labels = {'service': 'identity', 'method': 'GET', 'code': '200'}
+        count = self._value('blazar_openstack_requests_total', **labels)
+
+        metrics.observe_openstack_request(
+            'compute', self._response('/v3/auth/tokens'))
+
+        self.assertEqual(count + 1, self._value(
+            'blazar_openstack_requests_total', **labels))
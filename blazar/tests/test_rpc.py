@@ -0,0 +1,129 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import datetime
+
+from oslo_serialization import jsonutils
+
+from blazar import rpc
+from blazar import tests
+
+
+def _fake_lease(events=100):
+    start = datetime.datetime(2030, 1, 1, 0, 0)
+    return {
+        'id': 'lease-id',
+        'name': 'lease',
+        'start_date': start,
+        'end_date': start + datetime.timedelta(days=1),
+        'degraded': False,
+        'events': [{'id': 'event-%d' % i,
+                    'event_type': 'before_end_lease',
+                    'time': start + datetime.timedelta(minutes=i),
+                    'status': 'UNDONE'} for i in range(events)],
+    }
+
+
+def _as_json(entity):
+    return jsonutils.loads(jsonutils.dumps(entity))
+
+
+class PackTestCase(tests.TestCase):
+    def test_round_trip(self):
+        lease = _fake_lease()
+
+        packed = rpc.pack(lease)
+
+        self.assertTrue(rpc.is_packed(packed))
+        self.assertEqual(_as_json(lease), rpc.unpack(_as_json(packed)))
+
+    def test_datetimes(self):
+        values = [datetime.datetime(2030, 1, 2, 3, 4, 5, 6),
+                  datetime.datetime(1960, 1, 1),
+                  datetime.datetime(2030, 1, 1,
+                                    tzinfo=datetime.timezone.utc)]
+
+        self.assertEqual(_as_json(values), rpc.unpack(rpc.pack(values)))
+
+    def test_map_keys(self):
+        values = {1: 'a', 1.5: 'b', False: 'c', None: 'd', 'e': {2: 'f'}}
+
+        self.assertEqual(_as_json(values), rpc.unpack(rpc.pack(values)))
+
+    def test_smaller_than_json(self):
+        lease = _fake_lease()
+
+        self.assertLess(len(jsonutils.dumps(rpc.pack(lease))),
+                        len(jsonutils.dumps(lease)) // 4)
+
+    def test_is_packed(self):
+        self.assertFalse(rpc.is_packed({'id': 'lease-id'}))
+        self.assertFalse(rpc.is_packed({rpc.PACKED_KEY: 2, 'data': ''}))
+        self.assertFalse(rpc.is_packed([]))
+
+
+class RPCSerializerTestCase(tests.TestCase):
+    def setUp(self):
+        super(RPCSerializerTestCase, self).setUp()
+
+        self.server = rpc.RPCSerializer(packing_threshold=1024)
+        self.client = rpc.RPCSerializer()
+        self.ctxt = self.client.serialize_context({'user_id': 'user'})
+
+    def _call(self, result, ctxt=None):
+        if ctxt is None:
+            ctxt = self.ctxt
+        sent = _as_json(self.server.serialize_entity(ctxt, result))
+        return sent, self.client.deserialize_entity(ctxt, sent)
+
+    def test_serialize_context(self):
+        self.assertEqual({'user_id': 'user',
+                          rpc.PACKING_CONTEXT_KEY: rpc.PACKING_VERSION},
+                         self.ctxt)
+
+    def test_large_result(self):
+        lease = _fake_lease()
+
+        sent, received = self._call(lease)
+
+        self.assertTrue(rpc.is_packed(sent))
+        self.assertEqual(_as_json(lease), received)
+
+    def test_small_result(self):
+        lease = _fake_lease(events=1)
+
+        sent, received = self._call(lease)
+
+        self.assertEqual(_as_json(lease), sent)
+        self.assertEqual(_as_json(lease), received)
+
+    def test_caller_without_packing(self):
+        lease = _fake_lease()
+
+        sent, received = self._call(lease, ctxt={'user_id': 'user'})
+
+        self.assertEqual(_as_json(lease), sent)
+
+    def test_packing_disabled(self):
+        self.server.packing_threshold = 0
+        lease = _fake_lease()
+
+        sent, received = self._call(lease)
+
+        self.assertEqual(_as_json(lease), sent)
+
+    def test_not_a_collection(self):
+        self.server.packing_threshold = 1
+
+        sent, received = self._call('x' * 100)
+
+        self.assertEqual('x' * 100, received)
@@ -11,6 +11,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from unittest import mock
 from unittest.mock import call
 
 from blazar.db import api as db_api
@@ -63,6 +64,7 @@ class LeaseStatusTestCase(tests.TestCase):
         self.status = status
         self.db_api = db_api
         self.lease_id = 'lease-id'
+        self.patch(self.db_api, 'transaction')
 
     def test_is_valid_transition_true(self):
         self.patch(self.status.LeaseStatus, 'is_valid_combination'
@@ -303,6 +305,20 @@ class LeaseStatusTestCase(tests.TestCase):
             [call(self.lease_id, {'status': status.LeaseStatus.STARTING}),
              call(self.lease_id, {'status': status.LeaseStatus.ERROR})])
 
+    def test_lease_status_unknown_lease(self):
+        self.patch(self.db_api, 'lease_get').return_value = None
+        lease_update = self.patch(self.db_api, 'lease_update')
+        func = mock.Mock()
+
+        decorated = self.status.LeaseStatus.lease_status(
+            transition=status.LeaseStatus.UPDATING,
+            result_in=(status.LeaseStatus.PENDING,))(func)
+
+        self.assertRaises(exceptions.NotFound, decorated,
+                          lease_id=self.lease_id)
+        func.assert_not_called()
+        lease_update.assert_not_called()
+
     def test_lease_status_lease_deleted(self):
         lease = {
             'status': status.LeaseStatus.PENDING
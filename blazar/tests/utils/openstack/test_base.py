@@ -13,7 +13,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from unittest import mock
+
+from keystoneauth1 import session
+
 from blazar.manager import exceptions
+from blazar import metrics
 from blazar import tests
 from blazar.utils.openstack import base
 
@@ -107,3 +112,14 @@ class TestBaseStackUtils(tests.TestCase):
         self.assertRaises(exceptions.EndpointsNotFound, self.base.url_for,
                           service_catalog, self.service_type,
                           os_region_name='RegionTwo')
+
+    def test_instrument_session(self):
+        sess = session.Session()
+        observe = self.patch(metrics, 'observe_openstack_request')
+
+        self.assertIs(sess, self.base.instrument_session(sess, 'compute'))
+        response = mock.Mock()
+        for hook in sess.session.hooks['response']:
+            hook(response)
+
+        observe.assert_called_once_with('compute', response)
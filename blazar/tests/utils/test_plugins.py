@@ -13,6 +13,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import datetime
+from unittest import mock
+
+from oslo_config import cfg
+from oslo_utils import timeutils
 
 from blazar.manager import exceptions as manager_exceptions
 from blazar import tests
@@ -99,3 +104,30 @@ class TestPluginsUtils(tests.TestCase):
         to_add = [1, 2, 2, 2, 3, 4, 7, 8, 8]
 
         self.assertEqual((to_remove, to_add), result)
+
+    def test_provisioning_date_disabled(self):
+        start_date = timeutils.utcnow() + datetime.timedelta(days=1)
+
+        self.assertIsNone(plugins_utils.provisioning_date(start_date))
+
+    def test_provisioning_date(self):
+        cfg.CONF.set_override('provisioning_time', 60)
+        self.addCleanup(cfg.CONF.clear_override, 'provisioning_time')
+        start_date = datetime.datetime(2030, 1, 1, 12, 0)
+
+        with mock.patch.object(timeutils, 'utcnow') as patched:
+            patched.return_value = datetime.datetime(2030, 1, 1, 10, 0)
+            result = plugins_utils.provisioning_date(start_date)
+
+        self.assertEqual(datetime.datetime(2030, 1, 1, 11, 0), result)
+
+    def test_provisioning_date_within_provisioning_time(self):
+        cfg.CONF.set_override('provisioning_time', 60)
+        self.addCleanup(cfg.CONF.clear_override, 'provisioning_time')
+        start_date = datetime.datetime(2030, 1, 1, 12, 0)
+
+        with mock.patch.object(timeutils, 'utcnow') as patched:
+            patched.return_value = datetime.datetime(2030, 1, 1, 11, 30)
+            result = plugins_utils.provisioning_date(start_date)
+
+        self.assertIsNone(result)
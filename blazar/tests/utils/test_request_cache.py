@@ -0,0 +1,48 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest import mock
+
+from blazar import tests
+from blazar.utils import request_cache
+
+
+class RequestCacheTestCase(tests.TestCase):
+
+    def test_no_scope(self):
+        func = mock.Mock(side_effect=[1, 2])
+        request_cache.set('key', 'value')
+
+        self.assertIsNone(request_cache.pop('key'))
+        self.assertEqual(1, request_cache.get_or_set('key', func))
+        self.assertEqual(2, request_cache.get_or_set('key', func))
+
+    def test_scope(self):
+        func = mock.Mock(side_effect=[1, 2])
+
+        with request_cache.scope():
+            self.assertEqual(1, request_cache.get_or_set('key', func))
+            self.assertEqual(1, request_cache.get_or_set('key', func))
+            request_cache.set('other', 'value')
+            self.assertEqual('value', request_cache.pop('other'))
+            self.assertIsNone(request_cache.pop('other'))
+
+        self.assertEqual(2, request_cache.get_or_set('key', func))
+
+    def test_nested_scope(self):
+        with request_cache.scope():
+            request_cache.set('key', 'value')
+            with request_cache.scope():
+                self.assertEqual('value', request_cache.pop('key'))
+                request_cache.set('key', 'nested')
+            self.assertEqual('nested', request_cache.pop('key'))
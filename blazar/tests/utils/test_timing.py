@@ -0,0 +1,114 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest import mock
+
+from oslo_config import cfg
+
+from blazar import metrics
+from blazar import tests
+from blazar.utils import timing
+
+
+class TimingTestCase(tests.TestCase):
+
+    def setUp(self):
+        super(TimingTestCase, self).setUp()
+        self.monotonic = self.patch(timing.time, 'monotonic')
+        self.monotonic.return_value = 100.0
+        self.log = self.patch(timing, 'LOG')
+
+    def _value(self, name, method, route):
+        return metrics.API_REGISTRY.get_sample_value(
+            name, {'method': method, 'route': route}) or 0
+
+    def test_end_request(self):
+        count = self._value('blazar_api_request_duration_seconds_count',
+                            'GET', '/v1/leases')
+        duration = self._value('blazar_api_request_duration_seconds_sum',
+                               'GET', '/v1/leases')
+        timer = timing.start_request()
+        self.monotonic.return_value = 100.5
+
+        latency = timing.end_request(timer, 'GET', '/v1/leases',
+                                     '/v1/leases', '200', 42)
+
+        self.assertEqual(0.5, latency)
+        self.assertEqual(count + 1, self._value(
+            'blazar_api_request_duration_seconds_count', 'GET',
+            '/v1/leases'))
+        self.assertAlmostEqual(duration + 0.5, self._value(
+            'blazar_api_request_duration_seconds_sum', 'GET', '/v1/leases'))
+        self.log.warning.assert_not_called()
+
+    def test_end_request_unmatched(self):
+        count = self._value('blazar_api_request_duration_seconds_count',
+                            'GET', timing.UNMATCHED_ROUTE)
+        timer = timing.start_request()
+
+        timing.end_request(timer, 'GET', None, '/unknown', '404', 0)
+
+        self.assertEqual(count + 1, self._value(
+            'blazar_api_request_duration_seconds_count', 'GET',
+            timing.UNMATCHED_ROUTE))
+
+    def test_slow_request(self):
+        cfg.CONF.set_override('slow_request_threshold', 1.0)
+        timer = timing.start_request()
+        with timing.rpc():
+            self.monotonic.return_value = 101.5
+        self.monotonic.return_value = 102.0
+
+        timing.end_request(timer, 'GET', '/v1/leases', '/v1/leases',
+                           '200', 42, request_id='req-1')
+
+        self.log.warning.assert_called_once_with(mock.ANY, {
+            'method': 'GET', 'route': '/v1/leases', 'uri': '/v1/leases',
+            'status': '200', 'time': 2.0, 'rpc_time': 1.5, 'bytes': 42,
+            'request_id': 'req-1'})
+
+    def test_slow_request_disabled(self):
+        cfg.CONF.set_override('slow_request_threshold', 0)
+        timer = timing.start_request()
+        self.monotonic.return_value = 200.0
+
+        timing.end_request(timer, 'GET', '/v1/leases', '/v1/leases',
+                           '200', 42)
+
+        self.log.warning.assert_not_called()
+
+    def test_waiting_not_counted(self):
+        cfg.CONF.set_override('slow_request_threshold', 1.0)
+        timer = timing.start_request()
+        with timing.waiting():
+            self.monotonic.return_value = 160.0
+        self.monotonic.return_value = 160.2
+
+        latency = timing.end_request(timer, 'GET', '/v1/leases/changes',
+                                     '/v1/leases/changes', '200', 42)
+
+        self.assertAlmostEqual(0.2, latency)
+        self.log.warning.assert_not_called()
+
+    def test_rpc_outside_request(self):
+        with timing.rpc():
+            pass
+
+    def test_rpc_after_request(self):
+        timer = timing.start_request()
+        timing.end_request(timer, 'GET', None, '/', '200', 0)
+
+        with timing.rpc():
+            self.monotonic.return_value = 101.0
+
+        self.assertEqual(0.0, timer.rpc_time)
@@ -13,6 +13,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import functools
+
 from keystoneauth1.access import create as create_access_info
 from keystoneauth1.identity import access
 from keystoneauth1.identity import v3
@@ -23,6 +25,7 @@ from oslo_config import cfg
 
 from blazar import context
 from blazar.manager import exceptions
+from blazar import metrics
 
 
 CONF = cfg.CONF
@@ -39,6 +42,21 @@ def get_os_auth_host(conf):
     return os_auth_host
 
 
+def instrument_session(sess, service):
+    """Record the requests made with a keystoneauth session in the metrics.
+
+    :param service: the type of the service the session is used for, e.g.
+                    compute.
+    """
+    sess.session.hooks['response'].append(
+        functools.partial(_observe_response, service))
+    return sess
+
+
+def _observe_response(service, response, **kwargs):
+    metrics.observe_openstack_request(service, response)
+
+
 def client_kwargs(**_kwargs):
     kwargs = _kwargs.copy()
 
@@ -93,7 +111,7 @@ def client_kwargs(**_kwargs):
     if CONF.cafile:
         sess_kwargs.update(verify=CONF.cafile)
 
-    sess = session.Session(**sess_kwargs)
+    sess = instrument_session(session.Session(**sess_kwargs), 'identity')
 
     kwargs.setdefault('session', sess)
     kwargs.setdefault('region_name', region_name)
@@ -133,7 +151,7 @@ def client_user_kwargs(**_kwargs):
     if CONF.cafile:
         sess_kwargs.update(verify=CONF.cafile)
 
-    sess = session.Session(**sess_kwargs)
+    sess = instrument_session(session.Session(**sess_kwargs), 'identity')
 
     kwargs.setdefault('session', sess)
     kwargs.setdefault('region_name', region_name)
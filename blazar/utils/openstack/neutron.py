@@ -86,7 +86,8 @@ class BlazarNeutronClient(object):
         )
         if CONF.cafile:
             sess_kwargs.update(verify=CONF.cafile)
-        sess = session.Session(**sess_kwargs)
+        sess = base.instrument_session(session.Session(**sess_kwargs),
+                                       'network')
         kwargs.setdefault('session', sess)
         kwargs.setdefault('region_name', region_name)
         kwargs.setdefault('endpoint_type', CONF.neutron.endpoint_type + 'URL')
@@ -164,13 +164,17 @@ class BlazarNovaClient(object):
             )
             if CONF.cafile:
                 sess_kwargs.update(verify=CONF.cafile)
-            sess = session.Session(**sess_kwargs)
+            sess = base.instrument_session(session.Session(**sess_kwargs),
+                                           'compute')
             kwargs.setdefault('session', sess)
 
         kwargs.setdefault('endpoint_type', CONF.nova.endpoint_type + 'URL')
         kwargs.setdefault('endpoint_override', endpoint_override)
         kwargs.setdefault('version', version)
         self.nova = nova_client.Client(**kwargs)
+        if 'session' not in kwargs:
+            # NOTE: The client created its own session.
+            base.instrument_session(self.nova.client.session, 'compute')
 
         self.nova.servers = ServerManager(self.nova)
 
@@ -88,7 +88,8 @@ class BlazarPlacementClient(object):
         )
         if CONF.cafile:
             sess_kwargs.update(verify=CONF.cafile)
-        sess = session.Session(**sess_kwargs)
+        sess = base.instrument_session(session.Session(**sess_kwargs),
+                                       'placement')
         # Set accept header on every request to ensure we notify placement
         # service of our response body media type preferences.
         headers = {'accept': 'application/json'}
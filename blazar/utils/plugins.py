@@ -14,10 +14,16 @@
 # limitations under the License.
 
 import copy
+import datetime
+
+from oslo_config import cfg
 from oslo_serialization import jsonutils
+from oslo_utils import timeutils
 
 from blazar.manager import exceptions as manager_ex
 
+CONF = cfg.CONF
+
 
 def convert_requirements(requirements):
     """Convert the requirements to an array of strings
@@ -100,3 +106,20 @@ def list_difference(list1, list2):
     result1 = list_subtract(list1, list2)
     result2 = list_subtract(list2, list1)
     return result1, result2
+
+
+def provisioning_date(start_date):
+    """Return when to create the remote resources of a lease.
+
+    :param start_date: start date of the lease.
+    :return: the date at which the Nova and Placement resources of the
+             reservations must be created, or None if they must be created
+             with the lease.
+    """
+    if not CONF.provisioning_time:
+        return None
+
+    date = start_date - datetime.timedelta(minutes=CONF.provisioning_time)
+    if date <= timeutils.utcnow():
+        return None
+    return date
@@ -0,0 +1,67 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Cache living for the duration of a single request.
+
+The cache is local to the (green) thread handling the request and is only
+active within a scope() block. Outside of it, nothing is cached.
+"""
+
+import contextlib
+import threading
+
+_local = threading.local()
+
+
+def _cache():
+    return getattr(_local, 'cache', None)
+
+
+@contextlib.contextmanager
+def scope():
+    """Enable the cache until the end of the block.
+
+    Nested scopes share the cache of the outermost one.
+    """
+    if _cache() is not None:
+        yield
+        return
+
+    _local.cache = {}
+    try:
+        yield
+    finally:
+        _local.cache = None
+
+
+def set(key, value):
+    cache = _cache()
+    if cache is not None:
+        cache[key] = value
+
+
+def pop(key, default=None):
+    cache = _cache()
+    if cache is None:
+        return default
+    return cache.pop(key, default)
+
+
+def get_or_set(key, func):
+    """Return the cached value of key, calling func to compute it if needed."""
+    cache = _cache()
+    if cache is None:
+        return func()
+    if key not in cache:
+        cache[key] = func()
+    return cache[key]
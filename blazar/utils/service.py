@@ -19,10 +19,13 @@ import functools
 
 from oslo_config import cfg
 from oslo_log import log as logging
+from oslo_serialization import jsonutils
 from oslo_service import service
 
 from blazar import context
+from blazar.db import api as db_api
 from blazar import rpc
+from blazar.utils import timing
 
 LOG = logging.getLogger(__name__)
 
@@ -35,11 +38,18 @@ class RPCClient(object):
 
     def cast(self, name, **kwargs):
         ctx = context.current()
-        self._client.cast(ctx.to_dict(), name, **kwargs)
+        with timing.rpc():
+            self._client.cast(ctx.to_dict(), name, **kwargs)
 
     def call(self, name, **kwargs):
         ctx = context.current()
-        return self._client.call(ctx.to_dict(), name, **kwargs)
+        with timing.rpc():
+            return self._client.call(ctx.to_dict(), name, **kwargs)
+
+
+def rpc_primitive(value):
+    """Return value as a caller would receive it from an RPC call."""
+    return jsonutils.loads(jsonutils.dumps(value))
 
 
 class RPCServer(service.Service):
@@ -75,7 +85,8 @@ class ContextEndpointHandler(object):
 
             def run_method(__ctx, **kwargs):
                 with context.BlazarContext.from_dict(__ctx):
-                    return method(**kwargs)
+                    with db_api.track_queries('RPC method %s' % name):
+                        return method(**kwargs)
 
             return run_method
         except AttributeError:
@@ -0,0 +1,114 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Timing of API requests.
+
+A request timer measures the wall time of a request, the time spent in it
+waiting on RPC calls, and the time it deliberately waited for, e.g. for new
+lease changes. The timer is local to the (green) thread handling the
+request. The latencies of requests, excluding deliberate waits, are observed
+by a histogram per method and route, and requests slower than a threshold
+are logged.
+"""
+
+import contextlib
+import threading
+import time
+
+from oslo_config import cfg
+from oslo_log import log as logging
+
+from blazar import metrics
+
+CONF = cfg.CONF
+CONF.import_opt('slow_request_threshold', 'blazar.config')
+LOG = logging.getLogger(__name__)
+
+# WSGI environ key of the route of a request, set by the API applications.
+ROUTE_KEY = 'blazar.route'
+
+# Route of the requests which did not match any route, so that the number of
+# histograms does not depend on the URLs requested.
+UNMATCHED_ROUTE = '<unmatched>'
+
+_local = threading.local()
+
+
+class RequestTimer(object):
+    def __init__(self):
+        self.start = time.monotonic()
+        self.rpc_time = 0.0
+        self.wait_time = 0.0
+
+    def elapsed(self):
+        return time.monotonic() - self.start
+
+
+def start_request():
+    """Start timing the request handled by the current thread."""
+    timer = _local.timer = RequestTimer()
+    return timer
+
+
+def end_request(timer, method, route, uri, status, size, request_id=None):
+    """Stop timing a request, and record its latency.
+
+    :param route: the route of the request, e.g. "/v1/leases", or None if
+                  it did not match any.
+    :param status: the HTTP status code of the response.
+    :param size: the size of the response body in bytes.
+    :return: the latency of the request in seconds, excluding the time it
+             deliberately waited for.
+    """
+    if getattr(_local, 'timer', None) is timer:
+        _local.timer = None
+    latency = timer.elapsed() - timer.wait_time
+    metrics.API_REQUEST_DURATION.labels(
+        method, route or UNMATCHED_ROUTE).observe(latency)
+
+    threshold = CONF.slow_request_threshold
+    if threshold and latency >= threshold:
+        LOG.warning('Slow request: method=%(method)s route="%(route)s" '
+                    'uri="%(uri)s" status=%(status)s time=%(time).3f '
+                    'rpc_time=%(rpc_time).3f bytes=%(bytes)s '
+                    'request_id=%(request_id)s',
+                    {'method': method, 'route': route or UNMATCHED_ROUTE,
+                     'uri': uri, 'status': status, 'time': latency,
+                     'rpc_time': timer.rpc_time, 'bytes': size,
+                     'request_id': request_id or '-'})
+    return latency
+
+
+@contextlib.contextmanager
+def _measure(attr):
+    timer = getattr(_local, 'timer', None)
+    if timer is None:
+        yield
+        return
+
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        setattr(timer, attr,
+                getattr(timer, attr) + time.monotonic() - start)
+
+
+def rpc():
+    """Count the duration of the block as time waiting on RPC."""
+    return _measure('rpc_time')
+
+
+def waiting():
+    """Count the duration of the block as time deliberately waited for."""
+    return _measure('wait_time')
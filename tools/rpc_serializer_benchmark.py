@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Compare the cost of sending lease results as JSON or packed over RPC.
+
+Run from the top of the source tree:
+
+    python tools/rpc_serializer_benchmark.py --reservations 50 --events 20
+
+For fake leases of various sizes, this prints the size of the result as
+encoded by the transport, and the time taken to encode it on the manager
+side and to decode it on the API side, with and without packing.
+"""
+
+import argparse
+import datetime
+import timeit
+
+from oslo_serialization import jsonutils
+
+from blazar import rpc
+
+
+def fake_lease(reservations, events, hosts):
+    start = datetime.datetime(2030, 1, 1, 0, 0)
+    end = start + datetime.timedelta(days=7)
+    return {
+        'id': 'lease-id',
+        'name': 'lease',
+        'user_id': 'user-id',
+        'project_id': 'project-id',
+        'start_date': start,
+        'end_date': end,
+        'trust_id': 'trust-id',
+        'status': 'ACTIVE',
+        'degraded': False,
+        'created_at': start,
+        'updated_at': None,
+        'reservations': [{
+            'id': 'reservation-%d' % i,
+            'lease_id': 'lease-id',
+            'resource_id': 'resource-%d' % i,
+            'resource_type': 'physical:host',
+            'status': 'active',
+            'min': hosts,
+            'max': hosts,
+            'hypervisor_properties': '[">=", "$vcpus", "4"]',
+            'resource_properties': '["==", "$gpu", "true"]',
+            'before_end': 'default',
+            'on_start': 'default',
+            'on_end': 'default',
+            'created_at': start,
+            'updated_at': start,
+            'computehost_allocations': [{
+                'id': 'allocation-%d-%d' % (i, j),
+                'compute_host_id': 'host-%d' % j,
+                'reservation_id': 'reservation-%d' % i,
+                'created_at': start,
+                'updated_at': None,
+            } for j in range(hosts)],
+        } for i in range(reservations)],
+        'events': [{
+            'id': 'event-%d' % i,
+            'lease_id': 'lease-id',
+            'event_type': 'before_end_lease',
+            'time': start + datetime.timedelta(hours=i),
+            'status': 'UNDONE',
+            'created_at': start,
+            'updated_at': None,
+        } for i in range(events)],
+    }
+
+
+def measure(serializer, ctxt, lease, number):
+    def encode():
+        return jsonutils.dumps(serializer.serialize_entity(ctxt, lease))
+
+    wire = encode()
+
+    def decode():
+        return serializer.deserialize_entity(ctxt, jsonutils.loads(wire))
+
+    encode_time = min(timeit.repeat(encode, number=number, repeat=3))
+    decode_time = min(timeit.repeat(decode, number=number, repeat=3))
+    return (len(wire), encode_time / number * 1e6,
+            decode_time / number * 1e6)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reservations', type=int, nargs='+',
+                        default=[1, 10, 100])
+    parser.add_argument('--events', type=int, default=3)
+    parser.add_argument('--hosts', type=int, default=10,
+                        help='Number of hosts allocated per reservation.')
+    parser.add_argument('--number', type=int, default=100,
+                        help='Number of runs per measure.')
+    args = parser.parse_args()
+
+    json_serializer = rpc.RPCSerializer()
+    packing_serializer = rpc.RPCSerializer(packing_threshold=1)
+    ctxt = packing_serializer.serialize_context({})
+
+    print('%12s %-6s %12s %12s %12s' % (
+        'reservations', 'format', 'bytes', 'encode (us)', 'decode (us)'))
+    for reservations in args.reservations:
+        lease = fake_lease(reservations, args.events, args.hosts)
+        for name, serializer in (('json', json_serializer),
+                                 ('packed', packing_serializer)):
+            size, encode_time, decode_time = measure(
+                serializer, ctxt, lease, args.number)
+            print('%12d %-6s %12d %12.1f %12.1f' % (
+                reservations, name, size, encode_time, decode_time))
+
+
+if __name__ == '__main__':
+    main()